@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf8 -*-
+
+# Copyright 2026 Martin Bukatovič <mbukatov@redhat.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of zone configuration and ``MachineConfig`` generation with
+growing number of node addresses, reporting wall time (best of given number
+of repeats) and peak memory (via tracemalloc) of each case.
+
+Run it with ocpnetsplit installed (eg. via ``pip install -e .``)::
+
+    $ python benchmarks/bench_generation.py
+    $ python benchmarks/bench_generation.py --sizes 10 100 --repeat 3
+"""
+
+
+import argparse
+import ipaddress
+import time
+import tracemalloc
+
+from ocpnetsplit import main
+from ocpnetsplit import serialize
+from ocpnetsplit import zone
+
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+
+def get_addrs(size):
+    """
+    Get given number of distinct ip addresses.
+    """
+    first = ipaddress.IPv4Address("10.0.0.1")
+    return [str(first + i) for i in range(size)]
+
+
+def get_zone_config(addrs):
+    """
+    Create zone configuration with a single arbiter node and the rest of the
+    addresses evenly spread into data zones.
+    """
+    zone_config = zone.ZoneConfig()
+    zone_config.add_node("a", addrs[0])
+    for i, addr in enumerate(addrs[1:]):
+        zone_config.add_node("bc"[i % 2], addr)
+    return zone_config
+
+
+def measure(func, repeat):
+    """
+    Run given function repeatedly.
+
+    Returns:
+        tuple: best wall time in seconds and peak memory in bytes
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def get_cases(size):
+    """
+    Get list of benchmark cases for given number of addresses, as tuples of
+    case name and function.
+    """
+    addrs = get_addrs(size)
+    zone_config = get_zone_config(addrs)
+    zone_env = zone_config.get_env_file()
+    latency_spec = zone.ZoneLatSpec(ab=10, bc=20)
+    return [
+        ("ZoneConfig.add_nodes", lambda: get_zone_config(addrs)),
+        ("ZoneConfig.get_env_file", lambda: get_zone_config(addrs).get_env_file()),
+        ("ZoneConfig.get_env_file (cached)", zone_config.get_env_file),
+        ("get_networksplit_mc_spec", lambda: main.get_networksplit_mc_spec(
+            zone_env, split=True, latency=5, latency_spec=latency_spec)),
+        ("get_networksplit_mc_spec + yaml", lambda: serialize.dump_objects(main.get_networksplit_mc_spec(
+            zone_env, split=True, latency=5, latency_spec=latency_spec))),
+        ("get_networksplit_mc_spec + json", lambda: serialize.dump_objects(main.get_networksplit_mc_spec(
+            zone_env, split=True, latency=5, latency_spec=latency_spec), "json")),
+    ]
+
+
+def main_bench():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument(
+        "--sizes", nargs="+", type=int, default=DEFAULT_SIZES, metavar="N",
+        help="numbers of node addresses (default: %(default)s)")
+    ap.add_argument(
+        "--repeat", type=int, default=5, help="number of repeats of each case (default: %(default)s)")
+    args = ap.parse_args()
+
+    print(f"{'CASE':<36} {'ADDRS':>6} {'TIME [ms]':>10} {'PEAK [KiB]':>11}")
+    for size in args.sizes:
+        for name, func in get_cases(size):
+            duration, peak = measure(func, args.repeat)
+            print(f"{name:<36} {size:>6} {duration * 1000:>10.2f} {peak / 1024:>11.1f}")
+
+
+if __name__ == "__main__":
+    main_bench()
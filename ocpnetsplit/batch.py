@@ -0,0 +1,167 @@
+# -*- coding: utf8 -*-
+
+# Copyright 2026 Martin Bukatovič <mbukatov@redhat.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Batches of commands executed on a node in a single session.
+
+Each ``oc debug node`` call creates (and deletes) a debug pod, which takes
+a few seconds, so running several commands on a node one by one is slow.
+A batch runs all the commands via single shell script, which prints a marker
+line with return code after output of each command, eg.::
+
+    m=ocpnetsplit-6f1c...
+    { systemctl start network-split-ab-setup@1617978600.timer; } 2>&1; printf '\\n%s %d\\n' "$m" $?
+    { date +%s.%N; } 2>&1; printf '\\n%s %d\\n' "$m" $?
+
+so that output and return code of each command could be parsed from the
+output of the whole session (see :py:func:`parse_batch_output`). Commands
+are executed one after another even when some of them fail. Standard error
+output of the commands is merged into the standard output.
+"""
+
+
+import re
+import shlex
+import subprocess
+import uuid
+
+
+class CommandResult:
+    """
+    Result of a single command of a batch.
+
+    Args:
+        cmd_list (list): the command
+        output (str): combined stdout and stderr of the command
+        returncode (int): return code of the command
+    """
+
+    def __init__(self, cmd_list, output, returncode):
+        self.cmd_list = cmd_list
+        self.output = output
+        self.returncode = returncode
+
+    @property
+    def ok(self):
+        """
+        True if the command succeeded.
+        """
+        return self.returncode == 0
+
+    def check_returncode(self):
+        """
+        Raise ``subprocess.CalledProcessError`` if the command failed.
+        """
+        if not self.ok:
+            raise subprocess.CalledProcessError(
+                self.returncode, self.cmd_list, output=self.output, stderr=self.output)
+
+    def to_dict(self):
+        return {
+            "cmd": self.cmd_list,
+            "output": self.output,
+            "returncode": self.returncode,
+        }
+
+
+MAX_BATCH_SIZE = 64 * 1024
+"""
+Max length of a batch script (see :py:func:`split_batches`). The whole script
+is passed to ``sh -c`` as a single argument (and to the remote shell as a
+part of single command string with ssh), which Linux limits to 128 KiB
+(``MAX_ARG_STRLEN``), so there is some room left for quoting.
+"""
+
+
+def new_marker():
+    """
+    Create unique marker string separating outputs of commands of a batch.
+    """
+    return "ocpnetsplit-" + uuid.uuid4().hex
+
+
+def batch_cmd(cmd_lists, marker):
+    """
+    Create single command running all given commands on a node.
+
+    Args:
+        cmd_lists (list): list of commands, eg.
+            ``[["uname", "-a"], ["date"]]``
+        marker (str): marker created by :py:func:`new_marker`
+
+    Returns:
+        list: command to run on a node, output of which could be parsed via
+        :py:func:`parse_batch_output`
+    """
+    lines = [f"m={shlex.quote(marker)}"]
+    for cmd_list in cmd_lists:
+        lines.append(f"{{ {shlex.join(cmd_list)}; }} 2>&1; printf '\\n%s %d\\n' \"$m\" $?")
+    return ["sh", "-c", "\n".join(lines)]
+
+
+def split_batches(cmd_lists, max_size=MAX_BATCH_SIZE):
+    """
+    Split given commands into batches, so that script of each batch created
+    by :py:func:`batch_cmd` is not longer than ``max_size`` (unless a single
+    command is longer than that on it's own).
+
+    Args:
+        cmd_lists (list): list of commands
+        max_size (int): max length of a batch script
+
+    Returns:
+        list: list of commands of each batch
+    """
+    batches = []
+    size = 0
+    for cmd_list in cmd_lists:
+        # command with the marker line, see batch_cmd()
+        cmd_size = len(shlex.join(cmd_list)) + 64
+        if len(batches) == 0 or size + cmd_size > max_size:
+            batches.append([])
+            # marker definition
+            size = 64
+        batches[-1].append(cmd_list)
+        size += cmd_size
+    return batches
+
+
+def parse_batch_output(output, marker, cmd_lists):
+    """
+    Split output of a batch created by :py:func:`batch_cmd` into results of
+    the commands.
+
+    Args:
+        output (str): stdout of the batch
+        marker (str): marker used to create the batch
+        cmd_lists (list): commands of the batch
+
+    Returns:
+        list: :py:class:`CommandResult` object for each command
+
+    Raises:
+        ValueError: when output of some command is missing
+    """
+    results = []
+    pattern = re.compile(r"\n" + re.escape(marker) + r" (\d+)\n")
+    pos = 0
+    for cmd_list in cmd_lists:
+        match = pattern.search(output, pos)
+        if match is None:
+            raise ValueError(f"output of command {cmd_list} is missing in batch output")
+        results.append(CommandResult(cmd_list, output[pos:match.start()], int(match.group(1))))
+        pos = match.end()
+    return results
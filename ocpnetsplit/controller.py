@@ -0,0 +1,334 @@
+# -*- coding: utf8 -*-
+
+# Copyright 2026 Martin Bukatovič <mbukatov@redhat.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Controller keeping zone configuration on nodes of a cluster up to date when
+nodes join or leave the cluster.
+
+The controller watches cluster nodes via k8s watch API and when zone
+membership changes, it pushes the new zone configuration into
+``/etc/network-split-controller.env`` file on every node (node scripts use it
+instead of zone configuration from ``/etc/network-split.env`` deployed via
+MachineConfig) and updates rules of active network split and latency setup
+only for the addresses which changed.
+"""
+
+
+import logging
+import queue
+import subprocess
+import threading
+import time
+
+from ocpnetsplit import ocp
+from ocpnetsplit import status
+from ocpnetsplit import zone
+
+
+LOGGER = logging.getLogger(name=__file__)
+
+
+ZONE_LABEL = "topology.kubernetes.io/zone"
+
+CONTROLLER_ENV = "/etc/network-split-controller.env"
+"""
+Zone configuration file managed by the controller, it's not part of any
+MachineConfig so that changing it doesn't interfere with MCO.
+"""
+
+
+UPDATE_SCRIPT = """\
+set -e
+cat > {env_path} <<'EOF'
+{env}EOF
+set -a
+. /etc/network-split.env
+set +a
+units=$(systemctl list-units --state=active --plain --no-legend 'network-split@*.service' | cut -d' ' -f1)
+for unit in $units; do
+  split=${{unit#network-split@}}
+  /etc/network-split.sh update "${{split%.service}}" {changes}
+done
+if [ -x /etc/network-latency.sh ]; then
+  /etc/network-latency.sh update {changes}
+fi
+"""
+"""
+Node script applying zone membership changes on a node which zone membership
+didn't change.
+"""
+
+
+RESTART_SCRIPT = """\
+set -e
+units=$(systemctl list-units --state=active --plain --no-legend 'network-split@*.service' | cut -d' ' -f1)
+if [ -n "$units" ]; then
+  systemctl stop $units
+fi
+cat > {env_path} <<'EOF'
+{env}EOF
+if [ -n "$units" ]; then
+  systemctl start $units
+fi
+set -a
+. /etc/network-split.env
+set +a
+if [ -x /etc/network-latency.sh ]; then
+  /etc/network-latency.sh reapply
+fi
+"""
+"""
+Node script used for nodes which joined a zone or moved between zones, it
+restarts active network split units, because their rules depend on zone of
+the node itself, and sets up active latency once again. Latency is reapplied
+directly instead of restarting ``network-latency.service`` (which waits 2
+minutes before the setup), and this way it covers latency set up by transient
+units of a scenario as well (including a running latency profile).
+"""
+
+
+PUSH_TIMEOUT = 120
+"""
+Timeout of a single attempt to push zone configuration to a node in seconds.
+"""
+
+STALE_BASE_DELAY = 30
+"""
+Delay before the first retry of a node which failed to receive an update in
+seconds, the delay doubles with each failed attempt.
+"""
+
+STALE_MAX_DELAY = 900
+"""
+Max delay between attempts to update a stale node in seconds.
+"""
+
+
+class ZoneController:
+    """
+    Track zone membership of cluster nodes and push zone configuration
+    changes to the nodes.
+
+    The first :py:meth:`sync` after start only records the zone configuration
+    as the baseline, assuming that it matches the configuration deployed via
+    MachineConfig, unless the baseline is specified explicitly.
+
+    Args:
+        zone_labels (dict): ``topology.kubernetes.io/zone`` label of each
+            ocp-network-split zone, eg. ``{"a": "arbiter", "b": "data-1"}``
+        zone_x_addrs (list): list of ip addresses in external zone ``x``
+        kubeconfig (str): file path to kubeconfig
+        dry_run (bool): when true, changes are only logged
+        baseline (ZoneConfig): zone config currently deployed on the nodes
+        run_all (callable): function running a command on given nodes
+            concurrently, called with the command, list of nodes and
+            ``zone_config`` of the nodes (see
+            :py:func:`ocpnetsplit.main.run_node_cmd_all`), required unless
+            ``dry_run`` is enabled
+        clock (callable): function returning monotonic time in seconds, used
+            to schedule next attempt of stale nodes
+    """
+
+    def __init__(
+            self,
+            zone_labels,
+            zone_x_addrs=None,
+            kubeconfig=None,
+            dry_run=False,
+            baseline=None,
+            run_all=None,
+            clock=time.monotonic):
+        self._label_zones = {label: zone_name for zone_name, label in zone_labels.items()}
+        self._zone_x_addrs = zone_x_addrs or []
+        self._kubeconfig = kubeconfig
+        self._dry_run = dry_run
+        # node name -> (zone name, tuple of ip addresses)
+        self._nodes = {}
+        # zone config successfully pushed to the nodes (the baseline)
+        self._applied = baseline
+        self._run_all = run_all
+        self._clock = clock
+        # nodes which failed to receive the last update:
+        # node name -> (number of failed attempts, time of next attempt)
+        self._stale = {}
+
+    def handle_event(self, event_type, node_dict):
+        """
+        Process a node watch event.
+
+        Returns:
+            bool: true if zone membership of the node changed
+        """
+        name = node_dict["metadata"]["name"]
+        label = node_dict["metadata"].get("labels", {}).get(ZONE_LABEL)
+        zone_name = self._label_zones.get(label)
+        if event_type == "DELETED" or zone_name is None:
+            return self._nodes.pop(name, None) is not None
+        addrs = tuple(sorted(ocp.get_node_dict_ip_addrs(node_dict)))
+        if len(addrs) == 0:
+            return False
+        if self._nodes.get(name) == (zone_name, addrs):
+            return False
+        LOGGER.info("node %s is in zone %s with addresses %s", name, zone_name, addrs)
+        self._nodes[name] = (zone_name, addrs)
+        return True
+
+    def resync(self):
+        """
+        Forget nodes which are no longer present in the cluster, eg. because
+        they were deleted while the node watch was not running.
+
+        Returns:
+            bool: true if any node was forgotten
+        """
+        names = {node.split("/", 1)[-1] for node in ocp.list_cluster_nodes(kubeconfig=self._kubeconfig)}
+        changed = False
+        for name in sorted(set(self._nodes) - names):
+            LOGGER.info("node %s is gone", name)
+            del self._nodes[name]
+            changed = True
+        return changed
+
+    def get_zone_config(self):
+        """
+        Get zone config of the nodes seen so far.
+
+        Returns:
+            ZoneConfig: zone config with node ip addresses
+        """
+        zc = zone.ZoneConfig()
+        for zone_name, addrs in self._nodes.values():
+            zc.add_nodes(zone_name, addrs)
+        if len(self._zone_x_addrs) > 0:
+            zc.add_nodes("x", self._zone_x_addrs)
+        return zc
+
+    def _stale_delay(self, attempts):
+        return min(STALE_MAX_DELAY, STALE_BASE_DELAY * 2**attempts)
+
+    def _push(self, script, nodes, node_zones):
+        if self._dry_run:
+            LOGGER.info("dry run, not executing on nodes %s:\n%s", ", ".join(nodes), script)
+            return [(status.NodeStatus(name, node_zones.get_zone(name)), None) for name in nodes]
+        return self._run_all(["sh", "-c", script], nodes, zone_config=node_zones)
+
+    def sync(self):
+        """
+        Push zone configuration changes to all nodes concurrently.
+
+        A node which failed to receive an update is marked as stale, and its
+        units are restarted with the current zone configuration on a later
+        sync, not sooner than after exponentially growing delay (starting
+        with ``STALE_BASE_DELAY`` seconds), so that a node which is down
+        isn't retried on every sync.
+
+        Returns:
+            list: :py:class:`ocpnetsplit.status.NodeStatus` object for each
+            node where changes were pushed
+        """
+        new_config = self.get_zone_config()
+        if self._applied is None:
+            LOGGER.info("zone config baseline:\n%s", new_config.get_env_file())
+            self._applied = new_config
+            return []
+        zc_diff = new_config.diff(self._applied)
+        now = self._clock()
+        stale = {name: value for name, value in self._stale.items() if name in self._nodes}
+        due = {name for name, (_, retry_ts) in stale.items() if retry_ts <= now}
+        if zc_diff.is_empty() and len(due) == 0:
+            self._stale = stale
+            return []
+        LOGGER.info("zone membership changes: %s", zc_diff.get_cli_args())
+        env = new_config.get_env_file()
+        restart_nodes = []
+        update_nodes = []
+        node_zones = zone.ZoneConfig()
+        for name, (zone_name, addrs) in sorted(self._nodes.items()):
+            node_moved = any(self._applied.get_zone(addr) != zone_name for addr in addrs)
+            if zc_diff.is_empty() and name not in due:
+                continue
+            if node_moved or name in stale:
+                restart_nodes.append(name)
+            elif not zc_diff.is_empty():
+                update_nodes.append(name)
+            else:
+                continue
+            node_zones.add_node(zone_name, name)
+        results = []
+        if len(restart_nodes) > 0:
+            script = RESTART_SCRIPT.format(env_path=CONTROLLER_ENV, env=env)
+            results.extend(self._push(script, restart_nodes, node_zones))
+        if len(update_nodes) > 0:
+            script = UPDATE_SCRIPT.format(
+                env_path=CONTROLLER_ENV, env=env, changes=zc_diff.get_cli_args())
+            results.extend(self._push(script, update_nodes, node_zones))
+        now = self._clock()
+        for node_status, _ in results:
+            attempts, _ = stale.pop(node_status.node, (0, None))
+            if node_status.ok:
+                continue
+            delay = self._stale_delay(attempts)
+            LOGGER.warning(
+                "failed to update zone config on node %s, next attempt in %d s: %s",
+                node_status.node, delay, node_status.error)
+            stale[node_status.node] = (attempts + 1, now + delay)
+        self._applied = new_config
+        self._stale = stale
+        return sorted((node_status for node_status, _ in results), key=lambda ns: ns.node)
+
+    def run(self, debounce=5):
+        """
+        Watch cluster nodes and push zone configuration changes to the nodes
+        when no other node change was seen for ``debounce`` seconds (so that
+        changes are batched when multiple nodes join the cluster). This
+        function never returns.
+
+        Args:
+            debounce (int): number of seconds to wait for more node changes
+        """
+        events = queue.Queue()
+
+        def watch():
+            try:
+                for event in ocp.watch_nodes(kubeconfig=self._kubeconfig):
+                    events.put(event)
+            except subprocess.SubprocessError as ex:
+                LOGGER.warning("node watch failed: %s", ex)
+            events.put(None)
+
+        threading.Thread(target=watch, daemon=True).start()
+        changed = False
+        while True:
+            try:
+                event = events.get(timeout=debounce)
+            except queue.Empty:
+                if changed or len(self._stale) > 0:
+                    self.sync()
+                    changed = False
+                continue
+            if event is None:
+                # watch ends after a server side timeout, start it again
+                LOGGER.info("restarting node watch")
+                time.sleep(1)
+                threading.Thread(target=watch, daemon=True).start()
+                # the new watch reports existing nodes only, so nodes deleted
+                # in the meantime would be kept forever
+                try:
+                    changed = self.resync() or changed
+                except subprocess.SubprocessError as ex:
+                    LOGGER.warning("failed to list cluster nodes: %s", ex)
+                continue
+            changed = self.handle_event(*event) or changed
@@ -0,0 +1,280 @@
+# -*- coding: utf8 -*-
+
+# Copyright 2026 Martin Bukatovič <mbukatov@redhat.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measurement of network split convergence, ie. when firewall rules of a split
+actually become active (and inactive again) on every node of the cluster.
+
+Polling nodes via ``oc debug`` or ssh is too slow for sub-second resolution,
+and connection to some nodes could be lost during the split anyway. So a
+sampler is started on every node via a transient timer (see
+:py:func:`sampler_cmd`) shortly before the split starts, which counts
+``DROP`` rules in ``INPUT`` and ``OUTPUT`` chains (or drop verdicts of tc
+filters with ``tc`` datapath) along with netem qdiscs every ``interval``
+seconds and stores the samples in a log file on the node.
+When the split is over, the log files are collected and evaluated.
+
+Expected number of rules on a node is computed on the node itself by running
+``network-split.sh`` in debug mode, so that zone configuration of the node
+(including changes made by ``ocp-network-split-controller``) is taken into
+account.
+"""
+
+
+SAMPLER_SCRIPT = """\
+set -a
+. {etc_dir}/network-split.env
+if [ -z "$NETWORK_SPLIT_DATAPATH" ] && [ -f {etc_dir}/network-split-datapath.env ]; then
+  . {etc_dir}/network-split-datapath.env
+fi
+set +a
+iface=$(ip route show default | cut -d' ' -f5 | head -n1)
+if [ "$NETWORK_SPLIT_DATAPATH" = tc ]; then
+  expected_re='^tc filter add .* action drop$'
+  count_rules() {{
+    (tc filter show dev "$iface" ingress; tc filter show dev "$iface" egress) | grep -c 'action drop'
+  }}
+else
+  expected_re='^iptables.*-j DROP'
+  count_rules() {{
+    (iptables -S INPUT; iptables -S OUTPUT) | grep -c -- '-j DROP'
+  }}
+fi
+{{
+  echo "expected $({etc_dir}/network-split.sh -d setup {split} | grep -c "$expected_re")"
+  while [ "$(date +%s)" -lt {end_ts} ]; do
+    rules=$(count_rules)
+    qdiscs=$(tc qdisc show dev "$iface" | grep -c netem)
+    echo "$(date +%s.%N) $rules $qdiscs"
+    sleep {interval}
+  done
+}} > {log_path}
+"""
+"""
+Shell script sampling number of split rules (``DROP`` iptables rules, or
+drop verdict filters with ``tc`` datapath) and netem qdiscs on a node.
+"""
+
+
+def get_log_path(start_ts):
+    """
+    Get path of sampler log file on a node for a split starting at given
+    unix timestamp.
+    """
+    return f"/run/network-split-watch-{start_ts}.log"
+
+
+def sampler_cmd(split_name, start_ts, stop_ts, interval=0.2, lead=10, etc_dir="/etc"):
+    """
+    Create command starting a transient timer, which runs the sampler from
+    ``lead`` seconds before the split start till ``lead`` seconds after the
+    split stop.
+
+    Args:
+        split_name (str): network split configuration in canonical form
+        start_ts (int): unix timestamp of the split start
+        stop_ts (int): unix timestamp of the split stop
+        interval (float): sampling interval in seconds
+        lead (int): number of seconds to sample before start and after stop
+        etc_dir (str): directory with node scripts and env files
+
+    Returns:
+        list: command to run on a node
+    """
+    script = SAMPLER_SCRIPT.format(
+        split=split_name,
+        end_ts=stop_ts + lead,
+        interval=interval,
+        etc_dir=etc_dir,
+        log_path=get_log_path(start_ts))
+    return [
+        "systemd-run",
+        f"--on-calendar=@{start_ts - lead}",
+        f"--unit=network-split-watch-{start_ts}",
+        "sh", "-c", script,
+    ]
+
+
+def collect_cmd(start_ts):
+    """
+    Create command printing sampler log file of a split starting at given
+    unix timestamp.
+    """
+    return ["cat", get_log_path(start_ts)]
+
+
+def parse_samples(output):
+    """
+    Parse sampler log file.
+
+    Returns:
+        tuple: expected number of split rules (None if not reported) and list
+        of samples, each sample is a tuple of timestamp (float), number of
+        drop rules and number of netem qdiscs
+    """
+    expected = None
+    samples = []
+    for line in output.splitlines():
+        words = line.split()
+        if len(words) == 2 and words[0] == "expected":
+            expected = int(words[1])
+        elif len(words) == 3:
+            samples.append((float(words[0]), int(words[1]), int(words[2])))
+    return expected, samples
+
+
+class NodeConvergence:
+    """
+    Onset and teardown times of a network split on a single node, evaluated
+    from sampler log of the node.
+
+    Args:
+        node (str): name of the node
+        zone (str): zone of the node, None when not known
+        start_ts (int): unix timestamp of the split start
+        stop_ts (int): unix timestamp of the split stop
+    """
+
+    def __init__(self, node, zone=None, start_ts=None, stop_ts=None):
+        self.node = node
+        self.zone = zone
+        self.cluster = None
+        self.start_ts = start_ts
+        self.stop_ts = stop_ts
+        self.expected = None
+        self.samples = []
+        self.error = None
+
+    def load(self, output):
+        """
+        Load samples from given sampler log.
+        """
+        self.expected, self.samples = parse_samples(output)
+        if self.expected is None or len(self.samples) == 0:
+            self.error = "sampler log is incomplete"
+
+    def _get_onset_idx(self):
+        if not self.expected or len(self.samples) == 0:
+            return None
+        # rules which were there before the split are not counted
+        baseline = self.samples[0][1]
+        for idx, (_, rules, _) in enumerate(self.samples):
+            if rules - baseline >= self.expected:
+                return idx
+        return None
+
+    @property
+    def onset_ts(self):
+        """
+        Timestamp of the first sample with all split rules in place, None when
+        the node is not affected by the split or the rules never appeared.
+        """
+        idx = self._get_onset_idx()
+        if idx is None:
+            return None
+        return self.samples[idx][0]
+
+    @property
+    def teardown_ts(self):
+        """
+        Timestamp of the first sample without split rules after the onset.
+        """
+        idx = self._get_onset_idx()
+        if idx is None:
+            return None
+        baseline = self.samples[0][1]
+        for ts, rules, _ in self.samples[idx:]:
+            if rules <= baseline:
+                return ts
+        return None
+
+    @property
+    def onset(self):
+        """
+        Number of seconds since the scheduled start when the split rules were
+        in place.
+        """
+        if self.onset_ts is None:
+            return None
+        return self.onset_ts - self.start_ts
+
+    @property
+    def teardown(self):
+        """
+        Number of seconds since the scheduled stop when the split rules were
+        removed.
+        """
+        if self.teardown_ts is None:
+            return None
+        return self.teardown_ts - self.stop_ts
+
+    @property
+    def affected(self):
+        """
+        True if split rules are expected on the node.
+        """
+        return bool(self.expected)
+
+    @property
+    def converged(self):
+        """
+        True if the split was both set up and torn down as expected.
+        """
+        if self.error is not None:
+            return False
+        if not self.affected:
+            return True
+        return self.onset is not None and self.teardown is not None
+
+    def to_dict(self):
+        return {
+            "node": self.node,
+            "zone": self.zone,
+            "cluster": self.cluster,
+            "expected_rules": self.expected,
+            "samples": len(self.samples),
+            "onset": self.onset,
+            "teardown": self.teardown,
+            "converged": self.converged,
+            "error": self.error,
+        }
+
+
+def summarize(results):
+    """
+    Compute cluster wide convergence from results of all nodes.
+
+    Args:
+        results (list): list of :py:class:`NodeConvergence` objects
+
+    Returns:
+        dict: number of nodes, affected and converged nodes, and cluster
+        convergence times (max onset and teardown over affected nodes, None
+        when some affected node didn't converge)
+    """
+    affected = [r for r in results if r.affected]
+    converged = [r for r in results if r.converged]
+    summary = {
+        "nodes": len(results),
+        "affected_nodes": len(affected),
+        "converged_nodes": len(converged),
+        "onset_convergence": None,
+        "teardown_convergence": None,
+    }
+    if len(affected) > 0 and len(converged) == len(results):
+        summary["onset_convergence"] = max(r.onset for r in affected)
+        summary["teardown_convergence"] = max(r.teardown for r in affected)
+    return summary
@@ -0,0 +1,365 @@
+# -*- coding: utf8 -*-
+
+# Copyright 2026 Martin Bukatovič <mbukatov@redhat.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Deployment of network split scripts, units and zone env file on nodes which
+are not part of any OCP cluster (and so are not managed by Machine Config
+Operator), replacing ``multisetup-netsplit.yml`` and
+``multisetup-latency.yml`` playbooks.
+
+Files to deploy are taken from ``MachineConfig`` spec created by
+:py:func:`ocpnetsplit.main.get_networksplit_mc_spec` (see
+:py:func:`get_deploy_files`), so that the nodes end up with the same content
+as OCP nodes. Each node is usually processed in two sessions (see
+:py:mod:`ocpnetsplit.batch`):
+
+- the first one reads checksum and mode of each file and checks which
+  packages are missing (see :py:func:`get_state_cmds`),
+- the second one, executed only when something differs, writes changed files
+  only, installs missing packages, reloads systemd when some unit changed and
+  restarts only services affected by the changed files (see
+  :py:func:`get_apply_cmds`), large changes are split into multiple sessions
+  (see :py:func:`ocpnetsplit.batch.split_batches`).
+
+So repeated deployment of the same configuration doesn't change anything on
+the nodes.
+"""
+
+
+import base64
+import binascii
+import hashlib
+import os.path
+
+
+UNIT_DIR = "/etc/systemd/system"
+
+
+SPLIT_PACKAGES = ("iptables",)
+"""
+Packages needed for network splits.
+"""
+
+
+LATENCY_PACKAGES = ("iproute-tc", "kernel-modules-extra")
+"""
+Packages needed for latency.
+"""
+
+
+RESTART_UNITS = (
+    ("systemd-modules-load.service", ("/etc/modules-load.d/sch_netem.conf",)),
+    ("network-latency.service", (
+        "/etc/systemd/system/network-latency.service",
+        "/etc/network-latency.sh",
+        "/etc/network-split.env",
+        "/etc/network-split-datapath.env",
+        "/etc/network-zone-tc.sh")),
+)
+"""
+Services restarted when some of given files changes (in this order). Only
+services deployed along with the files (or services of systemd itself) are
+restarted.
+"""
+
+
+STATE_SCRIPT = (
+    'for f; do if [ -f "$f" ]; then '
+    'printf \'%s %s %s\\n\' "$(sha256sum < "$f" | cut -d " " -f 1)" "$(stat -c %a "$f")" "$f"; '
+    'fi; done')
+"""
+Shell script printing checksum, mode and path of each given existing file.
+"""
+
+
+WRITE_SCRIPT = (
+    'mkdir -p "$(dirname "$2")" && printf %s "$1" | base64 -d > "$2.tmp" && '
+    'if [ -n "$3" ]; then chmod "$3" "$2.tmp" && mv "$2.tmp" "$2"; fi')
+"""
+Shell script atomically replacing given file (second argument) with base64
+encoded content (first argument) and mode (third argument). When the mode is
+empty, the file is not replaced yet, and more content is expected to be
+appended via :py:const:`APPEND_SCRIPT`.
+"""
+
+
+APPEND_SCRIPT = (
+    'printf %s "$1" | base64 -d >> "$2.tmp" && '
+    'if [ -n "$3" ]; then chmod "$3" "$2.tmp" && mv "$2.tmp" "$2"; fi')
+"""
+Shell script appending next chunk of base64 encoded content (first argument)
+of given file (second argument), see :py:const:`WRITE_SCRIPT`.
+"""
+
+
+WRITE_CHUNK_SIZE = 24 * 1024
+"""
+Max number of bytes of a file written by single command, so that a command
+fits into a batch (see :py:const:`ocpnetsplit.batch.MAX_BATCH_SIZE`) even
+after base64 encoding. Larger files are written in chunks.
+"""
+
+
+class DeployFile:
+    """
+    File to deploy on a node.
+
+    Args:
+        path (str): absolute path of the file
+        content (str): content of the file
+        mode (int): file mode, eg. ``0o644``
+        unit (str): name of systemd unit, when the file is a unit file
+        enabled (bool): whether the unit should be enabled
+    """
+
+    def __init__(self, path, content, mode=0o644, unit=None, enabled=False):
+        self.path = path
+        self.content = content
+        self.mode = mode
+        self.unit = unit
+        self.enabled = enabled
+
+    @property
+    def checksum(self):
+        """
+        Hex sha256 checksum of the content.
+        """
+        return hashlib.sha256(self.content.encode()).hexdigest()
+
+    def __repr__(self):
+        return f"DeployFile({self.path!r}, mode={self.mode:o})"
+
+
+def _decode_source(source):
+    # see ocpnetsplit.machineconfig.create_file_dict
+    prefix, _, data = source.partition("base64,")
+    if not prefix.startswith("data:"):
+        raise ValueError(f"unsupported file source: {source[:40]}")
+    try:
+        return base64.b64decode(data, validate=True).decode()
+    except binascii.Error as ex:
+        raise ValueError(f"invalid file source: {ex}")
+
+
+def get_deploy_files(mc_spec):
+    """
+    Get list of files to deploy from ``MachineConfig`` spec. Files present in
+    multiple ``MachineConfig`` objects (eg. for both ``master`` and ``worker``
+    roles) are included only once.
+
+    Args:
+        mc_spec (list): list of ``MachineConfig`` dicts, as created by
+            :py:func:`ocpnetsplit.main.get_networksplit_mc_spec`
+
+    Returns:
+        list: :py:class:`DeployFile` objects
+
+    Raises:
+        ValueError: when the spec contains different content of a file
+    """
+    files = {}
+    for mcd in mc_spec:
+        config = mcd["spec"]["config"]
+        for file_dict in config.get("storage", {}).get("files", []):
+            files.setdefault(file_dict["path"], []).append(DeployFile(
+                file_dict["path"],
+                _decode_source(file_dict["contents"]["source"]),
+                mode=file_dict["mode"]))
+        for unit_dict in config.get("systemd", {}).get("units", []):
+            path = os.path.join(UNIT_DIR, unit_dict["name"])
+            files.setdefault(path, []).append(DeployFile(
+                path,
+                unit_dict["contents"],
+                unit=unit_dict["name"],
+                enabled=unit_dict.get("enabled", False)))
+    result = []
+    for path, path_files in files.items():
+        if len(set(f.checksum for f in path_files)) > 1:
+            raise ValueError(f"MachineConfig spec contains different versions of {path}")
+        result.append(path_files[0])
+    return result
+
+
+def get_packages(files):
+    """
+    Get list of packages needed by given files.
+    """
+    packages = list(SPLIT_PACKAGES)
+    if any(f.unit == "network-latency.service" for f in files):
+        packages += LATENCY_PACKAGES
+    return packages
+
+
+def parse_inventory(content):
+    """
+    Get list of hosts from ansible inventory like ini file. Hosts are listed
+    only once, in order of their first occurrence, groups and variables are
+    ignored.
+
+    Args:
+        content (str): content of the inventory file
+
+    Returns:
+        list: names of the hosts
+    """
+    hosts = []
+    section = ""
+    for line in content.splitlines():
+        line = line.strip()
+        if len(line) == 0 or line[0] in "#;":
+            continue
+        if line.startswith("["):
+            section = line.strip("[]")
+            continue
+        # group variables and children sections don't list hosts
+        if section.endswith(":vars") or section.endswith(":children"):
+            continue
+        host = line.split()[0]
+        if "=" in host or host in hosts:
+            continue
+        hosts.append(host)
+    return hosts
+
+
+def get_state_cmds(files, packages):
+    """
+    Get commands reading state of given files and packages on a node, to be
+    executed via :py:func:`ocpnetsplit.main.run_node_cmds` and evaluated via
+    :py:meth:`NodeDeployReport.load_state`.
+    """
+    return [
+        ["sh", "-c", STATE_SCRIPT, "sh"] + [f.path for f in files],
+        ["rpm", "-q"] + list(packages),
+    ]
+
+
+def get_write_cmds(deploy_file):
+    """
+    Get commands writing given file on a node, the file is replaced only
+    after the last chunk of it's content is written (see
+    :py:const:`WRITE_CHUNK_SIZE`).
+    """
+    data = deploy_file.content.encode()
+    chunks = [data[i:i + WRITE_CHUNK_SIZE] for i in range(0, len(data), WRITE_CHUNK_SIZE)] or [b""]
+    cmds = []
+    for idx, chunk in enumerate(chunks):
+        script = WRITE_SCRIPT if idx == 0 else APPEND_SCRIPT
+        # the file is replaced with the last chunk only
+        mode = f"{deploy_file.mode:o}" if idx == len(chunks) - 1 else ""
+        cmds.append(["sh", "-c", script, "sh", base64.b64encode(chunk).decode(), deploy_file.path, mode])
+    return cmds
+
+
+def get_apply_cmds(files, changed, missing_packages):
+    """
+    Get commands deploying changed files and missing packages on a node.
+
+    Args:
+        files (list): all :py:class:`DeployFile` objects
+        changed (list): paths of changed files
+        missing_packages (list): names of packages to install
+
+    Returns:
+        list: commands to run on the node, empty when there is nothing to do
+    """
+    cmds = []
+    if len(missing_packages) > 0:
+        cmds.append(["dnf", "install", "-y"] + list(missing_packages))
+    changed_files = [f for f in files if f.path in changed]
+    for f in changed_files:
+        cmds += get_write_cmds(f)
+    if any(f.unit is not None for f in changed_files):
+        cmds.append(["systemctl", "daemon-reload"])
+    for f in changed_files:
+        if f.enabled and "@" not in f.unit:
+            cmds.append(["systemctl", "enable", f.unit])
+    units = set(f.unit for f in files)
+    for unit, paths in RESTART_UNITS:
+        if not unit.startswith("systemd-") and unit not in units:
+            continue
+        if any(path in changed for path in paths):
+            # don't wait for the service, eg. latency setup sleeps on start
+            cmds.append(["systemctl", "restart", "--no-block", unit])
+    return cmds
+
+
+class NodeDeployReport:
+    """
+    Result of deployment on a single node.
+
+    Args:
+        node (str): name of the node
+        zone (str): zone of the node (see :py:const:`ocpnetsplit.zone.ZONES`)
+    """
+
+    def __init__(self, node, zone=None):
+        self.node = node
+        self.zone = zone
+        self.cluster = None
+        # paths of files which differ from the deployed ones
+        self.changed = []
+        self.missing_packages = []
+        # commands to bring the node up to date
+        self.apply_cmds = []
+        self.applied = False
+        self.duration = None
+        self.error = None
+
+    def load_state(self, files, results):
+        """
+        Evaluate results of state commands, see :py:func:`get_state_cmds`.
+
+        Args:
+            files (list): :py:class:`DeployFile` objects
+            results (list): :py:class:`ocpnetsplit.batch.CommandResult`
+                objects of the state commands
+
+        Raises:
+            ValueError: when the state can't be read
+        """
+        files_result, rpm_result = results
+        files_result.check_returncode()
+        deployed = {}
+        for line in files_result.output.strip().splitlines():
+            checksum, mode, path = line.split(" ", 2)
+            deployed[path] = (checksum, int(mode, 8))
+        self.changed = [
+            f.path for f in files
+            if deployed.get(f.path) != (f.checksum, f.mode)]
+        # rpm -q reports each missing package on a separate line
+        self.missing_packages = [
+            line.split()[1] for line in rpm_result.output.splitlines()
+            if line.startswith("package ") and line.endswith(" is not installed")]
+        self.apply_cmds = get_apply_cmds(files, self.changed, self.missing_packages)
+
+    @property
+    def ok(self):
+        """
+        True if the node is up to date.
+        """
+        return self.error is None and (self.applied or len(self.apply_cmds) == 0)
+
+    def to_dict(self):
+        return {
+            "node": self.node,
+            "zone": self.zone,
+            "cluster": self.cluster,
+            "changed": list(self.changed),
+            "missing_packages": list(self.missing_packages),
+            "applied": self.applied,
+            "duration": self.duration,
+            "error": self.error,
+        }
@@ -0,0 +1,269 @@
+# -*- coding: utf8 -*-
+
+# Copyright 2026 Martin Bukatovič <mbukatov@redhat.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pre-flight checks of cluster nodes, verifying assumptions of network split
+and latency scripts (see :doc:`assumptions`) before a split is scheduled.
+
+All checks of a node are executed in a single session (see
+:py:mod:`ocpnetsplit.batch`) and evaluated via :py:class:`NodeReport`:
+
+- ``clock``: time of the node, compared with local time of the client
+- ``chrony``: offset of the node clock from NTP time as reported by chrony,
+  the node has to be synchronized
+- ``iptables``: ``iptables`` tool is available (needed for splits)
+- ``env_file``: zone env file is deployed and valid
+- ``zone``: ``network-zone.sh`` detects zone of the node, which matches
+  expected zone of the node (when known)
+- ``tc``: ``tc`` tool is available (needed for latency)
+- ``sch_netem``: ``sch_netem`` kernel module is available (ditto)
+- ``default_route``: the node has single default route, as
+  ``network-latency.sh`` requires (ditto)
+
+Splits are armed as absolute wall clock timers, so the split starts on all
+nodes at the same time only when their clocks are synchronized. Clock skew of
+the cluster (the difference between the fastest and the slowest node clock
+as reported by chrony) is checked against a limit based on the split length,
+see :py:func:`max_clock_skew`.
+"""
+
+
+from ocpnetsplit import controller
+from ocpnetsplit import status
+from ocpnetsplit import zone
+
+
+ENV_FILE = "/etc/network-split.env"
+
+
+ZONE_SCRIPT = (
+    f"set -a; . {ENV_FILE}; "
+    f"if [ -f {controller.CONTROLLER_ENV} ]; then . {controller.CONTROLLER_ENV}; fi; "
+    "set +a; /etc/network-zone.sh")
+"""
+Shell script reporting zone detected by ``network-zone.sh`` script, with
+zone configuration maintained by ``ocp-network-split-controller`` taking
+precedence (as in the other node scripts).
+"""
+
+
+CHECKS = (
+    ("clock", status.CLOCK_CMD),
+    ("chrony", ["chronyc", "-c", "tracking"]),
+    ("iptables", ["iptables", "--version"]),
+    ("env_file", ["cat", ENV_FILE]),
+    ("zone", ["sh", "-c", ZONE_SCRIPT]),
+    ("tc", ["tc", "-V"]),
+    ("sch_netem", ["modinfo", "-n", "sch_netem"]),
+    ("default_route", ["ip", "route", "show", "default"]),
+)
+"""
+Name and command of each check.
+"""
+
+
+SPLIT_CHECKS = ("clock", "chrony", "iptables", "env_file", "zone")
+"""
+Checks which have to pass for network splits.
+"""
+
+
+LATENCY_CHECKS = ("tc", "sch_netem", "default_route")
+"""
+Additional checks which have to pass for latency.
+"""
+
+
+def get_check_cmds():
+    """
+    Get list of check commands, to be executed via
+    :py:func:`ocpnetsplit.main.run_node_cmds`.
+    """
+    return [cmd_list for _, cmd_list in CHECKS]
+
+
+def max_clock_skew(split_length, ratio=0.01, minimum=1.0):
+    """
+    Get max acceptable clock skew of the cluster for a split of given length.
+
+    Args:
+        split_length (int): length of the split in minutes
+        ratio (float): acceptable skew as a fraction of the split length
+        minimum (float): min acceptable skew in seconds
+
+    Returns:
+        float: clock skew in seconds
+    """
+    return max(minimum, split_length * 60 * ratio)
+
+
+def _last_line(output):
+    lines = output.strip().splitlines()
+    if len(lines) == 0:
+        return ""
+    return lines[-1]
+
+
+class NodeReport:
+    """
+    Results of pre-flight checks of a single node.
+
+    Args:
+        node (str): name of the node
+        zone (str): expected zone of the node (see
+            :py:const:`ocpnetsplit.zone.ZONES`), None when not known
+    """
+
+    def __init__(self, node, zone=None):
+        self.node = node
+        self.zone = zone
+        self.cluster = None
+        # error message of each failed check, None for passed checks
+        self.checks = {}
+        self.clock_offset = None
+        self.clock_error = None
+        self.ntp_offset = None
+        self.detected_zone = None
+        self.default_routes = None
+        self.error = None
+
+    def load(self, results, local_start, local_stop):
+        """
+        Evaluate results of check commands.
+
+        Args:
+            results (list): :py:class:`ocpnetsplit.batch.CommandResult`
+                object for each check, in the order of :py:const:`CHECKS`
+            local_start (float): local unix timestamp of the session start
+            local_stop (float): local unix timestamp of the session stop
+        """
+        for (name, _), result in zip(CHECKS, results):
+            if not result.ok:
+                self.checks[name] = _last_line(result.output) or f"return code {result.returncode}"
+                continue
+            try:
+                self.checks[name] = getattr(self, "_check_" + name, lambda output: None)(result.output)
+            except (ValueError, IndexError) as ex:
+                self.checks[name] = f"unexpected output: {ex}"
+        # the node time was read somewhere within the session
+        if self.checks.get("clock") is None and self.clock_offset is not None:
+            self.clock_offset -= (local_start + local_stop) / 2
+            self.clock_error = (local_stop - local_start) / 2
+
+    def _check_clock(self, output):
+        self.clock_offset = float(output)
+
+    def _check_chrony(self, output):
+        fields = _last_line(output).split(",")
+        self.ntp_offset = float(fields[4])
+        if fields[-1] == "Not synchronised":
+            return "clock is not synchronized"
+        return None
+
+    def _check_env_file(self, output):
+        zc = zone.ZoneConfig()
+        zc.load_env_file(output)
+        return None
+
+    def _check_zone(self, output):
+        detected = _last_line(output)
+        if not detected.startswith("ZONE_"):
+            return f"unexpected zone: {detected}"
+        self.detected_zone = detected[len("ZONE_"):].lower()
+        if self.zone is not None and self.detected_zone != self.zone:
+            return f"node detects zone {self.detected_zone}, expected {self.zone}"
+        return None
+
+    def _check_default_route(self, output):
+        self.default_routes = len(output.strip().splitlines())
+        if self.default_routes != 1:
+            return f"{self.default_routes} default routes, expected 1"
+        return None
+
+    def failed_checks(self, latency=False):
+        """
+        List names of failed checks.
+
+        Args:
+            latency (bool): whether to include latency checks
+        """
+        names = SPLIT_CHECKS
+        if latency:
+            names += LATENCY_CHECKS
+        return [name for name in names if self.checks.get(name) is not None]
+
+    def ok(self, latency=False):
+        """
+        True if all checks of the node passed.
+        """
+        return self.error is None and len(self.failed_checks(latency)) == 0
+
+    def to_dict(self):
+        return {
+            "node": self.node,
+            "zone": self.zone,
+            "cluster": self.cluster,
+            "detected_zone": self.detected_zone,
+            "checks": dict(self.checks),
+            "clock_offset": self.clock_offset,
+            "clock_error": self.clock_error,
+            "ntp_offset": self.ntp_offset,
+            "default_routes": self.default_routes,
+            "error": self.error,
+        }
+
+
+def summarize(reports, max_skew, latency=False):
+    """
+    Aggregate pre-flight reports of all nodes.
+
+    The cluster fails clock check when clock skew of the cluster (as
+    reported by chrony) exceeds ``max_skew``, or when the clock of some node
+    is off by more than ``max_skew`` from local time of the client, even with
+    precision of the measurement taken into account.
+
+    Args:
+        reports (list): list of :py:class:`NodeReport` objects
+        max_skew (float): max acceptable clock skew in seconds, see
+            :py:func:`max_clock_skew`
+        latency (bool): whether to include latency checks
+
+    Returns:
+        dict: number of nodes, names of failed nodes, number of nodes which
+        failed each check, clock skew of the cluster and overall result
+    """
+    failed_checks = {}
+    for report in reports:
+        for name in report.failed_checks(latency):
+            failed_checks[name] = failed_checks.get(name, 0) + 1
+    ntp_offsets = [r.ntp_offset for r in reports if r.ntp_offset is not None]
+    ntp_skew = None
+    if len(ntp_offsets) > 0:
+        ntp_skew = max(ntp_offsets) - min(ntp_offsets)
+    clock_ok = ntp_skew is None or ntp_skew <= max_skew
+    for report in reports:
+        if report.clock_offset is not None and abs(report.clock_offset) - report.clock_error > max_skew:
+            clock_ok = False
+    failed_nodes = [r.node for r in reports if not r.ok(latency)]
+    return {
+        "nodes": len(reports),
+        "failed_nodes": failed_nodes,
+        "failed_checks": failed_checks,
+        "ntp_skew": ntp_skew,
+        "max_clock_skew": max_skew,
+        "clock_ok": clock_ok,
+        "ok": clock_ok and len(failed_nodes) == 0,
+    }
@@ -0,0 +1,284 @@
+# -*- coding: utf8 -*-
+
+# Copyright 2026 Martin Bukatovič <mbukatov@redhat.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Local history of ``ocp-network-split-sched`` runs, stored in SQLite database
+(see :py:func:`get_default_path`).
+
+Each run (eg. scheduling of a split, status check, cancel or pre-flight
+check) is recorded with it's parameters, and result of each node: duration of
+the node operation (eg. dispatch latency of arming the timers), clock offset,
+onset and teardown of the split when the split was watched (see
+:py:mod:`ocpnetsplit.convergence`) and error. Results of probes (see
+:py:mod:`ocpnetsplit.probe`) are recorded as well.
+
+:py:meth:`History.summarize` aggregates the results of last runs for each
+cluster, so that regressions (eg. growing dispatch latency or onset skew of
+a cluster) could be spotted.
+"""
+
+
+import json
+import os
+import os.path
+import sqlite3
+
+from ocpnetsplit import retry
+
+
+HISTORY_ENV = "OCP_NETWORK_SPLIT_HISTORY"
+"""
+Environment variable overriding path of the history database.
+"""
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    command TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL NOT NULL,
+    split TEXT,
+    params TEXT NOT NULL,
+    ok INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS node_results (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    cluster TEXT,
+    node TEXT NOT NULL,
+    zone TEXT,
+    duration REAL,
+    clock_offset REAL,
+    onset REAL,
+    teardown REAL,
+    ok INTEGER NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS node_results_run_id ON node_results(run_id);
+CREATE TABLE IF NOT EXISTS probe_results (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    probe TEXT NOT NULL,
+    time_to_detect REAL,
+    time_to_recover REAL,
+    availability_during REAL
+);
+CREATE INDEX IF NOT EXISTS probe_results_run_id ON probe_results(run_id);
+"""
+
+
+def get_default_path():
+    """
+    Get path of the history database, which is
+    ``$XDG_DATA_HOME/ocp-network-split/history.sqlite`` unless overridden via
+    :py:const:`HISTORY_ENV` environment variable.
+    """
+    path = os.environ.get(HISTORY_ENV)
+    if path:
+        return path
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(data_home, "ocp-network-split", "history.sqlite")
+
+
+def _cluster_name(cluster):
+    return "default" if cluster is None else cluster
+
+
+class History:
+    """
+    History of runs stored in SQLite database.
+
+    Args:
+        path (str): path of the database file, created when it doesn't exist
+    """
+
+    def __init__(self, path):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def record(
+            self, command, started, finished, params, split=None, nodes=(), convergence=(), probes=(), ok=None):
+        """
+        Record a run.
+
+        Args:
+            command (str): type of the run, eg. ``schedule``, ``status``,
+                ``cancel`` or ``preflight``
+            started (float): unix timestamp of the run start
+            finished (float): unix timestamp of the run end
+            params (dict): parameters of the run (json serializable)
+            split (str): network split configuration or name of scenario
+            nodes (list): dict with result of each node, as created by
+                ``to_dict()`` method of :py:class:`ocpnetsplit.status.NodeStatus`
+                or :py:class:`ocpnetsplit.doctor.NodeReport` (the node is
+                considered ok when ``ok`` key is true or when there is no
+                ``ok`` key and ``error`` is None)
+            convergence (list): dict with convergence of each node, as created
+                by :py:meth:`ocpnetsplit.convergence.NodeConvergence.to_dict`
+            probes (list): dict with result of each probe, as created by
+                :py:meth:`ocpnetsplit.probe.ProbeResult.to_dict`
+            ok (bool): result of the run, when not specified, the run is ok
+                when all nodes are ok
+
+        Returns:
+            int: id of the run
+        """
+        rows = {}
+        for node in nodes:
+            rows[(node.get("cluster"), node["node"])] = {
+                "cluster": node.get("cluster"),
+                "node": node["node"],
+                "zone": node.get("zone"),
+                "duration": node.get("duration"),
+                "clock_offset": node.get("clock_offset"),
+                "onset": None,
+                "teardown": None,
+                "ok": node.get("ok", node.get("error") is None),
+                "error": node.get("error"),
+            }
+        for conv in convergence:
+            row = rows.setdefault((conv.get("cluster"), conv["node"]), {
+                "cluster": conv.get("cluster"),
+                "node": conv["node"],
+                "zone": conv.get("zone"),
+                "duration": None,
+                "clock_offset": None,
+                "ok": True,
+                "error": None,
+            })
+            row["onset"] = conv.get("onset")
+            row["teardown"] = conv.get("teardown")
+            if not conv.get("converged", True):
+                row["ok"] = False
+                row["error"] = row["error"] or conv.get("error") or "not converged"
+        if ok is None:
+            ok = all(row["ok"] for row in rows.values())
+        with self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO runs (command, started, finished, split, params, ok) VALUES (?, ?, ?, ?, ?, ?)",
+                (command, started, finished, split, json.dumps(params, sort_keys=True), ok))
+            run_id = cur.lastrowid
+            self._conn.executemany(
+                "INSERT INTO node_results (run_id, cluster, node, zone, duration, clock_offset, onset, teardown, ok, "
+                "error) VALUES (:run_id, :cluster, :node, :zone, :duration, :clock_offset, :onset, :teardown, :ok, "
+                ":error)",
+                [dict(row, run_id=run_id) for row in rows.values()])
+            self._conn.executemany(
+                "INSERT INTO probe_results (run_id, probe, time_to_detect, time_to_recover, availability_during) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(run_id, p["probe"], p.get("time_to_detect"), p.get("time_to_recover"), p.get("availability_during"))
+                 for p in probes])
+        return run_id
+
+    def get_runs(self, command=None, last=30):
+        """
+        Get last runs, the most recent one first.
+
+        Args:
+            command (str): type of the runs (all types when not specified)
+            last (int): max number of runs
+
+        Returns:
+            list: dict with id, command, start, duration, split, parameters,
+            number of (failed) nodes and result of each run
+        """
+        query = (
+            "SELECT runs.id, command, started, finished, split, params, runs.ok, "
+            "COUNT(node_results.node), COALESCE(SUM(node_results.ok = 0), 0) "
+            "FROM runs LEFT JOIN node_results ON node_results.run_id = runs.id ")
+        args = []
+        if command is not None:
+            query += "WHERE command = ? "
+            args.append(command)
+        query += "GROUP BY runs.id ORDER BY started DESC, runs.id DESC LIMIT ?"
+        args.append(last)
+        runs = []
+        for row in self._conn.execute(query, args):
+            runs.append({
+                "id": row[0],
+                "command": row[1],
+                "started": row[2],
+                "duration": row[3] - row[2],
+                "split": row[4],
+                "params": json.loads(row[5]),
+                "ok": bool(row[6]),
+                "nodes": row[7],
+                "failed_nodes": row[8],
+            })
+        return runs
+
+    def summarize(self, command="schedule", last=30):
+        """
+        Summarize node results of last runs for each cluster.
+
+        Dispatch latency is duration of the node operation (eg. arming of the
+        timers), onset skew of a run is the difference between the latest and
+        the earliest onset of the split among nodes of the cluster. Change of
+        dispatch latency is ratio of p95 of the more recent half of the runs
+        to p95 of the older half, so that values well above 1 indicate a
+        regression.
+
+        Args:
+            command (str): type of the runs
+            last (int): number of the most recent runs to summarize
+
+        Returns:
+            list: dict with summary of each cluster
+        """
+        run_ids = [run["id"] for run in self.get_runs(command, last)]
+        if len(run_ids) == 0:
+            return []
+        # runs are ordered from the most recent one
+        recent = set(run_ids[:(len(run_ids) + 1) // 2])
+        placeholders = ", ".join("?" * len(run_ids))
+        clusters = {}
+        for run_id, cluster, duration, onset, ok in self._conn.execute(
+                f"SELECT run_id, cluster, duration, onset, ok FROM node_results WHERE run_id IN ({placeholders})",
+                run_ids):
+            stats = clusters.setdefault(_cluster_name(cluster), {
+                "runs": set(), "nodes": 0, "failed": 0, "durations": [], "recent": [], "older": [], "onsets": {}})
+            stats["runs"].add(run_id)
+            stats["nodes"] += 1
+            stats["failed"] += 0 if ok else 1
+            if duration is not None:
+                stats["durations"].append(duration)
+                stats["recent" if run_id in recent else "older"].append(duration)
+            if onset is not None:
+                stats["onsets"].setdefault(run_id, []).append(onset)
+        summary = []
+        for cluster, stats in sorted(clusters.items()):
+            skews = [max(onsets) - min(onsets) for onsets in stats["onsets"].values()]
+            recent_p95 = retry.percentile(stats["recent"], 0.95)
+            older_p95 = retry.percentile(stats["older"], 0.95)
+            change = None
+            if recent_p95 is not None and older_p95:
+                change = recent_p95 / older_p95
+            summary.append({
+                "cluster": cluster,
+                "runs": len(stats["runs"]),
+                "nodes": stats["nodes"],
+                "failure_rate": stats["failed"] / stats["nodes"],
+                "dispatch_p50": retry.percentile(stats["durations"], 0.5),
+                "dispatch_p95": retry.percentile(stats["durations"], 0.95),
+                "dispatch_p95_change": change,
+                "onset_skew_p95": retry.percentile(skews, 0.95),
+            })
+        return summary
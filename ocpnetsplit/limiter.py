@@ -0,0 +1,213 @@
+# -*- coding: utf8 -*-
+
+# Copyright 2026 Martin Bukatovič <mbukatov@redhat.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Adaptive concurrency limit of remote operations on cluster nodes.
+
+Every ``oc debug node`` call creates a debug pod, so running it on dozens of
+nodes at once could get the client throttled by the API server, or even
+overload a small control plane of the cluster under test. So the number of
+operations running at the same time is limited by a window, which is
+adjusted via AIMD (additive increase, multiplicative decrease) algorithm:
+the window grows with every successful operation and it's cut when an
+operation fails because of throttling, a timeout or an API server error
+(see :py:func:`is_congestion`). Other failures (eg. a command failing on the
+node) don't change the window.
+
+Operations are started in the order in which they asked for a slot, and
+optional per zone limit makes sure that nodes of one zone can't take the
+whole window.
+"""
+
+
+import contextlib
+import logging
+import subprocess
+import threading
+
+
+LOGGER = logging.getLogger(name=__file__)
+
+
+CONGESTION_PATTERNS = (
+    "(TooManyRequests)",
+    "429 Too Many Requests",
+    "(ServiceUnavailable)",
+    "(InternalError)",
+    "(Timeout)",
+    "the server is currently unable to handle the request",
+    "Unable to connect to the server",
+    "context deadline exceeded",
+    "etcdserver: request timed out",
+    "TLS handshake timeout",
+)
+"""
+Error messages of ``oc`` reporting throttling or overloaded API server.
+"""
+
+
+def is_congestion(ex):
+    """
+    Check whether given failure of a remote operation means that the cluster
+    (or the client connection) is overloaded.
+
+    Args:
+        ex (subprocess.SubprocessError): failure of an ``oc`` or ``ssh``
+            command
+
+    Returns:
+        bool: true for timeouts and throttling or API server errors
+    """
+    if isinstance(ex, subprocess.TimeoutExpired):
+        return True
+    if not isinstance(ex, subprocess.CalledProcessError) or ex.stderr is None:
+        return False
+    stderr = ex.stderr
+    if isinstance(stderr, bytes):
+        stderr = stderr.decode(errors="replace")
+    return any(pattern in stderr for pattern in CONGESTION_PATTERNS)
+
+
+class AimdLimiter:
+    """
+    Concurrency limiter with AIMD window.
+
+    The window starts at ``initial`` and grows by ``increase`` with every
+    successful operation (like TCP slow start), until the first congestion.
+    Then it's multiplied by ``decrease`` and from that point on it grows by
+    ``increase`` per window of successful operations only. Congestion
+    reported by operations started before the last decrease doesn't decrease
+    the window again, as these operations were started with the old window.
+
+    Args:
+        initial (int): initial size of the window
+        minimum (int): minimal size of the window
+        maximum (int): maximal size of the window
+        increase (float): additive increase of the window
+        decrease (float): multiplicative decrease of the window
+        zone_limit (int): max number of operations running at the same time
+            in a single zone, no limit when not specified
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=32, increase=1.0, decrease=0.5, zone_limit=None):
+        if not 1 <= minimum <= maximum:
+            raise ValueError(f"invalid window bounds: {minimum}-{maximum}")
+        if not 0 < decrease < 1:
+            raise ValueError(f"decrease factor is not within (0, 1): {decrease}")
+        if zone_limit is not None and zone_limit < 1:
+            raise ValueError(f"invalid zone limit: {zone_limit}")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.zone_limit = zone_limit
+        self.window = float(min(max(initial, minimum), maximum))
+        # window of the last congestion, slow start ends there
+        self._threshold = None
+        # number of window decreases, used to ignore stale congestion
+        self._epoch = 0
+        self._in_flight = 0
+        self._zone_in_flight = {}
+        self._waiters = []
+        self._cond = threading.Condition()
+        self.max_in_flight = 0
+        self.decreases = 0
+
+    @property
+    def limit(self):
+        """
+        Current max number of operations running at the same time.
+        """
+        return int(self.window)
+
+    def _can_start(self, waiter):
+        if self._in_flight >= self.limit:
+            return False
+        # the first waiter which isn't blocked by the zone limit goes first
+        for other in self._waiters:
+            zone = other[0]
+            if self.zone_limit is None or self._zone_in_flight.get(zone, 0) < self.zone_limit:
+                return other is waiter
+        return False
+
+    def acquire(self, zone=None):
+        """
+        Wait for a free slot in the window.
+
+        Args:
+            zone (str): zone of the node where the operation will run
+
+        Returns:
+            int: token, which has to be passed to :py:meth:`release`
+        """
+        waiter = [zone]
+        with self._cond:
+            self._waiters.append(waiter)
+            self._cond.wait_for(lambda: self._can_start(waiter))
+            self._waiters.remove(waiter)
+            self._in_flight += 1
+            self._zone_in_flight[zone] = self._zone_in_flight.get(zone, 0) + 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            # other waiters could be able to start as well
+            self._cond.notify_all()
+            return self._epoch
+
+    def release(self, zone, token, success=True, congestion=False):
+        """
+        Release a slot and adjust the window based on result of the
+        operation.
+
+        Args:
+            zone (str): zone passed to :py:meth:`acquire`
+            token (int): token returned by :py:meth:`acquire`
+            success (bool): whether the operation succeeded
+            congestion (bool): whether the operation failed because of
+                congestion, see :py:func:`is_congestion`
+        """
+        with self._cond:
+            self._in_flight -= 1
+            self._zone_in_flight[zone] -= 1
+            if congestion and token == self._epoch:
+                self.window = max(self.minimum, self.window * self.decrease)
+                self._threshold = self.window
+                self._epoch += 1
+                self.decreases += 1
+                LOGGER.info("congestion detected, concurrency window decreased to %d", self.limit)
+            elif success:
+                if self._threshold is None:
+                    self.window += self.increase
+                else:
+                    self.window += self.increase / self.window
+                self.window = min(self.maximum, self.window)
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self, zone=None):
+        """
+        Context manager running an operation within a slot of the window,
+        failure of the operation is evaluated via :py:func:`is_congestion`.
+        """
+        token = self.acquire(zone)
+        success = False
+        congestion = False
+        try:
+            yield
+            success = True
+        except subprocess.SubprocessError as ex:
+            congestion = is_congestion(ex)
+            raise
+        finally:
+            self.release(zone, token, success, congestion)
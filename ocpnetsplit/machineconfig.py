@@ -30,17 +30,29 @@ References:
 
 
 import base64
+import copy
+import functools
 import os
 import os.path
 import textwrap
 
-import yaml
+from ocpnetsplit import serialize
 
 
 HERE = os.path.abspath(os.path.dirname(__file__))
 SYSTEMD_DIR = os.path.join(HERE, "systemd")
 
 
+DATAPATHS = ("iptables", "tc")
+"""
+Datapaths of network split and latency scripts: ``iptables`` uses iptables
+rule (or tc filter for latency) for each node address, while ``tc`` looks up
+zone of an address in tc u32 hash table (see ``network-zone-tc.sh``), so that
+per packet cost doesn't grow with number of nodes, and a split or latency of
+the whole zone is switched via single filter update.
+"""
+
+
 MACHINECONFIG_SKELL = textwrap.dedent(
     """
     apiVersion: machineconfiguration.openshift.io/v1
@@ -84,6 +96,24 @@ UNIT_SKEL = textwrap.dedent(
 )
 
 
+@functools.lru_cache(maxsize=None)
+def _parse_skel(skel):
+    return serialize.load_yaml(skel)
+
+
+def _new_from_skel(skel):
+    """
+    Get new dict from given yaml skeleton, which is parsed only once.
+    """
+    return copy.deepcopy(_parse_skel(skel))
+
+
+@functools.lru_cache(maxsize=None)
+def _read_data_file(path):
+    with open(path, "r") as data_file:
+        return data_file.read()
+
+
 def create_file_dict(basename, content, target_dir="/etc"):
     """
     Create Ignition config spec for given file basename and content, to be used
@@ -103,7 +133,7 @@ def create_file_dict(basename, content, target_dir="/etc"):
     """
     if basename is None or len(basename) == 0:
         raise ValueError("basename should not be empty")
-    file_dict = yaml.safe_load(FILE_SKEL)
+    file_dict = _new_from_skel(FILE_SKEL)
     # MCO can deploy files to /etc and /var directories only
     if not target_dir.startswith("/"):
         raise ValueError(
@@ -135,7 +165,7 @@ def create_unit_dict(name, content):
     """
     if name is None or len(name) == 0:
         raise ValueError("name of the unit should not be empty")
-    unit_dict = yaml.safe_load(UNIT_SKEL)
+    unit_dict = _new_from_skel(UNIT_SKEL)
     unit_dict["name"] = name
     unit_dict["contents"] = content
     # don't try to enable systemd unit templates
@@ -152,12 +182,34 @@ def get_new_mc(role, name_suffix, priority=99):
         role (string): name of ``MachineConfig`` role
         name_suffix (string): suffix of resulting MachineConfig name
     """
-    mcd = yaml.safe_load(MACHINECONFIG_SKELL)
+    mcd = _new_from_skel(MACHINECONFIG_SKELL)
     mcd["metadata"]["name"] = str(priority) + "-" + role + "-" + name_suffix
     mcd["metadata"]["labels"]["machineconfiguration.openshift.io/role"] = role
     return mcd
 
 
+def copy_mc_dict(mcd, role):
+    """
+    Create copy of given MachineConfig dict for another role, so that the
+    files and units of the MachineConfig (with base64 encoded content of
+    possibly large zone env file) are not generated again for each role.
+
+    Args:
+        mcd (dict): MachineConfig dict, as created by :py:func:`get_new_mc`
+        role (string): name of ``MachineConfig`` role of the copy
+
+    Returns:
+        dict: MachineConfig dict
+    """
+    label = "machineconfiguration.openshift.io/role"
+    old_role = mcd["metadata"]["labels"][label]
+    # strings (eg. content of files) are immutable and so shared with the copy
+    new_mcd = copy.deepcopy(mcd)
+    new_mcd["metadata"]["name"] = mcd["metadata"]["name"].replace(f"-{old_role}-", f"-{role}-", 1)
+    new_mcd["metadata"]["labels"][label] = role
+    return new_mcd
+
+
 def create_script_dict(script_name):
     """
     Create file dict with given shell script from ocpnetsplit module.
@@ -168,10 +220,9 @@ def create_script_dict(script_name):
     Returns:
         dict: Ignition storage file config spec
     """
-    with open(os.path.join(HERE, script_name), "r") as script_file:
-        script_dict = create_file_dict(script_name, script_file.read())
-        # the script needs to be executable
-        script_dict["mode"] = 0o544
+    script_dict = create_file_dict(script_name, _read_data_file(os.path.join(HERE, script_name)))
+    # the script needs to be executable
+    script_dict["mode"] = 0o544
     return script_dict
 
 
@@ -185,12 +236,10 @@ def create_systemdunit_dict(unit_filename):
     Returns:
         dict: Ignition storage file config spec
     """
-    with open(os.path.join(SYSTEMD_DIR, unit_filename), "r") as unit_file:
-        unit_dict = create_unit_dict(unit_filename, unit_file.read())
-    return unit_dict
+    return create_unit_dict(unit_filename, _read_data_file(os.path.join(SYSTEMD_DIR, unit_filename)))
 
 
-def create_zone_mc_dict(role, zone_env):
+def create_zone_mc_dict(role, zone_env, datapath="iptables"):
     """
     Create ``MachineConfig`` dict with network zone config env file.
 
@@ -201,10 +250,17 @@ def create_zone_mc_dict(role, zone_env):
         zone_env (string): content of ``network-split.env`` file with zone
             configuration, as created by
             :py:meth:`ocpnetsplit.zone.ZoneConfig.get_env_file`
+        datapath (string): datapath of the node scripts, one of
+            :py:const:`DATAPATHS`
 
     Returns:
         dict: MachineConfig dict
+
+    Raises:
+        ValueError: if given ``datapath`` is invalid
     """
+    if datapath not in DATAPATHS:
+        raise ValueError(f"invalid datapath: {datapath}")
     mcd = get_new_mc(role, "network-zone-config", priority=95)
 
     # add env file with zone configuration
@@ -215,6 +271,13 @@ def create_zone_mc_dict(role, zone_env):
     script_dict = create_script_dict("network-zone.sh")
     mcd["spec"]["config"]["storage"]["files"].append(script_dict)
 
+    # both split and latency scripts use the zone lookup table of tc datapath
+    if datapath == "tc":
+        env_dict = create_file_dict("network-split-datapath.env", "NETWORK_SPLIT_DATAPATH=tc\n")
+        mcd["spec"]["config"]["storage"]["files"].append(env_dict)
+        script_dict = create_script_dict("network-zone-tc.sh")
+        mcd["spec"]["config"]["storage"]["files"].append(script_dict)
+
     # drop systemd section, which is not necessary in this case
     del mcd["spec"]["config"]["systemd"]
 
@@ -23,22 +23,50 @@ use the python functions defined here directly.
 
 from datetime import datetime, timedelta
 import argparse
+import concurrent.futures
 import configparser
+import itertools
+import json
 import logging
+import os.path
+import shlex
 import socket
+import sqlite3
 import subprocess
 import sys
+import time
 
 import yaml
 
+from ocpnetsplit import batch
+from ocpnetsplit import controller
+from ocpnetsplit import convergence
+from ocpnetsplit import deploy
+from ocpnetsplit import doctor
+from ocpnetsplit import history
+from ocpnetsplit import limiter
 from ocpnetsplit import machineconfig
 from ocpnetsplit import ocp
+from ocpnetsplit import probe
+from ocpnetsplit import retry
+from ocpnetsplit import rollout
+from ocpnetsplit import scenario
+from ocpnetsplit import serialize
+from ocpnetsplit import status
+from ocpnetsplit import target
 from ocpnetsplit import zone
 
 
 LOGGER = logging.getLogger(name=__file__)
 
 
+SCHEDULE_DEADLINE_MARGIN = 5
+"""
+Number of seconds before start of a split (or scenario) after which no
+attempt to arm it's timers is started.
+"""
+
+
 def run_ssh_node(cmd_list, node, timeout=600):
     """
     Run given command on given node via ssh assuming connection details like
@@ -54,8 +82,9 @@ def run_ssh_node(cmd_list, node, timeout=600):
         tuple: ssh stdout, ssh souterr
     """
     # using sudo in all cases, we don't need to care if we are connecting to
-    # the node as root or coreos user
-    ssh_cmd = ["ssh", node, "sudo"] + cmd_list
+    # the node as root or coreos user, the command is quoted because ssh
+    # passes it to a remote shell
+    ssh_cmd = ["ssh", node, "sudo"] + [shlex.quote(arg) for arg in cmd_list]
     LOGGER.info("going to execute %s", ssh_cmd)
     comp_proc = subprocess.run(
         ssh_cmd,
@@ -76,7 +105,53 @@ def run_ssh_node(cmd_list, node, timeout=600):
     return ssh_stdout, ssh_stderr
 
 
-def get_zone_config(zone_a, zone_b, zone_c, zone_x_addrs=None, kubeconfig=None):
+def run_node_cmd(cmd_list, node, use_ssh=False, kubeconfig=None, timeout=600):
+    """
+    Run given command on given node either via ssh or oc debug node.
+
+    Args:
+        cmd_list (list): a command to run, eg. ``["uname", "-a"]``
+        node (str): name of the node
+        use_ssh (bool): if true, connect to the node via ssh; use oc debug
+            node otherwise
+        kubeconfig (str): file path to kubeconfig (used with oc debug only)
+        timeout (int): command timeout specified in seconds, optional
+
+    Returns:
+        tuple: stdout of the command, stderr (ssh) or oc output (oc debug)
+    """
+    if use_ssh:
+        return run_ssh_node(cmd_list, node, timeout=timeout)
+    return ocp.run_oc_debug_node(cmd_list, node, kubeconfig=kubeconfig, timeout=timeout)
+
+
+def run_node_cmds(cmd_lists, node, use_ssh=False, kubeconfig=None, timeout=600):
+    """
+    Run given commands one after another on given node in a single session
+    (one ssh connection or one oc debug pod), see :py:mod:`ocpnetsplit.batch`.
+
+    Args:
+        cmd_lists (list): list of commands, eg. ``[["uname", "-a"], ["date"]]``
+        node (str): name of the node
+        use_ssh (bool): if true, connect to the node via ssh; use oc debug
+            node otherwise
+        kubeconfig (str): file path to kubeconfig (used with oc debug only)
+        timeout (int): timeout of the whole session in seconds, optional
+
+    Returns:
+        list: :py:class:`ocpnetsplit.batch.CommandResult` object for each
+        command, failure of a command doesn't raise an exception
+
+    Raises:
+        subprocess.SubprocessError: when the session itself fails
+        ValueError: when output of the session can't be parsed
+    """
+    marker = batch.new_marker()
+    stdout, _ = run_node_cmd(batch.batch_cmd(cmd_lists, marker), node, use_ssh, kubeconfig, timeout)
+    return batch.parse_batch_output(stdout, marker, cmd_lists)
+
+
+def get_zone_config(zone_a, zone_b, zone_c, zone_x_addrs=None, kubeconfig=None, zone_labels=None):
     """
     For each valid ocp-network-split zone name (see
     :py:const:`ocpnetsplit.zone.ZONES`), translate it's given
@@ -89,6 +164,8 @@ def get_zone_config(zone_a, zone_b, zone_c, zone_x_addrs=None, kubeconfig=None):
         zone_c (str): value of zone ``c`` label
         zone_x_addrs (list): list of ip addresses in external zone ``x``
         kubeconfig (str): file path to kubeconfig
+        zone_labels (dict): label of each additional cluster zone (eg.
+            ``{"d": "data-3"}``), see :py:func:`ocpnetsplit.zone.parse_zone_labels`
 
     Returns:
         ZoneConfig: object with list of node ip addresses for each zone name
@@ -96,8 +173,10 @@ def get_zone_config(zone_a, zone_b, zone_c, zone_x_addrs=None, kubeconfig=None):
             see :py:const:`ocpnetsplit.zone.ZONES`).
     """
     zc = zone.ZoneConfig()
-    for zone_name, label in zip(zone.ZONES, [zone_a, zone_b, zone_c]):
-        LOGGER.debug("listing all ip addresses of nodes in zone %s", zone)
+    labels = {"a": zone_a, "b": zone_b, "c": zone_c}
+    labels.update(zone_labels or {})
+    for zone_name, label in labels.items():
+        LOGGER.debug("listing all ip addresses of nodes in zone %s", zone_name)
         cluster_nodes = ocp.list_cluster_nodes(label, kubeconfig=kubeconfig)
         for node in cluster_nodes:
             zc.add_nodes(zone_name, ocp.get_all_node_ip_addrs(node, kubeconfig=kubeconfig))
@@ -130,7 +209,7 @@ def get_zone_config_fromfile(file_content, translate_hostname=True):
     return zc
 
 
-def get_networksplit_mc_spec(zone_env=None, split=False, latency=0, latency_spec=None):
+def get_networksplit_mc_spec(zone_env=None, split=False, latency=0, latency_spec=None, datapath="iptables"):
     """
     Create ``MachineConfig`` spec to install network split firewall tweaking
     script and unit files on all cluster nodes.
@@ -144,44 +223,354 @@ def get_networksplit_mc_spec(zone_env=None, split=False, latency=0, latency_spec
             in ms, when the value is zero, support for latency is not included
         latency_spec (:py:class`ocpnetsplit.zone.ZoneLatSpec`): specific
             latency between given zones (optional).
+        datapath (str): datapath of split and latency scripts, see
+            :py:const:`ocpnetsplit.machineconfig.DATAPATHS`
 
     Returns:
         machineconfig_spec: list of dictionaries with ``MachineConfig`` spec
     """
-    mc_spec = []
-    for role in "master", "worker":
-        if zone_env is not None:
-            mc_spec.append(machineconfig.create_zone_mc_dict(role, zone_env))
-        if latency != 0:
-            mc_spec.append(machineconfig.create_latency_mc_dict(role, latency, latency_spec))
-        if split:
-            mc_spec.append(machineconfig.create_split_mc_dict(role))
+    role_spec = []
+    if zone_env is not None:
+        role_spec.append(machineconfig.create_zone_mc_dict("master", zone_env, datapath))
+    if latency != 0:
+        role_spec.append(machineconfig.create_latency_mc_dict("master", latency, latency_spec))
+    if split:
+        role_spec.append(machineconfig.create_split_mc_dict("master"))
+    # the payload is the same for all roles, so it's rendered only once
+    mc_spec = list(role_spec)
+    for mcd in role_spec:
+        mc_spec.append(machineconfig.copy_mc_dict(mcd, "worker"))
     return mc_spec
 
 
-def schedule_split(nodes, split_name, target_dt, target_length, use_ssh=False, kubeconfig=None):
+def _get_node_zone(zone_config, node):
+    if zone_config is None:
+        return None
+    return zone_config.get_zone(node)
+
+
+def schedule_split(
+        nodes,
+        split_name,
+        target_dt,
+        target_length,
+        use_ssh=False,
+        kubeconfig=None,
+        zone_config=None,
+        node_limiter=None,
+        retry_policy=None,
+        rollback=True,
+        verify=False):
     """
     Schedule start and stop of network split on all nodes of the cluster.
+    Predefined network splits are scheduled via timer units deployed by
+    MachineConfig, any other split via transient timer units.
 
     Args:
         nodes (list): list of all nodes from all zones
         split_name (str): network split configuration specification, eg.
-            ``ab``, see
-            :py:const:`ocpnetsplit.zone.NETWORK_SPLITS` constant
+            ``ab``, see :py:const:`ocpnetsplit.zone.NETWORK_SPLITS` constant
+            and :py:func:`ocpnetsplit.zone.normalize_split`
         target_dt (datetime): requested start time of the network split
         target_length (int): number of minutes specifying how long the network
             split configuration should be active
         use_ssh (bool): if true, connect to the nodes via ssh; use oc debug
             node otherwise
         kubeconfig (str): file path to kubeconfig
+        zone_config (ZoneConfig): zone config with the nodes, used to report
+            zone of each node (optional)
+        node_limiter (AimdLimiter): concurrency limiter of node commands, see
+            :py:func:`run_node_cmd_all`
+        retry_policy (RetryPolicy): retry policy of each node, see
+            :py:func:`schedule_scenario`
+        rollback (bool): whether to stop timers of the split on all nodes
+            when scheduling fails on some node
+        verify (bool): whether to check that the timers are armed, see
+            :py:func:`schedule_scenario`
+
+    Returns:
+        list: :py:class:`ocpnetsplit.status.NodeStatus` object for each node
+        with the timers started there
 
     Raises:
         ValueError: in case invalid ``split_name`` or ``target_dt`` is
             specified.
+        subprocess.SubprocessError: when scheduling fails on some node
     """
     # input validation
-    if split_name not in zone.NETWORK_SPLITS:
-        raise ValueError(f"invalid split_name specified: '{split_name}'")
+    split_name = zone.normalize_split(split_name)
+    # single step scenario generates timer unit names and the command
+    scen = scenario.Scenario()
+    scen.steps = [scenario.ScenarioStep(0, target_length, split=split_name)]
+    return schedule_scenario(
+        nodes, scen, target_dt, use_ssh, kubeconfig, zone_config, node_limiter, retry_policy,
+        rollback, verify)
+
+
+def schedule_scenario(
+        nodes,
+        scen,
+        target_dt,
+        use_ssh=False,
+        kubeconfig=None,
+        zone_config=None,
+        node_limiter=None,
+        retry_policy=None,
+        rollback=True,
+        verify=False):
+    """
+    Schedule all steps of a scenario on all nodes of the cluster, using
+    single command per node. Nodes are processed concurrently, see
+    :py:func:`run_node_cmd_all`.
+
+    Failed command is retried on each node independently (see
+    :py:mod:`ocpnetsplit.retry`), as long as there is at least
+    :py:const:`SCHEDULE_DEADLINE_MARGIN` seconds left till the scenario
+    start. Arming of the timers is idempotent, so that it's safe to retry
+    or hedge it. When scheduling fails on some node even so, timers of the
+    scenario are stopped on all nodes (unless ``rollback`` is disabled), so
+    that the scenario doesn't run on part of the cluster only.
+
+    With ``verify`` enabled, armed timers are listed and clock of the node is
+    checked in the same session (see :py:func:`run_node_cmds`), so that it
+    still takes one round trip per node.
+
+    Args:
+        nodes (list): list of all nodes from all zones
+        scen (Scenario): validated scenario, see
+            :py:class:`ocpnetsplit.scenario.Scenario`
+        target_dt (datetime): requested start time of the scenario
+        use_ssh (bool): if true, connect to the nodes via ssh; use oc debug
+            node otherwise
+        kubeconfig (str): file path to kubeconfig
+        zone_config (ZoneConfig): zone config with the nodes, used to report
+            zone of each node (optional)
+        node_limiter (AimdLimiter): concurrency limiter of node commands, see
+            :py:func:`run_node_cmd_all`
+        retry_policy (RetryPolicy): retry policy of each node, default
+            policy (see :py:class:`ocpnetsplit.retry.RetryPolicy`) is used
+            when not specified
+        rollback (bool): whether to stop timers of the scenario on all nodes
+            when scheduling fails on some node
+        verify (bool): whether to check that all timers are armed on each
+            node (a node without them is considered failed) and measure
+            clock offset of each node
+
+    Returns:
+        list: :py:class:`ocpnetsplit.status.NodeStatus` object for each node
+        with the timers started there (as reported by the node when
+        ``verify`` is enabled)
+
+    Raises:
+        ValueError: in case invalid ``target_dt`` is specified, or when output
+            of some node can't be parsed (with ``verify`` enabled)
+        subprocess.SubprocessError: when scheduling fails on some node
+    """
+    _check_start_time(target_dt)
+    start_ts = int(target_dt.timestamp())
+    cmd_list = scen.get_node_cmd(start_ts)
+    timers = scen.get_timers(start_ts)
+    units = [timer.unit for timer in timers]
+    verify_cmds = [cmd_list, status.list_timers_cmd(units), status.CLOCK_CMD]
+    if node_limiter is None:
+        node_limiter = limiter.AimdLimiter()
+    if retry_policy is None:
+        retry_policy = retry.RetryPolicy()
+    deadline = start_ts - SCHEDULE_DEADLINE_MARGIN
+    tracker = retry.LatencyTracker()
+
+    def run(node):
+        node_status = status.NodeStatus(node, _get_node_zone(zone_config, node))
+        start = time.monotonic()
+
+        def attempt(timeout):
+            with node_limiter.slot(node_status.zone):
+                if not verify:
+                    run_node_cmd(cmd_list, node, use_ssh, kubeconfig, timeout)
+                    return
+                local_start = time.time()
+                results = run_node_cmds(verify_cmds, node, use_ssh, kubeconfig, timeout)
+                local_stop = time.time()
+            for result in results:
+                result.check_returncode()
+            node_status.timers = status.parse_list_timers(results[1].output)
+            armed = set(timer.unit for timer in node_status.armed_timers)
+            missing = [unit for unit in units if unit not in armed]
+            if len(missing) > 0:
+                raise status.TimersNotArmedError(node, missing)
+            # the node time was read somewhere within the session
+            node_status.clock_offset = float(results[2].output) - (local_start + local_stop) / 2
+
+        try:
+            retry.call(attempt, retry_policy, deadline, tracker)
+        except (subprocess.SubprocessError, ValueError) as ex:
+            LOGGER.warning("scheduling failed on node %s: %s", node, ex)
+            node_status.error = str(ex)
+            return node_status, ex
+        finally:
+            node_status.duration = time.monotonic() - start
+        if not verify:
+            node_status.timers = list(timers)
+        return node_status, None
+
+    results = _map_nodes(run, nodes, zone_config, node_limiter.maximum)
+    errors = [ex for _, ex in results if ex is not None]
+    if len(errors) == 0:
+        return [node_status for node_status, _ in results]
+    if rollback:
+        LOGGER.warning("scheduling failed on %d nodes, stopping scheduled timers on all nodes", len(errors))
+        cancel_results = cancel_split(
+            nodes, units, use_ssh, kubeconfig, zone_config, node_limiter, retry_policy)
+        for node_status in cancel_results:
+            if not node_status.ok:
+                LOGGER.error("rollback failed on node %s: %s", node_status.node, node_status.error)
+    raise errors[0]
+
+
+def schedule_split_targets(
+        targets,
+        split_name,
+        target_dt,
+        target_length,
+        retry_policy=None,
+        rollback=True,
+        verify=False):
+    """
+    Schedule start and stop of network split on all nodes of multiple
+    clusters at the same time, see :py:func:`schedule_scenario_targets`.
+
+    Args:
+        targets (list): list of :py:class:`ocpnetsplit.target.Target`
+            objects
+        split_name (str): network split configuration specification
+        target_dt (datetime): requested start time of the network split
+        target_length (int): number of minutes specifying how long the network
+            split configuration should be active
+        retry_policy (RetryPolicy): retry policy of each node
+        rollback (bool): whether to stop timers of the split on all nodes of
+            all clusters when scheduling fails on some node
+        verify (bool): whether to check that the timers are armed
+
+    Returns:
+        list: :py:class:`ocpnetsplit.status.NodeStatus` object for each node
+        of each target
+
+    Raises:
+        ValueError: in case invalid ``split_name`` or ``target_dt`` is
+            specified.
+        subprocess.SubprocessError: when scheduling fails on some node
+    """
+    split_name = zone.normalize_split(split_name)
+    scen = scenario.Scenario()
+    scen.steps = [scenario.ScenarioStep(0, target_length, split=split_name)]
+    return schedule_scenario_targets(targets, scen, target_dt, retry_policy, rollback, verify)
+
+
+def schedule_scenario_targets(
+        targets,
+        scen,
+        target_dt,
+        retry_policy=None,
+        rollback=True,
+        verify=False):
+    """
+    Schedule all steps of a scenario on all nodes of multiple clusters (see
+    :py:mod:`ocpnetsplit.target`). All clusters are processed concurrently,
+    each with it's own backend and concurrency limiter, and the scenario
+    starts at the same time on all of them. When scheduling fails on some
+    node, timers of the scenario are stopped on all nodes of all clusters
+    (unless ``rollback`` is disabled).
+
+    Args:
+        targets (list): list of :py:class:`ocpnetsplit.target.Target`
+            objects
+        scen (Scenario): validated scenario
+        target_dt (datetime): requested start time of the scenario
+        retry_policy (RetryPolicy): retry policy of each node
+        rollback (bool): whether to stop timers of the scenario on all nodes
+            of all clusters when scheduling fails on some node
+        verify (bool): whether to check that the timers are armed, see
+            :py:func:`schedule_scenario`
+
+    Returns:
+        list: :py:class:`ocpnetsplit.status.NodeStatus` object for each node
+        of each target
+
+    Raises:
+        ValueError: in case invalid ``target_dt`` is specified.
+        subprocess.SubprocessError: when scheduling fails on some node
+    """
+    _check_start_time(target_dt)
+
+    errors = []
+
+    def run(tgt):
+        try:
+            return schedule_scenario(
+                tgt.nodes, scen, target_dt, retry_policy=retry_policy, rollback=False, verify=verify,
+                **tgt.get_kwargs())
+        except (subprocess.SubprocessError, ValueError) as ex:
+            # with verify, unparsable output of a node fails it with ValueError
+            errors.append(ex)
+            return []
+
+    results = target.map_targets(run, targets)
+    if len(errors) == 0:
+        return results
+    if rollback:
+        LOGGER.warning("scheduling failed on %d clusters, stopping scheduled timers on all nodes", len(errors))
+        units = [timer.unit for timer in scen.get_timers(int(target_dt.timestamp()))]
+        cancel_results = target.map_targets(
+            lambda tgt: cancel_split(tgt.nodes, units, retry_policy=retry_policy, **tgt.get_kwargs()),
+            targets)
+        for node_status in cancel_results:
+            if not node_status.ok:
+                LOGGER.error("rollback failed on node %s: %s", node_status.node, node_status.error)
+    raise errors[0]
+
+
+def cancel_split(
+        nodes,
+        units=None,
+        use_ssh=False,
+        kubeconfig=None,
+        zone_config=None,
+        node_limiter=None,
+        retry_policy=None):
+    """
+    Stop scheduled network split timers on all nodes concurrently, see
+    :py:func:`run_node_cmd_all`.
+
+    Args:
+        nodes (list): list of all nodes from all zones
+        units (list): names of timer units to stop, when not specified, all
+            network split timers are stopped, along with network split
+            which is currently active (if any)
+        use_ssh (bool): if true, connect to the nodes via ssh; use oc debug
+            node otherwise
+        kubeconfig (str): file path to kubeconfig
+        zone_config (ZoneConfig): zone config with the nodes, used to report
+            zone of each node (optional)
+        node_limiter (AimdLimiter): concurrency limiter of node commands
+        retry_policy (RetryPolicy): retry policy of each node, default
+            policy (see :py:class:`ocpnetsplit.retry.RetryPolicy`) is used
+            when not specified
+
+    Returns:
+        list: :py:class:`ocpnetsplit.status.NodeStatus` object for each node,
+        failure to stop the timers on a node is reported via it's ``error``
+        attribute
+    """
+    if retry_policy is None:
+        retry_policy = retry.RetryPolicy()
+    cmd_list = scenario.cancel_cmd(units)
+    results = run_node_cmd_all(
+        cmd_list, nodes, use_ssh, kubeconfig, zone_config, node_limiter=node_limiter,
+        retry_policy=retry_policy)
+    return [node_status for node_status, _ in results]
+
+
+def _check_start_time(target_dt):
     now_dt = datetime.now()
     # let's not schedule in the past
     if target_dt - now_dt <= timedelta(minutes=0):
@@ -200,26 +589,461 @@ def schedule_split(nodes, split_name, target_dt, target_length, use_ssh=False, k
         )
         LOGGER.error(msg)
         raise ValueError(msg)
-    # convert start timestamp into unix time (number of seconds since epoch)
-    start_ts = int(target_dt.timestamp())
-    # compute target stop timestamp
-    stop_ts = start_ts + (target_length * 60)
-    # generate systemd timer unit names
-    start_unit = f"network-split-{split_name}-setup@{start_ts}.timer"
-    stop_unit = f"network-split-teardown@{stop_ts}.timer"
-    # schedule both timers on every node of the cluster
-    for node in nodes:
-        cmd_list = ["systemctl", "start",  start_unit, stop_unit]
-        if use_ssh:
-            run_ssh_node(cmd_list, node)
+
+
+def _map_nodes(func, nodes, zone_config, max_workers):
+    """
+    Call given function for each node concurrently, starting with nodes of
+    different zones in turns (so that nodes of one zone don't occupy all
+    workers while nodes of other zones wait).
+
+    Returns:
+        list: results of the function in the same order as the nodes
+
+    Raises:
+        Exception: the first exception raised by the function (in order of
+            the nodes), after all calls are finished
+    """
+    if len(nodes) == 0:
+        return []
+    zone_queues = {}
+    for idx, node in enumerate(nodes):
+        zone_queues.setdefault(_get_node_zone(zone_config, node), []).append(idx)
+    order = []
+    for round_idxs in itertools.zip_longest(*zone_queues.values()):
+        order.extend(idx for idx in round_idxs if idx is not None)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(nodes))) as executor:
+        futures = {idx: executor.submit(func, nodes[idx]) for idx in order}
+    return [futures[idx].result() for idx in range(len(nodes))]
+
+
+def run_node_cmd_all(
+        cmd_list,
+        nodes,
+        use_ssh=False,
+        kubeconfig=None,
+        zone_config=None,
+        max_workers=32,
+        node_limiter=None,
+        retry_policy=None,
+        deadline=None):
+    """
+    Run given command on all given nodes concurrently.
+
+    Number of commands running at the same time is limited by adaptive
+    concurrency window (see :py:mod:`ocpnetsplit.limiter`), so that many
+    ``oc debug`` pods created at once don't overload the API server. A
+    limiter could be shared by multiple calls, so that the window learned by
+    one call is used by the next one.
+
+    Args:
+        cmd_list (list): a command to run, eg. ``["uname", "-a"]``
+        nodes (list): list of nodes
+        use_ssh (bool): if true, connect to the nodes via ssh; use oc debug
+            node otherwise
+        kubeconfig (str): file path to kubeconfig (used with oc debug only)
+        zone_config (ZoneConfig): zone config with the nodes, used to report
+            zone of each node (optional)
+        max_workers (int): max number of commands running at the same time,
+            used when ``node_limiter`` is not specified
+        node_limiter (AimdLimiter): concurrency limiter of node commands
+        retry_policy (RetryPolicy): retry policy of each node, see
+            :py:mod:`ocpnetsplit.retry`, the command is not retried when not
+            specified
+        deadline (float): unix timestamp after which no attempt to run the
+            command is started (optional)
+
+    Returns:
+        list: tuple of :py:class:`ocpnetsplit.status.NodeStatus` object and
+        stdout of the command (None when the command failed) for each node,
+        in the same order as the nodes
+    """
+    def func(node, timeout):
+        stdout, _ = run_node_cmd(cmd_list, node, use_ssh, kubeconfig, timeout)
+        return stdout
+
+    return _run_all(func, nodes, zone_config, max_workers, node_limiter, retry_policy, deadline)
+
+
+def run_node_cmds_all(
+        cmd_lists,
+        nodes,
+        use_ssh=False,
+        kubeconfig=None,
+        zone_config=None,
+        max_workers=32,
+        node_limiter=None,
+        retry_policy=None,
+        deadline=None):
+    """
+    Run given commands on all given nodes concurrently, using single session
+    per node (see :py:func:`run_node_cmds`). Nodes are processed in the same
+    way as in :py:func:`run_node_cmd_all`.
+
+    Returns:
+        list: tuple of :py:class:`ocpnetsplit.status.NodeStatus` object and
+        list of :py:class:`ocpnetsplit.batch.CommandResult` objects (None
+        when the session failed) for each node, in the same order as the
+        nodes
+    """
+    def func(node, timeout):
+        return run_node_cmds(cmd_lists, node, use_ssh, kubeconfig, timeout)
+
+    return _run_all(func, nodes, zone_config, max_workers, node_limiter, retry_policy, deadline)
+
+
+def _run_all(func, nodes, zone_config, max_workers, node_limiter, retry_policy, deadline):
+    if node_limiter is None:
+        node_limiter = limiter.AimdLimiter(initial=min(4, max_workers), maximum=max_workers)
+    if retry_policy is None:
+        retry_policy = retry.RetryPolicy(attempts=1)
+    tracker = retry.LatencyTracker()
+
+    def run(node):
+        node_status = status.NodeStatus(node, _get_node_zone(zone_config, node))
+        result = None
+        start = time.monotonic()
+
+        def attempt(timeout):
+            with node_limiter.slot(node_status.zone):
+                return func(node, timeout)
+
+        try:
+            result = retry.call(attempt, retry_policy, deadline, tracker)
+        except (subprocess.SubprocessError, ValueError) as ex:
+            LOGGER.warning("command failed on node %s: %s", node, ex)
+            node_status.error = str(ex)
+        node_status.duration = time.monotonic() - start
+        return node_status, result
+
+    return _map_nodes(run, nodes, zone_config, node_limiter.maximum)
+
+
+def arm_split_watch(
+        nodes,
+        split_name,
+        start_ts,
+        stop_ts,
+        use_ssh=False,
+        kubeconfig=None,
+        zone_config=None,
+        interval=0.2,
+        lead=10,
+        node_limiter=None,
+        retry_policy=None):
+    """
+    Start convergence sampler of given network split on all nodes, see
+    :py:mod:`ocpnetsplit.convergence`.
+
+    Args:
+        nodes (list): list of all nodes from all zones
+        split_name (str): network split configuration specification
+        start_ts (int): unix timestamp of the split start
+        stop_ts (int): unix timestamp of the split stop
+        use_ssh (bool): if true, connect to the nodes via ssh; use oc debug
+            node otherwise
+        kubeconfig (str): file path to kubeconfig
+        zone_config (ZoneConfig): zone config with the nodes (optional)
+        interval (float): sampling interval in seconds
+        lead (int): number of seconds to sample before start and after stop
+        node_limiter (AimdLimiter): concurrency limiter of node commands
+        retry_policy (RetryPolicy): retry policy of each node, the sampler
+            is not started after it should have started sampling
+
+    Returns:
+        list: :py:class:`ocpnetsplit.status.NodeStatus` object for each node
+    """
+    split_name = zone.normalize_split(split_name)
+    cmd_list = convergence.sampler_cmd(split_name, start_ts, stop_ts, interval, lead)
+    results = run_node_cmd_all(
+        cmd_list, nodes, use_ssh, kubeconfig, zone_config, node_limiter=node_limiter,
+        retry_policy=retry_policy, deadline=start_ts - lead)
+    return [node_status for node_status, _ in results]
+
+
+def collect_split_watch(
+        nodes,
+        start_ts,
+        stop_ts,
+        use_ssh=False,
+        kubeconfig=None,
+        zone_config=None,
+        node_limiter=None,
+        retry_policy=None):
+    """
+    Collect and evaluate convergence sampler logs from all nodes, when the
+    network split is over.
+
+    Returns:
+        list: :py:class:`ocpnetsplit.convergence.NodeConvergence` object for
+        each node
+    """
+    cmd_list = convergence.collect_cmd(start_ts)
+    results = []
+    node_results = run_node_cmd_all(
+        cmd_list, nodes, use_ssh, kubeconfig, zone_config, node_limiter=node_limiter,
+        retry_policy=retry_policy)
+    for node_status, stdout in node_results:
+        node_conv = convergence.NodeConvergence(node_status.node, node_status.zone, start_ts, stop_ts)
+        if stdout is None:
+            node_conv.error = node_status.error
+        else:
+            node_conv.load(stdout)
+        results.append(node_conv)
+    return results
+
+
+def run_doctor(
+        nodes,
+        use_ssh=False,
+        kubeconfig=None,
+        zone_config=None,
+        node_limiter=None,
+        retry_policy=None):
+    """
+    Run pre-flight checks on all nodes concurrently, using single session per
+    node, see :py:mod:`ocpnetsplit.doctor`.
+
+    Args:
+        nodes (list): list of all nodes from all zones
+        use_ssh (bool): if true, connect to the nodes via ssh; use oc debug
+            node otherwise
+        kubeconfig (str): file path to kubeconfig
+        zone_config (ZoneConfig): zone config with the nodes, used to check
+            zone detected on each node (optional)
+        node_limiter (AimdLimiter): concurrency limiter of node commands
+        retry_policy (RetryPolicy): retry policy of each node
+
+    Returns:
+        list: :py:class:`ocpnetsplit.doctor.NodeReport` object for each node
+    """
+    cmd_lists = doctor.get_check_cmds()
+
+    def func(node, timeout):
+        local_start = time.time()
+        results = run_node_cmds(cmd_lists, node, use_ssh, kubeconfig, timeout)
+        return results, local_start, time.time()
+
+    reports = []
+    node_results = _run_all(func, nodes, zone_config, 32, node_limiter, retry_policy, None)
+    for node_status, result in node_results:
+        report = doctor.NodeReport(node_status.node, node_status.zone)
+        if result is None:
+            report.error = node_status.error
+        else:
+            report.load(*result)
+        reports.append(report)
+    return reports
+
+
+def deploy_nodes(
+        nodes,
+        files,
+        use_ssh=True,
+        kubeconfig=None,
+        zone_config=None,
+        node_limiter=None,
+        retry_policy=None,
+        dry_run=False):
+    """
+    Deploy given files on all nodes concurrently, changing only files which
+    differ from the deployed ones, see :py:mod:`ocpnetsplit.deploy`.
+
+    Args:
+        nodes (list): list of nodes
+        files (list): :py:class:`ocpnetsplit.deploy.DeployFile` objects
+        use_ssh (bool): if true, connect to the nodes via ssh; use oc debug
+            node otherwise
+        kubeconfig (str): file path to kubeconfig
+        zone_config (ZoneConfig): zone config with the nodes (optional)
+        node_limiter (AimdLimiter): concurrency limiter of node commands
+        retry_policy (RetryPolicy): retry policy of each node
+        dry_run (bool): if true, only check which files differ
+
+    Returns:
+        list: :py:class:`ocpnetsplit.deploy.NodeDeployReport` object for each
+        node
+    """
+    state_cmds = deploy.get_state_cmds(files, deploy.get_packages(files))
+
+    def func(node, timeout):
+        start = time.monotonic()
+        report = deploy.NodeDeployReport(node)
+        report.load_state(files, run_node_cmds(state_cmds, node, use_ssh, kubeconfig, timeout))
+        if dry_run or len(report.apply_cmds) == 0:
+            return report
+        # large changes are applied in multiple sessions, so that the batch
+        # script doesn't hit the limit of a command line argument
+        for cmds in batch.split_batches(report.apply_cmds):
+            timeout = max(1, timeout - (time.monotonic() - start))
+            for result in run_node_cmds(cmds, node, use_ssh, kubeconfig, timeout):
+                result.check_returncode()
+        report.applied = True
+        return report
+
+    reports = []
+    for node_status, report in _run_all(func, nodes, zone_config, 32, node_limiter, retry_policy, None):
+        if report is None:
+            report = deploy.NodeDeployReport(node_status.node)
+            report.error = node_status.error
+        report.zone = node_status.zone
+        report.duration = node_status.duration
+        reports.append(report)
+    return reports
+
+
+def get_targets(kubeconfigs, zonefile, new_limiter):
+    """
+    Get list of all nodes (across all zones) of each cluster specified on
+    command line, each cluster has it's own concurrency limiter. When neither
+    kubeconfig nor zonefile is specified, the default cluster is used.
+
+    Args:
+        kubeconfigs (list): file paths to kubeconfig of each cluster (or
+            None)
+        zonefile (file): ini file with list of node fqdn for each zone (or
+            None), nodes of which are accessed via ssh
+        new_limiter (callable): function creating concurrency limiter of a
+            cluster
+
+    Returns:
+        list: :py:class:`ocpnetsplit.target.Target` object for each cluster
+    """
+    targets = []
+    for kubeconfig in kubeconfigs or []:
+        nodes = ocp.list_cluster_nodes(kubeconfig=kubeconfig)
+        targets.append(target.Target(kubeconfig, nodes, kubeconfig=kubeconfig, node_limiter=new_limiter()))
+    if zonefile is not None:
+        zone_config = get_zone_config_fromfile(
+                zonefile.read(), translate_hostname=False)
+        targets.append(target.Target(
+            zonefile.name, zone_config.get_nodes(), use_ssh=True, zone_config=zone_config,
+            node_limiter=new_limiter()))
+    if len(targets) == 0:
+        targets.append(target.Target(None, ocp.list_cluster_nodes(), node_limiter=new_limiter()))
+    return targets
+
+
+def record_history(path, command, started, params, **kwargs):
+    """
+    Record a run in history database (see :py:class:`ocpnetsplit.history.History`).
+    Failure to record the run is only reported, as it doesn't affect the run
+    itself.
+
+    Args:
+        path (str): path of the history database, nothing is recorded when
+            None
+        command (str): type of the run
+        started (float): unix timestamp of the run start
+        params (dict): parameters of the run
+        kwargs: other arguments of :py:meth:`ocpnetsplit.history.History.record`
+    """
+    if path is None:
+        return
+    try:
+        hist = history.History(path)
+        try:
+            hist.record(command, started, time.time(), params, **kwargs)
+        finally:
+            hist.close()
+    except (OSError, sqlite3.Error) as ex:
+        LOGGER.warning("failed to record the run in history %s: %s", path, ex)
+
+
+def print_doctor(reports, summary, latency=False):
+    """
+    Print pre-flight report in a table.
+    """
+    print(f"{'NODE':40} {'ZONE':5} {'OFFSET':>8} {'NTP':>10}  FAILED CHECKS")
+    for r in reports:
+        failed = r.error or ", ".join(f"{name}: {r.checks[name]}" for name in r.failed_checks(latency))
+        ntp_offset = "-" if r.ntp_offset is None else f"{r.ntp_offset:.6f}"
+        print(
+            f"{r.node:40} {r.detected_zone or '-':5} {_format_seconds(r.clock_offset):>8} "
+            f"{ntp_offset:>10}  {failed}")
+    ntp_skew = "-" if summary["ntp_skew"] is None else f"{summary['ntp_skew']:.6f}"
+    print(
+        f"failed nodes: {len(summary['failed_nodes'])}/{summary['nodes']}, "
+        f"clock skew: {ntp_skew} s (max {summary['max_clock_skew']:.2f} s), "
+        f"result: {'ok' if summary['ok'] else 'FAILED'}")
+
+
+def _format_seconds(value):
+    if value is None:
+        return "-"
+    return f"{value:.2f}"
+
+
+def print_rollout(tracker, now):
+    """
+    Print progress of MachineConfig rollout on a single line.
+    """
+    pools = []
+    for p in tracker.pools.values():
+        if p.target_config is None:
+            pools.append(f"{p.name} pending")
         else:
-            ocp.run_oc_debug_node(cmd_list, node, kubeconfig=kubeconfig)
+            updating = sum(
+                1 for n in tracker.nodes.values()
+                if n.pool == p.name and n.start is not None and not tracker.is_node_done(n))
+            pools.append(f"{p.name} {p.updated_count or 0}/{p.machine_count or 0} updated, {updating} updating")
+    eta = tracker.eta(now)
+    eta_str = "-" if eta is None else f"{int(eta) // 60}m{int(eta) % 60:02d}s"
+    print(f"{time.strftime('%H:%M:%S', time.localtime(now))} {'; '.join(pools)}; ETA {eta_str}", flush=True)
+
+
+def print_convergence(results):
+    """
+    Print convergence report in a table.
+    """
+    print(f"{'NODE':40} {'ZONE':5} {'RULES':>6} {'ONSET':>8} {'TEARDOWN':>9}  ERROR")
+    for r in results:
+        print(
+            f"{r.node:40} {r.zone or '-':5} {r.expected if r.expected is not None else '-':>6} "
+            f"{_format_seconds(r.onset):>8} {_format_seconds(r.teardown):>9}  {r.error or ''}")
+    summary = convergence.summarize(results)
+    print(
+        f"converged nodes: {summary['converged_nodes']}/{summary['nodes']}, "
+        f"onset convergence: {_format_seconds(summary['onset_convergence'])} s, "
+        f"teardown convergence: {_format_seconds(summary['teardown_convergence'])} s")
+
+
+def print_probes(probe_reports):
+    """
+    Print evaluated probe results in a table.
+    """
+    print(f"{'PROBE':40} {'CHECKS':>6} {'DETECT':>8} {'RECOVER':>8} {'AVAILABILITY':>12}")
+    for r in probe_reports:
+        availability = "-"
+        if r["availability_during"] is not None:
+            availability = f"{r['availability_during'] * 100:.1f}%"
+        print(
+            f"{r['probe']:40} {r['checks']:>6} {_format_seconds(r['time_to_detect']):>8} "
+            f"{_format_seconds(r['time_to_recover']):>8} {availability:>12}")
 
 
-def check_split(nodes, split_name, use_ssh=False):
+def print_split_status(results):
+    """
+    Print status of network split timers in a table, one line per timer.
+    """
+    print(f"{'NODE':40} {'ZONE':5} {'NEXT':19}  UNIT")
+    for r in results:
+        if not r.ok:
+            print(f"{r.node:40} {r.zone or '-':5} {'-':19}  {r.error}")
+            continue
+        if len(r.timers) == 0:
+            print(f"{r.node:40} {r.zone or '-':5} {'-':19}  -")
+        for timer in r.timers:
+            next_elapse = "-"
+            if timer.next_elapse is not None:
+                next_elapse = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timer.next_elapse))
+            print(f"{r.node:40} {r.zone or '-':5} {next_elapse:19}  {timer.unit}")
+
+
+def check_split(nodes, split_name, use_ssh=False, kubeconfig=None, zone_config=None, node_limiter=None):
     """
     Checks status of split via ``systemctl list-timers`` on all nodes of the
-    cluster.
+    cluster, see :py:func:`get_split_status`, and prints it in a table.
 
     Args:
         nodes (list): list of all nodes from all zones
@@ -228,29 +1052,79 @@ def check_split(nodes, split_name, use_ssh=False):
             constant
         use_ssh (bool): if true, connect to the nodes via ssh; use oc debug
             node otherwise
+        kubeconfig (str): file path to kubeconfig (used with oc debug only)
+        zone_config (ZoneConfig): zone config with the nodes, used to report
+            zone of each node (optional)
+        node_limiter (AimdLimiter): concurrency limiter of node commands, see
+            :py:func:`run_node_cmd_all`
+
+    Returns:
+        list: :py:class:`ocpnetsplit.status.NodeStatus` object for each node
 
     Raises:
         ValueError: when invalid ``split_name`` is specified
     """
-    # input validation
-    if split_name not in zone.NETWORK_SPLITS:
-        raise ValueError(f"invalid split_name specified: '{split_name}'")
-    # generate systemd timer unit pattern for list-timers
-    start_unit_pattern = f"network-split-{split_name}-setup*"
-    # check status of start timer on every node of the cluster
-    for node in nodes:
-        print(node)
-        cmd_list = ["systemctl", "list-timers", start_unit_pattern]
-        if use_ssh:
-            stdout, _ = run_ssh_node(cmd_list, node)
-        else:
-            stdout, _ = ocp.run_oc_debug_node(cmd_list, node)
-        for line in stdout.splitlines():
-            if line.startswith("Pass --all to see"):
-                continue
-            if line.endswith("timers listed."):
-                continue
-            print(line)
+    results = get_split_status(nodes, split_name, use_ssh, kubeconfig, zone_config, node_limiter)
+    print_split_status(results)
+    return results
+
+
+def get_split_status(
+        nodes,
+        split_name=None,
+        use_ssh=False,
+        kubeconfig=None,
+        zone_config=None,
+        node_limiter=None):
+    """
+    Get status of network split timers on all nodes of the cluster, parsing
+    ``systemctl list-timers`` output of each node. Nodes are processed
+    concurrently, see :py:func:`run_node_cmd_all`.
+
+    Args:
+        nodes (list): list of all nodes from all zones
+        split_name (str): network split configuration specification, eg.
+            ``ab``, see :py:const:`ocpnetsplit.zone.NETWORK_SPLITS`
+            constant, when not specified, timers of all splits are reported
+        use_ssh (bool): if true, connect to the nodes via ssh; use oc debug
+            node otherwise
+        kubeconfig (str): file path to kubeconfig
+        zone_config (ZoneConfig): zone config with the nodes, used to report
+            zone of each node (optional)
+        node_limiter (AimdLimiter): concurrency limiter of node commands, see
+            :py:func:`run_node_cmd_all`
+
+    Returns:
+        list: :py:class:`ocpnetsplit.status.NodeStatus` object for each node,
+        failure to get status of a node is reported via it's ``error``
+        attribute
+
+    Raises:
+        ValueError: when invalid ``split_name`` is specified
+    """
+    if split_name is None:
+        patterns = ["network-split-*-setup*", "network-split-teardown*", "network-latency-*"]
+    else:
+        split_name = zone.normalize_split(split_name)
+        patterns = [f"network-split-{split_name}-setup*", "network-split-teardown*"]
+    cmd_list = status.list_timers_cmd(patterns)
+    if node_limiter is None:
+        node_limiter = limiter.AimdLimiter()
+
+    def run(node):
+        node_status = status.NodeStatus(node, _get_node_zone(zone_config, node))
+        start = time.monotonic()
+        try:
+            with node_limiter.slot(node_status.zone):
+                stdout, _ = run_node_cmd(cmd_list, node, use_ssh, kubeconfig)
+            node_status.timers = status.parse_list_timers(stdout)
+        except (subprocess.SubprocessError, ValueError) as ex:
+            LOGGER.warning("failed to get timers of node %s: %s", node, ex)
+            node_status.error = str(ex)
+        node_status.duration = time.monotonic() - start
+        return node_status
+
+    return _map_nodes(run, nodes, zone_config, node_limiter.maximum)
 
 
 def main_setup():
@@ -278,6 +1152,11 @@ def main_setup():
         type=argparse.FileType("w"),
         default=sys.stdout,
         help="name of yaml file with MachineConfig to deploy on OCP cluster")
+    ap.add_argument(
+        "--output-format",
+        choices=serialize.OUTPUT_FORMATS,
+        default="yaml",
+        help="format of MachineConfig output, json is a single List object")
     ap.add_argument(
         "-a",
         "--zone-a",
@@ -299,6 +1178,13 @@ def main_setup():
         metavar="LABEL",
         required=True,
         help="topology.kubernetes.io/zone label of zone c")
+    ap.add_argument(
+        "--zone",
+        dest="zones",
+        metavar="ZONE=LABEL",
+        action="append",
+        default=[],
+        help="topology.kubernetes.io/zone label of additional zone d-w, y or z, eg. d=data-3")
     ap.add_argument(
         "--zone-x-addrs",
         dest="x_addrs",
@@ -325,6 +1211,12 @@ def main_setup():
         nargs="*",
         type=str,
         help='network latency in ms among given zones, eg. "ab=10 ac=25"')
+    ap.add_argument(
+        "--datapath",
+        choices=machineconfig.DATAPATHS,
+        default="iptables",
+        help=("how split and latency scripts match addresses of zone nodes, "
+              "tc uses hash table lookup with per zone verdicts"))
     ap.add_argument(
         "--debug",
         action="store_true",
@@ -334,6 +1226,11 @@ def main_setup():
     if args.debug:
         logging.basicConfig(level=logging.DEBUG)
 
+    try:
+        zone_labels = zone.parse_zone_labels(args.zones)
+    except ValueError as ex:
+        ap.error(str(ex))
+
     # get node ip addresses of each zone via zone config
     if args.x_addrs is not None:
         addr_list = args.x_addrs.split(",")
@@ -349,7 +1246,7 @@ def main_setup():
             print(err_msg, file=sys.stderr)
             return 1
     else:
-        zone_config = get_zone_config(args.a, args.b, args.c, addr_list)
+        zone_config = get_zone_config(args.a, args.b, args.c, addr_list, zone_labels=zone_labels)
         zone_env = zone_config.get_env_file()
         if args.print_env_only:
             print(zone_env)
@@ -358,7 +1255,11 @@ def main_setup():
     # get zone latency spec object if latency_spec was specified via argument
     if args.latency_spec is not None:
         latency_spec = zone.ZoneLatSpec()
-        latency_spec.load_arguments(args.latency_spec)
+        try:
+            latency_spec.load_arguments(args.latency_spec)
+            latency_spec.validate_classes(args.latency)
+        except ValueError as ex:
+            ap.error(str(ex))
     else:
         latency_spec = None
 
@@ -367,8 +1268,9 @@ def main_setup():
             zone_env,
             split=(not args.no_split),
             latency=args.latency,
-            latency_spec=latency_spec)
-    args.output.write(yaml.dump_all(mc))
+            latency_spec=latency_spec,
+            datapath=args.datapath)
+    args.output.write(serialize.dump_objects(mc, args.output_format))
 
 
 def main_multisetup():
@@ -386,13 +1288,18 @@ def main_multisetup():
     ap.add_argument(
         "zonefile",
         type=argparse.FileType("r"),
-        help="ini file with list of node fqdn for each zone a, b and c")
+        help="ini file with list of node fqdn for each zone (a, b, c and optionally other zones)")
     ap.add_argument(
         "--mc",
         metavar="FILE",
         required=True,
         type=argparse.FileType("w"),
         help="name of an output yaml file with MachineConfig entries")
+    ap.add_argument(
+        "--output-format",
+        choices=serialize.OUTPUT_FORMATS,
+        default="yaml",
+        help="format of MachineConfig output, json is a single List object")
     ap.add_argument(
         "--env",
         metavar="FILE",
@@ -415,6 +1322,12 @@ def main_multisetup():
         nargs="*",
         type=str,
         help='network latency in ms among given zones, eg. "ab=10 ac=25"')
+    ap.add_argument(
+        "--datapath",
+        choices=machineconfig.DATAPATHS,
+        default="iptables",
+        help=("how split and latency scripts match addresses of zone nodes, "
+              "tc uses hash table lookup with per zone verdicts"))
     ap.add_argument(
         "--debug",
         action="store_true",
@@ -437,7 +1350,11 @@ def main_multisetup():
     # get zone latency spec object if latency_spec was specified via argument
     if args.latency_spec is not None:
         latency_spec = zone.ZoneLatSpec()
-        latency_spec.load_arguments(args.latency_spec)
+        try:
+            latency_spec.load_arguments(args.latency_spec)
+            latency_spec.validate_classes(args.latency)
+        except ValueError as ex:
+            ap.error(str(ex))
     else:
         latency_spec = None
 
@@ -446,8 +1363,9 @@ def main_multisetup():
             zone_env,
             split=(not args.no_split),
             latency=args.latency,
-            latency_spec=latency_spec)
-    args.mc.write(yaml.dump_all(mc))
+            latency_spec=latency_spec,
+            datapath=args.datapath)
+    args.mc.write(serialize.dump_objects(mc, args.output_format))
 
 
 def main_sched():
@@ -458,16 +1376,32 @@ def main_sched():
 
          $ ocp-network-split-sched ab-bc -t 2021-03-18T18:45 --split-len 30
          $ ocp-network-split-sched ab-bc
+         $ ocp-network-split-sched --scenario scenario.yaml -t 2021-03-18T18:45
+         $ ocp-network-split-sched --cancel
+         $ ocp-network-split-sched ab -t 2021-03-18T18:45 --kubeconfig c1 --kubeconfig c2 --zonefile zones.ini
     """
     ap = argparse.ArgumentParser(description="network split scheduler")
     ap.add_argument(
         "split_name",
-        choices=zone.NETWORK_SPLITS,
-        help="which split configuration to schedule")
+        nargs="?",
+        help=(
+            "which split configuration to schedule, either one of "
+            f"{', '.join(zone.NETWORK_SPLITS)}, or any other list of "
+            "zone tuples, eg. ac-bx"))
+    ap.add_argument(
+        "--scenario",
+        metavar="FILE",
+        type=argparse.FileType("r"),
+        help="yaml file with timeline of network splits and latency changes")
     ap.add_argument(
         "-t",
         "--timestamp",
         help="moment when to schedule the network split (in ISO format)")
+    ap.add_argument(
+        "--cancel",
+        action="store_true",
+        default=False,
+        help="stop all scheduled network splits (and the active one) on all nodes")
     ap.add_argument(
         "--split-len",
         metavar="MIN",
@@ -480,27 +1414,202 @@ def main_sched():
         help=("ini file with list of node fqdn for each zone, "
               "will use ssh instead of `oc debug` when specified"))
     ap.add_argument(
-        "-d",
-        "--debug",
+        "--kubeconfig",
+        metavar="FILE",
+        action="append",
+        help=("kubeconfig of OCP cluster to use (could be used multiple times, "
+              "and along with --zonefile, to cover multiple clusters at once)"))
+    ap.add_argument(
+        "--watch",
         action="store_true",
-        help="set log level to DEBUG")
+        default=False,
+        help="wait till the split is over and report when it's rules were active on each node")
+    ap.add_argument(
+        "--watch-interval",
+        metavar="SEC",
+        default=0.2,
+        type=float,
+        help="sampling interval of split rules on the nodes for --watch option")
+    ap.add_argument(
+        "--probe",
+        metavar="PROBE",
+        action="append",
+        help=("check availability of a service during the split, either "
+              "http(s)://host:port/path, tcp:host:port or cmd:command "
+              "(could be used multiple times)"))
+    ap.add_argument(
+        "--probe-interval",
+        metavar="SEC",
+        default=0.1,
+        type=float,
+        help="time between two checks of a probe")
+    ap.add_argument(
+        "--probe-timeout",
+        metavar="SEC",
+        default=1.0,
+        type=float,
+        help="timeout of a single check of a probe")
+    ap.add_argument(
+        "--probe-tail",
+        metavar="SEC",
+        default=60,
+        type=int,
+        help="how long to keep probing after the split stops")
+    ap.add_argument(
+        "--max-concurrency",
+        metavar="N",
+        default=32,
+        type=int,
+        help="max number of nodes processed at the same time")
+    ap.add_argument(
+        "--zone-concurrency",
+        metavar="N",
+        type=int,
+        help="max number of nodes of a single zone processed at the same time")
+    ap.add_argument(
+        "--preflight",
+        action="store_true",
+        default=False,
+        help="run pre-flight checks of all nodes first, and don't schedule when they fail")
+    ap.add_argument(
+        "--max-clock-skew",
+        metavar="SEC",
+        type=float,
+        help="max clock skew of nodes accepted by --preflight (1%% of the split length by default)")
+    ap.add_argument(
+        "--verify",
+        action="store_true",
+        default=False,
+        help="check that the timers are armed and measure clock offset of each node when scheduling")
+    ap.add_argument(
+        "--retries",
+        metavar="N",
+        default=2,
+        type=int,
+        help="max number of retries of a failed command on a node")
+    ap.add_argument(
+        "--hedge",
+        action="store_true",
+        default=False,
+        help=("run a command on a node once more when it's slower than 95th "
+              "percentile of other nodes, and use the faster result"))
+    ap.add_argument(
+        "--output",
+        choices=("text", "json"),
+        default="text",
+        help="output format, json reports structured result for each node")
+    ap.add_argument(
+        "--history",
+        metavar="FILE",
+        default=history.get_default_path(),
+        help="sqlite database to record the run in (default: %(default)s)")
+    ap.add_argument(
+        "--no-history",
+        dest="history",
+        action="store_const",
+        const=None,
+        help="don't record the run in the history")
+    ap.add_argument(
+        "-d",
+        "--debug",
+        action="store_true",
+        help="set log level to DEBUG")
     args = ap.parse_args()
 
     if args.debug:
         logging.basicConfig(level=logging.DEBUG)
 
-    # get list of all nodes (across all zones)
-    if args.zonefile is not None:
-        zone_config = get_zone_config_fromfile(
-                args.zonefile.read(), translate_hostname=False)
-        nodes = zone_config.get_nodes()
-        use_ssh = True
+    started = time.time()
+
+    def new_limiter():
+        return limiter.AimdLimiter(
+            initial=min(4, args.max_concurrency),
+            maximum=args.max_concurrency,
+            zone_limit=args.zone_concurrency)
+
+    try:
+        # validate the concurrency limits before talking to any cluster
+        new_limiter()
+        retry_policy = retry.RetryPolicy(attempts=args.retries + 1, hedge=args.hedge)
+    except ValueError as ex:
+        ap.error(str(ex))
+
+    if args.cancel:
+        if args.split_name is not None or args.scenario is not None or args.timestamp is not None:
+            ap.error("--cancel option can't be used with split_name, --scenario or --timestamp")
+        if args.watch or args.probe is not None:
+            ap.error("--cancel option can't be used with --watch or --probe options")
+    elif args.scenario is not None:
+        if args.split_name is not None:
+            ap.error("split_name can't be used with --scenario option")
+        if args.timestamp is None:
+            ap.error("--timestamp is required with --scenario option")
+        if args.watch:
+            ap.error("--watch option can't be used with --scenario option")
+        scen = scenario.Scenario()
+        try:
+            scen.load_yaml(args.scenario.read())
+        except (ValueError, yaml.YAMLError) as ex:
+            print(f"invalid scenario: {ex}", file=sys.stderr)
+            return 1
+    elif args.split_name is None:
+        ap.error("either split_name or --scenario option is required")
     else:
-        nodes = ocp.list_cluster_nodes()
-        use_ssh = False
+        try:
+            args.split_name = zone.normalize_split(args.split_name)
+        except ValueError as ex:
+            ap.error(str(ex))
+
+    probes = None
+    if args.probe is not None:
+        if args.timestamp is None:
+            ap.error("--timestamp is required with --probe option")
+        try:
+            probes = [probe.parse_probe(spec, args.probe_timeout) for spec in args.probe]
+        except ValueError as ex:
+            ap.error(str(ex))
+
+    targets = get_targets(args.kubeconfig, args.zonefile, new_limiter)
+
+    params = {
+        "split_len": args.split_len,
+        "targets": [tgt.name for tgt in targets],
+        "timestamp": args.timestamp,
+        "verify": args.verify,
+        "watch": args.watch,
+        "probes": args.probe or [],
+        "max_concurrency": args.max_concurrency,
+        "zone_concurrency": args.zone_concurrency,
+        "retries": args.retries,
+        "hedge": args.hedge,
+    }
+    split = args.split_name if args.scenario is None else args.scenario.name
+
+    if args.cancel:
+        results = target.map_targets(
+            lambda tgt: cancel_split(tgt.nodes, retry_policy=retry_policy, **tgt.get_kwargs()),
+            targets)
+        record_history(
+            args.history, "cancel", started, params, nodes=[r.to_dict() for r in results])
+        if args.output == "json":
+            print(json.dumps([r.to_dict() for r in results], indent=2))
+        else:
+            for r in results:
+                print(f"{r.node:40} {'ok' if r.ok else r.error}")
+        if not all(r.ok for r in results):
+            return 1
+        return
 
     if args.timestamp is None:
-        check_split(nodes, args.split_name, use_ssh)
+        results = target.map_targets(
+            lambda tgt: get_split_status(tgt.nodes, args.split_name, **tgt.get_kwargs()),
+            targets)
+        record_history(
+            args.history, "status", started, params, split=split, nodes=[r.to_dict() for r in results])
+        if args.output == "json":
+            print(json.dumps([r.to_dict() for r in results], indent=2))
+        else:
+            print_split_status(results)
         return
 
     try:
@@ -509,4 +1618,588 @@ def main_sched():
         print(ex)
         return 1
 
-    schedule_split(nodes, args.split_name, start_dt, args.split_len, use_ssh)
+    if args.preflight:
+        if args.scenario is not None:
+            latency = scen.has_latency()
+            length = scen.get_length()
+        else:
+            latency = False
+            length = args.split_len
+        max_skew = args.max_clock_skew
+        if max_skew is None:
+            max_skew = doctor.max_clock_skew(length)
+        reports = target.map_targets(
+            lambda tgt: run_doctor(tgt.nodes, retry_policy=retry_policy, **tgt.get_kwargs()),
+            targets)
+        summary = doctor.summarize(reports, max_skew, latency)
+        record_history(
+            args.history, "preflight", started, params, split=split,
+            nodes=[dict(r.to_dict(), ok=r.ok(latency)) for r in reports])
+        if not summary["ok"]:
+            print_doctor(reports, summary, latency)
+            print("pre-flight checks failed, not scheduling", file=sys.stderr)
+            return 1
+
+    sched_started = time.time()
+    try:
+        if args.scenario is not None:
+            results = schedule_scenario_targets(
+                targets, scen, start_dt, retry_policy=retry_policy, verify=args.verify)
+        else:
+            results = schedule_split_targets(
+                targets, args.split_name, start_dt, args.split_len, retry_policy=retry_policy,
+                verify=args.verify)
+    except (subprocess.SubprocessError, ValueError):
+        record_history(args.history, "schedule", sched_started, params, split=split, ok=False)
+        raise
+    sched_nodes = [r.to_dict() for r in results]
+    if not args.watch and probes is None:
+        record_history(args.history, "schedule", sched_started, params, split=split, nodes=sched_nodes)
+        if args.output == "json":
+            print(json.dumps([r.to_dict() for r in results], indent=2))
+        elif args.verify:
+            for r in results:
+                print(
+                    f"{r.node:40} {len(r.armed_timers)} timers armed, "
+                    f"clock offset {_format_seconds(r.clock_offset)} s")
+        return
+
+    start_ts = int(start_dt.timestamp())
+    if args.scenario is not None:
+        stop_ts = start_ts + scen.get_length() * 60
+    else:
+        stop_ts = start_ts + args.split_len * 60
+    lead = 10
+    report = {}
+    if args.watch:
+        target.map_targets(
+            lambda tgt: arm_split_watch(
+                tgt.nodes, args.split_name, start_ts, stop_ts, interval=args.watch_interval, lead=lead,
+                retry_policy=retry_policy, **tgt.get_kwargs()),
+            targets)
+    if probes is not None:
+        # start probing shortly before the split starts
+        time.sleep(max(0, start_ts - lead - time.time()))
+        probe_results = probe.run_probes(probes, stop_ts + args.probe_tail, args.probe_interval)
+        report["probes"] = [r.to_dict(start_ts, stop_ts) for r in probe_results]
+    if args.watch:
+        # wait for the samplers to finish
+        time.sleep(max(0, stop_ts + lead + 1 - time.time()))
+        conv_results = target.map_targets(
+            lambda tgt: collect_split_watch(
+                tgt.nodes, start_ts, stop_ts, retry_policy=retry_policy, **tgt.get_kwargs()),
+            targets)
+        report["convergence"] = {
+            "nodes": [r.to_dict() for r in conv_results],
+            "summary": convergence.summarize(conv_results),
+        }
+    record_history(
+        args.history, "schedule", sched_started, params, split=split, nodes=sched_nodes,
+        convergence=report.get("convergence", {}).get("nodes", []), probes=report.get("probes", []))
+    if args.output == "json":
+        print(json.dumps(report, indent=2))
+        return
+    if probes is not None:
+        print_probes(report["probes"])
+    if args.watch:
+        print_convergence(conv_results)
+
+
+def main_doctor():
+    """
+    Command line interface of pre-flight checks of all cluster nodes.
+
+    Example usage::
+
+         $ ocp-network-split-doctor --split-len 30
+         $ ocp-network-split-doctor --zonefile zones.ini --latency
+         $ ocp-network-split-doctor --kubeconfig c1/auth/kubeconfig --kubeconfig c2/auth/kubeconfig
+    """
+    ap = argparse.ArgumentParser(description="network split pre-flight checks")
+    ap.add_argument(
+        "--zonefile",
+        type=argparse.FileType("r"),
+        help=("ini file with list of node fqdn for each zone, "
+              "will use ssh instead of `oc debug` when specified"))
+    ap.add_argument(
+        "--kubeconfig",
+        metavar="FILE",
+        action="append",
+        help=("kubeconfig of OCP cluster to use (could be used multiple times, "
+              "and along with --zonefile, to cover multiple clusters at once)"))
+    ap.add_argument(
+        "--latency",
+        action="store_true",
+        default=False,
+        help="check requirements of network latency as well")
+    ap.add_argument(
+        "--split-len",
+        metavar="MIN",
+        default=15,
+        type=int,
+        help="length of planned network split (in minutes), used to compute max clock skew")
+    ap.add_argument(
+        "--max-clock-skew",
+        metavar="SEC",
+        type=float,
+        help="max acceptable clock skew of nodes (1%% of the split length by default)")
+    ap.add_argument(
+        "--max-concurrency",
+        metavar="N",
+        default=32,
+        type=int,
+        help="max number of nodes processed at the same time")
+    ap.add_argument(
+        "--output",
+        choices=("text", "json"),
+        default="text",
+        help="output format")
+    ap.add_argument(
+        "--history",
+        metavar="FILE",
+        default=history.get_default_path(),
+        help="sqlite database to record the run in (default: %(default)s)")
+    ap.add_argument(
+        "--no-history",
+        dest="history",
+        action="store_const",
+        const=None,
+        help="don't record the run in the history")
+    ap.add_argument(
+        "-d",
+        "--debug",
+        action="store_true",
+        help="set log level to DEBUG")
+    args = ap.parse_args()
+
+    if args.debug:
+        logging.basicConfig(level=logging.DEBUG)
+
+    started = time.time()
+
+    def new_limiter():
+        return limiter.AimdLimiter(
+            initial=min(4, args.max_concurrency), maximum=args.max_concurrency)
+
+    try:
+        # validate the concurrency limit before talking to any cluster
+        new_limiter()
+    except ValueError as ex:
+        ap.error(str(ex))
+    max_skew = args.max_clock_skew
+    if max_skew is None:
+        max_skew = doctor.max_clock_skew(args.split_len)
+
+    targets = get_targets(args.kubeconfig, args.zonefile, new_limiter)
+    params = {
+        "split_len": args.split_len,
+        "targets": [tgt.name for tgt in targets],
+        "latency": args.latency,
+        "max_clock_skew": max_skew,
+        "max_concurrency": args.max_concurrency,
+    }
+    reports = target.map_targets(lambda tgt: run_doctor(tgt.nodes, **tgt.get_kwargs()), targets)
+    summary = doctor.summarize(reports, max_skew, args.latency)
+    record_history(
+        args.history, "preflight", started, params,
+        nodes=[dict(r.to_dict(), ok=r.ok(args.latency)) for r in reports])
+    if args.output == "json":
+        print(json.dumps({"nodes": [r.to_dict() for r in reports], "summary": summary}, indent=2))
+    else:
+        print_doctor(reports, summary, args.latency)
+    if not summary["ok"]:
+        return 1
+
+
+def main_deploy():
+    """
+    Command line interface to deploy network split scripts, units and zone env
+    file (as created by ``ocp-network-split-multisetup``) on all hosts which
+    are not part of any OCP cluster.
+
+    Example usage::
+
+         $ ocp-network-split-deploy ceph.hosts --env network-split.env
+         $ ocp-network-split-deploy ceph.hosts --env network-split.env --latency 5 --dry-run
+    """
+    ap = argparse.ArgumentParser(description="multi cluster network split deployer")
+    ap.add_argument(
+        "inventory",
+        type=argparse.FileType("r"),
+        help="ansible inventory like ini file with hosts to deploy on (via ssh)")
+    ap.add_argument(
+        "--env",
+        metavar="FILE",
+        required=True,
+        type=argparse.FileType("r"),
+        help="env file with zone configuration created by ocp-network-split-multisetup")
+    ap.add_argument(
+        "--no-split",
+        action="store_true",
+        default=False,
+        help="don't deploy netsplit scripts and units")
+    ap.add_argument(
+        "--latency",
+        "-l",
+        default=0,
+        type=int,
+        help="default network latency in ms to be created among zones")
+    ap.add_argument(
+        "--latency-spec",
+        nargs="*",
+        type=str,
+        help='network latency in ms among given zones, eg. "ab=10 ac=25"')
+    ap.add_argument(
+        "--datapath",
+        choices=machineconfig.DATAPATHS,
+        default="iptables",
+        help=("how split and latency scripts match addresses of zone nodes, "
+              "tc uses hash table lookup with per zone verdicts"))
+    ap.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only report which hosts would be changed")
+    ap.add_argument(
+        "--max-concurrency",
+        metavar="N",
+        default=32,
+        type=int,
+        help="max number of hosts processed at the same time")
+    ap.add_argument(
+        "--retries",
+        metavar="N",
+        default=2,
+        type=int,
+        help="number of retries of a failed host")
+    ap.add_argument(
+        "--output",
+        choices=("text", "json"),
+        default="text",
+        help="output format")
+    ap.add_argument(
+        "-d",
+        "--debug",
+        action="store_true",
+        help="set log level to DEBUG")
+    args = ap.parse_args()
+
+    if args.debug:
+        logging.basicConfig(level=logging.DEBUG)
+
+    try:
+        node_limiter = limiter.AimdLimiter(
+            initial=min(4, args.max_concurrency), maximum=args.max_concurrency)
+        retry_policy = retry.RetryPolicy(attempts=args.retries + 1)
+        zone_env = args.env.read()
+        zone.ZoneConfig().load_env_file(zone_env)
+    except ValueError as ex:
+        ap.error(str(ex))
+    if args.latency_spec is not None:
+        latency_spec = zone.ZoneLatSpec()
+        try:
+            latency_spec.load_arguments(args.latency_spec)
+            latency_spec.validate_classes(args.latency)
+        except ValueError as ex:
+            ap.error(str(ex))
+    else:
+        latency_spec = None
+
+    mc = get_networksplit_mc_spec(
+            zone_env,
+            split=(not args.no_split),
+            latency=args.latency,
+            latency_spec=latency_spec,
+            datapath=args.datapath)
+    files = deploy.get_deploy_files(mc)
+    nodes = deploy.parse_inventory(args.inventory.read())
+    reports = deploy_nodes(
+        nodes, files, node_limiter=node_limiter, retry_policy=retry_policy, dry_run=args.dry_run)
+    if args.output == "json":
+        print(json.dumps([r.to_dict() for r in reports], indent=2))
+    else:
+        for r in reports:
+            if r.error is not None:
+                result = f"FAILED: {r.error}"
+            elif len(r.apply_cmds) == 0:
+                result = "up to date"
+            else:
+                action = "changed" if r.applied else "would change"
+                result = f"{action} {len(r.changed)} files"
+                if len(r.missing_packages) > 0:
+                    result += ", packages: " + " ".join(r.missing_packages)
+            print(f"{r.node:40} {result}")
+    if any(r.error is not None for r in reports):
+        return 1
+
+
+def main_rollout():
+    """
+    Command line interface to apply MachineConfig yaml (as created by
+    ``ocp-network-split-setup``) and wait until it's rolled out on all nodes
+    of the cluster.
+
+    Example usage::
+
+         $ ocp-network-split-setup -a arbiter -b d1 -c d2 -o mc.yaml
+         $ ocp-network-split-rollout mc.yaml --max-unavailable 2
+    """
+    ap = argparse.ArgumentParser(description="network split MachineConfig rollout")
+    ap.add_argument(
+        "mc",
+        type=argparse.FileType("r"),
+        help="yaml (or json) file with MachineConfig to deploy on OCP cluster")
+    ap.add_argument(
+        "--kubeconfig",
+        metavar="FILE",
+        help="kubeconfig of OCP cluster to use")
+    ap.add_argument(
+        "--max-unavailable",
+        metavar="N",
+        type=int,
+        help=("max number of worker nodes updated at the same time during the rollout, "
+              "the original value is restored afterwards"))
+    ap.add_argument(
+        "--timeout",
+        metavar="MIN",
+        default=120,
+        type=int,
+        help="max duration of the rollout (in minutes)")
+    ap.add_argument(
+        "--output",
+        choices=("text", "json"),
+        default="text",
+        help="output format")
+    ap.add_argument(
+        "-d",
+        "--debug",
+        action="store_true",
+        help="set log level to DEBUG")
+    args = ap.parse_args()
+
+    if args.debug:
+        logging.basicConfig(level=logging.DEBUG)
+    if args.max_unavailable is not None and args.max_unavailable < 1:
+        ap.error(f"invalid max unavailable value: {args.max_unavailable}")
+
+    mc_yaml = args.mc.read()
+    mc = serialize.load_objects(mc_yaml)
+    progress = print_rollout if args.output == "text" else None
+    try:
+        tracker = rollout.run_rollout(
+            mc, mc_yaml, args.kubeconfig, args.max_unavailable, args.timeout * 60, progress)
+    except subprocess.SubprocessError as ex:
+        print(f"rollout failed: {ex}", file=sys.stderr)
+        return 1
+    if args.output == "json":
+        print(json.dumps(tracker.to_dict(), indent=2))
+    else:
+        for n in sorted(tracker.nodes.values(), key=lambda n: n.node):
+            print(f"{n.node:40} {n.pool:8} {_format_seconds(n.duration):>8}")
+        if len(tracker.pools) == 0:
+            print("no MachineConfig changed")
+    for pool, message in tracker.degraded.items():
+        print(f"pool {pool} is degraded: {message}", file=sys.stderr)
+    if not tracker.done:
+        if len(tracker.degraded) == 0:
+            print("rollout timed out", file=sys.stderr)
+        return 1
+
+
+def main_history():
+    """
+    Command line interface to query history of ``ocp-network-split-sched``
+    runs.
+
+    Example usage::
+
+         $ ocp-network-split-history
+         $ ocp-network-split-history --command preflight --last 10
+         $ ocp-network-split-history --runs
+    """
+    ap = argparse.ArgumentParser(description="network split run history")
+    ap.add_argument(
+        "--history",
+        metavar="FILE",
+        default=history.get_default_path(),
+        help="sqlite database with the history (default: %(default)s)")
+    ap.add_argument(
+        "--command",
+        choices=("schedule", "status", "cancel", "preflight"),
+        default="schedule",
+        help="type of the runs to summarize")
+    ap.add_argument(
+        "--last",
+        metavar="N",
+        default=30,
+        type=int,
+        help="number of the most recent runs to summarize")
+    ap.add_argument(
+        "--runs",
+        action="store_true",
+        default=False,
+        help="list the runs instead of summary of each cluster")
+    ap.add_argument(
+        "--output",
+        choices=("text", "json"),
+        default="text",
+        help="output format")
+    args = ap.parse_args()
+
+    if args.last < 1:
+        ap.error(f"invalid number of runs: {args.last}")
+    if not os.path.exists(args.history):
+        print(f"no history found in {args.history}", file=sys.stderr)
+        return 1
+    hist = history.History(args.history)
+    try:
+        if args.runs:
+            result = hist.get_runs(args.command, args.last)
+        else:
+            result = hist.summarize(args.command, args.last)
+    finally:
+        hist.close()
+    if args.output == "json":
+        print(json.dumps(result, indent=2))
+    elif args.runs:
+        for run in result:
+            started = datetime.fromtimestamp(run["started"]).isoformat(timespec="seconds")
+            print(
+                f"{started:20} {run['split'] or '-':20} {run['nodes']:4} nodes "
+                f"{run['failed_nodes']:4} failed {_format_seconds(run['duration']):>8} s "
+                f"{'ok' if run['ok'] else 'FAILED'}")
+    else:
+        for c in result:
+            change = "-" if c["dispatch_p95_change"] is None else f"{c['dispatch_p95_change']:.2f}x"
+            print(
+                f"{c['cluster']:40} {c['runs']:3} runs, failures {c['failure_rate']:6.1%}, "
+                f"dispatch p50 {_format_seconds(c['dispatch_p50'])} s "
+                f"p95 {_format_seconds(c['dispatch_p95'])} s ({change}), "
+                f"onset skew p95 {_format_seconds(c['onset_skew_p95'])} s")
+
+
+def main_controller():
+    """
+    Command line interface of a long running controller, which watches
+    cluster nodes and updates zone configuration on the nodes when zone
+    membership of nodes changes.
+
+    Example usage::
+
+         $ ocp-network-split-controller -a arbiter -b data-1 -c data-2
+    """
+    ap = argparse.ArgumentParser(description="network split zone controller")
+    ap.add_argument(
+        "-a",
+        "--zone-a",
+        dest="a",
+        metavar="LABEL",
+        required=True,
+        help="topology.kubernetes.io/zone label of zone a")
+    ap.add_argument(
+        "-b",
+        "--zone-b",
+        dest="b",
+        metavar="LABEL",
+        required=True,
+        help="topology.kubernetes.io/zone label of zone b")
+    ap.add_argument(
+        "-c",
+        "--zone-c",
+        dest="c",
+        metavar="LABEL",
+        required=True,
+        help="topology.kubernetes.io/zone label of zone c")
+    ap.add_argument(
+        "--zone",
+        dest="zones",
+        metavar="ZONE=LABEL",
+        action="append",
+        default=[],
+        help="topology.kubernetes.io/zone label of additional zone d-w, y or z, eg. d=data-3")
+    ap.add_argument(
+        "--zone-x-addrs",
+        dest="x_addrs",
+        metavar="IP_ADDRS",
+        help="comma separated list of IP addresses of external services")
+    ap.add_argument(
+        "--env",
+        metavar="FILE",
+        type=argparse.FileType("r"),
+        help="env file with zone config deployed on the nodes, used as a baseline")
+    ap.add_argument(
+        "--kubeconfig",
+        metavar="FILE",
+        help="kubeconfig of OCP cluster to use")
+    ap.add_argument(
+        "--debounce",
+        metavar="SEC",
+        default=5,
+        type=int,
+        help="how long to wait for more node changes before pushing them")
+    ap.add_argument(
+        "--max-concurrency",
+        metavar="N",
+        default=32,
+        type=int,
+        help="max number of nodes updated at the same time")
+    ap.add_argument(
+        "--retries",
+        metavar="N",
+        default=2,
+        type=int,
+        help="number of retries of a failed node update")
+    ap.add_argument(
+        "--dry-run",
+        action="store_true",
+        default=False,
+        help="just log changes which would be pushed to the nodes")
+    ap.add_argument(
+        "--debug",
+        action="store_true",
+        help="set log level to DEBUG")
+    args = ap.parse_args()
+
+    if args.debug:
+        logging.basicConfig(level=logging.DEBUG)
+    else:
+        logging.basicConfig(level=logging.INFO)
+
+    if args.x_addrs is not None:
+        addr_list = args.x_addrs.split(",")
+    else:
+        addr_list = None
+
+    baseline = None
+    if args.env is not None:
+        baseline = zone.ZoneConfig()
+        baseline.load_env_file(args.env.read())
+
+    zone_labels = {"a": args.a, "b": args.b, "c": args.c}
+    try:
+        zone_labels.update(zone.parse_zone_labels(args.zones))
+        node_limiter = limiter.AimdLimiter(
+            initial=min(4, args.max_concurrency), maximum=args.max_concurrency)
+        retry_policy = retry.RetryPolicy(attempts=args.retries + 1, timeout=controller.PUSH_TIMEOUT)
+    except ValueError as ex:
+        ap.error(str(ex))
+
+    def run_all(cmd_list, nodes, zone_config):
+        return run_node_cmd_all(
+            cmd_list,
+            nodes,
+            kubeconfig=args.kubeconfig,
+            zone_config=zone_config,
+            node_limiter=node_limiter,
+            retry_policy=retry_policy)
+
+    zone_ctl = controller.ZoneController(
+        zone_labels,
+        zone_x_addrs=addr_list,
+        kubeconfig=args.kubeconfig,
+        dry_run=args.dry_run,
+        baseline=baseline,
+        run_all=run_all)
+    try:
+        zone_ctl.run(debounce=args.debounce)
+    except KeyboardInterrupt:
+        return
@@ -16,9 +16,12 @@
 
 show_help()
 {
-  echo "Configure egress network latency via netem qdisc for a 3 zone cluster"
+  echo "Configure egress network latency via netem qdisc among cluster zones"
   echo
   echo "Usage: $(basename "${0}") [-d] [-l LATSPEC] <default latency|teardown>"
+  echo "       $(basename "${0}") [-d] update <change>..."
+  echo "       $(basename "${0}") [-d] reapply"
+  echo "       $(basename "${0}") [-d] profile <start timestamp> <step>..."
   echo
   echo "Where 'LATSPEC' defines specific latency between particular zones."
   echo "Eg.: 'ac=20' will set 20ms latency between zones a and c, while the"
@@ -31,15 +34,115 @@ show_help()
   echo current root qdisc is removed which will remove any latency previously
   echo configured by this tool.
   echo
+  echo "Update command adds or removes classifiers of addresses which zone"
+  echo "membership changed while the latency is configured, each change adds"
+  echo "(+=) or removes (-=) an address of a zone, eg. 'b+=198.51.100.7'."
+  echo
+  echo "Reapply command sets up the latency configured last time once again,"
+  echo "using the current zone configuration, eg. when zone of the node itself"
+  echo "changed."
+  echo
+  echo "Profile command applies latency which changes over time. Each step"
+  echo "'OFFSET:LATENCY[:ZONES=LATENCY]...' defines the default and zone specific"
+  echo "latency since OFFSET seconds after the start unix timestamp, eg."
+  echo "'60:20:ab=30'. Latency of the first step is set up right away, the"
+  echo "command then waits for the other steps and changes delay of the netem"
+  echo "qdiscs in place. Zone specific latency has to be specified for the same"
+  echo "zone pairs in all steps."
+  echo
+  echo "Zones a, b and c could be accompanied by other zones d-w, y and z, when"
+  echo "the cluster has more failure domains. A node creates netem qdisc for"
+  echo "each distinct latency value from it's zone only (at most 13 of them),"
+  echo "no matter how many zones or zone pairs there are."
+  echo
+  echo "When NETWORK_SPLIT_DATAPATH environment variable is set to 'tc', packets"
+  echo "are classified via zone lookup hash table (see network-zone-tc.sh)"
+  echo "instead of one u32 filter per address."
+  echo
   echo "Examples: $(basename "${0}") -l ab=25 -l ac=25 5"
 }
 
+# run tc batch commands from stdin (or just print them in debug mode)
+tc_batch()
+{
+  if [[ -n $DEBUG_MODE ]]; then
+    sed 's/^/tc /'
+  else
+    tc -batch -
+  fi
+}
+
 tc_show()
 {
   $DEBUG_MODE tc qdisc show dev "${iface}"
   $DEBUG_MODE tc class show dev "${iface}"
 }
 
+# print zone pair in the form used as a key of latspec, eg. 'ba' -> 'AB'
+zone_pair()
+{
+  echo "$1" | tr '[:lower:]' '[:upper:]' | grep -o . | sort | tr -d "\n"
+}
+
+# print handle of prio qdisc class for traffic from current zone to given zone
+zone_handle()
+{
+  local spec_latency zones
+  # check if there is a specific latency between current_zone and zone_name,
+  # reling on lex. ordering of zone letters in latspec asoc. array keys
+  ZX=${current_zone#ZONE_}
+  ZY=${1#ZONE_}
+  if [[ ${ZX} < ${ZY} ]]; then
+    zones=${ZX}${ZY}
+  else
+    zones=${ZY}${ZX}
+  fi
+  spec_latency=${latspec[${zones}]}
+  # if a specific latency is defined, use qdiscs for this latency (or for
+  # this zone pair with latency profile), otherwise use the default
+  if [[ -z $spec_latency ]]; then
+    echo 1:4
+  elif [[ -n $profile ]]; then
+    echo "1:${qdisc_handles[$zones]:-4}"
+  else
+    echo "1:${qdisc_handles[$spec_latency]:-4}"
+  fi
+}
+
+# print names of env variables with addresses of cluster zones, that is all
+# zones but external zone x (eg. ZONE_A ZONE_B ZONE_C ZONE_D)
+cluster_zones()
+{
+  local zone_name
+  for zone_name in ${!ZONE_@}; do
+    if [[ ${zone_name} =~ ^ZONE_[A-WYZ]$ ]]; then
+      echo "${zone_name}"
+    fi
+  done
+}
+
+# wait till given number of seconds since the profile start
+wait_offset()
+{
+  local delay_ns
+  delay_ns=$(( (profile_start + $1) * 1000000000 - $(date +%s%N) ))
+  if [[ $delay_ns -gt 0 ]]; then
+    $DEBUG_MODE sleep "$((delay_ns / 1000000000)).$(printf %09d $((delay_ns % 1000000000)))"
+  fi
+}
+
+# print u32 filter handle of each classifier as "hex_ip_addr filter_handle"
+list_filters()
+{
+  tc filter show dev "${iface}" parent 1: | while read -r line; do
+    if [[ $line =~ fh\ ([0-9a-f]+::[0-9a-f]+) ]]; then
+      fh=${BASH_REMATCH[1]}
+    elif [[ $line =~ ^match\ ([0-9a-f]{8})/ffffffff\ at\ 16 ]]; then
+      echo "${BASH_REMATCH[1]} ${fh}"
+    fi
+  done
+}
+
 if [[ $# = 0 ]]; then
   show_help
   exit
@@ -47,6 +150,10 @@ fi
 
 # make sure we don't reuse variables from the outside environment by mistake
 unset DEBUG_MODE
+profile=""
+
+# latency configuration is stored here, so that update command can reuse it
+state_file=${LATENCY_STATE_FILE:-/run/network-latency.state}
 
 # dict for specific latencies
 declare -A latspec
@@ -55,8 +162,8 @@ while getopts "dl:h" OPT; do
   # shellcheck disable=SC2209
   case $OPT in
   d) DEBUG_MODE=echo;;
-  l) if [[ "$OPTARG" =~ ^([ABCXabcx]{2})=([0-9]+)$ ]]; then
-       zones=$(echo "${BASH_REMATCH[1]}" | tr abcx ABCX | grep -o . | sort | tr -d "\n");
+  l) if [[ "$OPTARG" =~ ^([a-zA-Z]{2})=([0-9]+)$ ]]; then
+       zones=$(zone_pair "${BASH_REMATCH[1]}");
        value=${BASH_REMATCH[2]};
        if [[ -n ${latspec[$zones]} ]]; then
          echo "Specific latency for $zones is defined multiple times." >&2;
@@ -85,6 +192,57 @@ if [[ $1 =~ ^[0-9]+$ ]]; then
   latency=${1}
 elif [[ $1 = teardown ]]; then
   teardown=1
+elif [[ $1 = update ]]; then
+  update=1
+  for change in "${@:2}"; do
+    if [[ ! ${change} =~ ^[a-zA-Z][+-]=[0-9.]+$ ]]; then
+      echo "Invalid zone change specified: ${change}" >&2
+      exit 1
+    fi
+  done
+  if [[ ! -f ${state_file} ]]; then
+    echo "latency is not configured, there is nothing to update"
+    exit
+  fi
+  # shellcheck source=/dev/null
+  source "${state_file}"
+elif [[ $1 = reapply ]]; then
+  if [[ ! -f ${state_file} ]]; then
+    echo "latency is not configured, there is nothing to reapply"
+    exit
+  fi
+  # shellcheck source=/dev/null
+  source "${state_file}"
+elif [[ $1 = profile ]]; then
+  if [[ ${#latspec[@]} -gt 0 ]]; then
+    echo "Specific latency can't be used with profile, use steps instead." >&2
+    exit 1
+  fi
+  if [[ ! $2 =~ ^[0-9]+$ ]]; then
+    echo "Invalid profile start timestamp specified: $2" >&2
+    exit 1
+  fi
+  profile_start=$2
+  profile_steps=("${@:3}")
+  if [[ ${#profile_steps[@]} = 0 ]]; then
+    echo "No profile step specified." >&2
+    exit 1
+  fi
+  for step in "${profile_steps[@]}"; do
+    if [[ ! ${step} =~ ^[0-9]+:[0-9]+(:[a-zA-Z]{2}=[0-9]+)*$ ]]; then
+      echo "Invalid profile step specified: ${step}" >&2
+      exit 1
+    fi
+  done
+  # the first step is set up as usual, but each zone pair gets it's own qdisc
+  # so that it's latency could be changed independently later
+  profile=1
+  IFS=: read -r -a fields <<< "${profile_steps[0]}"
+  latency=${fields[1]}
+  for spec in "${fields[@]:2}"; do
+    latspec[$(zone_pair "${spec%=*}")]=${spec#*=}
+  done
+  wait_offset "${fields[0]}"
 else
   echo "The default egress latency specified $1 is not an integer value." >&2
   exit 1
@@ -92,6 +250,21 @@ fi
 
 # check zone configuration and detect current zone (we are running inside)
 script_dir=$(realpath "$(dirname "$0")")
+# datapath selected during setup (see --datapath option of
+# ocp-network-split-setup), could be overridden via environment
+if [[ -z ${NETWORK_SPLIT_DATAPATH} && -f "${script_dir}/network-split-datapath.env" ]]; then
+  # shellcheck source=/dev/null
+  source "${script_dir}/network-split-datapath.env"
+fi
+datapath=${NETWORK_SPLIT_DATAPATH:-iptables}
+# zone configuration maintained by ocp-network-split-controller takes
+# precedence over the one from the environment
+if [[ -f "${script_dir}/network-split-controller.env" ]]; then
+  set -a
+  # shellcheck source=/dev/null
+  source "${script_dir}/network-split-controller.env"
+  set +a
+fi
 if ! current_zone=$("${script_dir}"/network-zone.sh); then
   echo "zone configuration is invalid, script can't continue"
   exit 1
@@ -112,38 +285,104 @@ fi
 iface=$(ip route show default | cut -d' ' -f5)
 echo "network interface: $iface"
 
-# delete all current qdiscss
-# TODO: polish this so that the original configuration could be restored
-# TODO: instead of deleting the original qdiscs, just alter it (would be
-# more complex and error prone, it's not clear it's worth the effort)
-$DEBUG_MODE tc qdisc del dev "${iface}" root
+if [[ -n $update && ${datapath} = tc ]]; then
+  # addresses of all zones are in the lookup table, the zone verdicts stay,
+  # but a zone which was empty during setup gets it's table and verdict only
+  # now (replacing a verdict which exists already doesn't change anything)
+  {
+    "${script_dir}"/network-zone-tc.sh update "${iface}" 1: dst "${@:2}"
+    for change in "${@:2}"; do
+      zone_name=ZONE_${change:0:1}
+      zone_name=${zone_name^^}
+      if [[ ${change:1:1} = "+" && $zone_name != "${current_zone}" && $zone_name != ZONE_X ]]; then
+        "${script_dir}"/network-zone-tc.sh verdict "${iface}" 1: "${change:0:1}" replace flowid "$(zone_handle "${zone_name}")"
+      fi
+    done
+  } | tc_batch
+  tc_show
+  exit
+fi
 
-if [[ -n $teardown ]]; then
-  # report what qdiscs structure was created by default after the previous
-  # one was removed, and then just exit
+if [[ -n $update ]]; then
+  declare -A filter_handles
+  while read -r addr_hex fh; do
+    filter_handles[$addr_hex]=$fh
+  done < <(list_filters)
+  for change in "${@:2}"; do
+    zone_name=ZONE_${change:0:1}
+    zone_name=${zone_name^^}
+    # there is no latency within current zone and for external zone x
+    if [[ $zone_name = "${current_zone}" || $zone_name = ZONE_X ]]; then
+      continue
+    fi
+    ip_addr=${change#*=}
+    if [[ ${change:1:1} = "+" ]]; then
+      handle=$(zone_handle "${zone_name}")
+      $DEBUG_MODE tc filter add dev "${iface}" parent 1: protocol ip prio 1 u32 match ip dst "${ip_addr}"/32 flowid "${handle}"
+    else
+      # shellcheck disable=SC2086
+      addr_hex=$(printf '%02x%02x%02x%02x' ${ip_addr//./ })
+      if [[ -z ${filter_handles[$addr_hex]} ]]; then
+        echo "no classifier for ${ip_addr} found"
+        continue
+      fi
+      $DEBUG_MODE tc filter del dev "${iface}" parent 1: protocol ip prio 1 handle "${filter_handles[$addr_hex]}" u32
+    fi
+  done
   tc_show
   exit
 fi
 
-# dict for tracking qdisc with specific latency
-declare -A qdisc_handles
+# dict for tracking qdisc with specific latency (handles loaded from the
+# state file by reapply command belong to the previous zone of the node)
+declare -A qdisc_handles=()
 # there will always be a qdisc with handle 1:4 for the default latency, so the
-# next free minor handle is 1:5, hence:
+# next free minor handle is 1:5 (minor handles are hex numbers), hence:
 next_minor_num=5
 # for each zone specific delay value, allocate qdisc handle in qdisc_handles
 for ZONES in "${!latspec[@]}"; do
   spec_latency=${latspec[$ZONES]}
+  # only latency from current zone is configured on this node
+  if [[ ${ZONES} != *${current_zone#ZONE_}* ]]; then
+    continue
+  fi
+  if [[ -n $profile ]]; then
+    qdisc_handles[${ZONES}]=$(printf %x "${next_minor_num}")
+    ((next_minor_num++))
+    continue
+  fi
   if [[ $latency -eq $spec_latency ]]; then
     continue
   fi
   if [[ -z ${qdisc_handles[${spec_latency}]} ]]; then
-    qdisc_handles[${spec_latency}]=${next_minor_num}
+    qdisc_handles[${spec_latency}]=$(printf %x "${next_minor_num}")
     ((next_minor_num++))
   fi
 done
 # check how many bands we need: we won't touch the 3 default bands, so we
 # will need one band for each lantecy
 band_num=$((next_minor_num-1))
+# prio qdisc has at most 16 bands
+if [[ ${band_num} -gt 16 ]]; then
+  echo "error: too many distinct latency values from ${current_zone}, at most 13 are supported" >&2
+  exit 1
+fi
+
+# delete all current qdiscss
+# TODO: polish this so that the original configuration could be restored
+# TODO: instead of deleting the original qdiscs, just alter it (would be
+# more complex and error prone, it's not clear it's worth the effort)
+$DEBUG_MODE tc qdisc del dev "${iface}" root
+
+if [[ -n $teardown ]]; then
+  # report what qdiscs structure was created by default after the previous
+  # one was removed, and then just exit
+  if [[ -z $DEBUG_MODE ]]; then
+    rm -f "${state_file}"
+  fi
+  tc_show
+  exit
+fi
 
 # define new qdisc structure
 $DEBUG_MODE tc qdisc add dev "${iface}" root handle 1: prio bands "${band_num}"
@@ -151,36 +390,85 @@ $DEBUG_MODE tc qdisc add dev "${iface}" parent 1:4 handle 40: netem delay "${lat
 # for each zone specific delay value, define new qdisc with given latency
 for SP_LAT in "${!qdisc_handles[@]}"; do
   minor_num=${qdisc_handles[$SP_LAT]}
-  $DEBUG_MODE tc qdisc add dev "${iface}" parent 1:${minor_num} handle ${minor_num}0: netem delay "${SP_LAT}"ms
+  if [[ -n $profile ]]; then
+    # qdiscs of latency profile are allocated for zone pairs
+    delay=${latspec[$SP_LAT]}
+  else
+    delay=${SP_LAT}
+  fi
+  $DEBUG_MODE tc qdisc add dev "${iface}" parent 1:${minor_num} handle ${minor_num}0: netem delay "${delay}"ms
 done
 
 # create tc filter/classifier for nodes in other zones, and direct traffic
 # heading to them via netem qdisc
-for zone_name in ZONE_A ZONE_B ZONE_C; do
-  if [[ $current_zone = "${zone_name}" ]]; then
-    continue
-  fi
-  for ip_addr in ${!zone_name}; do
-    # check if there is a specific latency between current_zone and zone_name,
-    # reling on lex. ordering of zone letters in latspec asoc. array keys
-    ZX=${current_zone#ZONE_}
-    ZY=${zone_name#ZONE_}
-    if [[ ${ZX} < ${ZY} ]]; then
-      spec_latency=${latspec[${ZX}${ZY}]}
-    else
-      spec_latency=${latspec[${ZY}${ZX}]}
-    fi
-    # if a specific latency is defined, use qdiscs for this latency, otherwise
-    # use the default
-    if [[ -z $spec_latency ]]; then
-      handle=1:4
-    else
-      handle=1:${qdisc_handles[$spec_latency]:-4}
+if [[ ${datapath} = tc ]]; then
+  # zone of an address is looked up in hash table, with single classifier
+  # of each zone
+  {
+    "${script_dir}"/network-zone-tc.sh setup "${iface}" 1: dst
+    for zone_name in $(cluster_zones); do
+      if [[ $current_zone != "${zone_name}" ]]; then
+        "${script_dir}"/network-zone-tc.sh verdict "${iface}" 1: "${zone_name#ZONE_}" add flowid "$(zone_handle "${zone_name}")"
+      fi
+    done
+  } | tc_batch
+else
+  for zone_name in $(cluster_zones); do
+    if [[ $current_zone = "${zone_name}" ]]; then
+      continue
     fi
-    # finally create a classifier
-    $DEBUG_MODE tc filter add dev "${iface}" parent 1: protocol ip prio 1 u32 match ip dst ${ip_addr}/32 flowid ${handle}
+    handle=$(zone_handle "${zone_name}")
+    for ip_addr in ${!zone_name}; do
+      # finally create a classifier
+      $DEBUG_MODE tc filter add dev "${iface}" parent 1: protocol ip prio 1 u32 match ip dst ${ip_addr}/32 flowid ${handle}
+    done
   done
-done
+fi
+
+# remember latency configuration for update command
+if [[ -z $DEBUG_MODE ]]; then
+  declare -p latency latspec qdisc_handles profile current_zone > "${state_file}"
+fi
 
 # report the result
 tc_show
+
+if [[ -z $profile ]]; then
+  exit
+fi
+
+# apply the other steps of latency profile, changing delay of existing qdiscs
+# in place, so that classifiers and queued packets are kept
+for step in "${profile_steps[@]:1}"; do
+  IFS=: read -r -a fields <<< "${step}"
+  wait_offset "${fields[0]}"
+  echo "profile step: ${step}"
+  # latency could have been reapplied in the meantime because the node moved
+  # into another zone, so that qdiscs of other zone pairs are in place now
+  if [[ -z $DEBUG_MODE && -f ${state_file} ]]; then
+    # shellcheck source=/dev/null
+    source "${state_file}"
+  fi
+  if [[ ${fields[1]} -ne $latency ]]; then
+    latency=${fields[1]}
+    $DEBUG_MODE tc qdisc change dev "${iface}" parent 1:4 handle 40: netem delay "${latency}"ms
+  fi
+  for spec in "${fields[@]:2}"; do
+    ZONES=$(zone_pair "${spec%=*}")
+    if [[ ${ZONES} != *${current_zone#ZONE_}* ]]; then
+      continue
+    fi
+    minor_num=${qdisc_handles[$ZONES]}
+    if [[ -z $minor_num ]]; then
+      echo "no qdisc for ${ZONES} zones, latency is not specified in the first step" >&2
+      continue
+    fi
+    if [[ ${spec#*=} -ne ${latspec[$ZONES]} ]]; then
+      latspec[$ZONES]=${spec#*=}
+      $DEBUG_MODE tc qdisc change dev "${iface}" parent 1:${minor_num} handle ${minor_num}0: netem delay "${latspec[$ZONES]}"ms
+    fi
+  done
+  if [[ -z $DEBUG_MODE ]]; then
+    declare -p latency latspec qdisc_handles profile current_zone > "${state_file}"
+  fi
+done
@@ -25,8 +25,16 @@ else
   echo "file ${script_env} not found" >&2
   exit 1
 fi
+# zone configuration maintained by ocp-network-split-controller
+if [[ -f "${script_dir}/network-split-controller.env" ]]; then
+  # shellcheck source=/dev/null
+  source "${script_dir}/network-split-controller.env"
+fi
 
-for zone_name in ZONE_A ZONE_B ZONE_C ZONE_X; do
+for zone_name in ${!ZONE_@}; do
+  if [[ ! ${zone_name} =~ ^ZONE_[A-Z]$ ]]; then
+    continue
+  fi
   echo ===============================================================================
   echo $zone_name
   echo ===============================================================================
@@ -16,13 +16,140 @@
 
 show_help()
 {
-  echo "Network split for cluster with 3 zones"
+  echo "Network split among cluster zones"
   echo "Usage: $(basename "${0}") [-d] <setup|teardown> <split-config>"
+  echo "       $(basename "${0}") [-d] update <split-config> <change>..."
   echo
-  echo "Argument split-config describes network split among 3 zones a, b and c"
-  echo "While zone x denotes external nodes outside of the cluster."
+  echo "Argument split-config describes network split among zones a, b and c"
+  echo "(and optionally other zones d-w, y and z, when the cluster has more"
+  echo "failure domains), while zone x denotes external nodes outside of the"
+  echo "cluster."
   echo "eg. 'bc' means that connection between zones b and c is lost"
   echo "Examples of valid splits: bc, ab, ab-bc, ab-ac, ax"
+  echo "Any other list of zone tuples (eg. ac-bx) is valid as well."
+  echo
+  echo "Split config could be followed by options separated by colons, which"
+  echo "turn the total split into a partial one:"
+  echo "  lossN      drop only N percent of packets (1-99)"
+  echo "  flapN      add and remove the rules every N seconds"
+  echo "  icmp       drop only icmp packets"
+  echo "  tcp, udp,  drop only tcp, udp or sctp packets, optionally only of"
+  echo "  sctp       given ports separated by dots, eg. tcp2379.2380"
+  echo "  keep       don't drop tcp packets of ssh, kube-apiserver and kubelet"
+  echo "             ports (22, 6443, 10250), or of given ports, eg. keep22"
+  echo "eg. 'ab:loss30', 'ab-ac:tcp2379.2380:udp' or 'bc:keep'"
+  echo
+  echo "Update command changes rules of already active split when zone"
+  echo "membership changes, each change adds (+=) or removes (-=) an address"
+  echo "of a zone, eg. 'b+=198.51.100.7' or 'c-=198.51.100.9'. The zone"
+  echo "configuration in environment is expected to be already updated."
+  echo
+  echo "When NETWORK_SPLIT_DATAPATH environment variable is set to 'tc', packets"
+  echo "are dropped via tc filters of clsact qdisc, which look up zone of an"
+  echo "address in a hash table (see network-zone-tc.sh) instead of iptables"
+  echo "rules. Only flap option is supported in this case."
+}
+
+# run tc batch commands from stdin (or just print them in debug mode)
+tc_batch()
+{
+  if [[ -n $DEBUG_MODE ]]; then
+    sed 's/^/tc /'
+  else
+    # verdicts could be missing already (eg. when links are flapping)
+    tc -force -batch -
+  fi
+}
+
+# add (-A) or remove (-D) rules blocking packets from and to given address
+block_addr()
+{
+  local op=$1
+  local node_addr=$2
+  local match
+  # accept rules have to precede drop rules
+  if [[ -n ${keep_match} && ${op} = "-A" ]]; then
+    keep_addr "${op}" "${node_addr}"
+  fi
+  for match in "${rule_matches[@]}"; do
+    # rules could be missing already (eg. when links are flapping)
+    # shellcheck disable=SC2086
+    if [[ ${op} = "-D" && -z $DEBUG_MODE ]] && \
+        ! iptables -C INPUT -s "${node_addr}" ${match} ${stat_args} -j DROP 2>/dev/null; then
+      continue
+    fi
+    # shellcheck disable=SC2086
+    $DEBUG_MODE iptables "${op}" INPUT  -s "${node_addr}" ${match} ${stat_args} -j DROP -v
+    # shellcheck disable=SC2086
+    $DEBUG_MODE iptables "${op}" OUTPUT -d "${node_addr}" ${match} ${stat_args} -j DROP -v
+  done
+  if [[ -n ${keep_match} && ${op} = "-D" ]]; then
+    keep_addr "${op}" "${node_addr}"
+  fi
+}
+
+# add (-A) or remove (-D) rules accepting packets of kept ports
+keep_addr()
+{
+  local op=$1
+  local node_addr=$2
+  # shellcheck disable=SC2086
+  if [[ ${op} = "-D" && -z $DEBUG_MODE ]] && \
+      ! iptables -C INPUT -s "${node_addr}" ${keep_match} -j ACCEPT 2>/dev/null; then
+    return
+  fi
+  # shellcheck disable=SC2086
+  $DEBUG_MODE iptables "${op}" INPUT  -s "${node_addr}" ${keep_match} -j ACCEPT -v
+  # shellcheck disable=SC2086
+  $DEBUG_MODE iptables "${op}" OUTPUT -d "${node_addr}" ${keep_match} -j ACCEPT -v
+}
+
+# print given upper case zone tuple with external zone X second (eg. XY
+# becomes YX), since rules are applied in the first zone of a tuple only and
+# there are no nodes in zone X
+external_last()
+{
+  if [[ ${1:0:1} = X ]]; then
+    echo "${1:1:1}${1:0:1}"
+  else
+    echo "${1}"
+  fi
+}
+
+# add (-A) or remove (-D) rules of all zone tuples of the split
+apply_split()
+{
+  local op=$1
+  local i split affected_zone blocked_zone node_addr
+  for i in ${split_spec//-/ }; do
+    split=$(external_last "${i^^}")
+    affected_zone=ZONE_${split:0:1}
+    blocked_zone=ZONE_${split:1:1}
+    if [[ ${current_zone} != "${affected_zone}" ]]; then
+      continue
+    fi
+    if [[ ${datapath} = tc ]]; then
+      # single drop verdict covers all nodes of the zone
+      block_zone "${op}" "${split:1:1}"
+      continue
+    fi
+    for node_addr in ${!blocked_zone}; do
+      block_addr "${op}" "${node_addr}"
+    done
+  done
+}
+
+# add (-A) or remove (-D) drop verdict of given zone in both directions
+block_zone()
+{
+  local verdict_op=add
+  if [[ $1 = "-D" ]]; then
+    verdict_op=del
+  fi
+  {
+    "${script_dir}"/network-zone-tc.sh verdict "${iface}" ingress "$2" ${verdict_op} action drop
+    "${script_dir}"/network-zone-tc.sh verdict "${iface}" egress "$2" ${verdict_op} action drop
+  } | tc_batch
 }
 
 if [[ $# = 0 ]]; then
@@ -46,11 +173,97 @@ case $1 in
   help|-h)   show_help; exit;;
   setup)     OP="-A"; shift;;
   teardown)  OP="-D"; shift;;
+  update)    OP="update"; shift;;
   *)         show_help; exit 1
 esac
 
-# check zone configuration and detect current zone (we are running inside)
+if [[ $# = 0 ]]; then
+  echo "split-config not specified" >&2
+  exit 1
+fi
+split_opt_re="(loss[1-9][0-9]?|flap[1-9][0-9]{0,3}|icmp|(tcp|udp|sctp|keep)([0-9]{1,5}(\.[0-9]{1,5}){0,14})?)"
+if [[ ! $1 =~ ^[a-zA-Z]{2}(-[a-zA-Z]{2})*(:${split_opt_re})*$ ]]; then
+  echo "Invalid split-config specified: $1" >&2
+  exit 1
+fi
+
+# split options (after the first colon) restrict which packets are dropped
+split_spec=${1%%:*}
+split_opts=""
+if [[ $1 = *:* ]]; then
+  split_opts=${1#*:}
+fi
+stat_args=""
+flap_interval=""
+keep_match=""
+rule_matches=()
+for opt in ${split_opts//:/ }; do
+  case ${opt} in
+    loss*)
+      # drop given percentage of packets only
+      stat_args="-m statistic --mode random --probability $(printf '0.%02d' "${opt#loss}")";;
+    flap*)
+      flap_interval=${opt#flap};;
+    icmp)
+      rule_matches+=("-p icmp");;
+    keep*)
+      # tcp packets of these ports are accepted before the drop rules
+      keep_ports=${opt#keep}
+      keep_match="-p tcp -m multiport --ports ${keep_ports:-22.6443.10250}"
+      keep_match=${keep_match//./,};;
+    *)
+      # drop packets of given protocol (and ports) only
+      proto=${opt%%[0-9]*}
+      ports=${opt#"${proto}"}
+      if [[ -n ${ports} ]]; then
+        rule_matches+=("-p ${proto} -m multiport --ports ${ports//./,}")
+      else
+        rule_matches+=("-p ${proto}")
+      fi;;
+  esac
+done
+# without protocol options, all packets are dropped
+if [[ ${#rule_matches[@]} = 0 ]]; then
+  rule_matches=("")
+fi
+flap_pid_file=${NETWORK_SPLIT_RUN_DIR:-/run}/network-split-flap-${1}.pid
+
+# datapath selected during setup (see --datapath option of
+# ocp-network-split-setup), could be overridden via environment
 script_dir=$(realpath "$(dirname "$0")")
+if [[ -z ${NETWORK_SPLIT_DATAPATH} && -f "${script_dir}/network-split-datapath.env" ]]; then
+  # shellcheck source=/dev/null
+  source "${script_dir}/network-split-datapath.env"
+fi
+datapath=${NETWORK_SPLIT_DATAPATH:-iptables}
+if [[ ${datapath} != iptables && ${datapath} != tc ]]; then
+  echo "Invalid datapath specified: ${datapath}" >&2
+  exit 1
+fi
+if [[ ${datapath} = tc && (-n ${stat_args} || -n ${keep_match} || -n ${rule_matches[0]}) ]]; then
+  echo "Only flap split option is supported with tc datapath: $1" >&2
+  exit 1
+fi
+
+# validate zone membership changes for update command
+if [[ ${OP} = "update" ]]; then
+  for change in "${@:2}"; do
+    if [[ ! ${change} =~ ^[a-zA-Z][+-]=[0-9.]+$ ]]; then
+      echo "Invalid zone change specified: ${change}" >&2
+      exit 1
+    fi
+  done
+fi
+
+# check zone configuration and detect current zone (we are running inside)
+# zone configuration maintained by ocp-network-split-controller takes
+# precedence over the one from the environment
+if [[ -f "${script_dir}/network-split-controller.env" ]]; then
+  set -a
+  # shellcheck source=/dev/null
+  source "${script_dir}/network-split-controller.env"
+  set +a
+fi
 if ! current_zone=$("${script_dir}"/network-zone.sh); then
   echo "zone configuration is invalid, script can't continue"
   exit 1
@@ -59,16 +272,53 @@ fi
 # report current zone
 echo "current zone: $current_zone"
 
+# tc filters are attached to the interface of the default route, as
+# network-latency.sh does
+if [[ ${datapath} = tc ]]; then
+  iface=$(ip route show default | cut -d' ' -f5)
+  echo "network interface: $iface"
+  if [[ ${OP} = "update" ]]; then
+    # addresses of all zones are in the lookup table, no matter which split
+    # is active
+    {
+      "${script_dir}"/network-zone-tc.sh update "${iface}" ingress src "${@:2}"
+      "${script_dir}"/network-zone-tc.sh update "${iface}" egress dst "${@:2}"
+    } | tc_batch
+    exit
+  fi
+fi
+
 # load network split specification from command line
-net_split_spec=${1//-/ }
+net_split_spec=${split_spec//-/ }
 
 # try to apply firewall rules for each network split specification
 for i in ${net_split_spec}; do
   # make sure the split specification is upper case
-  split=${i^^}
+  split=$(external_last "${i^^}")
   # read the split configuration
   affected_zone=ZONE_${split:0:1}
   blocked_zone=ZONE_${split:1:1}
+  if [[ ${OP} = "update" ]]; then
+    # only rules for changed addresses of the blocked zone are added or
+    # removed, the rest of the split stays in place
+    echo "${i}: ${blocked_zone} membership changes will be applied in ${affected_zone}"
+    if [[ ${current_zone} != "${affected_zone}" ]]; then
+      continue
+    fi
+    for change in "${@:2}"; do
+      change_zone=ZONE_${change:0:1}
+      if [[ ${change_zone^^} != "${blocked_zone}" ]]; then
+        continue
+      fi
+      node_addr=${change#*=}
+      if [[ ${change:1:1} = "+" ]]; then
+        block_addr -A "${node_addr}"
+      else
+        block_addr -D "${node_addr}"
+      fi
+    done
+    continue
+  fi
   if [[ ${OP} = "-A" ]]; then
     op_desc=blocked
   else
@@ -76,11 +326,53 @@ for i in ${net_split_spec}; do
   fi
   # log and explain selected network split configuration
   echo "${i}: ${blocked_zone} will be ${op_desc} from ${affected_zone}"
-  if [[ ${current_zone} = "${affected_zone}" ]]; then
-    for node_addr in ${!blocked_zone}; do
-      # block all packets from or to given node
-      $DEBUG_MODE iptables ${OP} INPUT  -s "${node_addr}" -j DROP -v
-      $DEBUG_MODE iptables ${OP} OUTPUT -d "${node_addr}" -j DROP -v
-    done
-  fi
 done
+
+if [[ ${OP} = "update" ]]; then
+  exit
+fi
+
+# stop flapping of the links first, so that it doesn't interfere with teardown
+if [[ ${OP} = "-D" && -f ${flap_pid_file} ]]; then
+  $DEBUG_MODE kill "$(cat "${flap_pid_file}")"
+  $DEBUG_MODE rm -f "${flap_pid_file}"
+fi
+
+if [[ ${OP} = "-A" && ${datapath} = tc ]]; then
+  # the lookup tables are created only once, so that another split could
+  # reuse them
+  if ! tc qdisc show dev "${iface}" | grep -q "^qdisc clsact"; then
+    {
+      echo "qdisc add dev ${iface} clsact"
+      "${script_dir}"/network-zone-tc.sh setup "${iface}" ingress src
+      "${script_dir}"/network-zone-tc.sh setup "${iface}" egress dst
+    } | tc_batch
+  fi
+fi
+
+apply_split "${OP}"
+
+# with tc datapath, removal of clsact qdisc removes the lookup tables as well,
+# which is done only when no other split keeps it's verdicts there
+if [[ ${OP} = "-D" && ${datapath} = tc ]]; then
+  if [[ -n $DEBUG_MODE ]] || ! { tc filter show dev "${iface}" ingress; tc filter show dev "${iface}" egress; } \
+      2>/dev/null | grep -q "action drop"; then
+    echo "qdisc del dev ${iface} clsact" | tc_batch
+  else
+    echo "zone lookup tables are kept for other active splits"
+  fi
+fi
+
+if [[ ${OP} = "-A" && -n ${flap_interval} ]]; then
+  echo "links will flap every ${flap_interval} seconds"
+  if [[ -z $DEBUG_MODE ]]; then
+    # the loop keeps running in the background, as part of the split service
+    while true; do
+      sleep "${flap_interval}"
+      apply_split -D
+      sleep "${flap_interval}"
+      apply_split -A
+    done > /dev/null 2>&1 &
+    echo $! > "${flap_pid_file}"
+  fi
+fi
@@ -0,0 +1,182 @@
+#!/bin/bash
+
+# Copyright 2026 Martin Bukatovič <mbukatov@redhat.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+show_help()
+{
+  echo "Print tc batch commands of zone lookup table of cluster zones"
+  echo "Usage: $(basename "${0}") setup <dev> <parent> <src|dst>"
+  echo "       $(basename "${0}") update <dev> <parent> <src|dst> <change>..."
+  echo "       $(basename "${0}") verdict <dev> <parent> <zone> <add|del> [action]..."
+  echo
+  echo "Zone lookup table is u32 hash table with 256 buckets indexed by the last"
+  echo "byte of source or destination address of a packet, where each address"
+  echo "of a zone node links to a table of the zone. A zone table contains"
+  echo "single filter with a verdict (eg. 'action drop' or 'flowid 1:5') for"
+  echo "all nodes of the zone, so that a packet is classified via few lookups"
+  echo "no matter how many nodes the cluster has, and a verdict of the whole"
+  echo "zone is changed via single filter update."
+  echo
+  echo "Parent is either 'ingress' or 'egress' hook of clsact qdisc, or handle"
+  echo "of a classful qdisc (eg. '1:')."
+  echo
+  echo "Update command adds or removes addresses which zone membership changed,"
+  echo "each change adds (+=) or removes (-=) an address of a zone, eg."
+  echo "'b+=198.51.100.7'. Table of a zone is created when it's missing."
+  echo
+  echo "Examples: $(basename "${0}") setup eth0 ingress src | tc -batch -"
+  echo "          $(basename "${0}") verdict eth0 ingress b add action drop | tc -batch -"
+}
+
+# print handle of u32 table of given zone (a-z), eg. 10 for zone a
+zone_table()
+{
+  if [[ ${1,,} =~ ^[a-z]$ ]]; then
+    printf '%x\n' $(( 0x10 + $(printf %d "'${1,,}") - $(printf %d "'a") ))
+  fi
+}
+
+# print filter creating table of given zone (without any verdict)
+table_filter()
+{
+  echo "filter add dev ${dev} ${attach} prio 1 protocol ip handle $(zone_table "$1"): u32 divisor 1"
+}
+
+# print filter of given address in the lookup table
+addr_filter()
+{
+  local op=$1
+  local zone=$2
+  local addr=$3
+  local bucket
+  bucket=$(printf %x "${addr##*.}")
+  echo "filter ${op} dev ${dev} ${attach} prio 1 protocol ip u32 ht 100:${bucket}: match ip ${dir} ${addr}/32 link $(zone_table "${zone}"):"
+}
+
+# print u32 filter handle of each address in the lookup table as
+# "hex_ip_addr filter_handle", and handle of each existing table with single
+# bucket (such as a zone table) as "table handle"
+list_filters()
+{
+  # shellcheck disable=SC2086
+  tc filter show dev "${dev}" ${attach} | while read -r line; do
+    if [[ $line =~ fh\ (100:[0-9a-f]+:[0-9a-f]+) ]]; then
+      fh=${BASH_REMATCH[1]}
+    elif [[ $line =~ fh\ ([0-9a-f]+):\ ht\ divisor\ 1($|\ ) ]]; then
+      echo "table ${BASH_REMATCH[1]}"
+    elif [[ $line =~ ^match\ ([0-9a-f]{8})/ffffffff\ at\ ${offset} ]]; then
+      echo "${BASH_REMATCH[1]} ${fh}"
+    fi
+  done
+}
+
+if [[ $# -lt 4 ]]; then
+  show_help
+  exit 1
+fi
+
+cmd=$1
+dev=$2
+if [[ $3 = ingress || $3 = egress ]]; then
+  attach=$3
+else
+  attach="parent $3"
+fi
+
+if [[ ${cmd} = verdict ]]; then
+  table=$(zone_table "$4")
+  if [[ -z ${table} ]]; then
+    echo "Invalid zone specified: $4" >&2
+    exit 1
+  fi
+  case $5 in
+    add|replace)
+      echo "filter $5 dev ${dev} ${attach} prio 1 protocol ip handle ${table}::1 u32 ht ${table}: match u32 0 0 ${*:6}";;
+    del)
+      echo "filter del dev ${dev} ${attach} prio 1 protocol ip handle ${table}::1 u32";;
+    *)
+      echo "Invalid verdict operation specified: $5" >&2
+      exit 1;;
+  esac
+  exit
+fi
+
+case $4 in
+  src) dir=src; offset=12;;
+  dst) dir=dst; offset=16;;
+  *)   echo "Invalid address direction specified: $4" >&2; exit 1;;
+esac
+
+# zones a, b, c and x (which tables are created even when a zone is empty)
+# and any other zone with addresses, eg. ZONE_D
+zone_names="ZONE_A ZONE_B ZONE_C"
+for zone_name in ${!ZONE_@}; do
+  if [[ ${zone_name} =~ ^ZONE_[D-WYZ]$ ]]; then
+    zone_names+=" ${zone_name}"
+  fi
+done
+zone_names+=" ZONE_X"
+
+case ${cmd} in
+  setup)
+    # tables of zones (without any verdict) and the lookup table itself
+    for zone_name in ${zone_names}; do
+      table_filter "${zone_name#ZONE_}"
+    done
+    echo "filter add dev ${dev} ${attach} prio 1 protocol ip handle 100: u32 divisor 256"
+    for zone_name in ${zone_names}; do
+      for addr in ${!zone_name}; do
+        addr_filter add "${zone_name#ZONE_}" "${addr}"
+      done
+    done
+    # the last byte of the address selects bucket of the lookup table
+    echo "filter add dev ${dev} ${attach} prio 1 protocol ip u32 ht 800:: match u32 0 0 hashkey mask 0x000000ff at ${offset} link 100:";;
+  update)
+    declare -A filter_handles tables
+    while read -r addr_hex fh; do
+      if [[ ${addr_hex} = table ]]; then
+        tables[$fh]=1
+      else
+        filter_handles[$addr_hex]=$fh
+      fi
+    done < <(list_filters)
+    for change in "${@:5}"; do
+      if [[ ! ${change} =~ ^[a-zA-Z][+-]=[0-9.]+$ ]]; then
+        echo "Invalid zone change specified: ${change}" >&2
+        exit 1
+      fi
+      addr=${change#*=}
+      if [[ ${change:1:1} = "+" ]]; then
+        # zone without any address during setup has no table yet
+        table=$(zone_table "${change:0:1}")
+        if [[ -z ${tables[$table]} ]]; then
+          table_filter "${change:0:1}"
+          tables[$table]=1
+        fi
+        addr_filter add "${change:0:1}" "${addr}"
+        continue
+      fi
+      # shellcheck disable=SC2086
+      addr_hex=$(printf '%02x%02x%02x%02x' ${addr//./ })
+      if [[ -z ${filter_handles[$addr_hex]} ]]; then
+        echo "no filter for ${addr} found" >&2
+        continue
+      fi
+      echo "filter del dev ${dev} ${attach} prio 1 protocol ip handle ${filter_handles[$addr_hex]} u32"
+    done;;
+  *)
+    show_help
+    exit 1;;
+esac
@@ -20,10 +20,22 @@ show_help()
   echo "Usage: $(basename "${0}")"
 }
 
+# print names of env variables with addresses of cluster zones, that is all
+# zones but external zone x (eg. ZONE_A ZONE_B ZONE_C ZONE_D)
+cluster_zones()
+{
+  local zone_name
+  for zone_name in ${!ZONE_@}; do
+    if [[ ${zone_name} =~ ^ZONE_[A-WYZ]$ ]]; then
+      echo "${zone_name}"
+    fi
+  done
+}
+
 print_current_zone()
 {
   for host_ip_addr in $(hostname -I); do
-    for zone_name in ZONE_{A,B,C}; do
+    for zone_name in $(cluster_zones); do
       for zone_host_ip_addr in ${!zone_name}; do
         if [[ "${zone_host_ip_addr}" = "${host_ip_addr}" ]]; then
           echo ${zone_name}
@@ -51,10 +63,13 @@ for env_var in ZONE_A ZONE_B ZONE_C; do
   fi
 done
 
-# external zone x is optional
-if [[ -v ZONE_X ]]; then
-  echo "ZONE_X=\"${ZONE_X}\"" >&2
-fi
+# other cluster zones and external zone x are optional
+for env_var in $(cluster_zones) ZONE_X; do
+  if [[ ${env_var} =~ ^ZONE_[ABC]$ || ! -v ${env_var} ]]; then
+    continue
+  fi
+  echo "$env_var=\"${!env_var}\"" >&2
+done
 
 # script can't report the zone if there is a problem with zone configuration
 if [[ $ERROR -eq 1 ]]; then
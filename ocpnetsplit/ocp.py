@@ -15,16 +15,15 @@
 # limitations under the License.
 
 
+import json
 import logging
 import subprocess
 
-import yaml
-
 
 LOGGER = logging.getLogger(name=__file__)
 
 
-def run_oc(cmd_list, kubeconfig=None, oc_executable=None, timeout=600):
+def run_oc(cmd_list, kubeconfig=None, oc_executable=None, timeout=600, input_str=None):
     """
     Run given oc command and log all it's output.
 
@@ -36,6 +35,7 @@ def run_oc(cmd_list, kubeconfig=None, oc_executable=None, timeout=600):
             need to override the default)
         oc_executable (str): file path of oc command (optional, use only if
             you need to override the default)
+        input_str (str): standard input of the command (optional)
 
     Returns:
         tuple: stdout, stderr of the command executed
@@ -50,6 +50,7 @@ def run_oc(cmd_list, kubeconfig=None, oc_executable=None, timeout=600):
     comp_proc = subprocess.run(
         oc_cmd,
         capture_output=True,
+        input=None if input_str is None else input_str.encode(),
         timeout=timeout)
     # log whole output of the process
     proc_log_level = logging.DEBUG
@@ -66,7 +67,7 @@ def run_oc(cmd_list, kubeconfig=None, oc_executable=None, timeout=600):
     return stdout, stderr
 
 
-def run_oc_debug_node(cmd_list, node, kubeconfig=None, oc_executable=None):
+def run_oc_debug_node(cmd_list, node, kubeconfig=None, oc_executable=None, timeout=600):
     """
     Run given command on given node via oc debug node.
 
@@ -79,6 +80,7 @@ def run_oc_debug_node(cmd_list, node, kubeconfig=None, oc_executable=None):
             need to override the default)
         oc_executable (str): file path of oc command (optional, use only if
             you need to override the default)
+        timeout (int): command timeout specified in seconds, optional
 
     Returns:
         tuple: cmd_out (combined stdout and stderr of the executed command),
@@ -90,7 +92,7 @@ def run_oc_debug_node(cmd_list, node, kubeconfig=None, oc_executable=None):
     oc_cmd = ["debug", node, "--", "chroot", "/host"]
     oc_cmd.extend(cmd_list)
     cmd_out, oc_out = run_oc(
-            oc_cmd, kubeconfig=kubeconfig, oc_executable=oc_executable)
+            oc_cmd, kubeconfig=kubeconfig, oc_executable=oc_executable, timeout=timeout)
     return cmd_out, oc_out
 
 
@@ -134,16 +136,164 @@ def get_all_node_ip_addrs(node, kubeconfig=None, oc_executable=None):
     Returns:
         list: node ip addressess (as strings)
     """
-    ip_addrs = []
     if not node.startswith("node/"):
         node = "node/" + node
-    oc_cmd = ["get", node, "-o", "yaml"]
+    oc_cmd = ["get", node, "-o", "json"]
     LOGGER.debug("trying to get details about %s", node)
     node_str, _ = run_oc(
             oc_cmd, kubeconfig=kubeconfig, oc_executable=oc_executable)
-    node_dict = yaml.safe_load(node_str)
-    for addr_d in node_dict["status"]["addresses"]:
+    node_dict = json.loads(node_str)
+    return get_node_dict_ip_addrs(node_dict)
+
+
+def get_node_dict_ip_addrs(node_dict):
+    """
+    Get all ip addresses (both internal and external) from given k8s node
+    object.
+
+    Args:
+        node_dict (dict): k8s node object
+
+    Returns:
+        list: node ip addressess (as strings)
+    """
+    ip_addrs = []
+    for addr_d in node_dict["status"].get("addresses", []):
         if addr_d["type"] not in ("ExternalIP", "InternalIP"):
             continue
         ip_addrs.append(addr_d["address"])
     return ip_addrs
+
+
+def apply_yaml(content, kubeconfig=None, oc_executable=None):
+    """
+    Create or update k8s objects from given yaml via ``oc apply``.
+
+    Args:
+        content (str): yaml (or json) with k8s objects
+        kubeconfig (str): file path to kubeconfig (optional, use only if you
+            need to override the default)
+        oc_executable (str): file path of oc command (optional, use only if
+            you need to override the default)
+
+    Returns:
+        dict: action reported by ``oc apply`` (eg. ``created``,
+        ``configured`` or ``unchanged``) for name of each object (eg.
+        ``machineconfig.machineconfiguration.openshift.io/99-worker-network-split``)
+    """
+    stdout, _ = run_oc(
+            ["apply", "-f", "-"], kubeconfig=kubeconfig, oc_executable=oc_executable,
+            input_str=content)
+    actions = {}
+    for line in stdout.splitlines():
+        name, _, action = line.strip().partition(" ")
+        actions[name] = action
+    return actions
+
+
+def get_object(name, kubeconfig=None, oc_executable=None):
+    """
+    Get given k8s object.
+
+    Args:
+        name (str): type and name of the object, eg.
+            ``machineconfigpool/worker``
+        kubeconfig (str): file path to kubeconfig (optional, use only if you
+            need to override the default)
+        oc_executable (str): file path of oc command (optional, use only if
+            you need to override the default)
+
+    Returns:
+        dict: the k8s object
+    """
+    stdout, _ = run_oc(
+            ["get", name, "-o", "json"], kubeconfig=kubeconfig, oc_executable=oc_executable)
+    return json.loads(stdout)
+
+
+def patch_object(name, patch, kubeconfig=None, oc_executable=None):
+    """
+    Update given k8s object via json merge patch.
+
+    Args:
+        name (str): type and name of the object, eg.
+            ``machineconfigpool/worker``
+        patch (dict): the merge patch, eg. ``{"spec": {"paused": True}}``
+        kubeconfig (str): file path to kubeconfig (optional, use only if you
+            need to override the default)
+        oc_executable (str): file path of oc command (optional, use only if
+            you need to override the default)
+    """
+    run_oc(
+        ["patch", name, "--type", "merge", "-p", json.dumps(patch)],
+        kubeconfig=kubeconfig, oc_executable=oc_executable)
+
+
+def watch_nodes(kubeconfig=None, oc_executable=None):
+    """
+    Watch cluster nodes via k8s watch API, yielding an event for every node
+    change as reported by ``oc get nodes --watch``. The watch starts with
+    ``ADDED`` event for every existing node.
+
+    Args:
+        kubeconfig (str): file path to kubeconfig (optional, use only if you
+            need to override the default)
+        oc_executable (str): file path of oc command (optional, use only if
+            you need to override the default)
+
+    Yields:
+        tuple: event type (``ADDED``, ``MODIFIED`` or ``DELETED``) and k8s
+        node object (dict)
+
+    Raises:
+        subprocess.CalledProcessError: when the watch process fails
+    """
+    return watch_objects("nodes", kubeconfig, oc_executable)
+
+
+def watch_objects(resource, kubeconfig=None, oc_executable=None):
+    """
+    Watch k8s objects of given type via k8s watch API, see
+    :py:func:`watch_nodes`.
+
+    Args:
+        resource (str): type of the objects, eg. ``machineconfigpools``
+        kubeconfig (str): file path to kubeconfig (optional, use only if you
+            need to override the default)
+        oc_executable (str): file path of oc command (optional, use only if
+            you need to override the default)
+
+    Yields:
+        tuple: event type (``ADDED``, ``MODIFIED`` or ``DELETED``) and k8s
+        object (dict)
+
+    Raises:
+        subprocess.CalledProcessError: when the watch process fails
+    """
+    if oc_executable is None:
+        oc_executable = "oc"
+    oc_cmd = [oc_executable]
+    if kubeconfig is not None:
+        oc_cmd.extend(["--kubeconfig", kubeconfig])
+    oc_cmd.extend(["get", resource, "--watch", "--output-watch-events", "-o", "json"])
+    LOGGER.info("going to execute %s", oc_cmd)
+    decoder = json.JSONDecoder()
+    with subprocess.Popen(oc_cmd, stdout=subprocess.PIPE, text=True) as proc:
+        buf = ""
+        for line in proc.stdout:
+            buf += line
+            # oc prints one json object after another, each object ends
+            # with a closing brace which is not indented
+            if line.startswith(" ") or not line.rstrip().endswith("}"):
+                continue
+            try:
+                event, end = decoder.raw_decode(buf.strip())
+            except ValueError:
+                continue
+            buf = ""
+            if event.get("type") not in ("ADDED", "MODIFIED", "DELETED"):
+                LOGGER.warning("unexpected watch event: %s", event)
+                continue
+            yield event["type"], event["object"]
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, oc_cmd)
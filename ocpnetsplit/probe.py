@@ -0,0 +1,279 @@
+# -*- coding: utf8 -*-
+
+# Copyright 2026 Martin Bukatovič <mbukatov@redhat.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Workload probes checking availability of a service from the operator machine
+while a network split is active, so that one can see how quickly the
+disruption is detected by the service and how quickly it recovers.
+
+Each probe is executed in it's own thread every ``interval`` seconds, and
+results are stored in a compact time series (see :py:class:`Timeline`),
+which is evaluated with respect to start and stop time of the split.
+
+Probes are specified via a string:
+
+- ``http://host:port/path`` or ``https://...``: HTTP GET request which
+  succeeds when response status code is lower than 400
+- ``tcp:host:port``: TCP connection could be established
+- ``cmd:command args``: command exits with zero return code
+"""
+
+
+import abc
+import array
+import http.client
+import shlex
+import socket
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+class Probe(abc.ABC):
+    """
+    Base class of a probe.
+
+    Args:
+        name (str): name of the probe, used in reports
+        timeout (float): timeout of a single check in seconds
+    """
+
+    def __init__(self, name, timeout=1.0):
+        self.name = name
+        self.timeout = timeout
+
+    @abc.abstractmethod
+    def check(self):
+        """
+        Perform single check.
+
+        Returns:
+            bool: True if the check passed
+        """
+
+
+class HttpProbe(Probe):
+    """
+    Probe sending HTTP GET request to given url.
+    """
+
+    def __init__(self, url, timeout=1.0):
+        super().__init__(url, timeout)
+        self.url = url
+
+    def check(self):
+        try:
+            with urllib.request.urlopen(self.url, timeout=self.timeout) as resp:
+                return resp.status < 400
+        except (urllib.error.URLError, http.client.HTTPException, OSError):
+            return False
+
+
+class TcpProbe(Probe):
+    """
+    Probe establishing TCP connection to given host and port.
+    """
+
+    def __init__(self, host, port, timeout=1.0):
+        super().__init__(f"tcp:{host}:{port}", timeout)
+        self.host = host
+        self.port = port
+
+    def check(self):
+        try:
+            with socket.create_connection((self.host, self.port), timeout=self.timeout):
+                return True
+        except OSError:
+            return False
+
+
+class CommandProbe(Probe):
+    """
+    Probe running given command.
+    """
+
+    def __init__(self, cmd_list, timeout=1.0):
+        super().__init__("cmd:" + shlex.join(cmd_list), timeout)
+        self.cmd_list = cmd_list
+
+    def check(self):
+        try:
+            comp_proc = subprocess.run(
+                self.cmd_list,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=self.timeout)
+        except (subprocess.SubprocessError, OSError):
+            return False
+        return comp_proc.returncode == 0
+
+
+def parse_probe(spec, timeout=1.0):
+    """
+    Create a probe based on given specification string, see module
+    documentation.
+
+    Raises:
+        ValueError: when the specification is not valid
+    """
+    if spec.startswith("http://") or spec.startswith("https://"):
+        return HttpProbe(spec, timeout)
+    if spec.startswith("tcp:"):
+        host, _, port = spec[len("tcp:"):].rpartition(":")
+        if len(host) == 0 or not port.isdigit():
+            raise ValueError(f"invalid tcp probe '{spec}', expected tcp:host:port")
+        return TcpProbe(host, int(port), timeout)
+    if spec.startswith("cmd:"):
+        cmd_list = shlex.split(spec[len("cmd:"):])
+        if len(cmd_list) == 0:
+            raise ValueError(f"invalid cmd probe '{spec}', no command specified")
+        return CommandProbe(cmd_list, timeout)
+    raise ValueError(f"invalid probe '{spec}'")
+
+
+class Timeline:
+    """
+    Time series of probe results, stored in compact arrays (8 bytes per
+    timestamp and 1 byte per result).
+    """
+
+    def __init__(self):
+        self.timestamps = array.array("d")
+        self.results = bytearray()
+
+    def add(self, ts, result):
+        self.timestamps.append(ts)
+        self.results.append(1 if result else 0)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def get_transitions(self):
+        """
+        Get list of state changes.
+
+        Returns:
+            list: tuples of timestamp and new result (bool), including the
+            first sample
+        """
+        transitions = []
+        prev = None
+        for ts, result in zip(self.timestamps, self.results):
+            if result != prev:
+                transitions.append((ts, bool(result)))
+                prev = result
+        return transitions
+
+    def get_time_to_detect(self, start_ts):
+        """
+        Number of seconds since given split start till the first failed
+        check, None when no check failed.
+        """
+        for ts, result in zip(self.timestamps, self.results):
+            if ts >= start_ts and not result:
+                return ts - start_ts
+        return None
+
+    def get_time_to_recover(self, stop_ts):
+        """
+        Number of seconds since given split stop till the first passed check
+        after the last failed check, 0 when no check failed after the stop,
+        None when the probe didn't recover.
+        """
+        last_failure = None
+        for idx in range(len(self.results) - 1, -1, -1):
+            if not self.results[idx]:
+                last_failure = idx
+                break
+        if last_failure is None or self.timestamps[last_failure] < stop_ts:
+            return 0.0
+        if last_failure == len(self.results) - 1:
+            return None
+        return self.timestamps[last_failure + 1] - stop_ts
+
+    def get_availability(self, begin_ts, end_ts):
+        """
+        Ratio of passed checks within given time window, None when there is
+        no check in the window.
+        """
+        window = [r for ts, r in zip(self.timestamps, self.results) if begin_ts <= ts < end_ts]
+        if len(window) == 0:
+            return None
+        return sum(window) / len(window)
+
+
+class ProbeResult:
+    """
+    Availability timeline of a single probe.
+
+    Args:
+        probe (Probe): the probe
+    """
+
+    def __init__(self, probe):
+        self.probe = probe
+        self.timeline = Timeline()
+
+    def to_dict(self, start_ts, stop_ts):
+        """
+        Evaluate the timeline with respect to given split start and stop
+        unix timestamps.
+        """
+        return {
+            "probe": self.probe.name,
+            "checks": len(self.timeline),
+            "time_to_detect": self.timeline.get_time_to_detect(start_ts),
+            "time_to_recover": self.timeline.get_time_to_recover(stop_ts),
+            "availability_before": self.timeline.get_availability(0, start_ts),
+            "availability_during": self.timeline.get_availability(start_ts, stop_ts),
+            "availability_after": self.timeline.get_availability(stop_ts, float("inf")),
+            "transitions": self.timeline.get_transitions(),
+        }
+
+
+def run_probes(probes, end_ts, interval=0.1):
+    """
+    Run given probes concurrently every ``interval`` seconds till given unix
+    timestamp.
+
+    Args:
+        probes (list): list of :py:class:`Probe` objects
+        end_ts (float): unix timestamp when to stop probing
+        interval (float): time between starts of two checks of a probe
+
+    Returns:
+        list: :py:class:`ProbeResult` object for each probe
+    """
+    results = [ProbeResult(probe) for probe in probes]
+
+    def run(probe_result):
+        next_ts = time.time()
+        while next_ts < end_ts:
+            check_ts = time.time()
+            probe_result.timeline.add(check_ts, probe_result.probe.check())
+            next_ts += interval
+            # don't try to catch up when a check took longer than interval
+            next_ts = max(next_ts, time.time())
+            time.sleep(max(0, min(next_ts, end_ts) - time.time()))
+
+    threads = [threading.Thread(target=run, args=(r,), daemon=True) for r in results]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
@@ -0,0 +1,253 @@
+# -*- coding: utf8 -*-
+
+# Copyright 2026 Martin Bukatovič <mbukatov@redhat.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Retries and hedging of remote operations on cluster nodes.
+
+A single slow or failing node (eg. a debug pod waiting for an image pull)
+shouldn't stall or break scheduling on the whole cluster. So a failed
+operation is retried with exponential backoff and full jitter (see
+:py:meth:`RetryPolicy.backoff`), and each attempt gets a timeout which
+doesn't exceed a deadline of the whole operation (eg. requested start time of
+a network split, since there is no point in arming timers after that).
+
+Optionally, an attempt could be hedged: when it takes longer than given
+percentile of durations of the same operation on other nodes (see
+:py:class:`LatencyTracker`), a second attempt is started and the result of
+the one which succeeds first is used. Hedging and retries assume that the
+operation is idempotent, which is the case for arming of timers (see
+:py:meth:`ocpnetsplit.scenario.Scenario.get_node_cmd`).
+"""
+
+
+import concurrent.futures
+import logging
+import math
+import random
+import subprocess
+import threading
+import time
+
+
+LOGGER = logging.getLogger(name=__file__)
+
+
+def percentile(values, pct):
+    """
+    Get given percentile of values (nearest rank method).
+
+    Args:
+        values (list): list of numbers
+        pct (float): percentile within (0, 1], eg. ``0.95``
+
+    Returns:
+        float: the percentile, None when there are no values
+    """
+    values = sorted(values)
+    if len(values) == 0:
+        return None
+    # rounding avoids float errors, eg. 0.95 * 20 = 19.000000000000004
+    rank = max(1, math.ceil(round(pct * len(values), 6)))
+    return values[rank - 1]
+
+
+class LatencyTracker:
+    """
+    Thread safe record of durations of successful operations, used to
+    compute hedging delay.
+
+    Args:
+        min_samples (int): min number of recorded durations needed to
+            compute a percentile
+    """
+
+    def __init__(self, min_samples=5):
+        self.min_samples = min_samples
+        self._durations = []
+        self._lock = threading.Lock()
+
+    def record(self, duration):
+        """
+        Record duration (in seconds) of a successful operation.
+        """
+        with self._lock:
+            self._durations.append(duration)
+
+    def percentile(self, pct):
+        """
+        Get given percentile of recorded durations (nearest rank method).
+
+        Args:
+            pct (float): percentile within (0, 1], eg. ``0.95``
+
+        Returns:
+            float: duration in seconds, None when there are not enough
+            durations recorded
+        """
+        with self._lock:
+            durations = list(self._durations)
+        if len(durations) < self.min_samples:
+            return None
+        return percentile(durations, pct)
+
+
+class RetryPolicy:
+    """
+    Retry policy of a remote operation.
+
+    Args:
+        attempts (int): max number of attempts (1 means no retry)
+        base_delay (float): backoff delay (in seconds) cap of the first retry
+        max_delay (float): max backoff delay in seconds
+        timeout (int): max timeout of a single attempt in seconds
+        hedge (bool): whether to start a second attempt when the first one
+            is slower than ``hedge_percentile`` of other operations
+        hedge_percentile (float): percentile of durations of other
+            operations, after which an attempt is hedged
+    """
+
+    def __init__(
+            self,
+            attempts=3,
+            base_delay=1.0,
+            max_delay=30.0,
+            timeout=600,
+            hedge=False,
+            hedge_percentile=0.95):
+        if attempts < 1:
+            raise ValueError(f"invalid number of attempts: {attempts}")
+        if base_delay < 0 or max_delay < base_delay:
+            raise ValueError(f"invalid backoff delays: {base_delay}-{max_delay}")
+        if not 0 < hedge_percentile <= 1:
+            raise ValueError(f"hedge percentile is not within (0, 1]: {hedge_percentile}")
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+
+    def backoff(self, attempt, rng=random):
+        """
+        Get delay before next attempt, using exponential backoff with full
+        jitter, so that retries of many nodes failed at the same time (eg.
+        because of API server overload) are spread in time.
+
+        Args:
+            attempt (int): number of the failed attempt, starting with 0
+
+        Returns:
+            float: delay in seconds
+        """
+        return rng.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def get_timeout(self, deadline=None):
+        """
+        Get timeout of next attempt, which doesn't exceed the deadline.
+
+        Args:
+            deadline (float): unix timestamp of the deadline (optional)
+
+        Returns:
+            float: timeout in seconds
+
+        Raises:
+            subprocess.TimeoutExpired: when the deadline has already passed
+        """
+        if deadline is None:
+            return self.timeout
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            raise subprocess.TimeoutExpired("deadline", 0)
+        return min(self.timeout, remaining)
+
+
+def _hedged_call(func, timeout, hedge_delay):
+    """
+    Call given function, and call it again concurrently when the first call
+    doesn't finish within hedge delay. Result of the first successful call is
+    returned, the other one is left to finish in the background.
+    """
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+    try:
+        futures = [executor.submit(func, timeout)]
+        done, _ = concurrent.futures.wait(futures, timeout=hedge_delay)
+        if len(done) == 0:
+            LOGGER.info("operation is slower than %.2f s, starting hedged attempt", hedge_delay)
+            futures.append(executor.submit(func, max(0.1, timeout - hedge_delay)))
+        pending = set(futures)
+        first_ex = None
+        while len(pending) > 0:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                if first_ex is None:
+                    first_ex = future.exception()
+        raise first_ex
+    finally:
+        executor.shutdown(wait=False)
+
+
+def call(func, policy=None, deadline=None, tracker=None, sleep=time.sleep):
+    """
+    Call given remote operation according to the retry policy.
+
+    Args:
+        func (callable): the operation, called with timeout (in seconds) of
+            the attempt as the only argument, failure is reported via
+            ``subprocess.SubprocessError``
+        policy (RetryPolicy): retry policy, a default one when not specified
+        deadline (float): unix timestamp after which no attempt is started
+        tracker (LatencyTracker): durations of the same operation on other
+            nodes, successful attempt is recorded there (optional, hedging
+            is possible only when specified)
+        sleep (callable): function used to wait for the backoff delay
+
+    Returns:
+        return value of the function
+
+    Raises:
+        subprocess.SubprocessError: failure of the last attempt, or
+            ``subprocess.TimeoutExpired`` when the deadline has passed
+    """
+    if policy is None:
+        policy = RetryPolicy()
+    for attempt in range(policy.attempts):
+        timeout = policy.get_timeout(deadline)
+        hedge_delay = None
+        if policy.hedge and tracker is not None:
+            hedge_delay = tracker.percentile(policy.hedge_percentile)
+        start = time.monotonic()
+        try:
+            if hedge_delay is not None and hedge_delay < timeout:
+                result = _hedged_call(func, timeout, hedge_delay)
+            else:
+                result = func(timeout)
+        except subprocess.SubprocessError as ex:
+            if attempt + 1 >= policy.attempts:
+                raise
+            delay = policy.backoff(attempt)
+            if deadline is not None and time.time() + delay >= deadline:
+                LOGGER.warning("attempt %d failed, no time left to retry: %s", attempt + 1, ex)
+                raise
+            LOGGER.warning("attempt %d failed, retrying in %.2f s: %s", attempt + 1, delay, ex)
+            sleep(delay)
+            continue
+        if tracker is not None:
+            tracker.record(time.monotonic() - start)
+        return result
@@ -0,0 +1,457 @@
+# -*- coding: utf8 -*-
+
+# Copyright 2026 Martin Bukatovič <mbukatov@redhat.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Rollout of network split ``MachineConfig`` objects across
+``MachineConfigPools`` of a cluster.
+
+When a ``MachineConfig`` of a pool changes, Machine Config Operator renders
+a new configuration of the pool and updates (and reboots) its nodes, at most
+``maxUnavailable`` nodes of the pool at a time. The progress of each node is
+reported via annotations of the node object:
+
+- ``machineconfiguration.openshift.io/currentConfig``: configuration the node
+  runs
+- ``machineconfiguration.openshift.io/desiredConfig``: configuration the node
+  is updated to
+- ``machineconfiguration.openshift.io/state``: ``Working`` during the update,
+  ``Done`` when finished
+
+:py:class:`RolloutTracker` follows watch events of pools and nodes and
+reports progress of each pool along with an estimate of remaining time, based
+on observed update durations of nodes which already finished (see
+:py:meth:`RolloutTracker.eta`). :py:func:`run_rollout` applies the
+``MachineConfig`` objects, optionally changes ``maxUnavailable`` of the pools
+for the duration of the rollout and waits until the rollout finishes.
+"""
+
+
+import logging
+import math
+import queue
+import statistics
+import subprocess
+import threading
+import time
+
+from ocpnetsplit import ocp
+
+
+LOGGER = logging.getLogger(name=__file__)
+
+
+MCO_PREFIX = "machineconfiguration.openshift.io/"
+
+ROLE_PREFIX = "node-role.kubernetes.io/"
+
+
+def get_changed_pools(mc_spec, actions):
+    """
+    Get names of pools with ``MachineConfig`` objects changed by
+    ``oc apply``.
+
+    Args:
+        mc_spec (list): list of ``MachineConfig`` dicts, as created by
+            :py:func:`ocpnetsplit.main.get_networksplit_mc_spec`
+        actions (dict): action for each object as reported by
+            :py:func:`ocpnetsplit.ocp.apply_yaml`
+
+    Returns:
+        list: names of the pools, in order of the spec
+    """
+    changed = set()
+    for name, action in actions.items():
+        if action != "unchanged":
+            changed.add(name.split("/")[-1])
+    pools = []
+    for mcd in mc_spec:
+        role = mcd["metadata"]["labels"][MCO_PREFIX + "role"]
+        if mcd["metadata"]["name"] in changed and role not in pools:
+            pools.append(role)
+    return pools
+
+
+def parse_max_unavailable(value, machine_count):
+    """
+    Get max number of nodes of a pool updated at the same time.
+
+    Args:
+        value: ``maxUnavailable`` of the pool, either number of nodes or
+            percentage of nodes of the pool (eg. ``"10%"``), None when not
+            specified
+        machine_count (int): number of nodes of the pool
+
+    Returns:
+        int: number of nodes, at least 1
+    """
+    if value is None:
+        return 1
+    if isinstance(value, str) and value.endswith("%"):
+        return max(1, math.floor(int(value[:-1]) * machine_count / 100))
+    return max(1, int(value))
+
+
+def _get_condition(obj, cond_type):
+    for cond in obj.get("status", {}).get("conditions", []):
+        if cond["type"] == cond_type:
+            return cond
+    return None
+
+
+class PoolProgress:
+    """
+    Rollout progress of a ``MachineConfigPool``.
+
+    Args:
+        name (str): name of the pool
+        initial_config (str): name of rendered configuration of the pool
+            before the rollout
+    """
+
+    def __init__(self, name, initial_config):
+        self.name = name
+        self.initial_config = initial_config
+        # rendered configuration the pool is updated to, None until MCO
+        # renders it
+        self.target_config = None
+        self.current_config = initial_config
+        self.machine_count = None
+        self.updated_count = None
+        self.max_unavailable = None
+        self.updated = False
+        self.degraded = None
+
+    def load(self, pool_dict):
+        """
+        Update the progress from a pool object.
+        """
+        target = pool_dict["spec"].get("configuration", {}).get("name")
+        if target is not None and target != self.initial_config:
+            self.target_config = target
+        pool_status = pool_dict.get("status", {})
+        self.current_config = pool_status.get("configuration", {}).get("name")
+        self.machine_count = pool_status.get("machineCount")
+        self.updated_count = pool_status.get("updatedMachineCount")
+        self.max_unavailable = pool_dict["spec"].get("maxUnavailable")
+        cond = _get_condition(pool_dict, "Updated")
+        self.updated = cond is not None and cond["status"] == "True"
+        cond = _get_condition(pool_dict, "Degraded")
+        if cond is not None and cond["status"] == "True":
+            self.degraded = cond.get("message") or cond.get("reason") or "pool is degraded"
+        else:
+            self.degraded = None
+
+    @property
+    def done(self):
+        """
+        True if all nodes of the pool run the new configuration.
+        """
+        return (
+            self.target_config is not None
+            and self.current_config == self.target_config
+            and self.updated_count == self.machine_count
+            and self.updated)
+
+    def to_dict(self):
+        return {
+            "pool": self.name,
+            "initial_config": self.initial_config,
+            "target_config": self.target_config,
+            "machine_count": self.machine_count,
+            "updated_count": self.updated_count,
+            "max_unavailable": self.max_unavailable,
+            "done": self.done,
+            "degraded": self.degraded,
+        }
+
+
+class NodeProgress:
+    """
+    Rollout progress of a node.
+
+    Args:
+        node (str): name of the node
+        pool (str): name of pool of the node
+    """
+
+    def __init__(self, node, pool):
+        self.node = node
+        self.pool = pool
+        self.current_config = None
+        self.desired_config = None
+        self.state = None
+        # timestamps of start and end of the update, as observed
+        self.start = None
+        self.stop = None
+
+    @property
+    def duration(self):
+        """
+        Duration of the update in seconds, None when it wasn't observed.
+        """
+        if self.start is None or self.stop is None:
+            return None
+        return self.stop - self.start
+
+    def to_dict(self):
+        return {
+            "node": self.node,
+            "pool": self.pool,
+            "current_config": self.current_config,
+            "state": self.state,
+            "start": self.start,
+            "stop": self.stop,
+            "duration": self.duration,
+        }
+
+
+class RolloutTracker:
+    """
+    Track rollout of new configuration of given pools, based on watch events
+    of ``MachineConfigPool`` and node objects.
+
+    Args:
+        initial_configs (dict): name of rendered configuration before the
+            rollout for each tracked pool
+    """
+
+    def __init__(self, initial_configs):
+        self.pools = {
+            name: PoolProgress(name, config) for name, config in initial_configs.items()}
+        self.nodes = {}
+
+    def _get_node_pool(self, node_dict):
+        # master pool takes precedence (eg. in compact clusters, where master
+        # nodes are workers as well), then tracked custom pools (eg. infra),
+        # which select nodes via their own role label, while a role without
+        # its own pool (eg. a plain label) leaves the node in worker pool
+        labels = node_dict["metadata"].get("labels", {})
+        roles = sorted(key[len(ROLE_PREFIX):] for key in labels if key.startswith(ROLE_PREFIX))
+        if "master" in roles:
+            return "master"
+        for role in roles:
+            if role != "worker" and role in self.pools:
+                return role
+        if "worker" in roles:
+            return "worker"
+        return None
+
+    def handle_pool(self, event_type, pool_dict):
+        """
+        Process a ``MachineConfigPool`` watch event.
+
+        Returns:
+            bool: true if the progress of the pool changed
+        """
+        progress = self.pools.get(pool_dict["metadata"]["name"])
+        if progress is None or event_type == "DELETED":
+            return False
+        old = progress.to_dict()
+        progress.load(pool_dict)
+        return progress.to_dict() != old
+
+    def handle_node(self, event_type, node_dict, ts):
+        """
+        Process a node watch event.
+
+        Returns:
+            bool: true if the update of the node started or finished
+        """
+        name = node_dict["metadata"]["name"]
+        pool = self._get_node_pool(node_dict)
+        if event_type == "DELETED" or pool not in self.pools:
+            return False
+        progress = self.nodes.setdefault(name, NodeProgress(name, pool))
+        annotations = node_dict["metadata"].get("annotations", {})
+        progress.current_config = annotations.get(MCO_PREFIX + "currentConfig")
+        progress.desired_config = annotations.get(MCO_PREFIX + "desiredConfig")
+        progress.state = annotations.get(MCO_PREFIX + "state")
+        target = self.pools[pool].target_config
+        if target is None:
+            return False
+        if progress.start is None and progress.current_config != target and (
+                progress.desired_config == target or progress.state == "Working"):
+            LOGGER.info("update of node %s started", name)
+            progress.start = ts
+            return True
+        if progress.stop is None and progress.current_config == target and progress.state == "Done":
+            LOGGER.info("update of node %s finished", name)
+            progress.stop = ts
+            return True
+        return False
+
+    def is_node_done(self, node_progress):
+        """
+        True if the node runs the new configuration of it's pool.
+        """
+        target = self.pools[node_progress.pool].target_config
+        return (
+            target is not None
+            and node_progress.current_config == target
+            and node_progress.state == "Done")
+
+    @property
+    def done(self):
+        """
+        True if all tracked pools finished the rollout.
+        """
+        return all(p.done for p in self.pools.values())
+
+    @property
+    def degraded(self):
+        """
+        Names and messages of degraded pools.
+        """
+        return {p.name: p.degraded for p in self.pools.values() if p.degraded is not None}
+
+    def node_duration(self):
+        """
+        Median of observed update durations of nodes, None when no node
+        finished the update yet.
+        """
+        durations = [n.duration for n in self.nodes.values() if n.duration is not None]
+        if len(durations) == 0:
+            return None
+        return statistics.median(durations)
+
+    def eta(self, now):
+        """
+        Estimate remaining time of the rollout.
+
+        Nodes of each pool are updated in waves of ``maxUnavailable`` nodes,
+        each update takes median of observed update durations, and pools are
+        updated concurrently.
+
+        Args:
+            now (float): current unix timestamp
+
+        Returns:
+            float: remaining time in seconds, None when it can't be estimated
+            yet
+        """
+        duration = self.node_duration()
+        if duration is None:
+            return None
+        eta = 0.0
+        for pool in self.pools.values():
+            if pool.done:
+                continue
+            if pool.target_config is None or pool.machine_count is None:
+                return None
+            nodes = [n for n in self.nodes.values() if n.pool == pool.name]
+            running = [n for n in nodes if n.start is not None and not self.is_node_done(n)]
+            remaining = pool.machine_count - sum(1 for n in nodes if self.is_node_done(n))
+            parallel = max(len(running), parse_max_unavailable(pool.max_unavailable, pool.machine_count))
+            waiting = max(0, remaining - len(running))
+            running_left = max((max(0.0, duration - (now - n.start)) for n in running), default=0.0)
+            eta = max(eta, running_left + math.ceil(waiting / parallel) * duration)
+        return eta
+
+    def to_dict(self):
+        return {
+            "pools": [p.to_dict() for p in self.pools.values()],
+            "nodes": [n.to_dict() for n in sorted(self.nodes.values(), key=lambda n: n.node)],
+            "node_duration": self.node_duration(),
+            "done": self.done,
+            "degraded": self.degraded,
+        }
+
+
+def _watch(resource, events, kubeconfig):
+    try:
+        for event_type, obj in ocp.watch_objects(resource, kubeconfig=kubeconfig):
+            events.put((resource, event_type, obj))
+    except subprocess.SubprocessError as ex:
+        LOGGER.warning("%s watch failed: %s", resource, ex)
+    events.put((resource, None, None))
+
+
+def run_rollout(mc_spec, mc_yaml, kubeconfig=None, max_unavailable=None, timeout=7200, progress=None):
+    """
+    Apply ``MachineConfig`` objects and wait until the new configuration is
+    rolled out on all nodes of affected pools.
+
+    Args:
+        mc_spec (list): list of ``MachineConfig`` dicts, as created by
+            :py:func:`ocpnetsplit.main.get_networksplit_mc_spec`
+        mc_yaml (str): the same objects as a yaml string
+        kubeconfig (str): file path to kubeconfig
+        max_unavailable (int): ``maxUnavailable`` of non master pools for the
+            duration of the rollout, the original value is restored
+            afterwards (master pool is not changed, so that etcd doesn't lose
+            quorum)
+        timeout (int): max duration of the rollout in seconds
+        progress (callable): function called with the tracker and current
+            timestamp whenever the progress changes
+
+    Returns:
+        RolloutTracker: final progress of the rollout, check
+        :py:attr:`RolloutTracker.done` and :py:attr:`RolloutTracker.degraded`
+    """
+    roles = []
+    for mcd in mc_spec:
+        role = mcd["metadata"]["labels"][MCO_PREFIX + "role"]
+        if role not in roles:
+            roles.append(role)
+    pools_before = {
+        role: ocp.get_object("machineconfigpool/" + role, kubeconfig=kubeconfig) for role in roles}
+    actions = ocp.apply_yaml(mc_yaml, kubeconfig=kubeconfig)
+    changed = get_changed_pools(mc_spec, actions)
+    tracker = RolloutTracker({
+        role: pools_before[role]["spec"].get("configuration", {}).get("name") for role in changed})
+    if len(changed) == 0:
+        LOGGER.info("no MachineConfig changed, nothing to roll out")
+        return tracker
+
+    restore = {}
+    if max_unavailable is not None:
+        for role in changed:
+            if role == "master":
+                continue
+            restore[role] = pools_before[role]["spec"].get("maxUnavailable")
+            LOGGER.info("setting maxUnavailable of pool %s to %d", role, max_unavailable)
+            ocp.patch_object(
+                "machineconfigpool/" + role, {"spec": {"maxUnavailable": max_unavailable}},
+                kubeconfig=kubeconfig)
+    try:
+        events = queue.Queue()
+        for resource in ("machineconfigpools", "nodes"):
+            threading.Thread(target=_watch, args=(resource, events, kubeconfig), daemon=True).start()
+        deadline = time.time() + timeout
+        while not tracker.done and len(tracker.degraded) == 0 and time.time() < deadline:
+            try:
+                resource, event_type, obj = events.get(timeout=min(10, max(0.1, deadline - time.time())))
+            except queue.Empty:
+                continue
+            now = time.time()
+            if event_type is None:
+                # watch ends after a server side timeout, start it again
+                LOGGER.info("restarting %s watch", resource)
+                time.sleep(1)
+                threading.Thread(target=_watch, args=(resource, events, kubeconfig), daemon=True).start()
+                continue
+            if resource == "nodes":
+                updated = tracker.handle_node(event_type, obj, now)
+            else:
+                updated = tracker.handle_pool(event_type, obj)
+            if updated and progress is not None:
+                progress(tracker, now)
+    finally:
+        for role, value in restore.items():
+            LOGGER.info("restoring maxUnavailable of pool %s to %s", role, value)
+            ocp.patch_object(
+                "machineconfigpool/" + role, {"spec": {"maxUnavailable": value}}, kubeconfig=kubeconfig)
+    return tracker
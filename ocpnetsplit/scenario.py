@@ -0,0 +1,414 @@
+# -*- coding: utf8 -*-
+
+# Copyright 2026 Martin Bukatovič <mbukatov@redhat.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Scenario is a timeline of network splits and latency changes, described in a
+yaml file like this::
+
+    steps:
+      - split: ab
+        at: 0
+        length: 5
+      - latency: 50
+        latency_spec:
+          ab: 100
+        at: 10
+        length: 15
+      - split: ab-bc
+        at: 30
+        length: 5
+      - latency_profile:
+          - offset: 0
+            latency: 10
+          - offset: 600
+            latency: 200
+            ramp: true
+        at: 40
+        length: 15
+
+Where ``at`` is start of the step in minutes relative to start of the whole
+scenario and ``length`` is duration of the step in minutes. Latency profile
+(see :py:class:`ocpnetsplit.zone.LatencyProfile`) changes the latency over
+time, in the example above it grows from 10 to 200 ms over 10 minutes and
+then stays there till the end of the step.
+
+All timers of the whole scenario are armed on a node via a single command, so
+that it takes one round trip per node to schedule the scenario, no matter how
+many steps it has. Predefined splits (see
+:py:const:`ocpnetsplit.zone.NETWORK_SPLITS`) are scheduled via timer units
+deployed by MachineConfig, while other splits and latency changes are
+scheduled via transient timers created by ``systemd-run``. Latency changes
+run ``network-latency.sh`` script, which has to be deployed on the nodes (see
+``--latency`` option of ``ocp-network-split-setup``). Latency profile is
+applied by ``network-latency.sh profile`` command running for the whole
+duration of the profile, which changes delay of the qdiscs in place.
+
+Arming of the timers is idempotent, so that the command could be retried (or
+run twice at the same time) on a node without any harm: ``systemctl start``
+of already active timer does nothing, and transient timers are created only
+when they are not active already (see :py:func:`arm_transient_cmd`).
+Scheduled timers could be stopped again via :py:func:`cancel_cmd`.
+"""
+
+
+import shlex
+
+from ocpnetsplit import serialize
+from ocpnetsplit import status
+from ocpnetsplit import zone
+
+
+SPLIT_KEYS = {"split", "at", "length"}
+LATENCY_KEYS = {"latency", "latency_spec", "at", "length"}
+PROFILE_KEYS = {"latency_profile", "at", "length"}
+
+
+class ScenarioStep:
+    """
+    Single step of a scenario, either a network split, a latency change or
+    a latency profile.
+
+    Args:
+        at (int): start of the step in minutes since start of the scenario
+        length (int): duration of the step in minutes, None means that
+            latency change is not reverted (not supported for splits)
+        split (str): network split configuration in canonical form, see
+            :py:func:`ocpnetsplit.zone.normalize_split`
+        latency (int): default zone latency in ms
+        latency_spec (ZoneLatSpec): specific latency between given zones
+        profile (LatencyProfile): time varying latency
+    """
+
+    def __init__(self, at, length, split=None, latency=None, latency_spec=None, profile=None):
+        self.at = at
+        self.length = length
+        self.split = split
+        self.latency = latency
+        self.latency_spec = latency_spec
+        self.profile = profile
+
+    @property
+    def end(self):
+        """
+        End of the step in minutes since start of the scenario, None when the
+        step doesn't end.
+        """
+        if self.length is None:
+            return None
+        return self.at + self.length
+
+    def get_timers(self, start_ts):
+        """
+        Get timers of this step.
+
+        Args:
+            start_ts (int): unix timestamp of start of the scenario
+
+        Returns:
+            list: :py:class:`ocpnetsplit.status.TimerStatus` objects
+        """
+        setup_ts = start_ts + self.at * 60
+        if self.split in zone.NETWORK_SPLITS:
+            stop_ts = setup_ts + self.length * 60
+            return [
+                status.TimerStatus(
+                    f"network-split-{self.split}-setup@{setup_ts}.timer",
+                    f"network-split@{self.split}.service",
+                    setup_ts),
+                status.TimerStatus(
+                    f"network-split-teardown@{stop_ts}.timer",
+                    "network-split-teardown.service",
+                    stop_ts),
+            ]
+        if self.split is not None:
+            stop_ts = setup_ts + self.length * 60
+            return [
+                status.TimerStatus(
+                    f"network-split-{self.split}-setup-{setup_ts}.timer",
+                    f"network-split-{self.split}-setup-{setup_ts}.service",
+                    setup_ts),
+                status.TimerStatus(
+                    f"network-split-teardown-{stop_ts}.timer",
+                    f"network-split-teardown-{stop_ts}.service",
+                    stop_ts),
+            ]
+        timers = [
+            status.TimerStatus(
+                f"network-latency-setup-{setup_ts}.timer",
+                f"network-latency-setup-{setup_ts}.service",
+                setup_ts)
+        ]
+        if self.length is not None:
+            stop_ts = setup_ts + self.length * 60
+            timers.append(status.TimerStatus(
+                f"network-latency-teardown-{stop_ts}.timer",
+                f"network-latency-teardown-{stop_ts}.service",
+                stop_ts))
+        return timers
+
+    def is_transient(self):
+        """
+        Return True when timers of this step are not deployed on the nodes
+        via MachineConfig, so that they need to be created as transient units
+        via ``systemd-run``.
+        """
+        return self.split not in zone.NETWORK_SPLITS
+
+    def get_transient_cmds(self, start_ts):
+        """
+        Get ``systemd-run`` commands creating transient timers of this step,
+        along with the services they activate.
+
+        Args:
+            start_ts (int): unix timestamp of start of the scenario
+
+        Returns:
+            list: list of commands
+        """
+        if self.split is not None:
+            step_cmds = [
+                ["systemctl", "start", f"network-split@{self.split}.service"],
+                ["systemctl", "stop", "network-split@*.service"],
+            ]
+        elif self.profile is not None:
+            length = None if self.length is None else self.length * 60
+            setup_ts = start_ts + self.at * 60
+            # profile command may still be waiting for the next change, so
+            # it's stopped before the teardown
+            teardown = shlex.join([
+                "systemctl", "stop", f"network-latency-setup-{setup_ts}.service"])
+            step_cmds = [
+                ["/etc/network-latency.sh", "profile", str(setup_ts)] + self.profile.get_cli_args(length),
+                ["sh", "-c", f"{teardown}; /etc/network-latency.sh teardown"],
+            ]
+        else:
+            step_cmds = [
+                ["/etc/network-latency.sh"] + self.get_latency_args(),
+                ["/etc/network-latency.sh", "teardown"],
+            ]
+        cmds = []
+        for timer, step_cmd in zip(self.get_timers(start_ts), step_cmds):
+            cmds.append([
+                "systemd-run",
+                f"--on-calendar=@{timer.next_elapse}",
+                f"--unit={timer.unit[:-len('.timer')]}",
+                "--property=EnvironmentFile=/etc/network-split.env",
+            ] + step_cmd)
+        return cmds
+
+    def get_latency_args(self):
+        """
+        Get command line arguments of ``network-latency.sh`` script for this
+        latency step.
+        """
+        args = []
+        if self.latency_spec is not None:
+            args += self.latency_spec.get_cli_args().split()
+        args.append(str(self.latency))
+        return args
+
+
+def arm_transient_cmd(cmd):
+    """
+    Create shell snippet running given ``systemd-run`` command only when the
+    transient timer it creates is not active already. When ``systemd-run``
+    fails because the same timer has been just created by another
+    concurrent attempt, the snippet still succeeds.
+
+    Args:
+        cmd (list): ``systemd-run`` command with ``--unit`` option, as
+            created by :py:meth:`ScenarioStep.get_transient_cmds`
+
+    Returns:
+        str: shell snippet
+    """
+    unit = [arg for arg in cmd if arg.startswith("--unit=")][0][len("--unit="):]
+    check = shlex.join(["systemctl", "is-active", "--quiet", f"{unit}.timer"])
+    return f"{{ {check} || {shlex.join(cmd)} || {check}; }}"
+
+
+def cancel_cmd(units=None):
+    """
+    Create command stopping given timers on a node. Timers which are not
+    loaded on the node (eg. transient timers which were not created there)
+    are ignored.
+
+    Args:
+        units (list): names of timer units to stop, when not specified, all
+            network split timers are stopped along with network split which
+            is currently active
+
+    Returns:
+        list: command to run on a node
+    """
+    if units is None:
+        # patterns match loaded units only, so there is nothing to ignore
+        return ["systemctl", "stop", "network-split-*.timer", "network-split@*.service"]
+    # systemctl returns 5 when some unit is not loaded, other units are
+    # stopped anyway
+    script = shlex.join(["systemctl", "stop"] + units) + "; rc=$?; test $rc -eq 0 -o $rc -eq 5"
+    return ["sh", "-c", script]
+
+
+def _check_keys(idx, step_d, allowed_keys):
+    unknown = set(step_d.keys()) - allowed_keys
+    if len(unknown) > 0:
+        raise ValueError(f"step {idx}: unknown keys {sorted(unknown)}")
+
+
+def _get_minutes(idx, step_d, key, required=True, minimum=0):
+    value = step_d.get(key)
+    if value is None:
+        if required:
+            raise ValueError(f"step {idx}: '{key}' is not specified")
+        return None
+    if not isinstance(value, int) or isinstance(value, bool) or value < minimum:
+        raise ValueError(f"step {idx}: '{key}' is not an integer >= {minimum}: {value}")
+    return value
+
+
+def _check_overlap(steps, kind):
+    prev = None
+    for step in sorted(steps, key=lambda s: s.at):
+        # teardown of the previous step could stop the next one when both
+        # timers elapse at the same time, so a gap is required
+        if prev is not None and (prev.end is None or prev.end >= step.at):
+            raise ValueError(
+                f"{kind} step starting at minute {step.at} overlaps with "
+                f"the previous {kind} step starting at minute {prev.at}")
+        prev = step
+
+
+class Scenario:
+    """
+    Timeline of network splits and latency changes.
+    """
+
+    def __init__(self):
+        self.steps = []
+
+    def load_dict(self, scenario_d):
+        """
+        Load and validate scenario from the given dict.
+
+        Args:
+            scenario_d (dict): scenario with ``steps`` list, see module
+                documentation for an example
+
+        Raises:
+            ValueError: when the scenario is not valid
+        """
+        if not isinstance(scenario_d, dict) or not isinstance(scenario_d.get("steps"), list):
+            raise ValueError("scenario doesn't contain list of steps")
+        if len(scenario_d["steps"]) == 0:
+            raise ValueError("scenario doesn't contain any step")
+        steps = []
+        for idx, step_d in enumerate(scenario_d["steps"]):
+            if not isinstance(step_d, dict):
+                raise ValueError(f"step {idx}: not a dict")
+            at = _get_minutes(idx, step_d, "at")
+            if "split" in step_d:
+                _check_keys(idx, step_d, SPLIT_KEYS)
+                try:
+                    split = zone.normalize_split(step_d["split"])
+                except ValueError as ex:
+                    raise ValueError(f"step {idx}: {ex}")
+                length = _get_minutes(idx, step_d, "length", minimum=1)
+                steps.append(ScenarioStep(at, length, split=split))
+            elif "latency" in step_d:
+                _check_keys(idx, step_d, LATENCY_KEYS)
+                latency = _get_minutes(idx, step_d, "latency")
+                length = _get_minutes(idx, step_d, "length", required=False, minimum=1)
+                latency_spec = None
+                if step_d.get("latency_spec") is not None:
+                    latency_spec = zone.ZoneLatSpec()
+                    try:
+                        latency_spec.load_dict(step_d["latency_spec"])
+                    except (ValueError, AttributeError) as ex:
+                        raise ValueError(f"step {idx}: {ex}")
+                steps.append(ScenarioStep(at, length, latency=latency, latency_spec=latency_spec))
+            elif "latency_profile" in step_d:
+                _check_keys(idx, step_d, PROFILE_KEYS)
+                length = _get_minutes(idx, step_d, "length", required=False, minimum=1)
+                profile = zone.LatencyProfile()
+                try:
+                    profile.load_list(step_d["latency_profile"])
+                except ValueError as ex:
+                    raise ValueError(f"step {idx}: {ex}")
+                steps.append(ScenarioStep(at, length, profile=profile))
+            else:
+                raise ValueError(f"step {idx}: neither split nor latency specified")
+        _check_overlap([s for s in steps if s.split is not None], "split")
+        _check_overlap([s for s in steps if s.split is None], "latency")
+        self.steps = sorted(steps, key=lambda s: s.at)
+
+    def load_yaml(self, content):
+        """
+        Load and validate scenario from the given yaml content.
+        """
+        self.load_dict(serialize.load_yaml(content))
+
+    def get_length(self):
+        """
+        Get duration of the whole scenario in minutes.
+        """
+        return max(step.end or step.at for step in self.steps)
+
+    def has_latency(self):
+        """
+        Check whether the scenario contains a latency change.
+        """
+        return any(step.split is None for step in self.steps)
+
+    def get_timers(self, start_ts):
+        """
+        Get all timers of the scenario.
+
+        Args:
+            start_ts (int): unix timestamp of start of the scenario
+
+        Returns:
+            list: :py:class:`ocpnetsplit.status.TimerStatus` objects
+        """
+        timers = []
+        for step in self.steps:
+            timers += step.get_timers(start_ts)
+        return timers
+
+    def get_node_cmd(self, start_ts):
+        """
+        Create single command arming all timers of the scenario on a node.
+
+        Args:
+            start_ts (int): unix timestamp of start of the scenario
+
+        Returns:
+            list: command to run on a node
+        """
+        units = []
+        transient_cmds = []
+        for step in self.steps:
+            if step.is_transient():
+                transient_cmds += step.get_transient_cmds(start_ts)
+            else:
+                units += [timer.unit for timer in step.get_timers(start_ts)]
+        if len(transient_cmds) == 0:
+            return ["systemctl", "start"] + units
+        snippets = [arm_transient_cmd(cmd) for cmd in transient_cmds]
+        if len(units) > 0:
+            snippets = [shlex.join(["systemctl", "start"] + units)] + snippets
+        script = " && ".join(snippets)
+        return ["sh", "-c", script]
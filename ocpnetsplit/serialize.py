@@ -0,0 +1,115 @@
+# -*- coding: utf8 -*-
+
+# Copyright 2026 Martin Bukatovič <mbukatov@redhat.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Serialization of k8s objects (eg. ``MachineConfig`` spec) and other yaml
+documents.
+
+Yaml is loaded and dumped via libyaml C bindings of PyYAML when available
+(with fallback to pure python implementation), and k8s objects could be
+dumped as json ``List`` object as well, which is accepted by both
+``oc create -f`` and ``oc apply -f``.
+"""
+
+
+import json
+
+import yaml
+
+
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+"""
+The fastest safe yaml loader available.
+"""
+
+
+SafeDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+"""
+The fastest safe yaml dumper available.
+"""
+
+
+OUTPUT_FORMATS = ("yaml", "json")
+"""
+Output formats of k8s objects, see :py:func:`dump_objects`.
+"""
+
+
+def load_yaml(content):
+    """
+    Load single yaml document from given string.
+    """
+    return yaml.load(content, Loader=SafeLoader)
+
+
+def load_yaml_all(content):
+    """
+    Load all yaml documents from given string.
+
+    Returns:
+        list: loaded documents, without empty ones
+    """
+    return [doc for doc in yaml.load_all(content, Loader=SafeLoader) if doc is not None]
+
+
+def dump_yaml_all(docs):
+    """
+    Dump given list of documents as yaml string with multiple documents.
+    """
+    return yaml.dump_all(docs, Dumper=SafeDumper)
+
+
+def dump_objects(objects, output_format="yaml"):
+    """
+    Dump given k8s objects in given format.
+
+    Args:
+        objects (list): k8s objects (eg. ``MachineConfig`` dicts)
+        output_format (str): one of :py:const:`OUTPUT_FORMATS`, with ``yaml``
+            each object is a separate yaml document, with ``json`` the objects
+            are items of a single ``List`` object
+
+    Returns:
+        str: the serialized objects
+
+    Raises:
+        ValueError: if given ``output_format`` is invalid
+    """
+    if output_format == "yaml":
+        return dump_yaml_all(objects)
+    if output_format == "json":
+        obj_list = {"apiVersion": "v1", "kind": "List", "items": objects}
+        return json.dumps(obj_list, indent=2) + "\n"
+    raise ValueError(f"invalid output format: {output_format}")
+
+
+def load_objects(content):
+    """
+    Load k8s objects from given yaml or json string, as created by
+    :py:func:`dump_objects`.
+
+    Returns:
+        list: k8s objects, items of ``List`` objects are included instead of
+        the list itself
+    """
+    # json is valid yaml as well
+    objects = []
+    for doc in load_yaml_all(content):
+        if doc.get("kind") == "List":
+            objects.extend(doc.get("items") or [])
+        else:
+            objects.append(doc)
+    return objects
@@ -0,0 +1,245 @@
+# -*- coding: utf8 -*-
+
+# Copyright 2026 Martin Bukatovič <mbukatov@redhat.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Machine readable results of network split scheduling and checking.
+
+Results are reported per node via :py:class:`NodeStatus` objects, which can
+be converted into plain dicts (eg. to be dumped as json) via ``to_dict()``.
+Output of ``systemctl list-timers`` is parsed only once, preferably in json
+format (``--output=json`` is supported since systemd 251), with a fallback
+to the default table format for older systemd versions.
+"""
+
+
+import json
+import subprocess
+
+
+CLOCK_CMD = ["date", "+%s.%N"]
+"""
+Command printing current time of a node as unix timestamp with fractional
+part.
+"""
+
+
+class TimersNotArmedError(subprocess.SubprocessError):
+    """
+    Some timers are not armed on a node after scheduling.
+    """
+
+    def __init__(self, node, units):
+        self.node = node
+        self.units = units
+        super().__init__(f"timers not armed on node {node}: {', '.join(units)}")
+
+
+def list_timers_cmd(patterns):
+    """
+    Create command listing systemd timers matching given patterns, which
+    produces json output when systemd on the node supports it, and falls back
+    to table output otherwise.
+
+    Args:
+        patterns (list): list of timer unit name patterns
+
+    Returns:
+        list: command to run on a node, output of which could be parsed via
+        :py:func:`parse_list_timers`
+    """
+    patterns_str = " ".join(f"'{pattern}'" for pattern in patterns)
+    script = (
+        f"systemctl list-timers --output=json {patterns_str} 2>/dev/null"
+        f" || systemctl list-timers {patterns_str}")
+    return ["sh", "-c", script]
+
+
+def timer_instance_ts(unit):
+    """
+    Get unix timestamp from instance name of ocp-network-split timer unit,
+    eg. ``1617978600`` from ``network-split-ab-setup@1617978600.timer``, or
+    from the name suffix of a transient timer unit, eg.
+    ``network-latency-setup-1617978600.timer``.
+
+    Returns:
+        int: unix timestamp, or None if the unit name doesn't contain it
+    """
+    if "@" in unit:
+        instance = unit.split("@", 1)[1].rsplit(".", 1)[0]
+    elif "-" in unit:
+        instance = unit.rsplit("-", 1)[1].rsplit(".", 1)[0]
+    else:
+        return None
+    if not instance.isdigit():
+        return None
+    return int(instance)
+
+
+class TimerStatus:
+    """
+    Status of a systemd timer unit on a node.
+
+    Args:
+        unit (str): name of the timer unit
+        activates (str): name of the unit the timer activates
+        next_elapse (int): unix timestamp of the next elapse of the timer,
+            None when the timer is not going to elapse again
+    """
+
+    def __init__(self, unit, activates=None, next_elapse=None):
+        self.unit = unit
+        self.activates = activates
+        self.next_elapse = next_elapse
+
+    @property
+    def armed(self):
+        """
+        True if the timer is going to elapse in the future.
+        """
+        return self.next_elapse is not None
+
+    def to_dict(self):
+        return {
+            "unit": self.unit,
+            "activates": self.activates,
+            "next_elapse": self.next_elapse,
+            "armed": self.armed,
+        }
+
+
+class NodeStatus:
+    """
+    Result of an operation (such as scheduling or checking of a network
+    split) on a single node.
+
+    Args:
+        node (str): name of the node
+        zone (str): zone of the node (see
+            :py:const:`ocpnetsplit.zone.ZONES`), None when not known
+    """
+
+    def __init__(self, node, zone=None):
+        self.node = node
+        self.zone = zone
+        self.cluster = None
+        self.timers = []
+        self.duration = None
+        self.clock_offset = None
+        self.error = None
+
+    @property
+    def armed_timers(self):
+        """
+        List of timers which are going to elapse in the future.
+        """
+        return [timer for timer in self.timers if timer.armed]
+
+    @property
+    def next_elapse(self):
+        """
+        Unix timestamp of the nearest elapse of any timer of the node, None
+        when there is no armed timer.
+        """
+        elapses = [timer.next_elapse for timer in self.armed_timers]
+        if len(elapses) == 0:
+            return None
+        return min(elapses)
+
+    @property
+    def ok(self):
+        """
+        True if the operation on the node succeeded.
+        """
+        return self.error is None
+
+    def to_dict(self):
+        return {
+            "node": self.node,
+            "zone": self.zone,
+            "cluster": self.cluster,
+            "timers": [timer.to_dict() for timer in self.timers],
+            "armed_timers": [timer.unit for timer in self.armed_timers],
+            "next_elapse": self.next_elapse,
+            "duration": self.duration,
+            "clock_offset": self.clock_offset,
+            "error": self.error,
+        }
+
+
+def parse_list_timers_json(output):
+    """
+    Parse json output of ``systemctl list-timers --output=json``.
+
+    Returns:
+        list: list of :py:class:`TimerStatus` objects
+    """
+    timers = []
+    for timer_d in json.loads(output):
+        next_elapse = timer_d.get("next")
+        # systemd reports timestamps in microseconds
+        if next_elapse is not None and next_elapse > 0:
+            next_elapse = next_elapse // 10**6
+        else:
+            next_elapse = None
+        timers.append(TimerStatus(timer_d["unit"], timer_d.get("activates"), next_elapse))
+    return timers
+
+
+def parse_list_timers_text(output):
+    """
+    Parse default table output of ``systemctl list-timers``.
+
+    Only timers of ocp-network-split have next elapse timestamp available,
+    because it's not possible to parse it reliably from the table, so it's
+    taken from the timer instance name.
+
+    Returns:
+        list: list of :py:class:`TimerStatus` objects
+    """
+    timers = []
+    for line in output.splitlines():
+        if line.startswith("NEXT") or line.startswith("Pass --all to see"):
+            continue
+        if line.endswith("timers listed.") or len(line.strip()) == 0:
+            continue
+        words = line.split()
+        unit_idx = None
+        for idx, word in enumerate(words):
+            if word.endswith(".timer"):
+                unit_idx = idx
+        if unit_idx is None:
+            continue
+        unit = words[unit_idx]
+        activates = None
+        if unit_idx + 1 < len(words):
+            activates = words[unit_idx + 1]
+        next_elapse = None
+        if not line.startswith("n/a"):
+            next_elapse = timer_instance_ts(unit)
+        timers.append(TimerStatus(unit, activates, next_elapse))
+    return timers
+
+
+def parse_list_timers(output):
+    """
+    Parse output of ``systemctl list-timers`` in either json or table format.
+
+    Returns:
+        list: list of :py:class:`TimerStatus` objects
+    """
+    if output.lstrip().startswith("["):
+        return parse_list_timers_json(output)
+    return parse_list_timers_text(output)
@@ -0,0 +1,98 @@
+# -*- coding: utf8 -*-
+
+# Copyright 2026 Martin Bukatovič <mbukatov@redhat.com>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Targets of network split operations spanning multiple clusters.
+
+Stretched setups could consist of multiple OCP clusters (reached via
+``oc debug`` with a kubeconfig of each cluster) and additional hosts listed
+in a zonefile (reached via ssh). Each such set of nodes is represented by
+:py:class:`Target` with it's own connection details and concurrency limiter,
+so that a slow API server of one cluster doesn't throttle operations on the
+other clusters. Operations are executed on all targets concurrently via
+:py:func:`map_targets`.
+"""
+
+
+import concurrent.futures
+
+
+class Target:
+    """
+    Set of nodes reached via the same backend.
+
+    Args:
+        name (str): name of the target (eg. path of kubeconfig file or
+            zonefile), reported as ``cluster`` of each node result, None
+            for the default cluster
+        nodes (list): names of nodes of the target
+        use_ssh (bool): if true, connect to the nodes via ssh; use oc debug
+            node otherwise
+        kubeconfig (str): file path to kubeconfig (used with oc debug only)
+        zone_config (ZoneConfig): zone config with the nodes (optional)
+        node_limiter (AimdLimiter): concurrency limiter of node commands of
+            this target
+    """
+
+    def __init__(self, name, nodes, use_ssh=False, kubeconfig=None, zone_config=None, node_limiter=None):
+        self.name = name
+        self.nodes = nodes
+        self.use_ssh = use_ssh
+        self.kubeconfig = kubeconfig
+        self.zone_config = zone_config
+        self.node_limiter = node_limiter
+
+    def get_kwargs(self):
+        """
+        Get connection details of the target as keyword arguments of
+        functions of :py:mod:`ocpnetsplit.main` module.
+        """
+        return {
+            "use_ssh": self.use_ssh,
+            "kubeconfig": self.kubeconfig,
+            "zone_config": self.zone_config,
+            "node_limiter": self.node_limiter,
+        }
+
+
+def map_targets(func, targets):
+    """
+    Call given function for each target concurrently, and report name of the
+    target as ``cluster`` attribute of each node result.
+
+    Args:
+        func (callable): function called with a target, returning list of
+            node results (eg. :py:class:`ocpnetsplit.status.NodeStatus`
+            objects)
+        targets (list): list of :py:class:`Target` objects
+
+    Returns:
+        list: node results of all targets, in order of the targets
+
+    Raises:
+        Exception: the first exception raised by the function (in order of
+            the targets), after all calls are finished
+    """
+    if len(targets) == 0:
+        return []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        futures = [executor.submit(func, target) for target in targets]
+    results = []
+    for target, future in zip(targets, futures):
+        for result in future.result():
+            result.cluster = target.name
+            results.append(result)
+    return results
@@ -15,7 +15,27 @@
 # limitations under the License.
 
 
-ZONES = ("a", "b", "c", "x")
+import string
+
+
+EXTERNAL_ZONE = "x"
+"""
+Identifier of external zone, with nodes outside of the cluster (eg. external
+services), which is never a current zone of a node.
+"""
+
+
+CLUSTER_ZONES = tuple(letter for letter in string.ascii_lowercase if letter != EXTERNAL_ZONE)
+"""
+Identifiers of cluster zones. Zones ``a``, ``b`` and ``c`` are always
+present (``a`` being the arbiter zone), while any other cluster zone is
+optional, so that clusters with more failure domains could be covered. Zone
+identifiers are single letters, so that a pair of zones (in a network split
+or latency spec) is just two letters, eg. ``ad``.
+"""
+
+
+ZONES = CLUSTER_ZONES + (EXTERNAL_ZONE,)
 """
 Stable zone identifiers as defined and used by ocp-network-split.
 """
@@ -23,13 +43,187 @@ Stable zone identifiers as defined and used by ocp-network-split.
 
 NETWORK_SPLITS = ("ab", "bc", "ab-bc", "ab-ac", "ax", "ax-bx-cx")
 """
-Available network split configurations. For every valid network split value,
-there is a systemd timer unit named ``network-split-{split}-setup@.timer``.
-Network split configuration consists of list of zone tuples, where each zone
-tuple represents a disrupted zone connection.
+Predefined network split configurations. For every predefined network split
+value, there is a systemd timer unit named
+``network-split-{split}-setup@.timer``. Network split configuration consists
+of list of zone tuples, where each zone tuple represents a disrupted zone
+connection. Other configurations (see :py:func:`normalize_split`) are
+scheduled via transient timer units.
 """
 
 
+SPLIT_PROTOCOLS = ("icmp", "sctp", "tcp", "udp")
+"""
+Protocols which could be selected via split options, see
+:py:func:`parse_split`.
+"""
+
+
+KEEP_PORTS = (22, 6443, 10250)
+"""
+TCP ports kept reachable by ``keep`` split option without explicit list of
+ports: ssh, kube-apiserver and kubelet (used by ``oc debug``), so that nodes
+could be inspected while the split is active.
+"""
+
+
+def _parse_ports(split_name, name, value):
+    ports = []
+    for port in value.split("."):
+        if not port.isdigit() or not 1 <= int(port) <= 65535:
+            raise ValueError(f"invalid port '{port}' in split '{split_name}'")
+        ports.append(int(port))
+    # limit of iptables multiport match
+    if len(ports) > 15:
+        raise ValueError(f"more than 15 ports of {name} in split '{split_name}'")
+    return sorted(set(ports))
+
+
+def _parse_split_option(split_name, opt, options):
+    value = opt.lstrip("abcdefghijklmnopqrstuvwxyz")
+    name = opt[:len(opt) - len(value)]
+    if name in ("loss", "flap"):
+        if options[name] is not None:
+            raise ValueError(f"option '{name}' specified multiple times in split '{split_name}'")
+        if not value.isdigit():
+            raise ValueError(f"option '{opt}' in split '{split_name}' requires a number")
+        number = int(value)
+        if name == "loss" and not 1 <= number <= 99:
+            raise ValueError(f"packet loss '{opt}' in split '{split_name}' is not within 1-99 %")
+        if name == "flap" and not 1 <= number <= 3600:
+            raise ValueError(f"flap interval '{opt}' in split '{split_name}' is not within 1-3600 s")
+        options[name] = number
+        return
+    if name == "keep":
+        if options["keep"] is not None:
+            raise ValueError(f"option 'keep' specified multiple times in split '{split_name}'")
+        if len(value) == 0:
+            options["keep"] = list(KEEP_PORTS)
+        else:
+            options["keep"] = _parse_ports(split_name, name, value)
+        return
+    if name not in SPLIT_PROTOCOLS:
+        raise ValueError(f"invalid option '{opt}' in split '{split_name}'")
+    if name in options["protocols"]:
+        raise ValueError(f"protocol '{name}' specified multiple times in split '{split_name}'")
+    ports = []
+    if len(value) > 0:
+        if name == "icmp":
+            raise ValueError(f"ports can't be specified for icmp in split '{split_name}'")
+        ports = _parse_ports(split_name, name, value)
+    options["protocols"][name] = ports
+
+
+def parse_zone_labels(zone_specs):
+    """
+    Parse ``topology.kubernetes.io/zone`` labels of additional cluster zones
+    (beyond zones ``a``, ``b`` and ``c``).
+
+    Args:
+        zone_specs (list): list of ``ZONE=LABEL`` strings, eg.
+            ``["d=data-3", "e=data-4"]``
+
+    Returns:
+        dict: label of each zone
+
+    Raises:
+        ValueError: when a zone is not valid or specified multiple times
+    """
+    zone_labels = {}
+    for zone_spec in zone_specs:
+        zone_name, sep, label = zone_spec.partition("=")
+        if sep == "" or len(label) == 0:
+            raise ValueError(f"invalid zone label spec '{zone_spec}', ZONE=LABEL expected")
+        if zone_name not in CLUSTER_ZONES[3:]:
+            raise ValueError(f"invalid additional zone '{zone_name}' in zone label spec '{zone_spec}'")
+        if zone_name in zone_labels:
+            raise ValueError(f"label of zone '{zone_name}' specified multiple times")
+        zone_labels[zone_name] = label
+    return zone_labels
+
+
+def parse_split(split_name):
+    """
+    Parse network split configuration, which consists of arbitrary set of
+    zone tuples (eg. ``ab-cx``), optionally followed by options separated by
+    colons, which turn the total split into a partial one (eg.
+    ``ab:loss30:tcp2379.2380``):
+
+    - ``lossN``: drop only N percent of packets (1-99)
+    - ``flapN``: add and remove the split rules every N seconds
+    - ``icmp``, ``tcp``, ``udp`` or ``sctp``: drop only packets of given
+      protocol, with optional list of ports separated by dots (eg.
+      ``tcp80.443``), multiple protocols could be specified
+    - ``keep`` or ``keepN.N``: don't drop tcp packets of given ports
+      (:py:const:`KEEP_PORTS` by default), so that eg. ssh and ``oc debug``
+      keep working during the split
+
+    Args:
+        split_name (str): network split configuration
+
+    Returns:
+        tuple: list of zone tuples (with zones sorted, external zone ``x``
+        always last, eg. ``['ab', 'bx', 'yx']``)
+        and dict with split options (``loss`` and ``flap`` numbers or None,
+        ``protocols`` dict with list of ports of each protocol, ``keep``
+        list of tcp ports or None)
+
+    Raises:
+        ValueError: when the configuration is not valid
+    """
+    if not isinstance(split_name, str) or len(split_name) == 0:
+        raise ValueError(f"invalid split_name specified: '{split_name}'")
+    spec, *opts = split_name.split(":")
+    zone_tuples = set()
+    for zone_tuple in spec.split("-"):
+        if len(zone_tuple) != 2 or zone_tuple[0] == zone_tuple[1]:
+            raise ValueError(f"invalid zone tuple '{zone_tuple}' in split '{split_name}'")
+        for zone in zone_tuple:
+            if zone not in ZONES:
+                raise ValueError(f"invalid zone '{zone}' in split '{split_name}'")
+        # external zone goes last, because network-split.sh applies rules
+        # in the first zone of a tuple only (eg. yx, not xy)
+        zone_tuples.add("".join(sorted(zone_tuple, key=lambda z: (z == EXTERNAL_ZONE, z))))
+    options = {"loss": None, "flap": None, "protocols": {}, "keep": None}
+    for opt in opts:
+        _parse_split_option(split_name, opt, options)
+    return sorted(zone_tuples), options
+
+
+def normalize_split(split_name):
+    """
+    Validate network split configuration (see :py:func:`parse_split`) and
+    return it in canonical form, with zones of each tuple and the tuples
+    sorted, without duplicates (eg. ``ba-ab`` becomes ``ab``, while ``xy``
+    becomes ``yx``, see :py:func:`parse_split`), and with
+    options in canonical order (eg. ``ab:tcp443.80:loss5`` becomes
+    ``ab:loss5:tcp80.443``, and ``keep22.6443.10250`` becomes ``keep``).
+    Configurations listed in :py:const:`NETWORK_SPLITS` are already in
+    canonical form.
+
+    Args:
+        split_name (str): network split configuration
+
+    Returns:
+        str: network split configuration in canonical form
+
+    Raises:
+        ValueError: when the configuration is not valid
+    """
+    zone_tuples, options = parse_split(split_name)
+    parts = ["-".join(zone_tuples)]
+    for name in ("loss", "flap"):
+        if options[name] is not None:
+            parts.append(f"{name}{options[name]}")
+    for proto, ports in sorted(options["protocols"].items()):
+        parts.append(proto + ".".join(str(port) for port in ports))
+    if options["keep"] == list(KEEP_PORTS):
+        parts.append("keep")
+    elif options["keep"] is not None:
+        parts.append("keep" + ".".join(str(port) for port in options["keep"]))
+    return ":".join(parts)
+
+
 class ZoneConfig:
     """
     ZoneConfig is tracking ip addresses of nodes in each cluster zone.
@@ -37,6 +231,8 @@ class ZoneConfig:
 
     def __init__(self):
         self._zones = {}
+        # content of env file, generated again only when a node is added
+        self._env_file = None
 
     def add_node(self, zone, node):
         """
@@ -47,8 +243,9 @@ class ZoneConfig:
             node (str): ip address of a node
         """
         if zone not in ZONES:
-            raise ValueError("Invalid zone name: {zone}")
+            raise ValueError(f"Invalid zone name: {zone}")
         self._zones.setdefault(zone, set()).add(node)
+        self._env_file = None
 
     def add_nodes(self, zone, nodes):
         """
@@ -80,6 +277,61 @@ class ZoneConfig:
             nodes += self._zones.get(zone)
         return nodes
 
+    def get_zone(self, node):
+        """
+        Return zone of given node.
+
+        Args:
+            node (str): ip address (or host name) of a node
+
+        Returns:
+            str: zone identification (one of ``ZONES``), None if the node is
+            not in any zone
+        """
+        for zone, node_set in self._zones.items():
+            if node in node_set:
+                return zone
+        return None
+
+    def load_env_file(self, content):
+        """
+        Load zone configuration from content of an env file, as generated by
+        :py:meth:`get_env_file`.
+
+        Args:
+            content (str): content of firewall environment file
+        """
+        for line in content.splitlines():
+            line = line.strip()
+            if len(line) == 0 or line.startswith("#"):
+                continue
+            key, _, value = line.partition("=")
+            if not key.startswith("ZONE_"):
+                raise ValueError(f"Invalid line in zone env file: '{line}'")
+            self.add_nodes(key[len("ZONE_"):].lower(), value.strip('"').split())
+
+    def diff(self, old_config):
+        """
+        Compute difference between given previous zone configuration and this
+        one.
+
+        Args:
+            old_config (ZoneConfig): previous zone configuration
+
+        Returns:
+            ZoneConfigDiff: node ip addresses added into and removed from
+            each zone
+        """
+        zc_diff = ZoneConfigDiff()
+        for zone in ZONES:
+            old_nodes = old_config.get_nodes(zone) or set()
+            new_nodes = self.get_nodes(zone) or set()
+            for node in new_nodes - old_nodes:
+                zc_diff.add_node(zone, node)
+            for node in old_nodes - new_nodes:
+                zc_diff.remove_node(zone, node)
+        return zc_diff
+
     def get_env_file(self):
         """
         Generate content of env file for firewall script.
@@ -87,11 +339,112 @@ class ZoneConfig:
         Returns:
             str: content of firewall environment file with zone configuration
         """
-        lines = []
-        for zone, node_list in self._zones.items():
-            nodes = " ".join(sorted(node_list))
-            lines.append(f'ZONE_{zone.upper()}="{nodes}"')
-        return "\n".join(lines) + "\n"
+        if self._env_file is None:
+            lines = []
+            for zone, node_list in self._zones.items():
+                nodes = " ".join(sorted(node_list))
+                lines.append(f'ZONE_{zone.upper()}="{nodes}"')
+            self._env_file = "\n".join(lines) + "\n"
+        return self._env_file
+
+
+class ZoneConfigDiff:
+    """
+    ZoneConfigDiff is tracking ip addresses of nodes added into and removed
+    from each cluster zone, so that rules of active network split or latency
+    could be updated without tearing them down (see ``update`` command of
+    ``network-split.sh`` and ``network-latency.sh`` scripts).
+    """
+
+    def __init__(self):
+        self._added = {}
+        self._removed = {}
+
+    def add_node(self, zone, node):
+        """
+        Record that a node ip address was added into a zone.
+        """
+        if zone not in ZONES:
+            raise ValueError(f"Invalid zone name: {zone}")
+        self._added.setdefault(zone, set()).add(node)
+
+    def remove_node(self, zone, node):
+        """
+        Record that a node ip address was removed from a zone.
+        """
+        if zone not in ZONES:
+            raise ValueError(f"Invalid zone name: {zone}")
+        self._removed.setdefault(zone, set()).add(node)
+
+    def get_added(self, zone):
+        """
+        Return set of node ip addresses added into given zone.
+        """
+        return self._added.get(zone, set())
+
+    def get_removed(self, zone):
+        """
+        Return set of node ip addresses removed from given zone.
+        """
+        return self._removed.get(zone, set())
+
+    def get_moved_nodes(self):
+        """
+        Return nodes which moved from one zone to another.
+
+        Returns:
+            dict: node ip address mapped to tuple of old and new zone
+        """
+        moved = {}
+        for old_zone, removed in self._removed.items():
+            for new_zone, added in self._added.items():
+                for node in removed & added:
+                    moved[node] = (old_zone, new_zone)
+        return moved
+
+    def is_empty(self):
+        """
+        Return True when zone membership of no node changed.
+        """
+        return len(self._added) == 0 and len(self._removed) == 0
+
+    def get_changes(self):
+        """
+        Return list of zone membership changes in format expected by
+        ``update`` command of node scripts, eg. ``["b+=198.51.100.7"]``.
+
+        Additions are listed first, so that a node which moved between zones
+        is covered by rules of the new zone before rules of the old zone are
+        removed.
+        """
+        changes = []
+        for zone in ZONES:
+            changes += [f"{zone}+={node}" for node in sorted(self.get_added(zone))]
+        for zone in ZONES:
+            changes += [f"{zone}-={node}" for node in sorted(self.get_removed(zone))]
+        return changes
+
+    def get_cli_args(self):
+        """
+        Generate command line arguments for ``update`` command of
+        ``network-split.sh`` and ``network-latency.sh`` scripts.
+        """
+        return " ".join(self.get_changes())
+
+    def to_dict(self):
+        return {
+            "added": {zone: sorted(nodes) for zone, nodes in self._added.items()},
+            "removed": {zone: sorted(nodes) for zone, nodes in self._removed.items()},
+        }
+
+
+MAX_LATENCY_CLASSES = 13
+"""
+Max number of distinct latency values from a single zone (including the
+default latency), because ``network-latency.sh`` creates one band of prio
+qdisc (which has at most 16 bands, 3 of them are kept for the default
+priomap) with netem qdisc for each distinct latency value.
+"""
 
 
 class ZoneLatSpec:
@@ -162,3 +515,216 @@ class ZoneLatSpec:
         for zones, latency in self._latspec.items():
             arglist.append(f"-l {zones}={latency}")
         return " ".join(arglist)
+
+    def get_zones(self):
+        """
+        Return sorted list of zone pairs with specific latency, eg.
+        ``["ab", "ac"]``.
+        """
+        return sorted(self._latspec)
+
+    def get_latency(self, zones, default):
+        """
+        Return latency between given pair of zones in ms, or given default
+        latency when there is no specific latency between the zones.
+        """
+        return int(self._latspec.get("".join(sorted(zones)), default))
+
+    def get_latency_classes(self, zone):
+        """
+        Group zones by specific latency from given zone. Nodes of the zone
+        need one netem qdisc for each distinct latency value (latency class)
+        along with the default one, no matter how many zones or zone pairs
+        there are.
+
+        Args:
+            zone (str): zone identification (one of ``ZONES``)
+
+        Returns:
+            dict: list of other zones with specific latency from given zone
+            for each distinct latency value, eg. ``{10: ["b", "c"]}``
+        """
+        classes = {}
+        for zones in self.get_zones():
+            if zone not in zones:
+                continue
+            other_zone = zones.replace(zone, "", 1)
+            classes.setdefault(int(self._latspec[zones]), []).append(other_zone)
+        return classes
+
+    def validate_classes(self, default):
+        """
+        Check that number of distinct latency values from any zone is within
+        :py:const:`MAX_LATENCY_CLASSES`.
+
+        Raises:
+            ValueError: when a zone has too many distinct latency values
+        """
+        for zone in ZONES:
+            classes = set(self.get_latency_classes(zone)) | {int(default)}
+            if len(classes) > MAX_LATENCY_CLASSES:
+                raise ValueError(
+                    f"zone {zone} has {len(classes)} distinct latency values, "
+                    f"while at most {MAX_LATENCY_CLASSES} are supported")
+
+
+PROFILE_POINT_KEYS = {"offset", "latency", "latency_spec", "ramp"}
+
+
+class LatencyProfile:
+    """
+    Time varying latency between zones, described by a list of points, eg.::
+
+        - offset: 0
+          latency: 10
+        - offset: 300
+          latency: 100
+          latency_spec:
+            ab: 200
+          ramp: true
+
+    Where ``offset`` is time in seconds since start of the profile, and
+    ``latency`` with ``latency_spec`` is the latency since then (see
+    :py:class:`ZoneLatSpec`). Latency changes at once at each point (step
+    schedule), unless the point is a ``ramp``, in which case the latency
+    changes linearly from the previous point (so that in the example above,
+    the latency between zones ``a`` and ``b`` grows from 10 to 200 ms over 5
+    minutes).
+
+    The profile is compiled into a list of latency changes (see
+    :py:meth:`compile`) which ``network-latency.sh profile`` command applies
+    on a node.
+    """
+
+    def __init__(self):
+        # list of (offset, default latency, ZoneLatSpec, ramp) tuples
+        self.points = []
+
+    def load_list(self, points):
+        """
+        Load and validate the profile from the given list of point dicts.
+
+        Raises:
+            ValueError: when the profile is not valid
+        """
+        if not isinstance(points, list) or len(points) == 0:
+            raise ValueError("latency profile doesn't contain list of points")
+        loaded = []
+        for idx, point in enumerate(points):
+            if not isinstance(point, dict):
+                raise ValueError(f"profile point {idx}: not a dict")
+            unknown = set(point.keys()) - PROFILE_POINT_KEYS
+            if len(unknown) > 0:
+                raise ValueError(f"profile point {idx}: unknown keys {sorted(unknown)}")
+            for key in ("offset", "latency"):
+                value = point.get(key)
+                if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                    raise ValueError(f"profile point {idx}: '{key}' is not an integer >= 0: {value}")
+            ramp = point.get("ramp", False)
+            if not isinstance(ramp, bool):
+                raise ValueError(f"profile point {idx}: 'ramp' is not a boolean: {ramp}")
+            if idx == 0 and (point["offset"] != 0 or ramp):
+                raise ValueError("profile point 0: the first point has to start at offset 0 without ramp")
+            if idx > 0 and point["offset"] <= loaded[-1][0]:
+                raise ValueError(f"profile point {idx}: offset is not greater than offset of the previous point")
+            latspec = ZoneLatSpec()
+            if point.get("latency_spec") is not None:
+                try:
+                    latspec.load_dict(point["latency_spec"])
+                except (ValueError, AttributeError) as ex:
+                    raise ValueError(f"profile point {idx}: {ex}")
+            loaded.append((point["offset"], point["latency"], latspec, ramp))
+        # network-latency.sh allocates netem qdisc for each zone pair of the
+        # profile (no matter the latency values) along with the default one
+        pairs = set()
+        for _, _, latspec, _ in loaded:
+            pairs.update(latspec.get_zones())
+        for zone in ZONES:
+            classes = len([zones for zones in pairs if zone in zones]) + 1
+            if classes > MAX_LATENCY_CLASSES:
+                raise ValueError(
+                    f"zone {zone} is in {classes - 1} zone pairs with specific latency, "
+                    f"while at most {MAX_LATENCY_CLASSES - 1} are supported in a profile")
+        self.points = loaded
+
+    def get_zones(self):
+        """
+        Return sorted list of zone pairs with specific latency in any point.
+        """
+        zones = set()
+        for _, _, latspec, _ in self.points:
+            zones.update(latspec.get_zones())
+        return sorted(zones)
+
+    def get_latency(self, offset):
+        """
+        Return latency at given time offset.
+
+        Args:
+            offset (float): seconds since start of the profile
+
+        Returns:
+            tuple: default latency and dict with latency of each zone pair
+            (see :py:meth:`get_zones`), all in whole ms
+        """
+        zones = self.get_zones()
+
+        def point_values(point):
+            _, latency, latspec, _ = point
+            return [latency] + [latspec.get_latency(z, latency) for z in zones]
+
+        idx = max(i for i, point in enumerate(self.points) if point[0] <= offset)
+        values = point_values(self.points[idx])
+        if idx + 1 < len(self.points) and self.points[idx + 1][3]:
+            # within a ramp towards the next point
+            start, end = self.points[idx][0], self.points[idx + 1][0]
+            ratio = (offset - start) / (end - start)
+            # rounding half up, so that a ramp changes at regular intervals
+            values = [
+                int(v + (n - v) * ratio + 0.5)
+                for v, n in zip(values, point_values(self.points[idx + 1]))]
+        return values[0], dict(zip(zones, values[1:]))
+
+    def compile(self, length=None, resolution=1):
+        """
+        Compile the profile into a list of latency changes. Ramps are sampled
+        every ``resolution`` seconds, and a change is included only when some
+        latency value changes, so that a node doesn't reconfigure it's qdiscs
+        for nothing.
+
+        Args:
+            length (int): duration of the profile in seconds, changes at or
+                after the end are dropped
+            resolution (int): seconds between two samples of a ramp
+
+        Returns:
+            list: tuples of offset in seconds, default latency and dict with
+            latency of each zone pair
+        """
+        offsets = []
+        prev_offset = 0
+        for offset, _, _, ramp in self.points:
+            if ramp:
+                offsets += range(prev_offset + resolution, offset, resolution)
+            offsets.append(offset)
+            prev_offset = offset
+        changes = []
+        for offset in offsets:
+            if length is not None and offset >= length:
+                break
+            latency, latspec = self.get_latency(offset)
+            if len(changes) > 0 and changes[-1][1:] == (latency, latspec):
+                continue
+            changes.append((offset, latency, latspec))
+        return changes
+
+    def get_cli_args(self, length=None, resolution=1):
+        """
+        Generate list of steps for ``network-latency.sh profile`` command,
+        each in ``OFFSET:LATENCY[:ZONES=LATENCY]...`` format, eg.
+        ``["0:10:ab=10", "60:20:ab=30"]``.
+        """
+        args = []
+        for offset, latency, latspec in self.compile(length, resolution):
+            args.append(":".join([str(offset), str(latency)] + [f"{z}={v}" for z, v in latspec.items()]))
+        return args
@@ -48,6 +48,11 @@ setup(
             'ocp-network-split-setup=ocpnetsplit.main:main_setup',
             'ocp-network-split-multisetup=ocpnetsplit.main:main_multisetup',
             'ocp-network-split-sched=ocpnetsplit.main:main_sched',
+            'ocp-network-split-controller=ocpnetsplit.main:main_controller',
+            'ocp-network-split-doctor=ocpnetsplit.main:main_doctor',
+            'ocp-network-split-deploy=ocpnetsplit.main:main_deploy',
+            'ocp-network-split-rollout=ocpnetsplit.main:main_rollout',
+            'ocp-network-split-history=ocpnetsplit.main:main_history',
             ],
         },
     # https://packaging.python.org/specifications/core-metadata/#project-url-multiple-use
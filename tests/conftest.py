@@ -0,0 +1,79 @@
+# -*- coding: utf8 -*-
+
+"""
+Shared pytest configuration of ocp-network-split test suite.
+
+Benchmark tests are marked with ``benchmark`` marker and are skipped unless
+``--benchmark`` option is specified, eg.::
+
+    $ python -m pytest tests --benchmark -m benchmark
+
+Results reported by benchmark tests via ``bench_report`` fixture are shown
+in a table at the end of the test session.
+"""
+
+
+import os
+
+import pytest
+
+from fakecluster import FakeCluster
+
+
+BENCH_RESULTS = []
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        default=False,
+        help="run benchmark tests (marked with benchmark marker)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "benchmark: slow benchmark test, needs --benchmark option")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip_bench = pytest.mark.skip(reason="benchmark, use --benchmark to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_bench)
+
+
+@pytest.fixture
+def bench_report(request):
+    """
+    Return a function to record a benchmark result, eg.
+    ``bench_report("split onset", nodes=10, seconds=0.5)``.
+    """
+    def report(name, **values):
+        BENCH_RESULTS.append((request.node.nodeid, name, values))
+    return report
+
+
+@pytest.fixture
+def fake_cluster(tmp_path, monkeypatch):
+    """
+    Return a function to create :py:class:`fakecluster.FakeCluster`, with
+    fake ``oc`` and ``ssh`` executables placed at the beginning of ``PATH``
+    for the rest of the test.
+    """
+    def make(node_num=9, **kwargs):
+        cluster = FakeCluster(str(tmp_path / "fakecluster"), node_num, **kwargs)
+        monkeypatch.setenv("PATH", cluster.bin_dir + os.pathsep + os.environ["PATH"])
+        return cluster
+    return make
+
+
+def pytest_terminal_summary(terminalreporter):
+    if len(BENCH_RESULTS) == 0:
+        return
+    terminalreporter.section("benchmark results")
+    for nodeid, name, values in BENCH_RESULTS:
+        values_str = " ".join(f"{k}={v}" for k, v in values.items())
+        terminalreporter.write_line(f"{name}: {values_str} ({nodeid})")
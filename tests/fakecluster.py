@@ -0,0 +1,650 @@
+# -*- coding: utf8 -*-
+
+"""
+Fake ``oc`` and ``ssh`` executables serving a synthetic cluster.
+
+:py:class:`FakeCluster` writes state of a synthetic cluster (nodes, their
+zone labels and ip addresses) into a working directory along with fake
+``oc`` and ``ssh`` executables. When the directory with the executables is
+placed at the beginning of ``PATH`` (see ``fake_cluster`` fixture), code under
+test talks to the synthetic cluster instead of a real one. Each call of the
+fake executables sleeps to emulate latency of the real operation (as defined
+by a latency profile), fails with given probability and is recorded into a
+call log, so that one can check how many calls were made and how long they
+took.
+
+Node commands executed via ``oc debug node/NAME -- chroot /host`` or
+``ssh NAME sudo`` are emulated for ``systemctl start`` and ``systemctl stop``
+of timer units, ``systemctl list-timers``, ``date`` and ``chronyc`` (with
+optional clock offset of each node), ``ip route``, zone detection of
+:py:mod:`ocpnetsplit.doctor`, file state and writes of
+:py:mod:`ocpnetsplit.deploy`, ``rpm -q`` (all packages are installed) and
+batches of these commands created by :py:mod:`ocpnetsplit.batch`. Tools could
+be removed from a node to emulate a failed check. Any other command just
+succeeds without output.
+
+``oc apply`` of ``MachineConfig`` yaml, ``MachineConfigPool`` objects (with
+``maxUnavailable`` changed via ``oc patch``) and MCO annotations of nodes are
+emulated as well, rollout of a changed ``MachineConfig`` finishes
+immediately.
+"""
+
+
+import json
+import os
+import stat
+import sys
+
+
+LATENCY_PROFILES = {
+    # no extra latency, the cost is given by process execution only
+    "none": {},
+    # cluster on local network, debug pod image already pulled on each node
+    "lan": {"get": 0.1, "debug": 2.0, "ssh": 0.2},
+    # cluster in a remote data center, as seen from a laptop
+    "wan": {"get": 0.4, "debug": 6.0, "ssh": 0.8},
+}
+"""
+Mean latency (in seconds) of fake ``oc get``, ``oc debug`` and ``ssh`` calls.
+"""
+
+
+FAKE_EXECUTABLE = r'''#!{python} -S
+# fake oc and ssh executable generated by tests/fakecluster.py
+import base64
+import fcntl
+import fnmatch
+import hashlib
+import json
+import os
+import random
+import shlex
+import sys
+import time
+
+BASE_DIR = {base_dir!r}
+
+with open(os.path.join(BASE_DIR, "state.json")) as state_file:
+    STATE = json.load(state_file)
+NODES = {{node["name"]: node for node in STATE["nodes"]}}
+
+
+def pool_state(role):
+    pool_path = os.path.join(BASE_DIR, "mcp", role + ".json")
+    if not os.path.exists(pool_path):
+        return {{"generation": 0, "maxUnavailable": None}}
+    with open(pool_path) as pool_file:
+        return json.load(pool_file)
+
+
+def save_pool_state(role, pool):
+    os.makedirs(os.path.join(BASE_DIR, "mcp"), exist_ok=True)
+    with open(os.path.join(BASE_DIR, "mcp", role + ".json"), "w") as pool_file:
+        json.dump(pool, pool_file)
+
+
+def pool_obj(role):
+    # the rollout finishes immediately
+    pool = pool_state(role)
+    config = "rendered-%s-%d" % (role, pool["generation"])
+    count = sum(1 for node in STATE["nodes"] if node["role"] == role)
+    spec = {{"configuration": {{"name": config}}}}
+    if pool["maxUnavailable"] is not None:
+        spec["maxUnavailable"] = pool["maxUnavailable"]
+    return {{
+        "apiVersion": "machineconfiguration.openshift.io/v1",
+        "kind": "MachineConfigPool",
+        "metadata": {{"name": role}},
+        "spec": spec,
+        "status": {{
+            "configuration": {{"name": config}},
+            "machineCount": count,
+            "updatedMachineCount": count,
+            "conditions": [
+                {{"type": "Updated", "status": "True"}},
+                {{"type": "Degraded", "status": "False"}},
+            ],
+        }},
+    }}
+
+
+def apply_mc(content):
+    # emulate oc apply of MachineConfig yaml, changed MachineConfig of a role
+    # creates new rendered config of the pool
+    os.makedirs(os.path.join(BASE_DIR, "mc"), exist_ok=True)
+    for doc in content.split("\n---\n"):
+        names = [line[len("  name: "):] for line in doc.splitlines() if line.startswith("  name: ")]
+        mc_path = os.path.join(BASE_DIR, "mc", names[0])
+        action = "created"
+        if os.path.exists(mc_path):
+            with open(mc_path) as mc_file:
+                action = "unchanged" if mc_file.read() == doc else "configured"
+        with open(mc_path, "w") as mc_file:
+            mc_file.write(doc)
+        print("machineconfig.machineconfiguration.openshift.io/%s %s" % (names[0], action))
+        if action != "unchanged":
+            role = names[0].split("-")[1]
+            pool = pool_state(role)
+            pool["generation"] += 1
+            save_pool_state(role, pool)
+    return 0
+
+
+def node_obj(node):
+    addresses = [{{"type": "Hostname", "address": node["name"]}}]
+    addresses += [{{"type": "InternalIP", "address": addr}} for addr in node["addrs"]]
+    config = "rendered-%s-%d" % (node["role"], pool_state(node["role"])["generation"])
+    return {{
+        "apiVersion": "v1",
+        "kind": "Node",
+        "metadata": {{
+            "name": node["name"],
+            "annotations": {{
+                "machineconfiguration.openshift.io/currentConfig": config,
+                "machineconfiguration.openshift.io/desiredConfig": config,
+                "machineconfiguration.openshift.io/state": "Done",
+            }},
+            "labels": {{
+                "kubernetes.io/hostname": node["name"],
+                "node-role.kubernetes.io/" + node["role"]: "",
+                "topology.kubernetes.io/zone": node["zone"],
+            }},
+        }},
+        "status": {{
+            "addresses": addresses,
+            "conditions": [
+                {{"type": t, "status": "False", "reason": "Kubelet" + t, "message": "ok"}}
+                for t in ("MemoryPressure", "DiskPressure", "PIDPressure")
+            ] + [{{"type": "Ready", "status": "True", "reason": "KubeletReady"}}],
+            "images": [
+                {{"names": ["quay.io/openshift/image-%d@sha256:%064d" % (i, i)], "sizeBytes": 10**8 + i}}
+                for i in range(STATE["images_per_node"])
+            ],
+        }},
+    }}
+
+
+def timers_path(name):
+    return os.path.join(BASE_DIR, "timers", name)
+
+
+def format_timer(unit, now):
+    # unit instance is unix timestamp of the timer, see ocpnetsplit.main
+    ts = int(unit.split("@")[1].split(".")[0])
+    if unit.startswith("network-split-teardown"):
+        activates = "network-split-teardown.service"
+    else:
+        activates = "network-split@" + unit[len("network-split-"):].split("-setup@")[0] + ".service"
+    ts_str = time.strftime("%a %Y-%m-%d %H:%M:%S UTC", time.gmtime(ts))
+    if ts > now:
+        left = "%dmin %ds left" % divmod(ts - now, 60)
+        return "%s  %-13s n/a  n/a    %s %s" % (ts_str, left, unit, activates)
+    return "n/a  n/a  %s  %dmin ago %s %s" % (ts_str, (now - ts) // 60, unit, activates)
+
+
+def list_timers_json(units, now):
+    timers = []
+    for unit in units:
+        ts = int(unit.split("@")[1].split(".")[0])
+        timers.append({{
+            "next": ts * 10**6 if ts > now else None,
+            "left": (ts - now) * 10**6 if ts > now else None,
+            "last": ts * 10**6 if ts <= now else None,
+            "passed": (now - ts) * 10**6 if ts <= now else None,
+            "unit": unit,
+            "activates": format_timer(unit, now).split()[-1],
+        }})
+    print(json.dumps(timers))
+
+
+def batch_cmd(name, script):
+    lines = script.splitlines()
+    marker = shlex.split(lines[0])[0][len("m="):]
+    for line in lines[1:]:
+        cmd = shlex.split(line[len("{{ "):line.index("; }} 2>&1; printf")])
+        # stderr of batch commands is merged into stdout
+        stderr = sys.stderr
+        sys.stderr = sys.stdout
+        try:
+            retcode = node_cmd(name, cmd)
+        finally:
+            sys.stderr = stderr
+        print("\n%s %d" % (marker, retcode))
+    return 0
+
+
+def detect_zone(name):
+    file_path = os.path.join(BASE_DIR, "files", name, "network-split.env")
+    if not os.path.exists(file_path):
+        sys.stderr.write("sh: /etc/network-split.env: No such file or directory\n")
+        return 1
+    with open(file_path) as env_file:
+        for line in env_file:
+            key, _, value = line.strip().partition("=")
+            if set(NODES[name]["addrs"]) & set(value.strip('"').split()):
+                print(key)
+                return 0
+    sys.stderr.write("current node doesn't belong to any zone\n")
+    return 1
+
+
+def node_file_path(name, file_path):
+    return os.path.join(BASE_DIR, "files", name, os.path.basename(file_path))
+
+
+def files_state(name, paths):
+    # emulate ocpnetsplit.deploy.STATE_SCRIPT
+    for path in paths:
+        file_path = node_file_path(name, path)
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, "rb") as node_file:
+            checksum = hashlib.sha256(node_file.read()).hexdigest()
+        print("%s %o %s" % (checksum, os.stat(file_path).st_mode & 0o777, path))
+    return 0
+
+
+def write_file(name, content, path, mode, append=False):
+    # emulate ocpnetsplit.deploy.WRITE_SCRIPT and APPEND_SCRIPT
+    os.makedirs(os.path.join(BASE_DIR, "files", name), exist_ok=True)
+    tmp_path = node_file_path(name, path) + ".tmp"
+    with open(tmp_path, "ab" if append else "wb") as node_file:
+        node_file.write(base64.b64decode(content))
+    if mode != "":
+        os.chmod(tmp_path, int(mode, 8))
+        os.rename(tmp_path, node_file_path(name, path))
+    return 0
+
+
+def shell_cmd(name, script, args):
+    if script.startswith("m="):
+        return batch_cmd(name, script)
+    if script.startswith("for f; do"):
+        return files_state(name, args)
+    if script.startswith("mkdir -p"):
+        return write_file(name, *args)
+    if script.startswith("printf %s"):
+        return write_file(name, *args, append=True)
+    if script.endswith("/etc/network-zone.sh"):
+        return detect_zone(name)
+    if script.startswith("systemctl stop"):
+        # emulate "systemctl stop ...; rc=$?; test ..." scripts
+        return node_cmd(name, shlex.split(script.split(";")[0]))
+    if not script.startswith("systemctl list-timers"):
+        # other scripts are just recorded
+        os.makedirs(os.path.join(BASE_DIR, "scripts"), exist_ok=True)
+        with open(os.path.join(BASE_DIR, "scripts", name), "a") as scripts_file:
+            scripts_file.write(json.dumps(script) + "\n")
+        return 0
+    # emulate "cmd1 2>/dev/null || cmd2" shell scripts
+    retcode = 1
+    for cmd_str in script.split(" || "):
+        cmd = [arg for arg in shlex.split(cmd_str) if arg != "2>/dev/null"]
+        retcode = node_cmd(name, cmd)
+        if retcode == 0:
+            break
+    return retcode
+
+
+def node_cmd(name, cmd):
+    if name not in NODES:
+        sys.stderr.write("error: node %s not found\n" % name)
+        return 1
+    if cmd[:2] == ["sh", "-c"]:
+        return shell_cmd(name, cmd[2], cmd[4:])
+    if "--output=json" in cmd and not STATE["systemd_json"]:
+        sys.stderr.write("systemctl: unrecognized option '--output=json'\n")
+        return 1
+    if cmd[0] in STATE["missing_tools"].get(name, []):
+        sys.stderr.write("sh: %s: command not found\n" % cmd[0])
+        return 127
+    clock_offset = STATE["clock_offsets"].get(name, 0.0)
+    if cmd[:1] == ["date"]:
+        print("%.9f" % (time.time() + clock_offset))
+        return 0
+    if cmd[:1] == ["chronyc"]:
+        print("A9FEA9FE,169.254.169.254,3,%.9f,%.9f,0.000001,0.000020,"
+              "-1.5,0.001,0.02,0.0004,0.0002,64.4,Normal" % (time.time(), clock_offset))
+        return 0
+    if cmd[:3] == ["ip", "route", "show"]:
+        print("default via 10.128.0.1 dev ens3 proto dhcp src %s metric 100" % NODES[name]["addrs"][0])
+        return 0
+    if cmd[:2] == ["rpm", "-q"]:
+        for package in cmd[2:]:
+            print("%s-1.0-1.el9.x86_64" % package)
+        return 0
+    if cmd[:1] == ["cat"]:
+        file_path = node_file_path(name, cmd[1])
+        if not os.path.exists(file_path):
+            sys.stderr.write("cat: %s: No such file or directory\n" % cmd[1])
+            return 1
+        with open(file_path) as node_file:
+            sys.stdout.write(node_file.read())
+        return 0
+    if cmd[:2] == ["systemctl", "start"]:
+        os.makedirs(os.path.join(BASE_DIR, "timers"), exist_ok=True)
+        with open(timers_path(name), "a") as timers_file:
+            for unit in cmd[2:]:
+                timers_file.write(unit + "\n")
+    elif cmd[:2] == ["systemctl", "stop"]:
+        if os.path.exists(timers_path(name)):
+            with open(timers_path(name)) as timers_file:
+                units = timers_file.read().split()
+            units = [u for u in units if not any(fnmatch.fnmatch(u, p) for p in cmd[2:])]
+            with open(timers_path(name), "w") as timers_file:
+                timers_file.write("".join(unit + "\n" for unit in units))
+    elif cmd[:2] == ["systemctl", "list-timers"]:
+        units = []
+        if os.path.exists(timers_path(name)):
+            with open(timers_path(name)) as timers_file:
+                units = sorted(set(timers_file.read().split()))
+        patterns = [arg for arg in cmd[2:] if not arg.startswith("-")] or ["*"]
+        units = [u for u in units if any(fnmatch.fnmatch(u, p) for p in patterns)]
+        now = int(time.time())
+        if "--output=json" in cmd:
+            list_timers_json(units, now)
+            return 0
+        print("NEXT" + " " * 25 + "LEFT" + " " * 10 + "LAST PASSED UNIT" + " " * 36 + "ACTIVATES")
+        for unit in units:
+            print(format_timer(unit, now))
+        print()
+        print("%d timers listed." % len(units))
+        print("Pass --all to see loaded but inactive timers, too.")
+    return 0
+
+
+def oc(args):
+    if args[:1] == ["--kubeconfig"]:
+        args = args[2:]
+    if args[:1] == ["debug"]:
+        name = args[1][len("node/"):]
+        return "debug", node_cmd(name, args[args.index("--") + 3:])
+    if args[:3] == ["apply", "-f", "-"]:
+        return "apply", apply_mc(sys.stdin.read())
+    if args[:1] == ["patch"] and args[1].startswith("machineconfigpool/"):
+        role = args[1][len("machineconfigpool/"):]
+        pool = pool_state(role)
+        pool["maxUnavailable"] = json.loads(args[args.index("-p") + 1])["spec"]["maxUnavailable"]
+        save_pool_state(role, pool)
+        return "patch", 0
+    if args[:1] == ["get"] and args[1].startswith("machineconfigpool/"):
+        print(json.dumps(pool_obj(args[1][len("machineconfigpool/"):]), indent=2))
+        return "get", 0
+    if args[:2] == ["get", "machineconfigpools"] and "--watch" in args:
+        for role in ("master", "worker"):
+            print(json.dumps({{"type": "ADDED", "object": pool_obj(role)}}, indent=4))
+        return "get", 0
+    if args[:2] == ["get", "nodes"] and "--watch" in args:
+        # the watch ends after the initial events
+        for node in STATE["nodes"]:
+            print(json.dumps({{"type": "ADDED", "object": node_obj(node)}}, indent=4))
+        return "get", 0
+    if args[:2] == ["get", "nodes"]:
+        nodes = STATE["nodes"]
+        if "-l" in args:
+            label = args[args.index("-l") + 1].split("=", 1)[1]
+            nodes = [node for node in nodes if node["zone"] == label]
+        for node in nodes:
+            print("node/" + node["name"])
+        return "get", 0
+    if args[:1] == ["get"] and args[1].startswith("node/"):
+        name = args[1][len("node/"):]
+        if name not in NODES:
+            sys.stderr.write('Error from server (NotFound): nodes "%s" not found\n' % name)
+            return "get", 1
+        # json is valid yaml as well
+        print(json.dumps(node_obj(NODES[name]), indent=2))
+        return "get", 0
+    sys.stderr.write("fake oc: unsupported command %s\n" % args)
+    return "unsupported", 1
+
+
+def ssh(args):
+    # ssh passes the command to a remote shell
+    cmd = shlex.split(" ".join(args[1:]))
+    if cmd[:1] == ["sudo"]:
+        cmd = cmd[1:]
+    return "ssh", node_cmd(args[0], cmd)
+
+
+def debug_pods(change):
+    """
+    Change number of running debug pods, return number of the pods.
+    """
+    with open(os.path.join(BASE_DIR, "debug_pods"), "a+") as pods_file:
+        fcntl.flock(pods_file, fcntl.LOCK_EX)
+        pods_file.seek(0)
+        count = len(pods_file.read())
+        if change > 0 and count >= STATE["max_debug_pods"]:
+            return None
+        pods_file.truncate(0)
+        pods_file.write("x" * (count + change))
+        return count + change
+
+
+def main():
+    start = time.time()
+    tool = os.path.basename(sys.argv[0])
+    random.seed()
+    failed = random.random() < STATE["failure_rate"]
+    if tool == "oc":
+        verb = "debug" if "debug" in sys.argv[1:3] else "get"
+    else:
+        verb = "ssh"
+    throttled = False
+    pod_started = False
+    if verb == "debug" and STATE["max_debug_pods"] is not None:
+        pod_started = debug_pods(1) is not None
+        throttled = not pod_started
+    delay = STATE["latency"].get(verb, 0.0) * STATE["time_scale"] * random.uniform(0.8, 1.2)
+    time.sleep(delay)
+    if throttled:
+        sys.stderr.write(
+            "Error from server (TooManyRequests): the server has received too many "
+            "requests and has asked us to try again later\n")
+        retcode = 1
+    elif failed:
+        sys.stderr.write("fake %s: injected failure\n" % tool)
+        retcode = 1
+    elif tool == "oc":
+        verb, retcode = oc(sys.argv[1:])
+    else:
+        verb, retcode = ssh(sys.argv[1:])
+    if pod_started:
+        debug_pods(-1)
+    record = {{
+        "tool": tool,
+        "verb": verb,
+        "args": sys.argv[1:],
+        "start": start,
+        "duration": time.time() - start,
+        "delay": delay,
+        "retcode": retcode,
+        "throttled": throttled,
+    }}
+    with open(os.path.join(BASE_DIR, "calls.jsonl"), "a") as log_file:
+        fcntl.flock(log_file, fcntl.LOCK_EX)
+        log_file.write(json.dumps(record) + "\n")
+    return retcode
+
+
+sys.exit(main())
+'''
+
+
+class FakeCluster:
+    """
+    Synthetic cluster served by fake ``oc`` and ``ssh`` executables.
+
+    Nodes are spread across zones given by ``zone_labels``, the first zone
+    (an arbiter zone) gets one node per each 10 nodes of the cluster and the
+    rest is split evenly among the other zones.
+
+    Args:
+        base_dir (str): working directory of the fake cluster
+        node_num (int): number of nodes of the cluster
+        zone_labels (tuple): ``topology.kubernetes.io/zone`` labels of zones
+        latency_profile (str): name of a profile from ``LATENCY_PROFILES``
+        time_scale (float): multiplier of latency profile values, so that
+            benchmarks of large clusters don't take too long
+        failure_rate (float): probability of failure of a fake call
+        max_debug_pods (int): max number of ``oc debug`` calls running at
+            the same time, other calls are throttled like by API server
+        images_per_node (int): number of images listed in node status, which
+            makes node objects as large as they are on real clusters
+        systemd_json (bool): whether systemd of the nodes supports json
+            output of ``systemctl list-timers``
+    """
+
+    def __init__(
+            self,
+            base_dir,
+            node_num=9,
+            zone_labels=("arbiter", "data-1", "data-2"),
+            latency_profile="none",
+            time_scale=1.0,
+            failure_rate=0.0,
+            max_debug_pods=None,
+            images_per_node=50,
+            systemd_json=True):
+        self.base_dir = base_dir
+        self.bin_dir = os.path.join(base_dir, "bin")
+        self.zone_labels = zone_labels
+        self.nodes = []
+        arbiter_num = max(1, node_num // 10)
+        data_zones = len(zone_labels) - 1
+        for i in range(node_num):
+            if i < arbiter_num:
+                zone_label = zone_labels[0]
+            else:
+                zone_label = zone_labels[1 + (i - arbiter_num) % data_zones]
+            self.nodes.append({
+                "name": f"compute-{i}",
+                "role": "master" if i < 3 else "worker",
+                "zone": zone_label,
+                "addrs": [f"10.{128 + i // 65536}.{i // 256 % 256}.{i % 256}"],
+            })
+        self._state = {
+            "nodes": self.nodes,
+            "latency": LATENCY_PROFILES[latency_profile],
+            "time_scale": time_scale,
+            "failure_rate": failure_rate,
+            "max_debug_pods": max_debug_pods,
+            "images_per_node": images_per_node,
+            "systemd_json": systemd_json,
+            "clock_offsets": {},
+            "missing_tools": {},
+        }
+        self._write()
+
+    def _write(self):
+        os.makedirs(self.bin_dir, exist_ok=True)
+        with open(os.path.join(self.base_dir, "state.json"), "w") as state_file:
+            json.dump(self._state, state_file)
+        script = FAKE_EXECUTABLE.format(python=sys.executable, base_dir=self.base_dir)
+        for tool in ("oc", "ssh"):
+            tool_path = os.path.join(self.bin_dir, tool)
+            with open(tool_path, "w") as tool_file:
+                tool_file.write(script)
+            os.chmod(tool_path, stat.S_IRWXU)
+
+    def set_failure_rate(self, failure_rate):
+        """
+        Change probability of failure of fake calls.
+        """
+        self._state["failure_rate"] = failure_rate
+        self._write()
+
+    def set_clock_offset(self, node_name, offset):
+        """
+        Shift clock of given node by given number of seconds.
+        """
+        self._state["clock_offsets"][node_name] = offset
+        self._write()
+
+    def remove_tool(self, node_name, tool):
+        """
+        Make given tool (eg. ``tc``) unavailable on given node.
+        """
+        self._state["missing_tools"].setdefault(node_name, []).append(tool)
+        self._write()
+
+    def get_node_names(self, zone_label=None):
+        """
+        Return names of nodes (in given zone only if specified).
+        """
+        return [n["name"] for n in self.nodes if zone_label in (None, n["zone"])]
+
+    def get_node_addrs(self, zone_label):
+        """
+        Return set of ip addresses of nodes in given zone.
+        """
+        return set(addr for n in self.nodes if n["zone"] == zone_label for addr in n["addrs"])
+
+    def get_timers(self, node_name):
+        """
+        Return list of timer units started on given node.
+        """
+        timers_path = os.path.join(self.base_dir, "timers", node_name)
+        if not os.path.exists(timers_path):
+            return []
+        with open(timers_path) as timers_file:
+            return timers_file.read().split()
+
+    def put_file(self, node_name, file_path, content):
+        """
+        Create a file on given node, which could be read via ``cat``.
+        """
+        files_dir = os.path.join(self.base_dir, "files", node_name)
+        os.makedirs(files_dir, exist_ok=True)
+        with open(os.path.join(files_dir, os.path.basename(file_path)), "w") as node_file:
+            node_file.write(content)
+
+    def get_file(self, node_name, file_path):
+        """
+        Return content of a file on given node, None if there is no such file.
+        """
+        node_file_path = os.path.join(self.base_dir, "files", node_name, os.path.basename(file_path))
+        if not os.path.exists(node_file_path):
+            return None
+        with open(node_file_path) as node_file:
+            return node_file.read()
+
+    def get_calls(self, tool=None, verb=None):
+        """
+        Return list of recorded calls of fake executables, each call is a dict
+        with ``tool``, ``verb``, ``args``, ``start``, ``duration``, ``delay``
+        and ``retcode`` keys.
+        """
+        log_path = os.path.join(self.base_dir, "calls.jsonl")
+        if not os.path.exists(log_path):
+            return []
+        calls = []
+        with open(log_path) as log_file:
+            for line in log_file:
+                call = json.loads(line)
+                if tool is not None and call["tool"] != tool:
+                    continue
+                if verb is not None and call["verb"] != verb:
+                    continue
+                calls.append(call)
+        return calls
+
+    def get_scripts(self, node_name):
+        """
+        Return list of shell scripts executed on given node via ``sh -c``,
+        except scripts listing timers.
+        """
+        scripts_path = os.path.join(self.base_dir, "scripts", node_name)
+        if not os.path.exists(scripts_path):
+            return []
+        with open(scripts_path) as scripts_file:
+            return [json.loads(line) for line in scripts_file]
+
+    def clear_calls(self):
+        """
+        Forget all recorded calls.
+        """
+        log_path = os.path.join(self.base_dir, "calls.jsonl")
+        if os.path.exists(log_path):
+            os.unlink(log_path)
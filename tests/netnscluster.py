@@ -0,0 +1,333 @@
+# -*- coding: utf8 -*-
+
+"""
+Local cluster emulator for exercising ocp-network-split node scripts.
+
+Each emulated node is a Linux network namespace connected via veth pair to a
+single bridge in the root namespace, so that all nodes share one network like
+nodes of a real cluster do. The env file with zone configuration and the node
+scripts from ``ocpnetsplit`` directory are installed into a per node directory
+and the scripts are executed inside of the node namespace, with zone env
+variables passed in the same way as systemd ``EnvironmentFile`` does.
+
+Creating the cluster requires root privileges and ``ip`` tool, running the
+network split script requires ``iptables`` and the latency script requires
+``tc`` with ``sch_netem`` available (tc datapath of the split script requires
+``clsact`` qdisc and ``gact`` action instead of ``iptables``), see
+:py:func:`missing_requirements`.
+"""
+
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import ocpnetsplit
+from ocpnetsplit import zone
+
+
+PROJECT_DIR = os.path.abspath(os.path.dirname(ocpnetsplit.__file__))
+NODE_SCRIPTS = (
+    "network-split.sh",
+    "network-latency.sh",
+    "network-zone.sh",
+    "network-zone-tc.sh",
+    "network-pingtest.sh",
+)
+
+
+UDP_ECHO_SERVER = """
+import socket, sys
+sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+sock.bind(("0.0.0.0", int(sys.argv[1])))
+sock.settimeout(float(sys.argv[2]))
+print("ready", flush=True)
+try:
+    while True:
+        data, addr = sock.recvfrom(64)
+        sock.sendto(data, addr)
+except socket.timeout:
+    pass
+"""
+
+
+UDP_ECHO_CLIENT = """
+import socket, sys, time
+sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+sock.settimeout(float(sys.argv[4]))
+rtts = []
+for i in range(int(sys.argv[3])):
+    start = time.perf_counter()
+    sock.sendto(b"%d" % i, (sys.argv[1], int(sys.argv[2])))
+    try:
+        sock.recvfrom(64)
+    except socket.timeout:
+        continue
+    rtts.append(time.perf_counter() - start)
+print(" ".join(str(rtt) for rtt in rtts))
+"""
+
+
+def _probe_tc(tc_cmds):
+    """
+    Check that given tc commands succeed in a temporary network namespace.
+    """
+    netns = f"onsbprobe{os.getpid()}"
+    subprocess.run(["ip", "netns", "add", netns], check=True)
+    try:
+        for tc_cmd in tc_cmds:
+            comp_proc = subprocess.run(["ip", "netns", "exec", netns, "tc"] + tc_cmd, capture_output=True)
+            if comp_proc.returncode != 0:
+                return False
+    finally:
+        subprocess.run(["ip", "netns", "del", netns])
+    return True
+
+
+def missing_requirements(split=False, latency=False, datapath="iptables"):
+    """
+    Check what is missing to run the emulator on this machine.
+
+    Args:
+        split (bool): check requirements of ``network-split.sh`` as well
+        latency (bool): check requirements of ``network-latency.sh`` as well
+        datapath (str): datapath of the scripts, see
+            :py:const:`ocpnetsplit.machineconfig.DATAPATHS`
+
+    Returns:
+        str: description of missing requirement, None if nothing is missing
+    """
+    if os.geteuid() != 0:
+        return "root privileges are required to create network namespaces"
+    for tool in ("ip", "hostname", "realpath"):
+        if shutil.which(tool) is None:
+            return f"{tool} tool is not available"
+    if split and datapath == "iptables" and shutil.which("iptables") is None:
+        return "iptables tool is not available"
+    if (latency or datapath == "tc") and shutil.which("tc") is None:
+        return "tc tool is not available"
+    # netem qdisc could be missing even when tc is installed
+    if latency and not _probe_tc([["qdisc", "add", "dev", "lo", "root", "netem", "delay", "1ms"]]):
+        return "netem qdisc is not available"
+    if split and datapath == "tc" and not _probe_tc([
+            ["qdisc", "add", "dev", "lo", "clsact"],
+            ["filter", "add", "dev", "lo", "egress", "prio", "1", "protocol", "ip",
+             "u32", "match", "u32", "0", "0", "action", "drop"]]):
+        return "clsact qdisc or gact action is not available"
+    return None
+
+
+class Node:
+    """
+    Emulated cluster node.
+    """
+
+    def __init__(self, name, zone_name, addr, etc_dir):
+        self.name = name
+        self.zone = zone_name
+        self.addr = addr
+        self.etc_dir = etc_dir
+
+    def __repr__(self):
+        return f"Node({self.name}, zone={self.zone}, addr={self.addr})"
+
+
+class NetnsCluster:
+    """
+    Cluster of emulated nodes, to be used as a context manager::
+
+        with NetnsCluster({"a": 1, "b": 4, "c": 4}) as cluster:
+            cluster.run_script_all("network-split.sh", ["setup", "ab"])
+
+    Args:
+        zone_sizes (dict): number of nodes in each zone (zone name as a key)
+        prefix (str): short prefix of network namespace and interface names
+        max_workers (int): how many node commands to run concurrently
+        datapath (str): datapath of the node scripts, see
+            :py:const:`ocpnetsplit.machineconfig.DATAPATHS`
+    """
+
+    def __init__(self, zone_sizes, prefix="onsb", max_workers=32, datapath="iptables"):
+        self.prefix = prefix
+        self.max_workers = max_workers
+        self.datapath = datapath
+        self.bridge = f"{prefix}br0"
+        self.nodes = []
+        self.zone_config = zone.ZoneConfig()
+        self._zone_sizes = zone_sizes
+        self._workdir = None
+        self._env = {}
+
+    def __enter__(self):
+        try:
+            self.create()
+        except Exception:
+            self.destroy()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.destroy()
+
+    def _addr(self, index):
+        # 10.213.0.1 is reserved for the bridge
+        host_num = index + 2
+        return f"10.213.{host_num // 256}.{host_num % 256}"
+
+    def create(self):
+        """
+        Create network namespace for every node, connect it to the bridge and
+        install scripts and env file with zone config into each node.
+        """
+        self._workdir = tempfile.mkdtemp(prefix="ocpnetsplit-netns-")
+        index = 0
+        for zone_name, size in self._zone_sizes.items():
+            for _ in range(size):
+                name = f"{self.prefix}{index}"
+                etc_dir = os.path.join(self._workdir, name, "etc")
+                node = Node(name, zone_name, self._addr(index), etc_dir)
+                self.nodes.append(node)
+                self.zone_config.add_node(zone_name, node.addr)
+                index += 1
+        env_content = self.zone_config.get_env_file()
+        for line in env_content.splitlines():
+            key, value = shlex.split(line)[0].split("=", 1)
+            self._env[key] = value
+        # create all links from the root namespace in one batch
+        batch = [
+            f"link add {self.bridge} type bridge",
+            f"addr add 10.213.0.1/16 dev {self.bridge}",
+            f"link set {self.bridge} up",
+        ]
+        for node in self.nodes:
+            batch.append(f"netns add {node.name}")
+            batch.append(f"link add {node.name} type veth peer name eth0 netns {node.name}")
+            batch.append(f"link set {node.name} master {self.bridge}")
+            batch.append(f"link set {node.name} up")
+        subprocess.run(
+            ["ip", "-batch", "-"],
+            input="\n".join(batch).encode(),
+            check=True)
+        for node in self.nodes:
+            ns_batch = [
+                f"addr add {node.addr}/16 dev eth0",
+                "link set lo up",
+                "link set eth0 up",
+                "route add default via 10.213.0.1",
+            ]
+            subprocess.run(
+                ["ip", "-n", node.name, "-batch", "-"],
+                input="\n".join(ns_batch).encode(),
+                check=True)
+            os.makedirs(node.etc_dir)
+            with open(os.path.join(node.etc_dir, "network-split.env"), "w") as env_file:
+                env_file.write(env_content)
+            if self.datapath != "iptables":
+                # as deployed by MachineConfig, see create_zone_mc_dict()
+                with open(os.path.join(node.etc_dir, "network-split-datapath.env"), "w") as env_file:
+                    env_file.write(f"NETWORK_SPLIT_DATAPATH={self.datapath}\n")
+            for script in NODE_SCRIPTS:
+                script_path = os.path.join(node.etc_dir, script)
+                shutil.copy(os.path.join(PROJECT_DIR, script), script_path)
+                os.chmod(script_path, 0o544)
+
+    def destroy(self):
+        """
+        Remove all network namespaces, links and files of the cluster.
+        """
+        # deleting veth link in the root namespace removes it's peer as well
+        # right away, which is not the case when namespace is deleted first
+        batch = [f"link del {node.name}" for node in self.nodes]
+        batch.extend(f"netns del {node.name}" for node in self.nodes)
+        batch.append(f"link del {self.bridge}")
+        subprocess.run(["ip", "-force", "-batch", "-"], input="\n".join(batch).encode())
+        if self._workdir is not None:
+            shutil.rmtree(self._workdir, ignore_errors=True)
+        self.nodes = []
+
+    def get_nodes(self, zone_name=None):
+        """
+        Return list of nodes (from given zone only, if specified).
+        """
+        return [n for n in self.nodes if zone_name is None or n.zone == zone_name]
+
+    def run(self, node, cmd_list, timeout=120, check=True):
+        """
+        Run given command within network namespace of given node.
+
+        Returns:
+            subprocess.CompletedProcess: result of the command
+        """
+        env = dict(os.environ)
+        env.update(self._env)
+        # nodes share file system, so node local state needs to be separated
+        env["LATENCY_STATE_FILE"] = os.path.join(node.etc_dir, "network-latency.state")
+        env["NETWORK_SPLIT_RUN_DIR"] = node.etc_dir
+        return subprocess.run(
+            ["ip", "netns", "exec", node.name] + cmd_list,
+            env=env,
+            capture_output=True,
+            timeout=timeout,
+            check=check)
+
+    def run_script(self, node, script, args):
+        """
+        Run given ocp-network-split script installed on the node.
+        """
+        script_path = os.path.join(node.etc_dir, script)
+        return self.run(node, ["bash", script_path] + args)
+
+    def run_script_all(self, script, args):
+        """
+        Run given script on all nodes at the same moment (as when a systemd
+        timer fires on all nodes of a cluster) and wait for all of them to
+        finish.
+
+        Returns:
+            dict: time in seconds since the start until the script finished
+            for each node (node name as a key)
+        """
+        start = time.perf_counter()
+
+        def run_timed(node):
+            self.run_script(node, script, args)
+            return node.name, time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return dict(executor.map(run_timed, self.nodes))
+
+    def count_drop_rules(self, node):
+        """
+        Return number of iptables ``DROP`` rules in filter table of the node.
+        """
+        comp_proc = self.run(node, ["iptables", "-S"])
+        return sum(1 for ln in comp_proc.stdout.decode().splitlines() if ln.endswith("-j DROP"))
+
+    def measure_rtt(self, src, dst, count=20, timeout=1.0, port=7007):
+        """
+        Measure round trip time between two nodes via UDP echo.
+
+        Returns:
+            list: RTT in seconds of each echo packet which returned, lost
+            packets are not included
+        """
+        server = subprocess.Popen(
+            ["ip", "netns", "exec", dst.name,
+             sys.executable, "-c", UDP_ECHO_SERVER, str(port), str(timeout * 2)],
+            stdout=subprocess.PIPE)
+        try:
+            server.stdout.readline()
+            comp_proc = self.run(
+                src,
+                [sys.executable, "-c", UDP_ECHO_CLIENT,
+                 dst.addr, str(port), str(count), str(timeout)],
+                timeout=count * timeout + 30)
+        finally:
+            server.kill()
+            server.wait()
+        return [float(rtt) for rtt in comp_proc.stdout.decode().split()]
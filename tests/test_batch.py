@@ -0,0 +1,57 @@
+# -*- coding: utf8 -*-
+
+import subprocess
+
+import pytest
+
+from ocpnetsplit import batch
+
+
+def run_batch(cmd_lists, marker):
+    cmd = batch.batch_cmd(cmd_lists, marker)
+    return subprocess.run(cmd, capture_output=True, check=True, text=True).stdout
+
+
+def test_batch_local():
+    """
+    Output and return code of each command is parsed from output of the
+    whole batch, executed via local shell.
+    """
+    marker = batch.new_marker()
+    cmd_lists = [
+        ["echo", "foo bar"],
+        ["sh", "-c", "echo 'error message' >&2; exit 3"],
+        ["printf", "no newline"],
+        ["true"],
+    ]
+    results = batch.parse_batch_output(run_batch(cmd_lists, marker), marker, cmd_lists)
+    assert [r.output for r in results] == ["foo bar\n", "error message\n", "no newline", ""]
+    assert [r.returncode for r in results] == [0, 3, 0, 0]
+    assert results[0].ok
+    assert not results[1].ok
+    with pytest.raises(subprocess.CalledProcessError):
+        results[1].check_returncode()
+    assert results[2].to_dict() == {"cmd": ["printf", "no newline"], "output": "no newline", "returncode": 0}
+
+
+def test_batch_missing_output():
+    marker = batch.new_marker()
+    output = f"foo\n\n{marker} 0\n"
+    with pytest.raises(ValueError):
+        batch.parse_batch_output(output, marker, [["echo", "foo"], ["true"]])
+
+
+def test_new_marker():
+    assert batch.new_marker() != batch.new_marker()
+
+
+def test_split_batches():
+    cmd_lists = [["echo", "x" * 300] for _ in range(10)]
+    batches = batch.split_batches(cmd_lists, max_size=1000)
+    assert [len(cmds) for cmds in batches] == [2, 2, 2, 2, 2]
+    assert all(len(batch.batch_cmd(cmds, batch.new_marker())[2]) <= 1000 for cmds in batches)
+    assert sum(batches, []) == cmd_lists
+    # command which is too long on it's own gets a batch of it's own
+    batches = batch.split_batches([["true"], ["echo", "x" * 2000], ["true"]], max_size=1000)
+    assert [len(cmds) for cmds in batches] == [1, 1, 1]
+    assert batch.split_batches([]) == []
@@ -0,0 +1,154 @@
+# -*- coding: utf8 -*-
+
+import pytest
+
+from ocpnetsplit import controller
+from ocpnetsplit import main
+from ocpnetsplit import ocp
+from ocpnetsplit import zone
+
+
+ZONE_LABELS = {"a": "arbiter", "b": "data-1", "c": "data-2"}
+
+
+def node_dict(name, zone_label, addr):
+    return {
+        "metadata": {
+            "name": name,
+            "labels": {controller.ZONE_LABEL: zone_label},
+        },
+        "status": {
+            "addresses": [
+                {"type": "Hostname", "address": name},
+                {"type": "InternalIP", "address": addr},
+            ],
+        },
+    }
+
+
+def test_controller_handle_event():
+    ctl = controller.ZoneController(ZONE_LABELS, zone_x_addrs=["203.0.113.1"])
+    assert ctl.handle_event("ADDED", node_dict("n1", "arbiter", "198.51.100.1"))
+    assert ctl.handle_event("ADDED", node_dict("n2", "data-1", "198.51.100.2"))
+    # node outside of any zone is ignored
+    assert not ctl.handle_event("ADDED", node_dict("n3", "other", "198.51.100.3"))
+    # no change of zone membership
+    assert not ctl.handle_event("MODIFIED", node_dict("n2", "data-1", "198.51.100.2"))
+    assert ctl.handle_event("MODIFIED", node_dict("n2", "data-2", "198.51.100.2"))
+    zc = ctl.get_zone_config()
+    assert zc.get_nodes("a") == {"198.51.100.1"}
+    assert zc.get_nodes("b") is None
+    assert zc.get_nodes("c") == {"198.51.100.2"}
+    assert zc.get_nodes("x") == {"203.0.113.1"}
+    assert ctl.handle_event("DELETED", node_dict("n2", "data-2", "198.51.100.2"))
+    assert not ctl.handle_event("DELETED", node_dict("n2", "data-2", "198.51.100.2"))
+    assert ctl.get_zone_config().get_nodes("c") is None
+
+
+def test_controller_sync(fake_cluster):
+    """
+    Nodes which stayed in their zone get only the changed addresses, while
+    a node which joined the cluster gets its units restarted.
+    """
+    cluster = fake_cluster(3)
+    ctl = controller.ZoneController(ZONE_LABELS, run_all=main.run_node_cmd_all)
+    for event in ocp.watch_nodes():
+        ctl.handle_event(*event)
+    # the first sync only records the baseline
+    assert ctl.sync() == []
+    assert cluster.get_scripts("compute-0") == []
+    ctl.handle_event("ADDED", node_dict("compute-3", "data-1", "10.128.0.3"))
+    results = ctl.sync()
+    assert [r.node for r in results] == ["compute-0", "compute-1", "compute-2", "compute-3"]
+    assert all(r.ok for r in results[:3])
+    update_script = cluster.get_scripts("compute-0")[0]
+    assert controller.CONTROLLER_ENV in update_script
+    assert 'ZONE_B="10.128.0.1 10.128.0.3"' in update_script
+    assert "network-split.sh update" in update_script
+    assert update_script.count("b+=10.128.0.3") == 2
+    # compute-3 is not known to the fake cluster, so the update failed
+    assert not results[-1].ok
+
+
+def test_controller_sync_stale_backoff(fake_cluster):
+    """
+    Node which failed to receive an update is retried with growing delay,
+    even without further changes.
+    """
+    fake_cluster(3)
+    now = [0]
+    ctl = controller.ZoneController(ZONE_LABELS, run_all=main.run_node_cmd_all, clock=lambda: now[0])
+    for event in ocp.watch_nodes():
+        ctl.handle_event(*event)
+    ctl.sync()
+    # compute-3 is not known to the fake cluster, so the update fails
+    ctl.handle_event("ADDED", node_dict("compute-3", "data-1", "10.128.0.3"))
+    assert not ctl.sync()[-1].ok
+    assert ctl.sync() == []
+    now[0] = controller.STALE_BASE_DELAY
+    results = ctl.sync()
+    assert [r.node for r in results] == ["compute-3"]
+    assert not results[0].ok
+    now[0] += controller.STALE_BASE_DELAY
+    assert ctl.sync() == []
+    now[0] += controller.STALE_BASE_DELAY
+    assert [r.node for r in ctl.sync()] == ["compute-3"]
+    # stale node which left the cluster is not retried
+    ctl.handle_event("DELETED", node_dict("compute-3", "data-1", "10.128.0.3"))
+    ctl.sync()
+    now[0] += controller.STALE_MAX_DELAY
+    assert ctl.sync() == []
+
+
+@pytest.mark.parametrize("dry_run", (True, False))
+def test_controller_sync_moved_node(fake_cluster, dry_run):
+    """
+    Node which moved to another zone gets its units restarted.
+    """
+    cluster = fake_cluster(3)
+    ctl = controller.ZoneController(ZONE_LABELS, dry_run=dry_run, run_all=main.run_node_cmd_all)
+    for event in ocp.watch_nodes():
+        ctl.handle_event(*event)
+    ctl.sync()
+    ctl.handle_event("MODIFIED", node_dict("compute-2", "data-1", "10.128.0.2"))
+    results = ctl.sync()
+    assert [r.zone for r in results] == ["a", "b", "b"]
+    if dry_run:
+        assert cluster.get_scripts("compute-2") == []
+        return
+    assert "systemctl stop" in cluster.get_scripts("compute-2")[0]
+    # latency is set up again right away, without restart of it's unit
+    assert "network-latency.sh reapply" in cluster.get_scripts("compute-2")[0]
+    assert "network-latency.service" not in cluster.get_scripts("compute-2")[0]
+    assert "systemctl stop" not in cluster.get_scripts("compute-0")[0]
+    assert "b+=10.128.0.2 c-=10.128.0.2" in cluster.get_scripts("compute-0")[0]
+
+
+def test_controller_sync_baseline(fake_cluster):
+    """
+    When the baseline is specified, the first sync pushes changes against it.
+    """
+    cluster = fake_cluster(3)
+    baseline = zone.ZoneConfig()
+    baseline.load_env_file('ZONE_A="10.128.0.0"\nZONE_B="10.128.0.1"\n')
+    ctl = controller.ZoneController(ZONE_LABELS, baseline=baseline, run_all=main.run_node_cmd_all)
+    for event in ocp.watch_nodes():
+        ctl.handle_event(*event)
+    results = ctl.sync()
+    assert [r.node for r in results] == ["compute-0", "compute-1", "compute-2"]
+    assert "update c+=10.128.0.2" in cluster.get_scripts("compute-0")[0]
+    assert "systemctl stop" in cluster.get_scripts("compute-2")[0]
+
+
+def test_controller_resync(fake_cluster):
+    """
+    Node deleted while the watch was not running is forgotten on resync.
+    """
+    fake_cluster(3)
+    ctl = controller.ZoneController(ZONE_LABELS)
+    for event in ocp.watch_nodes():
+        ctl.handle_event(*event)
+    ctl.handle_event("ADDED", node_dict("compute-3", "data-1", "10.128.0.3"))
+    assert ctl.resync()
+    assert ctl.get_zone_config().get_nodes("b") == {"10.128.0.1"}
+    assert not ctl.resync()
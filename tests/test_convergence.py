@@ -0,0 +1,150 @@
+# -*- coding: utf8 -*-
+
+import os
+import subprocess
+import textwrap
+import time
+
+from ocpnetsplit import convergence
+
+
+START_TS = 1617978600
+STOP_TS = START_TS + 300
+
+
+def sampler_log(expected, samples):
+    lines = [f"expected {expected}"]
+    lines += [f"{ts:.3f} {rules} {qdiscs}" for ts, rules, qdiscs in samples]
+    return "\n".join(lines) + "\n"
+
+
+def test_sampler_cmd():
+    cmd = convergence.sampler_cmd("ab", START_TS, STOP_TS, interval=0.5, lead=10)
+    assert cmd[:3] == [
+        "systemd-run",
+        f"--on-calendar=@{START_TS - 10}",
+        f"--unit=network-split-watch-{START_TS}",
+    ]
+    script = cmd[-1]
+    assert "network-split.sh -d setup ab" in script
+    assert f'-lt {STOP_TS + 10} ]' in script
+    assert "sleep 0.5" in script
+    assert f"> /run/network-split-watch-{START_TS}.log" in script
+    assert convergence.collect_cmd(START_TS) == ["cat", f"/run/network-split-watch-{START_TS}.log"]
+
+
+def write_exec(path, content):
+    with open(path, "w") as exec_file:
+        exec_file.write("#!/bin/sh\n" + content)
+    os.chmod(path, 0o755)
+
+
+def test_sampler_tc_datapath(tmp_path):
+    """
+    With tc datapath, the sampler counts drop verdicts of tc filters instead
+    of iptables rules.
+    """
+    etc_dir = tmp_path / "etc"
+    bin_dir = tmp_path / "bin"
+    etc_dir.mkdir()
+    bin_dir.mkdir()
+    (etc_dir / "network-split.env").write_text('ZONE_A="198.51.100.1"\n')
+    (etc_dir / "network-split-datapath.env").write_text("NETWORK_SPLIT_DATAPATH=tc\n")
+    write_exec(etc_dir / "network-split.sh", textwrap.dedent("""\
+        echo "tc filter add dev eth0 ingress prio 1 protocol ip u32 ht 100:2: match ip src 198.51.100.2/32 link 11:"
+        echo "tc filter add dev eth0 ingress prio 1 protocol ip handle 11::1 u32 ht 11: match u32 0 0 action drop"
+        echo "tc filter add dev eth0 egress prio 1 protocol ip handle 11::1 u32 ht 11: match u32 0 0 action drop"
+        """))
+    write_exec(bin_dir / "ip", 'echo "default via 198.51.100.254 dev eth0"\n')
+    write_exec(bin_dir / "iptables", 'echo "-A INPUT -s 198.51.100.9/32 -j DROP"\n')
+    write_exec(bin_dir / "tc", textwrap.dedent("""\
+        if [ "$1" = filter ]; then
+          echo "filter protocol ip pref 1 u32 chain 0 fh 11::1 order 1 key ht 11 bkt 0 terminal flowid not_in_hw"
+          echo "  match 00000000/00000000 at 0"
+          echo "        action order 1: gact action drop"
+        fi
+        """))
+    stop_ts = int(time.time()) + 1
+    script = convergence.sampler_cmd("ab", stop_ts - 1, stop_ts, interval=0.2, lead=0, etc_dir=str(etc_dir))[-1]
+    log_path = tmp_path / "watch.log"
+    script = script.replace(convergence.get_log_path(stop_ts - 1), str(log_path))
+    env = dict(os.environ, PATH=str(bin_dir) + os.pathsep + os.environ["PATH"])
+    env.pop("NETWORK_SPLIT_DATAPATH", None)
+    subprocess.run(["sh", "-c", script], env=env, check=True, timeout=10)
+    expected, samples = convergence.parse_samples(log_path.read_text())
+    # one drop verdict in each direction
+    assert expected == 2
+    assert len(samples) > 0
+    assert all(rules == 2 for _, rules, _ in samples)
+
+
+def test_parse_samples():
+    output = textwrap.dedent("""\
+        expected 4
+        1617978590.101 2 0
+        1617978600.302 6 0
+        """)
+    expected, samples = convergence.parse_samples(output)
+    assert expected == 4
+    assert samples == [(1617978590.101, 2, 0), (1617978600.302, 6, 0)]
+
+
+def test_node_convergence():
+    node_conv = convergence.NodeConvergence("compute-0", "a", START_TS, STOP_TS)
+    # there are 2 unrelated drop rules on the node before the split starts
+    node_conv.load(sampler_log(4, [
+        (START_TS - 10, 2, 0),
+        (START_TS + 0.2, 2, 0),
+        (START_TS + 0.4, 4, 0),
+        (START_TS + 0.6, 6, 0),
+        (STOP_TS + 0.2, 6, 0),
+        (STOP_TS + 0.4, 2, 0),
+    ]))
+    assert node_conv.affected
+    assert node_conv.converged
+    assert round(node_conv.onset, 3) == 0.6
+    assert round(node_conv.teardown, 3) == 0.4
+    assert node_conv.to_dict()["samples"] == 6
+
+
+def test_node_convergence_not_affected():
+    node_conv = convergence.NodeConvergence("compute-1", "c", START_TS, STOP_TS)
+    node_conv.load(sampler_log(0, [(START_TS - 10, 0, 0), (START_TS, 0, 0)]))
+    assert not node_conv.affected
+    assert node_conv.converged
+    assert node_conv.onset is None
+
+
+def test_node_convergence_incomplete():
+    node_conv = convergence.NodeConvergence("compute-2", "b", START_TS, STOP_TS)
+    node_conv.load(sampler_log(2, [(START_TS - 10, 0, 0), (START_TS + 1, 2, 0)]))
+    # teardown was not observed
+    assert node_conv.onset == 1
+    assert node_conv.teardown is None
+    assert not node_conv.converged
+    node_conv.load("")
+    assert node_conv.error is not None
+
+
+def test_summarize():
+    results = []
+    for node, onset, teardown in (("n0", 0.5, 0.25), ("n1", 1.5, 0.75)):
+        node_conv = convergence.NodeConvergence(node, "a", START_TS, STOP_TS)
+        node_conv.load(sampler_log(2, [
+            (START_TS - 10, 0, 0),
+            (START_TS + onset, 2, 0),
+            (STOP_TS + teardown, 0, 0),
+        ]))
+        results.append(node_conv)
+    unaffected = convergence.NodeConvergence("n2", "c", START_TS, STOP_TS)
+    unaffected.load(sampler_log(0, [(START_TS - 10, 0, 0)]))
+    results.append(unaffected)
+    assert convergence.summarize(results) == {
+        "nodes": 3,
+        "affected_nodes": 2,
+        "converged_nodes": 3,
+        "onset_convergence": 1.5,
+        "teardown_convergence": 0.75,
+    }
+    unaffected.error = "failed"
+    assert convergence.summarize(results)["onset_convergence"] is None
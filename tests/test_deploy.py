@@ -0,0 +1,195 @@
+# -*- coding: utf8 -*-
+
+import subprocess
+import textwrap
+
+import pytest
+
+from ocpnetsplit import batch
+from ocpnetsplit import deploy
+from ocpnetsplit import main
+
+
+ZONE_ENV = 'ZONE_A="198.51.100.1"\nZONE_B="198.51.100.2"\nZONE_C="198.51.100.3"\n'
+
+
+def run_local(cmd_lists):
+    """
+    Run commands via local shell in a single batch.
+    """
+    marker = batch.new_marker()
+    cmd = batch.batch_cmd(cmd_lists, marker)
+    stdout = subprocess.run(cmd, capture_output=True, check=True, text=True).stdout
+    return batch.parse_batch_output(stdout, marker, cmd_lists)
+
+
+def rpm_result(output=""):
+    return batch.CommandResult(["rpm", "-q"], output, 0)
+
+
+def test_get_deploy_files_split():
+    mc = main.get_networksplit_mc_spec(ZONE_ENV, split=True)
+    files = {f.path: f for f in deploy.get_deploy_files(mc)}
+    # files of master and worker MachineConfigs are the same
+    assert len(files) == len(set(files))
+    assert files["/etc/network-split.env"].content == ZONE_ENV
+    assert files["/etc/network-split.sh"].mode == 0o544
+    assert files["/etc/network-zone.sh"].mode == 0o544
+    unit = files["/etc/systemd/system/network-split@.service"]
+    assert unit.unit == "network-split@.service"
+    assert not unit.enabled
+    assert "/etc/network-latency.sh" not in files
+    assert deploy.get_packages(files.values()) == ["iptables"]
+
+
+def test_get_deploy_files_latency():
+    mc = main.get_networksplit_mc_spec(ZONE_ENV, latency=5)
+    files = {f.path: f for f in deploy.get_deploy_files(mc)}
+    assert "/etc/network-split.sh" not in files
+    assert files["/etc/modules-load.d/sch_netem.conf"].content == "sch_netem"
+    unit = files["/etc/systemd/system/network-latency.service"]
+    assert unit.enabled
+    assert "network-latency.sh 5" in unit.content
+    assert deploy.get_packages(files.values()) == ["iptables", "iproute-tc", "kernel-modules-extra"]
+
+
+def test_get_deploy_files_conflict():
+    mc = main.get_networksplit_mc_spec(ZONE_ENV, split=True)
+    mc += main.get_networksplit_mc_spec(ZONE_ENV.replace("100.1", "100.4"))
+    with pytest.raises(ValueError):
+        deploy.get_deploy_files(mc)
+
+
+def test_parse_inventory():
+    inventory = textwrap.dedent(
+        """
+        arbiter.ceph.example.com
+        osd-0.ceph.example.com ansible_user=root
+        # osd-9.ceph.example.com
+
+        [admin]
+        osd-0.ceph.example.com
+        osd-1.ceph.example.com
+
+        [admin:vars]
+        foo=bar
+
+        [all:children]
+        admin
+        """)
+    assert deploy.parse_inventory(inventory) == [
+        "arbiter.ceph.example.com",
+        "osd-0.ceph.example.com",
+        "osd-1.ceph.example.com",
+    ]
+
+
+def test_deploy_up_to_date(tmp_path):
+    """
+    Nothing is done on a node with the same files.
+    """
+    files = [deploy.DeployFile(str(tmp_path / "foo.sh"), "echo foo\n", mode=0o544)]
+    (tmp_path / "foo.sh").write_text("echo foo\n")
+    (tmp_path / "foo.sh").chmod(0o544)
+    report = deploy.NodeDeployReport("node")
+    state = run_local(deploy.get_state_cmds(files, [])[:1])
+    report.load_state(files, state + [rpm_result()])
+    assert report.changed == []
+    assert report.apply_cmds == []
+    assert report.ok
+
+
+def test_deploy_changed_files(tmp_path):
+    """
+    Missing and changed files are written, files with changed mode only are
+    fixed as well.
+    """
+    files = [
+        deploy.DeployFile(str(tmp_path / "same"), "same\n"),
+        deploy.DeployFile(str(tmp_path / "changed"), "new\n"),
+        deploy.DeployFile(str(tmp_path / "mode"), "mode\n", mode=0o544),
+        deploy.DeployFile(str(tmp_path / "sub" / "missing"), "missing 'quoted' $HOME\n"),
+    ]
+    (tmp_path / "same").write_text("same\n")
+    (tmp_path / "same").chmod(0o644)
+    (tmp_path / "changed").write_text("old\n")
+    (tmp_path / "mode").write_text("mode\n")
+    (tmp_path / "mode").chmod(0o644)
+    report = deploy.NodeDeployReport("node")
+    report.load_state(files, run_local(deploy.get_state_cmds(files, [])[:1]) + [rpm_result()])
+    assert report.changed == [f.path for f in files[1:]]
+    results = run_local(report.apply_cmds)
+    assert all(r.ok for r in results)
+    for f in files:
+        path = tmp_path / f.path
+        assert path.read_text() == f.content
+        assert path.stat().st_mode & 0o777 == f.mode
+    # deployed again, there is nothing to do
+    report.load_state(files, run_local(deploy.get_state_cmds(files, [])[:1]) + [rpm_result()])
+    assert report.apply_cmds == []
+
+
+def test_deploy_large_file(tmp_path):
+    """
+    Large file is written in chunks, in batches which fit into a command line
+    argument, and replaced only with the last chunk.
+    """
+    content = "".join(f"ZONE_{i}='198.51.100.{i % 256}'\n" for i in range(6000))
+    f = deploy.DeployFile(str(tmp_path / "large.env"), content)
+    cmds = deploy.get_write_cmds(f)
+    assert len(cmds) == len(content) // deploy.WRITE_CHUNK_SIZE + 1
+    assert [c[-1] for c in cmds[:-1]] == [""] * (len(cmds) - 1)
+    batches = batch.split_batches(cmds)
+    assert len(batches) > 1
+    for cmd_lists in batches[:-1]:
+        assert all(r.ok for r in run_local(cmd_lists))
+        assert not (tmp_path / "large.env").exists()
+    assert all(r.ok for r in run_local(batches[-1]))
+    assert (tmp_path / "large.env").read_text() == content
+    assert (tmp_path / "large.env").stat().st_mode & 0o777 == 0o644
+    assert not (tmp_path / "large.env.tmp").exists()
+
+
+def test_deploy_missing_packages():
+    files = [deploy.DeployFile("/etc/foo", "foo")]
+    state = batch.CommandResult([], f"{files[0].checksum} 644 /etc/foo\n", 0)
+    rpm = batch.CommandResult(
+        [], "iptables-1.8.8-6.el9.x86_64\npackage iproute-tc is not installed\n", 1)
+    report = deploy.NodeDeployReport("node")
+    report.load_state(files, [state, rpm])
+    assert report.missing_packages == ["iproute-tc"]
+    assert report.apply_cmds == [["dnf", "install", "-y", "iproute-tc"]]
+
+
+def test_get_apply_cmds_units():
+    """
+    Systemd is reloaded when some unit changes, and only services affected by
+    changed files are restarted.
+    """
+    mc = main.get_networksplit_mc_spec(ZONE_ENV, split=True, latency=5)
+    files = deploy.get_deploy_files(mc)
+    # zone config changed
+    cmds = deploy.get_apply_cmds(files, ["/etc/network-split.env"], [])
+    assert [c for c in cmds if c[0] == "systemctl"] == [
+        ["systemctl", "restart", "--no-block", "network-latency.service"]]
+    # split units changed
+    cmds = deploy.get_apply_cmds(
+        files, ["/etc/systemd/system/network-split@.service", "/etc/systemd/system/network-split-teardown.service"], [])
+    assert [c for c in cmds if c[0] == "systemctl"] == [
+        ["systemctl", "daemon-reload"],
+        ["systemctl", "enable", "network-split-teardown.service"]]
+    # latency deployed for the first time
+    cmds = deploy.get_apply_cmds(files, [f.path for f in files], [])
+    assert cmds[-2:] == [
+        ["systemctl", "restart", "--no-block", "systemd-modules-load.service"],
+        ["systemctl", "restart", "--no-block", "network-latency.service"]]
+
+
+def test_get_apply_cmds_no_latency():
+    """
+    Latency service is not restarted when it's not deployed.
+    """
+    files = deploy.get_deploy_files(main.get_networksplit_mc_spec(ZONE_ENV, split=True))
+    cmds = deploy.get_apply_cmds(files, ["/etc/network-split.env"], [])
+    assert len(cmds) == 1
+    assert cmds[0][:2] == ["sh", "-c"]
@@ -0,0 +1,103 @@
+# -*- coding: utf8 -*-
+
+import pytest
+
+from ocpnetsplit import batch
+from ocpnetsplit import doctor
+
+
+CHRONY_OUTPUT = (
+    "A9FEA9FE,169.254.169.254,3,1617978600.123456789,{offset},0.000001,0.000020,"
+    "-1.5,0.001,0.02,0.0004,0.0002,64.4,{leap}\n")
+
+
+def get_results(outputs=None, returncodes=None, ntp_offset=0.0, leap="Normal"):
+    default_outputs = {
+        "clock": "1617978600.5\n",
+        "chrony": CHRONY_OUTPUT.format(offset=ntp_offset, leap=leap),
+        "iptables": "iptables v1.8.7 (nf_tables)\n",
+        "env_file": 'ZONE_A="10.1.0.1"\nZONE_B="10.1.0.2"\nZONE_C="10.1.0.3"\n',
+        "zone": 'ZONE_A="10.1.0.1"\nZONE_B="10.1.0.2"\nZONE_C="10.1.0.3"\nZONE_B\n',
+        "tc": "tc utility, iproute2-5.18.0\n",
+        "sch_netem": "/lib/modules/5.14.0/kernel/net/sched/sch_netem.ko.xz\n",
+        "default_route": "default via 10.1.0.254 dev ens3 proto dhcp metric 100\n",
+    }
+    default_outputs.update(outputs or {})
+    returncodes = returncodes or {}
+    return [
+        batch.CommandResult(cmd_list, default_outputs[name], returncodes.get(name, 0))
+        for name, cmd_list in doctor.CHECKS
+    ]
+
+
+def test_node_report_ok():
+    report = doctor.NodeReport("node-1", "b")
+    report.load(get_results(ntp_offset=0.0002), 1617978599.0, 1617978601.0)
+    assert report.ok(latency=True)
+    assert report.detected_zone == "b"
+    assert report.clock_offset == 0.5
+    assert report.clock_error == 1.0
+    assert report.ntp_offset == 0.0002
+    assert report.default_routes == 1
+    assert report.to_dict()["checks"]["zone"] is None
+
+
+def test_node_report_failures():
+    report = doctor.NodeReport("node-1", "a")
+    results = get_results(
+        outputs={
+            "tc": "sh: tc: command not found\n",
+            "default_route": "default via 10.1.0.254 dev ens3\ndefault via 10.2.0.254 dev ens4\n",
+        },
+        returncodes={"tc": 127},
+        leap="Not synchronised")
+    report.load(results, 1617978599.0, 1617978601.0)
+    assert report.failed_checks() == ["chrony", "zone"]
+    assert report.failed_checks(latency=True) == ["chrony", "zone", "tc", "default_route"]
+    assert report.checks["tc"] == "sh: tc: command not found"
+    assert report.checks["zone"] == "node detects zone b, expected a"
+    assert report.default_routes == 2
+    assert not report.ok()
+
+
+def test_node_report_unexpected_output():
+    report = doctor.NodeReport("node-1")
+    report.load(get_results(outputs={"clock": "now\n", "chrony": "506\n"}), 0, 1)
+    assert report.failed_checks() == ["clock", "chrony"]
+    assert report.clock_offset is None
+
+
+@pytest.mark.parametrize("split_length, max_skew", [(1, 1.0), (15, 9.0), (60, 36.0)])
+def test_max_clock_skew(split_length, max_skew):
+    assert doctor.max_clock_skew(split_length) == max_skew
+
+
+def test_summarize():
+    reports = []
+    for idx, ntp_offset in enumerate((0.001, -0.002, 0.0)):
+        report = doctor.NodeReport(f"node-{idx}")
+        report.load(get_results(ntp_offset=ntp_offset), 1617978600.0, 1617978601.0)
+        reports.append(report)
+    summary = doctor.summarize(reports, 1.0)
+    assert summary["ok"]
+    assert summary["ntp_skew"] == pytest.approx(0.003)
+    # clock skew of the cluster exceeds the limit
+    assert not doctor.summarize(reports, 0.001)["clock_ok"]
+    # node with failed check
+    reports[1].load(get_results(outputs={"iptables": ""}, returncodes={"iptables": 127}), 1617978600.0, 1617978601.0)
+    summary = doctor.summarize(reports, 1.0)
+    assert not summary["ok"]
+    assert summary["failed_nodes"] == ["node-1"]
+    assert summary["failed_checks"] == {"iptables": 1}
+
+
+def test_summarize_client_clock():
+    """
+    Node clock is compared with local time, with precision of the
+    measurement taken into account.
+    """
+    report = doctor.NodeReport("node-1")
+    report.load(get_results(outputs={"clock": "1617978610.0\n"}), 1617978600.0, 1617978604.0)
+    assert report.clock_offset == 8.0
+    assert doctor.summarize([report], 6.5)["clock_ok"]
+    assert not doctor.summarize([report], 5.0)["clock_ok"]
@@ -0,0 +1,541 @@
+# -*- coding: utf8 -*-
+
+"""
+End to end tests and benchmarks of setup and sched flows running against
+a synthetic cluster served by fake ``oc`` and ``ssh``, see ``fakecluster``
+module.
+"""
+
+
+from datetime import datetime, timedelta
+import subprocess
+import sys
+import time
+
+import pytest
+
+from ocpnetsplit import convergence
+from ocpnetsplit import deploy
+from ocpnetsplit import doctor
+from ocpnetsplit import history
+from ocpnetsplit import limiter
+from ocpnetsplit import main
+from ocpnetsplit import ocp
+from ocpnetsplit import retry
+from ocpnetsplit import scenario
+from ocpnetsplit import target
+
+
+def test_fake_get_zone_config(fake_cluster):
+    """
+    Zone config is created based on zone labels of the fake cluster nodes.
+    """
+    cluster = fake_cluster(9)
+    zc = main.get_zone_config("arbiter", "data-1", "data-2")
+    assert zc.get_nodes("a") == cluster.get_node_addrs("arbiter")
+    assert zc.get_nodes("b") == cluster.get_node_addrs("data-1")
+    assert zc.get_nodes("c") == cluster.get_node_addrs("data-2")
+    # one oc call to list nodes in each zone, and one per each node
+    assert len(cluster.get_calls("oc")) == 3 + 9
+
+
+def test_fake_get_zone_config_more_zones(fake_cluster):
+    """
+    Additional zones are listed via their labels as well.
+    """
+    labels = ("arbiter", "data-1", "data-2", "data-3", "data-4")
+    cluster = fake_cluster(9, zone_labels=labels)
+    zc = main.get_zone_config("arbiter", "data-1", "data-2", zone_labels={"d": "data-3", "e": "data-4"})
+    assert zc.get_nodes("d") == cluster.get_node_addrs("data-3")
+    assert zc.get_nodes("e") == cluster.get_node_addrs("data-4")
+    assert zc.get_env_file().splitlines()[3].startswith('ZONE_D="')
+
+
+def test_fake_schedule_split(fake_cluster):
+    """
+    Both start and stop timers are started on every node via oc debug.
+    """
+    cluster = fake_cluster(5)
+    nodes = ocp.list_cluster_nodes()
+    start_dt = datetime.now() + timedelta(minutes=10)
+    main.schedule_split(nodes, "ab", start_dt, 5)
+    start_ts = int(start_dt.timestamp())
+    for node in cluster.get_node_names():
+        assert cluster.get_timers(node) == [
+            f"network-split-ab-setup@{start_ts}.timer",
+            f"network-split-teardown@{start_ts + 300}.timer",
+        ]
+    assert len(cluster.get_calls("oc", "debug")) == 5
+
+
+def test_fake_schedule_split_transient(fake_cluster):
+    """
+    Split without predefined timer unit is scheduled via systemd-run.
+    """
+    cluster = fake_cluster(3)
+    start_dt = datetime.now() + timedelta(minutes=10)
+    results = main.schedule_split(cluster.get_node_names(), "bx-ac", start_dt, 5)
+    start_ts = int(start_dt.timestamp())
+    assert results[0].timers[0].unit == f"network-split-ac-bx-setup-{start_ts}.timer"
+    for node in cluster.get_node_names():
+        scripts = cluster.get_scripts(node)
+        assert len(scripts) == 1
+        assert scripts[0].count("systemd-run") == 2
+        assert "network-split@ac-bx.service" in scripts[0]
+    with pytest.raises(ValueError):
+        main.schedule_split(cluster.get_node_names(), "a1", start_dt, 5)
+
+
+def test_fake_schedule_split_ssh(fake_cluster):
+    """
+    Scheduling via ssh starts timers on every node.
+    """
+    cluster = fake_cluster(5)
+    start_dt = datetime.now() + timedelta(minutes=10)
+    main.schedule_split(cluster.get_node_names(), "bc", start_dt, 5, use_ssh=True)
+    for node in cluster.get_node_names():
+        assert len(cluster.get_timers(node)) == 2
+    assert len(cluster.get_calls("ssh")) == 5
+    assert cluster.get_calls("oc") == []
+
+
+def test_fake_check_split(fake_cluster, capsys):
+    """
+    Check lists scheduled timer of every node, and reports node which can't
+    be checked instead of failing.
+    """
+    cluster = fake_cluster(3)
+    start_dt = datetime.now() + timedelta(minutes=10)
+    main.schedule_split(cluster.get_node_names(), "ab", start_dt, 5, use_ssh=True)
+    capsys.readouterr()
+    results = main.check_split(cluster.get_node_names() + ["compute-99"], "ab", use_ssh=True)
+    assert [r.ok for r in results] == [True, True, True, False]
+    out_lines = capsys.readouterr().out.splitlines()
+    start_unit = f"network-split-ab-setup@{int(start_dt.timestamp())}.timer"
+    assert len([line for line in out_lines if start_unit in line]) == 3
+    assert out_lines[-1].startswith("compute-99 ")
+
+
+@pytest.mark.parametrize("systemd_json", (True, False))
+def test_fake_get_split_status(fake_cluster, systemd_json):
+    """
+    Status of scheduled timers is reported for every node, no matter whether
+    systemd on the nodes supports json output of list-timers.
+    """
+    cluster = fake_cluster(3, systemd_json=systemd_json)
+    start_dt = datetime.now() + timedelta(minutes=10)
+    start_ts = int(start_dt.timestamp())
+    sched_results = main.schedule_split(cluster.get_node_names(), "ab", start_dt, 5, use_ssh=True)
+    assert [r.node for r in sched_results] == cluster.get_node_names()
+    assert sched_results[0].next_elapse == start_ts
+    assert sched_results[0].duration > 0
+    cluster.clear_calls()
+    results = main.get_split_status(cluster.get_node_names(), "ab", use_ssh=True)
+    # list-timers is executed once per node
+    assert len(cluster.get_calls()) == 3
+    for result in results:
+        assert result.ok
+        assert result.next_elapse == start_ts
+        assert result.armed_timers[1].unit == f"network-split-teardown@{start_ts + 300}.timer"
+    assert [r.to_dict()["timers"] for r in results] == [r.to_dict()["timers"] for r in sched_results]
+
+
+def test_fake_get_split_status_error(fake_cluster):
+    """
+    Node which can't be checked is reported with an error.
+    """
+    fake_cluster(3)
+    results = main.get_split_status(["compute-0", "compute-99"], use_ssh=True)
+    assert results[0].ok
+    assert results[0].timers == []
+    assert not results[1].ok
+
+
+def test_fake_get_split_status_concurrent(fake_cluster):
+    """
+    Status of the nodes is checked concurrently, within the node limiter.
+    """
+    cluster = fake_cluster(6, latency_profile="lan")
+    node_limiter = limiter.AimdLimiter(initial=3, maximum=3)
+    results = main.get_split_status(cluster.get_node_names(), use_ssh=True, node_limiter=node_limiter)
+    assert [r.node for r in results] == cluster.get_node_names()
+    assert all(r.ok for r in results)
+    calls = sorted(cluster.get_calls("ssh"), key=lambda c: c["start"])
+    assert len(calls) == 6
+    # the second call started before the first one was finished
+    assert calls[1]["start"] < calls[0]["start"] + calls[0]["duration"]
+
+
+def test_fake_schedule_scenario(fake_cluster):
+    """
+    All timers of a scenario are started on every node via single command.
+    """
+    cluster = fake_cluster(3)
+    scen = scenario.Scenario()
+    scen.load_dict({"steps": [
+        {"split": "ab", "at": 0, "length": 5},
+        {"split": "bc", "at": 10, "length": 5},
+        {"split": "ab-ac", "at": 20, "length": 5},
+    ]})
+    start_dt = datetime.now() + timedelta(minutes=10)
+    start_ts = int(start_dt.timestamp())
+    results = main.schedule_scenario(cluster.get_node_names(), scen, start_dt, use_ssh=True)
+    assert len(cluster.get_calls("ssh")) == 3
+    for result in results:
+        assert len(result.timers) == 6
+        assert sorted(cluster.get_timers(result.node)) == sorted(t.unit for t in result.timers)
+    assert f"network-split-ab-ac-setup@{start_ts + 1200}.timer" in cluster.get_timers("compute-2")
+
+
+def test_fake_split_watch(fake_cluster):
+    """
+    Convergence samplers are started on every node, and their logs are
+    collected and evaluated.
+    """
+    cluster = fake_cluster(3)
+    start_ts = int(time.time()) + 600
+    stop_ts = start_ts + 300
+    nodes = cluster.get_node_names()
+    results = main.arm_split_watch(nodes, "ab", start_ts, stop_ts, use_ssh=True)
+    assert all(r.ok for r in results)
+    assert len(cluster.get_calls("ssh")) == 3
+    log = f"expected 2\n{start_ts - 10} 0 0\n{start_ts + 0.5} 2 0\n{stop_ts + 0.25} 0 0\n"
+    cluster.put_file("compute-0", convergence.get_log_path(start_ts), log)
+    cluster.put_file("compute-1", convergence.get_log_path(start_ts), f"expected 0\n{start_ts - 10} 0 0\n")
+    conv_results = main.collect_split_watch(nodes, start_ts, stop_ts, use_ssh=True)
+    assert [r.node for r in conv_results] == nodes
+    assert conv_results[0].onset == 0.5
+    assert conv_results[0].teardown == 0.25
+    assert conv_results[1].converged
+    # there is no log on the last node
+    assert conv_results[2].error is not None
+    assert convergence.summarize(conv_results)["converged_nodes"] == 2
+
+
+def test_fake_failure(fake_cluster):
+    """
+    Injected failure of oc debug is reported as CalledProcessError.
+    """
+    fake_cluster(3, failure_rate=1.0)
+    start_dt = datetime.now() + timedelta(minutes=10)
+    with pytest.raises(subprocess.CalledProcessError):
+        main.schedule_split(["compute-0"], "ab", start_dt, 5)
+
+
+def test_fake_retry(fake_cluster):
+    """
+    Failed scheduling is retried on each node, and repeated arming of the
+    same timers is harmless.
+    """
+    cluster = fake_cluster(3, failure_rate=1.0)
+    start_dt = datetime.now() + timedelta(minutes=10)
+    policy = retry.RetryPolicy(attempts=3, base_delay=0.01)
+    with pytest.raises(subprocess.CalledProcessError):
+        main.schedule_split(["compute-0"], "ab", start_dt, 5, retry_policy=policy, rollback=False)
+    assert len(cluster.get_calls("oc", "debug")) == 3
+    cluster.set_failure_rate(0.0)
+    for _ in range(2):
+        results = main.schedule_split(cluster.get_node_names(), "ab", start_dt, 5, retry_policy=policy)
+    assert all(r.ok for r in results)
+    assert len(set(cluster.get_timers("compute-0"))) == 2
+
+
+def test_fake_rollback(fake_cluster):
+    """
+    When scheduling fails on some node, timers armed on the other nodes are
+    stopped again.
+    """
+    cluster = fake_cluster(3)
+    start_dt = datetime.now() + timedelta(minutes=10)
+    bc_start_dt = start_dt + timedelta(minutes=10)
+    main.schedule_split(cluster.get_node_names(), "bc", bc_start_dt, 5, use_ssh=True)
+    policy = retry.RetryPolicy(attempts=1)
+    with pytest.raises(subprocess.CalledProcessError):
+        main.schedule_split(
+            ["compute-0", "compute-1", "compute-99"], "ab", start_dt, 5, use_ssh=True,
+            retry_policy=policy)
+    bc_start_ts = int(bc_start_dt.timestamp())
+    # timers of the previously scheduled split are kept
+    for node in cluster.get_node_names():
+        assert cluster.get_timers(node) == [
+            f"network-split-bc-setup@{bc_start_ts}.timer",
+            f"network-split-teardown@{bc_start_ts + 300}.timer",
+        ]
+
+
+def test_fake_cancel(fake_cluster):
+    """
+    Cancel stops all network split timers on every node.
+    """
+    cluster = fake_cluster(3)
+    start_dt = datetime.now() + timedelta(minutes=10)
+    main.schedule_split(cluster.get_node_names(), "ab", start_dt, 5)
+    main.schedule_split(cluster.get_node_names(), "bc", start_dt + timedelta(minutes=10), 5)
+    cluster.clear_calls()
+    results = main.cancel_split(cluster.get_node_names())
+    assert all(r.ok for r in results)
+    assert len(cluster.get_calls("oc", "debug")) == 3
+    for node in cluster.get_node_names():
+        assert cluster.get_timers(node) == []
+
+
+def test_fake_schedule_split_targets(fake_cluster):
+    """
+    Split is scheduled at the same time on nodes of all targets, and each
+    node result reports it's target.
+    """
+    cluster = fake_cluster(6)
+    nodes = cluster.get_node_names()
+    targets = [
+        target.Target("c1", nodes[:3], kubeconfig="c1.kubeconfig"),
+        target.Target("zones.ini", nodes[3:], use_ssh=True),
+    ]
+    start_dt = datetime.now() + timedelta(minutes=10)
+    results = main.schedule_split_targets(targets, "ab", start_dt, 5)
+    assert [(r.node, r.cluster) for r in results] == (
+        [(node, "c1") for node in nodes[:3]] + [(node, "zones.ini") for node in nodes[3:]])
+    assert len(cluster.get_calls("oc", "debug")) == 3
+    assert len(cluster.get_calls("ssh")) == 3
+    start_ts = int(start_dt.timestamp())
+    for node in nodes:
+        assert cluster.get_timers(node) == [
+            f"network-split-ab-setup@{start_ts}.timer",
+            f"network-split-teardown@{start_ts + 300}.timer",
+        ]
+
+
+def test_fake_schedule_split_targets_rollback(fake_cluster):
+    """
+    When scheduling fails on some target, timers armed on all targets are
+    stopped again.
+    """
+    cluster = fake_cluster(6)
+    nodes = cluster.get_node_names()
+    targets = [
+        target.Target("c1", nodes[:3]),
+        target.Target("c2", nodes[3:] + ["compute-99"], use_ssh=True),
+    ]
+    start_dt = datetime.now() + timedelta(minutes=10)
+    policy = retry.RetryPolicy(attempts=1)
+    with pytest.raises(subprocess.CalledProcessError):
+        main.schedule_split_targets(targets, "ab", start_dt, 5, retry_policy=policy)
+    for node in nodes:
+        assert cluster.get_timers(node) == []
+
+
+def test_fake_schedule_scenario_targets_rollback_parse_error(fake_cluster, monkeypatch):
+    """
+    Unparsable output of a node on some target (reported as ValueError) is
+    handled like any other scheduling failure.
+    """
+    cluster = fake_cluster(6)
+    nodes = cluster.get_node_names()
+    targets = [
+        target.Target("c1", nodes[:3]),
+        target.Target("c2", nodes[3:], use_ssh=True),
+    ]
+    schedule_scenario = main.schedule_scenario
+
+    def fake_schedule_scenario(nodes, *args, **kwargs):
+        if kwargs.get("use_ssh"):
+            raise ValueError("could not convert string to float: ''")
+        return schedule_scenario(nodes, *args, **kwargs)
+
+    monkeypatch.setattr(main, "schedule_scenario", fake_schedule_scenario)
+    start_dt = datetime.now() + timedelta(minutes=10)
+    with pytest.raises(ValueError):
+        main.schedule_split_targets(targets, "ab", start_dt, 5, verify=True)
+    for node in nodes:
+        assert cluster.get_timers(node) == []
+
+
+def test_fake_deploy(fake_cluster):
+    """
+    Files are deployed on all nodes, and only changed files are deployed
+    again in a single session per node.
+    """
+    cluster = fake_cluster(3)
+    nodes = cluster.get_node_names()
+    zone_env = "".join(f'ZONE_{z.upper()}="{n}"\n' for z, n in zip("abc", nodes))
+    files = deploy.get_deploy_files(main.get_networksplit_mc_spec(zone_env, split=True, latency=5))
+    reports = main.deploy_nodes(nodes, files)
+    assert all(r.ok and r.applied for r in reports)
+    assert all(len(r.changed) == len(files) for r in reports)
+    assert len(cluster.get_calls("ssh")) == 2 * 3
+    for node in nodes:
+        assert cluster.get_file(node, "/etc/network-split.env") == zone_env
+    # nothing changed
+    cluster.clear_calls()
+    reports = main.deploy_nodes(nodes, files)
+    assert all(r.ok and not r.applied and r.changed == [] for r in reports)
+    assert len(cluster.get_calls("ssh")) == 3
+    # zone config changed
+    cluster.clear_calls()
+    zone_env = zone_env.replace(nodes[2], "10.0.0.1")
+    files = deploy.get_deploy_files(main.get_networksplit_mc_spec(zone_env, split=True, latency=5))
+    reports = main.deploy_nodes(nodes, files)
+    assert all(r.changed == ["/etc/network-split.env"] for r in reports)
+    assert all(r.applied for r in reports)
+    assert len(cluster.get_calls("ssh")) == 2 * 3
+    assert cluster.get_file(nodes[0], "/etc/network-split.env") == zone_env
+    # zone config larger than max length of a command line argument is
+    # deployed in multiple sessions
+    cluster.clear_calls()
+    x_addrs = " ".join(f"10.{i // 65536}.{i // 256 % 256}.{i % 256}" for i in range(12000))
+    zone_env += f'ZONE_X="{x_addrs}"\n'
+    files = deploy.get_deploy_files(main.get_networksplit_mc_spec(zone_env, split=True, latency=5))
+    reports = main.deploy_nodes(nodes, files)
+    assert all(r.ok and r.applied for r in reports)
+    assert len(cluster.get_calls("ssh")) > 2 * 3
+    assert cluster.get_file(nodes[0], "/etc/network-split.env") == zone_env
+
+
+def test_fake_run_node_cmds(fake_cluster):
+    """
+    Multiple commands are executed on each node in a single session.
+    """
+    cluster = fake_cluster(3)
+    cluster.set_clock_offset("compute-1", 30)
+    cmd_lists = [["date", "+%s.%N"], ["cat", "/etc/missing"], ["uname"]]
+    results = main.run_node_cmds_all(cmd_lists, cluster.get_node_names())
+    assert len(cluster.get_calls("oc", "debug")) == 3
+    for node_status, cmd_results in results:
+        assert node_status.ok
+        assert [r.returncode for r in cmd_results] == [0, 1, 0]
+        assert "No such file" in cmd_results[1].output
+    assert 25 < float(results[1][1][0].output) - float(results[0][1][0].output) < 35
+
+
+def test_fake_schedule_split_verify(fake_cluster):
+    """
+    With verification, timers are listed and clock is checked in the same
+    session which schedules the split.
+    """
+    cluster = fake_cluster(3)
+    cluster.set_clock_offset("compute-2", -20)
+    start_dt = datetime.now() + timedelta(minutes=10)
+    start_ts = int(start_dt.timestamp())
+    results = main.schedule_split(cluster.get_node_names(), "ab", start_dt, 5, verify=True)
+    assert len(cluster.get_calls("oc", "debug")) == 3
+    for result in results:
+        assert [t.unit for t in result.armed_timers] == [
+            f"network-split-ab-setup@{start_ts}.timer",
+            f"network-split-teardown@{start_ts + 300}.timer",
+        ]
+    assert abs(results[0].clock_offset) < 5
+    assert -25 < results[2].clock_offset < -15
+
+
+def test_fake_doctor(fake_cluster):
+    """
+    Pre-flight checks of all nodes run in a single session per node, and
+    report a node with wrong clock and missing tools.
+    """
+    cluster = fake_cluster(3)
+    zc = main.get_zone_config("arbiter", "data-1", "data-2")
+    for node in cluster.get_node_names():
+        cluster.put_file(node, "/etc/network-split.env", zc.get_env_file())
+    cluster.set_clock_offset("compute-1", 60)
+    cluster.remove_tool("compute-2", "tc")
+    cluster.clear_calls()
+    reports = main.run_doctor(cluster.get_node_names())
+    assert len(cluster.get_calls("oc", "debug")) == 3
+    assert [r.detected_zone for r in reports] == ["a", "b", "c"]
+    assert reports[0].ok(latency=True)
+    assert reports[1].ok()
+    assert reports[1].clock_offset > 50
+    assert reports[2].failed_checks(latency=True) == ["tc"]
+    summary = doctor.summarize(reports, 9.0, latency=True)
+    assert summary["ntp_skew"] == 60
+    assert not summary["clock_ok"]
+    assert summary["failed_nodes"] == ["compute-2"]
+
+
+def test_fake_main_doctor(fake_cluster, monkeypatch, tmp_path, capsys):
+    """
+    Pre-flight checks of the cluster given via kubeconfig are recorded in the
+    history.
+    """
+    cluster = fake_cluster(3)
+    hist_path = str(tmp_path / "history.sqlite")
+    monkeypatch.setattr(
+        sys, "argv", ["ocp-network-split-doctor", "--kubeconfig", "c1.kubeconfig", "--history", hist_path])
+    main.main_doctor()
+    assert "result:" in capsys.readouterr().out
+    assert all(call["args"][:2] == ["--kubeconfig", "c1.kubeconfig"] for call in cluster.get_calls("oc"))
+    hist = history.History(hist_path)
+    runs = hist.get_runs()
+    hist.close()
+    assert [(r["command"], r["nodes"]) for r in runs] == [("preflight", 3)]
+    assert runs[0]["params"]["targets"] == ["c1.kubeconfig"]
+
+
+def test_fake_throttling(fake_cluster):
+    """
+    Throttling of oc debug calls decreases concurrency of node commands.
+    """
+    cluster = fake_cluster(20, latency_profile="lan", time_scale=0.1, max_debug_pods=2)
+    node_limiter = limiter.AimdLimiter(initial=8, maximum=8)
+    results = main.run_node_cmd_all(["uname"], cluster.get_node_names(), node_limiter=node_limiter)
+    throttled = [c for c in cluster.get_calls("oc", "debug") if c["throttled"]]
+    assert len(throttled) > 0
+    assert node_limiter.decreases > 0
+    assert node_limiter.limit < 8
+    errors = [node_status.error for node_status, stdout in results if stdout is None]
+    assert len(errors) == len(throttled)
+
+
+def test_fake_latency(fake_cluster):
+    """
+    Latency of fake calls is injected according to latency profile.
+    """
+    cluster = fake_cluster(3, latency_profile="lan")
+    ocp.list_cluster_nodes()
+    call = cluster.get_calls("oc", "get")[0]
+    assert 0.08 <= call["delay"] <= 0.12
+    assert call["duration"] >= call["delay"]
+
+
+def report_flow(bench_report, cluster, name, node_num, wall_time, time_scale):
+    calls = cluster.get_calls()
+    bench_report(
+        name,
+        nodes=node_num,
+        wall_s=round(wall_time, 2),
+        calls=len(calls),
+        oc_get=len([c for c in calls if c["verb"] == "get"]),
+        oc_debug=len([c for c in calls if c["verb"] == "debug"]),
+        # sum of unscaled latency of all calls made by the flow
+        profile_s=round(sum(c["delay"] for c in calls) / time_scale, 1))
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("node_num", (10, 100, 1000))
+def test_benchmark_fake_setup(fake_cluster, bench_report, node_num):
+    """
+    Measure setup flow: zone config and MachineConfig spec generation.
+    """
+    time_scale = 0.01
+    cluster = fake_cluster(node_num, latency_profile="lan", time_scale=time_scale)
+    start = time.perf_counter()
+    zc = main.get_zone_config("arbiter", "data-1", "data-2")
+    main.get_networksplit_mc_spec(zc.get_env_file(), split=True)
+    wall_time = time.perf_counter() - start
+    report_flow(bench_report, cluster, "fake setup", node_num, wall_time, time_scale)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("node_num", (10, 100, 1000))
+def test_benchmark_fake_sched(fake_cluster, bench_report, node_num, capsys):
+    """
+    Measure sched flow: scheduling of a split and check of it's timers.
+    """
+    time_scale = 0.01
+    cluster = fake_cluster(node_num, latency_profile="lan", time_scale=time_scale)
+    start = time.perf_counter()
+    nodes = ocp.list_cluster_nodes()
+    main.schedule_split(nodes, "ab", datetime.now() + timedelta(minutes=30), 5)
+    main.check_split(nodes, "ab")
+    wall_time = time.perf_counter() - start
+    capsys.readouterr()
+    report_flow(bench_report, cluster, "fake sched", node_num, wall_time, time_scale)
@@ -0,0 +1,110 @@
+# -*- coding: utf8 -*-
+
+import pytest
+
+from ocpnetsplit import history
+
+
+def node(name, duration, cluster=None, error=None, **kwargs):
+    return dict(node=name, zone="a", cluster=cluster, duration=duration, clock_offset=0.1, error=error, **kwargs)
+
+
+@pytest.fixture
+def hist():
+    hist = history.History(":memory:")
+    yield hist
+    hist.close()
+
+
+def test_get_default_path(monkeypatch):
+    monkeypatch.setenv(history.HISTORY_ENV, "/tmp/history.sqlite")
+    assert history.get_default_path() == "/tmp/history.sqlite"
+    monkeypatch.delenv(history.HISTORY_ENV)
+    monkeypatch.setenv("XDG_DATA_HOME", "/data")
+    assert history.get_default_path() == "/data/ocp-network-split/history.sqlite"
+
+
+def test_record_runs(tmp_path):
+    """
+    Runs are persisted, and listed from the most recent one.
+    """
+    path = str(tmp_path / "sub" / "history.sqlite")
+    hist = history.History(path)
+    hist.record("schedule", 100, 105, {"split_len": 15}, split="ab", nodes=[node("n0", 1.0), node("n1", 2.0)])
+    hist.record("cancel", 200, 201, {}, nodes=[node("n0", 0.5, error="timeout")])
+    hist.close()
+    hist = history.History(path)
+    runs = hist.get_runs()
+    assert [r["command"] for r in runs] == ["cancel", "schedule"]
+    assert not runs[0]["ok"]
+    assert runs[0]["failed_nodes"] == 1
+    assert runs[1] == {
+        "id": 1,
+        "command": "schedule",
+        "started": 100,
+        "duration": 5,
+        "split": "ab",
+        "params": {"split_len": 15},
+        "ok": True,
+        "nodes": 2,
+        "failed_nodes": 0,
+    }
+    assert hist.get_runs("schedule", last=1) == runs[1:]
+    hist.close()
+
+
+def test_record_ok(hist):
+    # preflight reports specify ok explicitly
+    hist.record("preflight", 0, 1, {}, nodes=[node("n0", None, ok=False)])
+    # failed scheduling doesn't report any node
+    hist.record("schedule", 2, 3, {}, ok=False)
+    assert [r["ok"] for r in hist.get_runs()] == [False, False]
+
+
+def test_record_convergence(hist):
+    """
+    Convergence of nodes is merged with results of scheduling.
+    """
+    conv = [
+        {"node": "n0", "cluster": None, "onset": 10.5, "teardown": 70.0, "converged": True, "error": None},
+        {"node": "n1", "cluster": None, "onset": None, "teardown": None, "converged": False, "error": None},
+    ]
+    probes = [{"probe": "tcp:db:5432", "time_to_detect": 1.5, "time_to_recover": 2.0, "availability_during": 0.0}]
+    hist.record("schedule", 0, 80, {}, nodes=[node("n0", 1.0), node("n1", 1.0)], convergence=conv, probes=probes)
+    run = hist.get_runs()[0]
+    assert run["nodes"] == 2
+    assert run["failed_nodes"] == 1
+    assert not run["ok"]
+
+
+def test_summarize(hist):
+    """
+    Dispatch latency and onset skew is summarized for each cluster, change
+    of dispatch latency compares recent runs with older ones.
+    """
+    for i in range(4):
+        # dispatch latency of c1 doubles in the 2 recent runs
+        duration = 1.0 if i < 2 else 2.0
+        nodes = [node(f"n{j}", duration * (j + 1), cluster="c1") for j in range(2)]
+        nodes.append(node("m0", 3.0, error="failed" if i == 0 else None))
+        conv = [{"node": "n0", "cluster": "c1", "onset": 10.0}, {"node": "n1", "cluster": "c1", "onset": 10.5}]
+        hist.record("schedule", i, i + 1, {}, nodes=nodes, convergence=conv)
+    hist.record("cancel", 10, 11, {}, nodes=[node("n0", 10.0, cluster="c1")])
+    summary = hist.summarize()
+    assert [c["cluster"] for c in summary] == ["c1", "default"]
+    c1, default = summary
+    assert c1["runs"] == 4
+    assert c1["nodes"] == 8
+    assert c1["failure_rate"] == 0
+    assert c1["dispatch_p50"] == 2.0
+    assert c1["dispatch_p95"] == 4.0
+    assert c1["dispatch_p95_change"] == 2.0
+    assert c1["onset_skew_p95"] == 0.5
+    assert default["failure_rate"] == 0.25
+    assert default["dispatch_p95_change"] == 1.0
+    assert default["onset_skew_p95"] is None
+    # only the last 2 runs, which are both recent
+    c1 = hist.summarize(last=2)[0]
+    assert c1["runs"] == 2
+    assert c1["dispatch_p95_change"] == 1.0
+    assert hist.summarize("status") == []
@@ -0,0 +1,105 @@
+# -*- coding: utf8 -*-
+
+import subprocess
+import threading
+import time
+
+import pytest
+
+from ocpnetsplit import limiter
+
+
+def test_is_congestion():
+    assert limiter.is_congestion(subprocess.TimeoutExpired(["oc"], 600))
+    throttled = subprocess.CalledProcessError(
+        1, ["oc"], stderr=b"Error from server (TooManyRequests): the server has received too many requests")
+    assert limiter.is_congestion(throttled)
+    failed = subprocess.CalledProcessError(1, ["oc"], stderr=b"error: command terminated with exit code 1")
+    assert not limiter.is_congestion(failed)
+    assert not limiter.is_congestion(subprocess.CalledProcessError(1, ["oc"]))
+
+
+def test_limiter_increase():
+    lim = limiter.AimdLimiter(initial=2, maximum=4)
+    for _ in range(5):
+        token = lim.acquire()
+        lim.release(None, token)
+    assert lim.limit == 4
+
+
+def test_limiter_decrease():
+    lim = limiter.AimdLimiter(initial=8, maximum=8)
+    tokens = [lim.acquire() for _ in range(3)]
+    lim.release(None, tokens[0], success=False, congestion=True)
+    assert lim.limit == 4
+    # congestion of operations started with the old window is ignored
+    lim.release(None, tokens[1], success=False, congestion=True)
+    assert lim.limit == 4
+    # failure which is not caused by congestion doesn't change the window
+    lim.release(None, tokens[2], success=False)
+    assert lim.limit == 4
+    assert lim.decreases == 1
+    # after congestion, the window grows by about one per window of operations
+    for _ in range(4):
+        lim.release(None, lim.acquire())
+    assert lim.limit == 4
+    lim.release(None, lim.acquire())
+    assert lim.limit == 5
+
+
+def test_limiter_minimum():
+    lim = limiter.AimdLimiter(initial=2, minimum=1)
+    for _ in range(3):
+        lim.release(None, lim.acquire(), success=False, congestion=True)
+    assert lim.limit == 1
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"minimum": 0},
+    {"minimum": 5, "maximum": 4},
+    {"decrease": 1.0},
+    {"zone_limit": 0},
+])
+def test_limiter_invalid(kwargs):
+    with pytest.raises(ValueError):
+        limiter.AimdLimiter(**kwargs)
+
+
+def test_limiter_slot():
+    lim = limiter.AimdLimiter(initial=4)
+    with pytest.raises(subprocess.TimeoutExpired):
+        with lim.slot("a"):
+            raise subprocess.TimeoutExpired(["oc"], 1)
+    assert lim.limit == 2
+    with lim.slot("a"):
+        pass
+    assert lim.limit == 2
+    assert lim.max_in_flight == 1
+
+
+def test_limiter_concurrency():
+    """
+    Number of operations running at the same time doesn't exceed the window
+    nor the zone limit.
+    """
+    lim = limiter.AimdLimiter(initial=3, maximum=3, zone_limit=2)
+    lock = threading.Lock()
+    running = {"a": 0, "b": 0}
+    max_running = {"a": 0, "b": 0}
+
+    def run(zone):
+        with lim.slot(zone):
+            with lock:
+                running[zone] += 1
+                max_running[zone] = max(max_running[zone], running[zone])
+            time.sleep(0.01)
+            with lock:
+                running[zone] -= 1
+
+    threads = [threading.Thread(target=run, args=("ab"[i % 2],)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert lim.max_in_flight == 3
+    assert max_running == {"a": 2, "b": 2}
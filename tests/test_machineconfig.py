@@ -113,6 +113,23 @@ def test_create_zone_mc_dict_content():
     assert "systemd" not in mcd["spec"]["config"]
 
 
+def test_create_zone_mc_dict_datapath_tc():
+    mcd = machineconfig.create_zone_mc_dict("worker", 'ZONE_A="198.51.100.27"\n', datapath="tc")
+    files = {f["path"]: f for f in mcd["spec"]["config"]["storage"]["files"]}
+    assert sorted(files) == [
+        "/etc/network-split-datapath.env",
+        "/etc/network-split.env",
+        "/etc/network-zone-tc.sh",
+        "/etc/network-zone.sh",
+    ]
+    assert files["/etc/network-zone-tc.sh"]["mode"] == 0o544
+
+
+def test_create_zone_mc_dict_datapath_invalid():
+    with pytest.raises(ValueError):
+        machineconfig.create_zone_mc_dict("worker", 'ZONE_A="198.51.100.27"\n', datapath="ebpf")
+
+
 def test_create_split_mc_dict_content():
     """
     Create production like machineconfig dictionary and check the resulting
@@ -165,3 +182,15 @@ def test_create_latency_mc_dict_content_latspec():
     # check that the latency command line was expanded correctly
     unit_content = mcd["spec"]["config"]["systemd"]["units"][0]["contents"]
     assert "network-latency.sh -l ab=50 -l ac=70 10" in unit_content
+
+
+def test_copy_mc_dict():
+    mcd = machineconfig.create_split_mc_dict("master")
+    mcd_copy = machineconfig.copy_mc_dict(mcd, "worker")
+    assert mcd_copy == machineconfig.create_split_mc_dict("worker")
+    # the original is not changed, and the copy could be modified
+    assert mcd["metadata"]["name"] == "99-master-network-split"
+    mcd_copy["spec"]["config"]["storage"]["files"][0]["mode"] = 0o500
+    assert mcd["spec"]["config"]["storage"]["files"][0]["mode"] == 0o544
+    # skeletons are parsed only once, but each new dict is independent
+    assert machineconfig.get_new_mc("worker", "foo") is not machineconfig.get_new_mc("worker", "foo")
@@ -0,0 +1,523 @@
+# -*- coding: utf8 -*-
+
+"""
+Tests and data path benchmarks of node scripts running in a local cluster
+emulated via network namespaces, see ``netnscluster`` module.
+"""
+
+
+import os
+import statistics
+import time
+
+import pytest
+
+from netnscluster import NetnsCluster, missing_requirements
+from ocpnetsplit import zone
+
+
+CLUSTER_SIZES = (10, 50, 100, 500)
+
+
+def zone_sizes(node_num):
+    """
+    Split given number of nodes into zones, with small arbiter zone ``a``.
+    """
+    arbiter_num = max(1, node_num // 10)
+    data_num = node_num - arbiter_num
+    return {"a": arbiter_num, "b": data_num // 2, "c": data_num - data_num // 2}
+
+
+def skip_if_missing(split=False, latency=False, datapath="iptables"):
+    missing = missing_requirements(split=split, latency=latency, datapath=datapath)
+    if missing is not None:
+        pytest.skip(missing)
+
+
+@pytest.fixture
+def small_cluster():
+    skip_if_missing()
+    with NetnsCluster({"a": 1, "b": 2, "c": 2}) as cluster:
+        yield cluster
+
+
+@pytest.fixture
+def tc_cluster():
+    skip_if_missing()
+    with NetnsCluster({"a": 1, "b": 2, "c": 2}, datapath="tc") as cluster:
+        yield cluster
+
+
+def test_netns_cluster_connectivity(small_cluster):
+    """
+    All nodes of the emulated cluster can reach each other.
+    """
+    node_a = small_cluster.get_nodes("a")[0]
+    for node in small_cluster.get_nodes():
+        if node is node_a:
+            continue
+        assert len(small_cluster.measure_rtt(node_a, node, count=3)) == 3
+
+
+def test_netns_cluster_zone_detection(small_cluster):
+    """
+    Zone detection script reports the zone node was placed in.
+    """
+    for node in small_cluster.get_nodes():
+        comp_proc = small_cluster.run_script(node, "network-zone.sh", [])
+        assert comp_proc.stdout.decode().strip() == "ZONE_" + node.zone.upper()
+
+
+def test_netns_split_ab(small_cluster):
+    """
+    Split ab blocks traffic between zones a and b only, teardown restores it.
+    """
+    skip_if_missing(split=True)
+    node_a = small_cluster.get_nodes("a")[0]
+    node_b = small_cluster.get_nodes("b")[0]
+    node_c = small_cluster.get_nodes("c")[0]
+    small_cluster.run_script_all("network-split.sh", ["setup", "ab"])
+    assert small_cluster.measure_rtt(node_a, node_b, count=3, timeout=0.2) == []
+    assert len(small_cluster.measure_rtt(node_a, node_c, count=3)) == 3
+    assert len(small_cluster.measure_rtt(node_b, node_c, count=3)) == 3
+    small_cluster.run_script_all("network-split.sh", ["teardown", "ab"])
+    assert len(small_cluster.measure_rtt(node_a, node_b, count=3)) == 3
+    assert small_cluster.count_drop_rules(node_a) == 0
+
+
+def test_netns_split_update_debug(small_cluster):
+    """
+    Update of active split in debug mode changes rules only for the changed
+    addresses of the blocked zone, using zone config of the controller.
+    """
+    node_a = small_cluster.get_nodes("a")[0]
+    node_b = small_cluster.get_nodes("b")[0]
+    new_addr = "10.213.250.1"
+    with open(os.path.join(node_a.etc_dir, "network-split-controller.env"), "w") as env_file:
+        env_file.write(f"ZONE_B=\"{node_b.addr} {new_addr}\"\n")
+    cmd = ["-d", "update", "ab", f"b+={new_addr}", f"c+={new_addr}"]
+    out_lines = small_cluster.run_script(node_a, "network-split.sh", cmd).stdout.decode().splitlines()
+    assert f"iptables -A INPUT -s {new_addr} -j DROP -v" in out_lines
+    assert f"iptables -A OUTPUT -d {new_addr} -j DROP -v" in out_lines
+    assert len([line for line in out_lines if line.startswith("iptables")]) == 2
+    # nodes of zone b are not affected by split ab
+    out = small_cluster.run_script(node_b, "network-split.sh", cmd).stdout.decode()
+    assert "iptables" not in out
+
+
+def test_netns_split_arbitrary_debug(small_cluster):
+    """
+    Split which is not predefined is handled by the split script as well.
+    """
+    node_a = small_cluster.get_nodes("a")[0]
+    node_c = small_cluster.get_nodes("c")[0]
+    out = small_cluster.run_script(node_a, "network-split.sh", ["-d", "setup", "ac-bx"]).stdout.decode()
+    rules = [line for line in out.splitlines() if line.startswith("iptables")]
+    assert len(rules) == 2 * len(small_cluster.get_nodes("c"))
+    assert f"iptables -A INPUT -s {node_c.addr} -j DROP -v" in rules
+    script_path = os.path.join(node_a.etc_dir, "network-split.sh")
+    comp_proc = small_cluster.run(node_a, ["bash", script_path, "-d", "setup", "a1"], check=False)
+    assert comp_proc.returncode == 1
+    assert "Invalid split-config" in comp_proc.stderr.decode()
+
+
+@pytest.mark.parametrize("split_config, match", [
+    ("ab:loss30", "-m statistic --mode random --probability 0.30"),
+    ("ab:tcp2379.2380", "-p tcp -m multiport --ports 2379,2380"),
+    ("ab:icmp", "-p icmp"),
+])
+def test_netns_split_partial_debug(small_cluster, split_config, match):
+    """
+    Partial split options add matches to each split rule.
+    """
+    node_a = small_cluster.get_nodes("a")[0]
+    node_b = small_cluster.get_nodes("b")[0]
+    out = small_cluster.run_script(node_a, "network-split.sh", ["-d", "setup", split_config]).stdout.decode()
+    rules = [line for line in out.splitlines() if line.startswith("iptables")]
+    assert len(rules) == 2 * len(small_cluster.get_nodes("b"))
+    assert f"iptables -A INPUT -s {node_b.addr} {match} -j DROP -v" in rules
+
+
+def test_netns_split_flap_debug(small_cluster):
+    """
+    Flapping is reported, but not started in debug mode.
+    """
+    node_a = small_cluster.get_nodes("a")[0]
+    out = small_cluster.run_script(node_a, "network-split.sh", ["-d", "setup", "ab:flap5"]).stdout.decode()
+    assert "links will flap every 5 seconds" in out
+    assert not os.path.exists(os.path.join(node_a.etc_dir, "network-split-flap-ab:flap5.pid"))
+
+
+def test_netns_split_flap(small_cluster):
+    """
+    Flapping split periodically restores connectivity, and teardown stops
+    the flapping.
+    """
+    skip_if_missing(split=True)
+    node_a = small_cluster.get_nodes("a")[0]
+    small_cluster.run_script(node_a, "network-split.sh", ["setup", "ab:flap1"])
+    assert small_cluster.count_drop_rules(node_a) == 2 * len(small_cluster.get_nodes("b"))
+    assert os.path.exists(os.path.join(node_a.etc_dir, "network-split-flap-ab:flap1.pid"))
+    small_cluster.run_script(node_a, "network-split.sh", ["teardown", "ab:flap1"])
+    assert small_cluster.count_drop_rules(node_a) == 0
+    assert not os.path.exists(os.path.join(node_a.etc_dir, "network-split-flap-ab:flap1.pid"))
+
+
+@pytest.mark.parametrize("split_config, ports", [
+    ("ab:keep", "22,6443,10250"),
+    ("ab:tcp2379:keep22", "22"),
+])
+def test_netns_split_keep_debug(small_cluster, split_config, ports):
+    """
+    Kept ports are accepted before the drop rules are evaluated, and the
+    accept rules are removed after the drop rules.
+    """
+    node_a = small_cluster.get_nodes("a")[0]
+    node_b = small_cluster.get_nodes("b")[0]
+    keep_rule = f"iptables -A INPUT -s {node_b.addr} -p tcp -m multiport --ports {ports} -j ACCEPT -v"
+    out = small_cluster.run_script(node_a, "network-split.sh", ["-d", "setup", split_config]).stdout.decode()
+    rules = [line for line in out.splitlines() if line.startswith("iptables")]
+    assert len(rules) == 4 * len(small_cluster.get_nodes("b"))
+    drop_rules = [r for r in rules if r.startswith(f"iptables -A INPUT -s {node_b.addr} ") and r.endswith("DROP -v")]
+    assert rules.index(keep_rule) < rules.index(drop_rules[0])
+    out = small_cluster.run_script(node_a, "network-split.sh", ["-d", "teardown", split_config]).stdout.decode()
+    rules = [line for line in out.splitlines() if line.startswith("iptables")]
+    assert rules.index(keep_rule.replace("-A", "-D", 1)) > rules.index(drop_rules[0].replace("-A", "-D", 1))
+
+
+def test_netns_split_keep(small_cluster):
+    """
+    Teardown of a split with kept ports removes the accept rules as well.
+    """
+    skip_if_missing(split=True)
+    node_a = small_cluster.get_nodes("a")[0]
+    small_cluster.run_script(node_a, "network-split.sh", ["setup", "ab:keep"])
+    assert small_cluster.count_drop_rules(node_a) == 2 * len(small_cluster.get_nodes("b"))
+    out = small_cluster.run(node_a, ["iptables", "-S"]).stdout.decode()
+    assert out.count("-j ACCEPT") == 2 * len(small_cluster.get_nodes("b"))
+    small_cluster.run_script(node_a, "network-split.sh", ["teardown", "ab:keep"])
+    out = small_cluster.run(node_a, ["iptables", "-S"]).stdout.decode()
+    assert "-j ACCEPT" not in out
+    assert small_cluster.count_drop_rules(node_a) == 0
+
+
+def test_netns_tc_split_debug(tc_cluster):
+    """
+    With tc datapath, split adds lookup tables with addresses of all nodes
+    and a single drop verdict of the blocked zone in each direction.
+    """
+    node_a = tc_cluster.get_nodes("a")[0]
+    node_b = tc_cluster.get_nodes("b")[0]
+    out = tc_cluster.run_script(node_a, "network-split.sh", ["-d", "setup", "ab:flap5"]).stdout.decode()
+    cmds = [line for line in out.splitlines() if line.startswith("tc ")]
+    assert cmds[0] == "tc qdisc add dev eth0 clsact"
+    bucket = "%x" % int(node_b.addr.split(".")[-1])
+    lookup = (
+        f"tc filter add dev eth0 ingress prio 1 protocol ip u32 ht 100:{bucket}: "
+        f"match ip src {node_b.addr}/32 link 11:")
+    assert lookup in cmds
+    assert len([c for c in cmds if " ht 100:" in c]) == 2 * len(tc_cluster.get_nodes())
+    assert [c for c in cmds if "action drop" in c] == [
+        "tc filter add dev eth0 ingress prio 1 protocol ip handle 11::1 u32 ht 11: match u32 0 0 action drop",
+        "tc filter add dev eth0 egress prio 1 protocol ip handle 11::1 u32 ht 11: match u32 0 0 action drop",
+    ]
+    # nodes of zone b are not affected by split ab
+    out = tc_cluster.run_script(node_b, "network-split.sh", ["-d", "setup", "ab"]).stdout.decode()
+    assert "action drop" not in out
+    out = tc_cluster.run_script(node_a, "network-split.sh", ["-d", "teardown", "ab"]).stdout.decode()
+    assert out.splitlines()[-1] == "tc qdisc del dev eth0 clsact"
+    # partial splits are not supported
+    script_path = os.path.join(node_a.etc_dir, "network-split.sh")
+    comp_proc = tc_cluster.run(node_a, ["bash", script_path, "-d", "setup", "ab:tcp"], check=False)
+    assert comp_proc.returncode == 1
+
+
+def test_netns_tc_split(tc_cluster):
+    """
+    Split via tc datapath blocks traffic between zones a and b only, and
+    zone membership changes are applied to the lookup tables.
+    """
+    skip_if_missing(split=True, datapath="tc")
+    node_a = tc_cluster.get_nodes("a")[0]
+    node_b1, node_b2 = tc_cluster.get_nodes("b")
+    node_c = tc_cluster.get_nodes("c")[0]
+    tc_cluster.run_script_all("network-split.sh", ["setup", "ab"])
+    assert tc_cluster.measure_rtt(node_a, node_b1, count=3, timeout=0.2) == []
+    assert len(tc_cluster.measure_rtt(node_a, node_c, count=3)) == 3
+    # node b2 leaves zone b
+    tc_cluster.run_script(node_a, "network-split.sh", ["update", "ab", f"b-={node_b2.addr}"])
+    assert len(tc_cluster.measure_rtt(node_a, node_b2, count=3)) == 3
+    tc_cluster.run_script_all("network-split.sh", ["teardown", "ab"])
+    assert len(tc_cluster.measure_rtt(node_a, node_b1, count=3)) == 3
+    out = tc_cluster.run(node_a, ["tc", "qdisc", "show", "dev", "eth0"]).stdout.decode()
+    assert "clsact" not in out
+
+
+def test_netns_tc_lookup_update_new_zone(tc_cluster):
+    """
+    Update of the lookup table creates table of a zone which had no address
+    during setup, only once.
+    """
+    node_a = tc_cluster.get_nodes("a")[0]
+    if tc_cluster.run(node_a, ["tc", "qdisc", "add", "dev", "eth0", "clsact"], check=False).returncode != 0:
+        pytest.skip("clsact qdisc is not available")
+    script_path = os.path.join(node_a.etc_dir, "network-zone-tc.sh")
+
+    def run_tc(args):
+        tc_cluster.run(node_a, ["bash", "-c", f"bash {script_path} {' '.join(args)} | tc -batch -"])
+
+    run_tc(["setup", "eth0", "ingress", "src"])
+    run_tc(["update", "eth0", "ingress", "src", "d+=10.213.250.1"])
+    run_tc(["update", "eth0", "ingress", "src", "d+=10.213.250.2", "b+=10.213.250.3"])
+    out = tc_cluster.run(node_a, ["tc", "filter", "show", "dev", "eth0", "ingress"]).stdout.decode()
+    assert out.count("fh 13: ht divisor 1") == 1
+    assert out.count("link 13:") == 2
+    # the other zone tables were not created again
+    assert out.count("fh 11: ht divisor 1") == 1
+
+
+def test_netns_tc_split_update_new_zone(tc_cluster):
+    """
+    Zone membership update of an active split via tc datapath works for a
+    zone which had no nodes when the split started.
+    """
+    skip_if_missing(split=True, datapath="tc")
+    node_a = tc_cluster.get_nodes("a")[0]
+    node_b = tc_cluster.get_nodes("b")[0]
+    new_addr = "10.213.250.1"
+    tc_cluster.run_script_all("network-split.sh", ["setup", "ab"])
+    with open(os.path.join(node_a.etc_dir, "network-split-controller.env"), "w") as env_file:
+        env_file.write(f"ZONE_D=\"{new_addr}\"\n")
+    tc_cluster.run_script(node_a, "network-split.sh", ["update", "ab", f"d+={new_addr}"])
+    out = tc_cluster.run(node_a, ["tc", "filter", "show", "dev", "eth0", "egress"]).stdout.decode()
+    assert "fh 13: ht divisor 1" in out
+    assert tc_cluster.measure_rtt(node_a, node_b, count=3, timeout=0.2) == []
+    tc_cluster.run_script_all("network-split.sh", ["teardown", "ab"])
+
+
+def test_netns_tc_split_teardown_shared(tc_cluster):
+    """
+    Teardown of one split via tc datapath keeps other active splits in place,
+    the lookup tables are removed with the last split only.
+    """
+    skip_if_missing(split=True, datapath="tc")
+    node_a = tc_cluster.get_nodes("a")[0]
+    node_b = tc_cluster.get_nodes("b")[0]
+    node_c = tc_cluster.get_nodes("c")[0]
+    tc_cluster.run_script_all("network-split.sh", ["setup", "ab"])
+    tc_cluster.run_script_all("network-split.sh", ["setup", "ac"])
+    tc_cluster.run_script_all("network-split.sh", ["teardown", "ab"])
+    assert len(tc_cluster.measure_rtt(node_a, node_b, count=3)) == 3
+    assert tc_cluster.measure_rtt(node_a, node_c, count=3, timeout=0.2) == []
+    tc_cluster.run_script_all("network-split.sh", ["teardown", "ac"])
+    assert len(tc_cluster.measure_rtt(node_a, node_c, count=3)) == 3
+    out = tc_cluster.run(node_a, ["tc", "qdisc", "show", "dev", "eth0"]).stdout.decode()
+    assert "clsact" not in out
+
+
+def test_netns_tc_latency_debug(tc_cluster):
+    """
+    With tc datapath, latency uses a single classifier of each remote zone.
+    """
+    node_a = tc_cluster.get_nodes("a")[0]
+    out = tc_cluster.run_script(node_a, "network-latency.sh", ["-d", "-l", "ab=30", "10"]).stdout.decode()
+    cmds = [line for line in out.splitlines() if line.startswith("tc filter")]
+    assert len([c for c in cmds if " ht 100:" in c]) == len(tc_cluster.get_nodes())
+    assert [c for c in cmds if "flowid" in c] == [
+        "tc filter add dev eth0 parent 1: prio 1 protocol ip handle 11::1 u32 ht 11: match u32 0 0 flowid 1:5",
+        "tc filter add dev eth0 parent 1: prio 1 protocol ip handle 12::1 u32 ht 12: match u32 0 0 flowid 1:4",
+    ]
+
+
+def test_netns_latency_reapply_debug(small_cluster):
+    """
+    Reapply of latency uses qdiscs of the current zone of the node, not the
+    ones allocated in the zone where the latency was set up.
+    """
+    node_a = small_cluster.get_nodes("a")[0]
+    node_b = small_cluster.get_nodes("b")[0]
+    out = small_cluster.run_script(node_b, "network-latency.sh", ["-d", "reapply"]).stdout.decode()
+    assert "nothing to reapply" in out
+    # state of latency "-l ab=30 -l ac=40 10" set up in zone a
+    with open(os.path.join(node_b.etc_dir, "network-latency.state"), "w") as state_file:
+        state_file.write(
+            'declare -- latency="10"\n'
+            'declare -A latspec=([AB]="30" [AC]="40" )\n'
+            'declare -A qdisc_handles=([30]="5" [40]="6" )\n'
+            'declare -- profile=""\n'
+            'declare -- current_zone="ZONE_A"\n')
+    out = small_cluster.run_script(node_b, "network-latency.sh", ["-d", "reapply"]).stdout.decode()
+    assert "tc qdisc add dev eth0 root handle 1: prio bands 5" in out
+    assert "parent 1:6" not in out
+    assert f"match ip dst {node_a.addr}/32 flowid 1:5" in out
+
+
+@pytest.fixture
+def five_zone_cluster():
+    skip_if_missing()
+    with NetnsCluster({"a": 1, "b": 1, "c": 1, "d": 2, "e": 2}) as cluster:
+        yield cluster
+
+
+def test_netns_more_zones_debug(five_zone_cluster):
+    """
+    Zones beyond a, b and c are detected, split and get latency.
+    """
+    node_d = five_zone_cluster.get_nodes("d")[0]
+    node_e1, node_e2 = five_zone_cluster.get_nodes("e")
+    comp_proc = five_zone_cluster.run_script(node_e1, "network-zone.sh", [])
+    assert comp_proc.stdout.decode().strip() == "ZONE_E"
+    out = five_zone_cluster.run_script(node_d, "network-split.sh", ["-d", "setup", "ad-de"]).stdout.decode()
+    # node of zone d blocks nodes of zone e only, split ad affects zone a
+    rules = [line for line in out.splitlines() if line.startswith("iptables")]
+    assert len(rules) == 2 * len(five_zone_cluster.get_nodes("e"))
+    assert f"iptables -A OUTPUT -d {node_e2.addr} -j DROP -v" in rules
+
+
+@pytest.fixture
+def yz_cluster():
+    skip_if_missing()
+    with NetnsCluster({"a": 1, "b": 1, "c": 1, "y": 1, "z": 1, "x": 1}) as cluster:
+        yield cluster
+
+
+@pytest.mark.parametrize("split_config, zone_name", [
+    ("yx", "y"),
+    ("xy", "y"),
+    ("zx", "z"),
+    ("xz", "z"),
+])
+def test_netns_split_external_last_debug(yz_cluster, split_config, zone_name):
+    """
+    Split between zone y or z and external zone x blocks zone x on nodes of
+    the cluster zone, no matter the order of zones in the split config.
+    """
+    node = yz_cluster.get_nodes(zone_name)[0]
+    node_x = yz_cluster.get_nodes("x")[0]
+    out = yz_cluster.run_script(node, "network-split.sh", ["-d", "setup", split_config]).stdout.decode()
+    rules = [line for line in out.splitlines() if line.startswith("iptables")]
+    assert rules == [
+        f"iptables -A INPUT -s {node_x.addr} -j DROP -v",
+        f"iptables -A OUTPUT -d {node_x.addr} -j DROP -v",
+    ]
+
+
+def test_netns_more_zones_latency_debug(five_zone_cluster):
+    """
+    Qdiscs are created for each distinct latency from the current zone only,
+    no matter how many zone pairs have a specific latency.
+    """
+    node_d = five_zone_cluster.get_nodes("d")[0]
+    latspec = ["-l", "ab=50", "-l", "ad=20", "-l", "bd=20", "-l", "cd=30", "-l", "de=5"]
+    out = five_zone_cluster.run_script(node_d, "network-latency.sh", ["-d"] + latspec + ["5"]).stdout.decode()
+    # root qdisc, the default latency (the same as de=5), 20 ms and 30 ms
+    qdiscs = [line for line in out.splitlines() if line.startswith("tc qdisc add")]
+    assert len(qdiscs) == 4
+    assert "tc qdisc add dev eth0 root handle 1: prio bands 6" in qdiscs
+    assert "50ms" not in out
+    filters = [line for line in out.splitlines() if line.startswith("tc filter add")]
+    assert len(filters) == len(five_zone_cluster.get_nodes()) - len(five_zone_cluster.get_nodes("d"))
+    # latency to zone e is the default one
+    for node in five_zone_cluster.get_nodes("e"):
+        assert f"tc filter add dev eth0 parent 1: protocol ip prio 1 u32 match ip dst {node.addr}/32 flowid 1:4" \
+            in filters
+
+
+def test_netns_more_zones_latency_classes_debug(five_zone_cluster):
+    """
+    Class handles of many latency values are hex numbers, and latency
+    values beyond capacity of prio qdisc are rejected.
+    """
+    node_a = five_zone_cluster.get_nodes("a")[0]
+    zones = zone.CLUSTER_ZONES[1:14]
+    latspec = []
+    for i, z in enumerate(zones[:12]):
+        latspec += ["-l", f"a{z}={10 + i}"]
+    out = five_zone_cluster.run_script(node_a, "network-latency.sh", ["-d"] + latspec + ["5"]).stdout.decode()
+    assert "tc qdisc add dev eth0 root handle 1: prio bands 16" in out
+    assert "tc qdisc add dev eth0 parent 1:10 handle 100: netem delay " in out
+    script_path = os.path.join(node_a.etc_dir, "network-latency.sh")
+    comp_proc = five_zone_cluster.run(
+        node_a, ["bash", script_path, "-d"] + latspec + ["-l", f"a{zones[12]}=40", "5"], check=False)
+    assert comp_proc.returncode == 1
+    assert "too many distinct latency values" in comp_proc.stderr.decode()
+
+
+def test_netns_latency(small_cluster):
+    """
+    Latency script adds given delay to traffic between zones only.
+    """
+    skip_if_missing(latency=True)
+    small_cluster.run_script_all("network-latency.sh", ["20"])
+    node_b1, node_b2 = small_cluster.get_nodes("b")
+    node_c = small_cluster.get_nodes("c")[0]
+    assert min(small_cluster.measure_rtt(node_b1, node_c, count=3)) >= 0.040
+    assert max(small_cluster.measure_rtt(node_b1, node_b2, count=3)) < 0.020
+
+
+def test_netns_latency_profile(small_cluster):
+    """
+    Latency profile changes delay between zones in place.
+    """
+    skip_if_missing(latency=True)
+    start_ts = int(time.time())
+    small_cluster.run_script_all(
+        "network-latency.sh", ["profile", str(start_ts), "0:5:bc=20", "2:5:bc=60"])
+    node_b = small_cluster.get_nodes("b")[0]
+    node_c = small_cluster.get_nodes("c")[0]
+    node_a = small_cluster.get_nodes("a")[0]
+    # the profile command waits for all steps
+    assert time.time() >= start_ts + 2
+    assert min(small_cluster.measure_rtt(node_b, node_c, count=3)) >= 0.120
+    assert max(small_cluster.measure_rtt(node_a, node_b, count=3)) < 0.020
+    comp_proc = small_cluster.run(node_b, ["tc", "qdisc", "show"])
+    assert comp_proc.stdout.decode().count("netem") == 2
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("node_num", CLUSTER_SIZES)
+def test_benchmark_netns_split(node_num, bench_report):
+    """
+    Measure onset and teardown time, rule count and per packet overhead of
+    network split ``ab-ac`` (isolating zone ``a``).
+    """
+    skip_if_missing(split=True)
+    with NetnsCluster(zone_sizes(node_num)) as cluster:
+        node_a = cluster.get_nodes("a")[0]
+        # packets between two nodes of the isolated zone traverse all rules
+        if len(cluster.get_nodes("a")) > 1:
+            peer = cluster.get_nodes("a")[1]
+        else:
+            peer = node_a
+        rtt_before = statistics.median(cluster.measure_rtt(node_a, peer, count=200))
+        onset = cluster.run_script_all("network-split.sh", ["setup", "ab-ac"])
+        rules = [cluster.count_drop_rules(node) for node in cluster.get_nodes("a")]
+        rtt_during = statistics.median(cluster.measure_rtt(node_a, peer, count=200))
+        teardown = cluster.run_script_all("network-split.sh", ["teardown", "ab-ac"])
+    bench_report(
+        "netns split ab-ac",
+        nodes=node_num,
+        onset_s=round(max(onset.values()), 3),
+        teardown_s=round(max(teardown.values()), 3),
+        rules_per_node=max(rules),
+        rules_total=sum(rules),
+        overhead_us=round((rtt_during - rtt_before) * 10**6, 1))
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("node_num", CLUSTER_SIZES)
+def test_benchmark_netns_latency(node_num, bench_report):
+    """
+    Measure setup time and achieved RTT of 10ms default latency.
+    """
+    skip_if_missing(latency=True)
+    with NetnsCluster(zone_sizes(node_num)) as cluster:
+        onset = cluster.run_script_all("network-latency.sh", ["10"])
+        rtt = cluster.measure_rtt(cluster.get_nodes("b")[0], cluster.get_nodes("c")[0], count=50)
+        teardown = cluster.run_script_all("network-latency.sh", ["teardown"])
+    bench_report(
+        "netns latency 10ms",
+        nodes=node_num,
+        onset_s=round(max(onset.values()), 3),
+        teardown_s=round(max(teardown.values()), 3),
+        rtt_ms=round(statistics.median(rtt) * 1000, 2))
@@ -0,0 +1,139 @@
+# -*- coding: utf8 -*-
+
+import http.server
+import socket
+import threading
+import time
+
+import pytest
+
+from ocpnetsplit import probe
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """
+    HTTP stand-in of a workload, which responds with 503 when it's server
+    is marked as unavailable.
+    """
+
+    def do_GET(self):
+        if self.server.available:
+            self.send_response(200)
+        else:
+            self.send_response(503)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.available = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get_closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_parse_probe():
+    assert isinstance(probe.parse_probe("http://localhost:8080/health"), probe.HttpProbe)
+    tcp_probe = probe.parse_probe("tcp:198.51.100.7:6443", timeout=0.5)
+    assert (tcp_probe.host, tcp_probe.port, tcp_probe.timeout) == ("198.51.100.7", 6443, 0.5)
+    cmd_probe = probe.parse_probe("cmd:oc get nodes")
+    assert cmd_probe.cmd_list == ["oc", "get", "nodes"]
+    assert cmd_probe.name == "cmd:oc get nodes"
+    for spec in ("ftp://localhost", "tcp:localhost", "tcp::80", "cmd:", "foo"):
+        with pytest.raises(ValueError):
+            probe.parse_probe(spec)
+
+
+def test_probe_abstract():
+    with pytest.raises(TypeError):
+        probe.Probe("base")
+
+
+def test_http_probe(stand_in):
+    http_probe = probe.HttpProbe(f"http://127.0.0.1:{stand_in.server_port}/")
+    assert http_probe.check()
+    stand_in.available = False
+    assert not http_probe.check()
+    assert not probe.HttpProbe(f"http://127.0.0.1:{get_closed_port()}/").check()
+
+
+def test_tcp_probe(stand_in):
+    assert probe.TcpProbe("127.0.0.1", stand_in.server_port).check()
+    assert not probe.TcpProbe("127.0.0.1", get_closed_port()).check()
+
+
+def test_command_probe():
+    assert probe.CommandProbe(["true"]).check()
+    assert not probe.CommandProbe(["false"]).check()
+    assert not probe.CommandProbe(["sleep", "1"], timeout=0.1).check()
+    assert not probe.CommandProbe(["/nonexistent/command"]).check()
+
+
+def test_timeline():
+    timeline = probe.Timeline()
+    for ts, result in ((98, 1), (99, 1), (101, 1), (102, 0), (103, 0), (110, 0), (111, 0), (112, 1), (113, 1)):
+        timeline.add(ts, result)
+    assert len(timeline) == 9
+    assert timeline.get_transitions() == [(98, True), (102, False), (112, True)]
+    assert timeline.get_time_to_detect(100) == 2
+    assert timeline.get_time_to_recover(110) == 2
+    assert timeline.get_availability(100, 110) == pytest.approx(1 / 3)
+    assert timeline.get_availability(200, 210) is None
+    # the probe didn't recover
+    timeline.add(114, 0)
+    assert timeline.get_time_to_recover(110) is None
+
+
+def test_timeline_no_failure():
+    timeline = probe.Timeline()
+    timeline.add(99, True)
+    timeline.add(101, True)
+    assert timeline.get_time_to_detect(100) is None
+    assert timeline.get_time_to_recover(100) == 0
+
+
+def test_run_probes(stand_in):
+    """
+    Outage of the stand-in workload is detected and recovery is reported
+    relative to the outage start and stop.
+    """
+    probes = [
+        probe.HttpProbe(f"http://127.0.0.1:{stand_in.server_port}/", timeout=0.5),
+        probe.TcpProbe("127.0.0.1", stand_in.server_port),
+    ]
+    start_ts = time.time() + 0.3
+    stop_ts = start_ts + 0.4
+
+    def outage():
+        time.sleep(max(0, start_ts - time.time()))
+        stand_in.available = False
+        time.sleep(max(0, stop_ts - time.time()))
+        stand_in.available = True
+
+    outage_thread = threading.Thread(target=outage)
+    outage_thread.start()
+    results = probe.run_probes(probes, stop_ts + 0.3, interval=0.02)
+    outage_thread.join()
+    http_report = results[0].to_dict(start_ts, stop_ts)
+    assert http_report["checks"] > 20
+    assert http_report["availability_before"] == 1.0
+    assert http_report["availability_during"] < 0.5
+    assert 0 <= http_report["time_to_detect"] < 0.2
+    assert 0 <= http_report["time_to_recover"] < 0.2
+    assert [t[1] for t in http_report["transitions"]] == [True, False, True]
+    # tcp connection doesn't depend on http status code
+    tcp_report = results[1].to_dict(start_ts, stop_ts)
+    assert tcp_report["time_to_detect"] is None
+    assert tcp_report["availability_during"] == 1.0
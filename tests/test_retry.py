@@ -0,0 +1,159 @@
+# -*- coding: utf8 -*-
+
+import random
+import subprocess
+import threading
+import time
+
+import pytest
+
+from ocpnetsplit import retry
+
+
+def test_percentile():
+    assert retry.percentile([], 0.95) is None
+    assert retry.percentile([3], 0.5) == 3
+    assert retry.percentile([4, 1, 3, 2], 0.5) == 2
+    assert retry.percentile(range(1, 21), 0.95) == 19
+
+
+def test_latency_tracker_percentile():
+    tracker = retry.LatencyTracker(min_samples=5)
+    for duration in range(1, 5):
+        tracker.record(duration)
+    assert tracker.percentile(0.95) is None
+    for duration in range(5, 21):
+        tracker.record(duration)
+    assert tracker.percentile(0.95) == 19
+    assert tracker.percentile(0.5) == 10
+    assert tracker.percentile(1.0) == 20
+
+
+def test_backoff():
+    policy = retry.RetryPolicy(base_delay=1.0, max_delay=5.0)
+    rng = random.Random(42)
+    for attempt in range(6):
+        delays = [policy.backoff(attempt, rng) for _ in range(100)]
+        assert 0 <= min(delays)
+        assert max(delays) <= min(5.0, 2**attempt)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"attempts": 0},
+    {"base_delay": -1},
+    {"base_delay": 10, "max_delay": 5},
+    {"hedge_percentile": 0},
+])
+def test_retry_policy_invalid(kwargs):
+    with pytest.raises(ValueError):
+        retry.RetryPolicy(**kwargs)
+
+
+def test_get_timeout():
+    policy = retry.RetryPolicy(timeout=600)
+    assert policy.get_timeout() == 600
+    assert 9 < policy.get_timeout(time.time() + 10) <= 10
+    with pytest.raises(subprocess.TimeoutExpired):
+        policy.get_timeout(time.time() - 1)
+
+
+def test_call_retry():
+    """
+    Failed attempts are retried with backoff delay.
+    """
+    attempts = []
+    delays = []
+
+    def func(timeout):
+        attempts.append(timeout)
+        if len(attempts) < 3:
+            raise subprocess.CalledProcessError(1, ["oc"])
+        return "ok"
+
+    policy = retry.RetryPolicy(attempts=3, base_delay=1.0)
+    assert retry.call(func, policy, sleep=delays.append) == "ok"
+    assert len(attempts) == 3
+    assert len(delays) == 2
+    assert delays[1] <= 2.0
+
+
+def test_call_retry_exhausted():
+    def func(timeout):
+        raise subprocess.CalledProcessError(1, ["oc"])
+
+    policy = retry.RetryPolicy(attempts=2)
+    with pytest.raises(subprocess.CalledProcessError):
+        retry.call(func, policy, sleep=lambda delay: None)
+
+
+def test_call_deadline():
+    """
+    Attempt timeout doesn't exceed the deadline, and there is no retry when
+    the backoff delay would pass the deadline.
+    """
+    timeouts = []
+
+    def func(timeout):
+        timeouts.append(timeout)
+        raise subprocess.TimeoutExpired(["oc"], timeout)
+
+    policy = retry.RetryPolicy(attempts=5, base_delay=10.0, max_delay=10.0)
+    rng_state = random.getstate()
+    random.seed(0)
+    try:
+        with pytest.raises(subprocess.TimeoutExpired):
+            retry.call(func, policy, deadline=time.time() + 0.5, sleep=lambda delay: None)
+    finally:
+        random.setstate(rng_state)
+    assert len(timeouts) == 1
+    assert timeouts[0] <= 0.5
+
+
+def test_call_hedged():
+    """
+    Attempt slower than 95th percentile of other operations is hedged, and
+    the faster result is used.
+    """
+    tracker = retry.LatencyTracker(min_samples=5)
+    for _ in range(10):
+        tracker.record(0.05)
+    calls = []
+    lock = threading.Lock()
+
+    def func(timeout):
+        with lock:
+            calls.append(timeout)
+            call_idx = len(calls)
+        if call_idx == 1:
+            time.sleep(1.0)
+            return "slow"
+        return "fast"
+
+    policy = retry.RetryPolicy(hedge=True)
+    start = time.monotonic()
+    assert retry.call(func, policy, tracker=tracker) == "fast"
+    assert time.monotonic() - start < 0.5
+    assert len(calls) == 2
+
+
+def test_call_hedged_failure():
+    """
+    When the hedged attempt fails, result of the original one is used.
+    """
+    tracker = retry.LatencyTracker(min_samples=1)
+    tracker.record(0.01)
+    calls = []
+    lock = threading.Lock()
+
+    def func(timeout):
+        with lock:
+            calls.append(timeout)
+            call_idx = len(calls)
+        if call_idx == 1:
+            time.sleep(0.1)
+            return "slow"
+        raise subprocess.CalledProcessError(1, ["oc"])
+
+    policy = retry.RetryPolicy(attempts=1, hedge=True)
+    assert retry.call(func, policy, tracker=tracker) == "slow"
+    assert len(calls) == 2
@@ -0,0 +1,167 @@
+# -*- coding: utf8 -*-
+
+import pytest
+import yaml
+
+from ocpnetsplit import main
+from ocpnetsplit import rollout
+
+
+def pool_dict(name, target, current=None, count=3, updated=0, max_unavailable=None, degraded=None):
+    current = current or target
+    spec = {"configuration": {"name": target}}
+    if max_unavailable is not None:
+        spec["maxUnavailable"] = max_unavailable
+    conditions = [
+        {"type": "Updated", "status": "True" if current == target and updated == count else "False"},
+        {"type": "Degraded", "status": "False" if degraded is None else "True", "message": degraded or ""},
+    ]
+    return {
+        "metadata": {"name": name},
+        "spec": spec,
+        "status": {
+            "configuration": {"name": current},
+            "machineCount": count,
+            "updatedMachineCount": updated,
+            "conditions": conditions,
+        },
+    }
+
+
+def node_dict(name, roles, current, desired=None, state="Done"):
+    return {
+        "metadata": {
+            "name": name,
+            "labels": {"node-role.kubernetes.io/" + role: "" for role in roles},
+            "annotations": {
+                "machineconfiguration.openshift.io/currentConfig": current,
+                "machineconfiguration.openshift.io/desiredConfig": desired or current,
+                "machineconfiguration.openshift.io/state": state,
+            },
+        },
+    }
+
+
+def test_get_changed_pools():
+    mc = main.get_networksplit_mc_spec("ZONE_A=\"198.51.100.1\"\n", split=True)
+    actions = {
+        "machineconfig.machineconfiguration.openshift.io/95-master-network-zone-config": "unchanged",
+        "machineconfig.machineconfiguration.openshift.io/99-master-network-split": "unchanged",
+        "machineconfig.machineconfiguration.openshift.io/95-worker-network-zone-config": "configured",
+        "machineconfig.machineconfiguration.openshift.io/99-worker-network-split": "unchanged",
+    }
+    assert rollout.get_changed_pools(mc, actions) == ["worker"]
+    actions = {name: "created" for name in actions}
+    assert rollout.get_changed_pools(mc, actions) == ["master", "worker"]
+
+
+@pytest.mark.parametrize("value,count,expected", [
+    (None, 3, 1),
+    (2, 3, 2),
+    (0, 3, 1),
+    ("10%", 30, 3),
+    ("10%", 5, 1),
+])
+def test_parse_max_unavailable(value, count, expected):
+    assert rollout.parse_max_unavailable(value, count) == expected
+
+
+def test_node_pool():
+    get_pool = rollout.RolloutTracker({"worker": "w", "infra": "i"})._get_node_pool
+    assert get_pool(node_dict("n", ["master", "worker"], "c")) == "master"
+    assert get_pool(node_dict("n", ["worker", "infra"], "c")) == "infra"
+    # role without a tracked pool of its own
+    assert get_pool(node_dict("n", ["worker", "gpu"], "c")) == "worker"
+    assert get_pool(node_dict("n", ["gpu", "infra", "worker"], "c")) == "infra"
+    assert get_pool(node_dict("n", ["worker"], "c")) == "worker"
+    assert get_pool(node_dict("n", [], "c")) is None
+
+
+def test_tracker_rollout():
+    """
+    Progress and ETA of a rollout of worker pool, updating one node at a
+    time.
+    """
+    tracker = rollout.RolloutTracker({"worker": "rendered-worker-0"})
+    nodes = ["compute-0", "compute-1", "compute-2"]
+    # initial state, new config is not rendered yet
+    assert tracker.handle_pool("ADDED", pool_dict("worker", "rendered-worker-0", updated=3))
+    for node in nodes:
+        assert not tracker.handle_node("ADDED", node_dict(node, ["worker"], "rendered-worker-0"), 0)
+    # master pool and nodes are not tracked
+    assert not tracker.handle_pool("ADDED", pool_dict("master", "rendered-master-0"))
+    assert not tracker.handle_node("ADDED", node_dict("master-0", ["master"], "rendered-master-0"), 0)
+    assert not tracker.done
+    assert tracker.eta(0) is None
+    # rollout starts
+    tracker.handle_pool("MODIFIED", pool_dict("worker", "rendered-worker-1", "rendered-worker-0"))
+    assert tracker.handle_node(
+        "MODIFIED", node_dict("compute-0", ["worker"], "rendered-worker-0", "rendered-worker-1"), 10)
+    assert not tracker.handle_node(
+        "MODIFIED",
+        node_dict("compute-0", ["worker"], "rendered-worker-0", "rendered-worker-1", "Working"), 20)
+    assert tracker.eta(20) is None
+    assert tracker.handle_node("MODIFIED", node_dict("compute-0", ["worker"], "rendered-worker-1"), 310)
+    assert tracker.nodes["compute-0"].duration == 300
+    tracker.handle_pool("MODIFIED", pool_dict("worker", "rendered-worker-1", "rendered-worker-0", updated=1))
+    # 2 nodes left, one at a time
+    assert tracker.eta(310) == 600
+    tracker.handle_node(
+        "MODIFIED", node_dict("compute-1", ["worker"], "rendered-worker-0", "rendered-worker-1"), 320)
+    assert tracker.eta(420) == 200 + 300
+    tracker.handle_node("MODIFIED", node_dict("compute-1", ["worker"], "rendered-worker-1"), 520)
+    tracker.handle_node(
+        "MODIFIED", node_dict("compute-2", ["worker"], "rendered-worker-0", "rendered-worker-1"), 530)
+    tracker.handle_node("MODIFIED", node_dict("compute-2", ["worker"], "rendered-worker-1"), 730)
+    assert tracker.node_duration() == 200
+    assert not tracker.done
+    tracker.handle_pool("MODIFIED", pool_dict("worker", "rendered-worker-1", updated=3))
+    assert tracker.done
+    assert tracker.eta(730) == 0
+    report = tracker.to_dict()
+    assert report["done"]
+    assert [n["duration"] for n in report["nodes"]] == [300, 200, 200]
+
+
+def test_tracker_eta_parallel():
+    """
+    ETA takes maxUnavailable of the pool into account.
+    """
+    tracker = rollout.RolloutTracker({"worker": "r0"})
+    tracker.handle_pool("ADDED", pool_dict("worker", "r1", "r0", count=7, max_unavailable=2))
+    tracker.handle_node("ADDED", node_dict("n0", ["worker"], "r0", "r1"), 0)
+    tracker.handle_node("ADDED", node_dict("n0", ["worker"], "r1"), 100)
+    tracker.handle_node("ADDED", node_dict("n1", ["worker"], "r0", "r1"), 100)
+    tracker.handle_node("ADDED", node_dict("n2", ["worker"], "r0", "r1"), 100)
+    # 2 running nodes with 50 s left, 4 waiting nodes in 2 waves
+    assert tracker.eta(150) == 50 + 2 * 100
+
+
+def test_tracker_degraded():
+    tracker = rollout.RolloutTracker({"worker": "r0"})
+    tracker.handle_pool("ADDED", pool_dict("worker", "r1", "r0", degraded="node compute-1 is reporting: failed"))
+    assert tracker.degraded == {"worker": "node compute-1 is reporting: failed"}
+    assert not tracker.done
+
+
+def test_fake_rollout(fake_cluster):
+    """
+    Changed MachineConfig objects are rolled out, and maxUnavailable of
+    worker pool is restored afterwards.
+    """
+    cluster = fake_cluster(6)
+    mc = main.get_networksplit_mc_spec('ZONE_A="10.128.0.0"\n', split=True)
+    mc_yaml = yaml.dump_all(mc)
+    tracker = rollout.run_rollout(mc, mc_yaml, max_unavailable=2, timeout=30)
+    assert tracker.done
+    assert sorted(tracker.pools) == ["master", "worker"]
+    patches = [call["args"] for call in cluster.get_calls("oc", "patch")]
+    # master pool is not changed
+    assert patches == [
+        ["patch", "machineconfigpool/worker", "--type", "merge", "-p", '{"spec": {"maxUnavailable": 2}}'],
+        ["patch", "machineconfigpool/worker", "--type", "merge", "-p", '{"spec": {"maxUnavailable": null}}'],
+    ]
+    # applied again, nothing changed
+    tracker = rollout.run_rollout(mc, mc_yaml, timeout=30)
+    assert tracker.pools == {}
+    assert tracker.done
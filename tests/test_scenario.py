@@ -0,0 +1,194 @@
+# -*- coding: utf8 -*-
+
+import shlex
+import textwrap
+
+import pytest
+
+from ocpnetsplit import scenario
+
+
+SCENARIO_YAML = textwrap.dedent(
+    """
+    steps:
+      - split: ab
+        at: 0
+        length: 5
+      - latency: 50
+        latency_spec:
+          ab: 100
+        at: 3
+        length: 10
+      - split: ab-bc
+        at: 30
+        length: 5
+    """)
+
+
+def test_scenario_load_yaml():
+    scen = scenario.Scenario()
+    scen.load_yaml(SCENARIO_YAML)
+    assert [step.at for step in scen.steps] == [0, 3, 30]
+    assert scen.steps[1].get_latency_args() == ["-l", "ab=100", "50"]
+    assert scen.get_length() == 35
+    units = [timer.unit for timer in scen.get_timers(1617978600)]
+    assert units == [
+        "network-split-ab-setup@1617978600.timer",
+        "network-split-teardown@1617978900.timer",
+        "network-latency-setup-1617978780.timer",
+        "network-latency-teardown-1617979380.timer",
+        "network-split-ab-bc-setup@1617980400.timer",
+        "network-split-teardown@1617980700.timer",
+    ]
+
+
+def test_scenario_node_cmd_split_only():
+    scen = scenario.Scenario()
+    scen.load_dict({"steps": [{"split": "bc", "at": 5, "length": 1}]})
+    assert scen.get_node_cmd(1617978600) == [
+        "systemctl",
+        "start",
+        "network-split-bc-setup@1617978900.timer",
+        "network-split-teardown@1617978960.timer",
+    ]
+
+
+def split_script(script):
+    """
+    Split node script into commands, taking only systemd-run command from
+    idempotent snippets created by arm_transient_cmd.
+    """
+    cmds = []
+    for snippet in script.split(" && "):
+        if snippet.startswith("{ "):
+            snippet = snippet[2:-3].split(" || ")[1]
+        cmds.append(shlex.split(snippet))
+    return cmds
+
+
+def test_scenario_node_cmd():
+    scen = scenario.Scenario()
+    scen.load_yaml(SCENARIO_YAML)
+    cmd = scen.get_node_cmd(1617978600)
+    assert cmd[:2] == ["sh", "-c"]
+    cmds = split_script(cmd[2])
+    assert len(cmds) == 3
+    assert cmds[0][:2] == ["systemctl", "start"]
+    assert len(cmds[0]) == 2 + 4
+    assert cmds[1] == [
+        "systemd-run",
+        "--on-calendar=@1617978780",
+        "--unit=network-latency-setup-1617978780",
+        "--property=EnvironmentFile=/etc/network-split.env",
+        "/etc/network-latency.sh", "-l", "ab=100", "50",
+    ]
+    assert cmds[2][-2:] == ["/etc/network-latency.sh", "teardown"]
+
+
+def test_scenario_node_cmd_transient_split():
+    """
+    Split without timer unit deployed via MachineConfig is scheduled via
+    transient timers.
+    """
+    scen = scenario.Scenario()
+    scen.load_dict({"steps": [
+        {"split": "ab", "at": 0, "length": 5},
+        {"split": "xb-ca", "at": 10, "length": 5},
+    ]})
+    assert scen.steps[1].split == "ac-bx"
+    units = [timer.unit for timer in scen.get_timers(1617978600)]
+    assert units[2:] == [
+        "network-split-ac-bx-setup-1617979200.timer",
+        "network-split-teardown-1617979500.timer",
+    ]
+    cmd = scen.get_node_cmd(1617978600)
+    cmds = split_script(cmd[2])
+    assert cmds[0] == ["systemctl", "start"] + units[:2]
+    assert cmds[1][1:3] == ["--on-calendar=@1617979200", "--unit=network-split-ac-bx-setup-1617979200"]
+    assert cmds[1][-3:] == ["systemctl", "start", "network-split@ac-bx.service"]
+    assert cmds[2][-3:] == ["systemctl", "stop", "network-split@*.service"]
+
+
+def test_scenario_node_cmd_latency_profile():
+    """
+    Latency profile is applied by a single transient service, which is
+    stopped before the teardown.
+    """
+    scen = scenario.Scenario()
+    scen.load_yaml(textwrap.dedent(
+        """
+        steps:
+          - latency_profile:
+              - offset: 0
+                latency: 10
+              - offset: 60
+                latency: 40
+                latency_spec:
+                  ab: 100
+                ramp: true
+              - offset: 300
+                latency: 5
+            at: 1
+            length: 5
+        """))
+    assert scen.has_latency()
+    assert scen.get_length() == 6
+    cmds = split_script(scen.get_node_cmd(1617978600)[2])
+    assert len(cmds) == 2
+    assert cmds[0][1:3] == ["--on-calendar=@1617978660", "--unit=network-latency-setup-1617978660"]
+    steps = cmds[0][cmds[0].index("profile") + 1:]
+    assert steps[:3] == ["1617978660", "0:10:ab=10", "1:11:ab=12"]
+    assert steps[-1] == "60:40:ab=100"
+    # the last point is at the end of the step
+    assert "300:5:ab=5" not in steps
+    assert cmds[1][-3:-1] == ["sh", "-c"]
+    assert cmds[1][-1] == (
+        "systemctl stop network-latency-setup-1617978660.service; /etc/network-latency.sh teardown")
+
+
+def test_arm_transient_cmd():
+    """
+    Transient timer is created only when it's not active already.
+    """
+    cmd = ["systemd-run", "--on-calendar=@1617979200", "--unit=network-split-teardown-1617979200", "true"]
+    check = "systemctl is-active --quiet network-split-teardown-1617979200.timer"
+    assert scenario.arm_transient_cmd(cmd) == (
+        f"{{ {check} || systemd-run --on-calendar=@1617979200 "
+        f"--unit=network-split-teardown-1617979200 true || {check}; }}")
+
+
+@pytest.mark.parametrize("scenario_d", [
+    None,
+    {"steps": []},
+    {"steps": ["ab"]},
+    {"steps": [{"split": "a1", "at": 0, "length": 5}]},
+    {"steps": [{"split": "aa", "at": 0, "length": 5}]},
+    {"steps": [{"split": "ab", "at": 0}]},
+    {"steps": [{"split": "ab", "at": 0, "length": 0}]},
+    {"steps": [{"split": "ab", "at": -1, "length": 5}]},
+    {"steps": [{"split": "ab", "at": "0", "length": 5}]},
+    {"steps": [{"split": "ab", "at": 0, "length": 5, "latency": 10}]},
+    {"steps": [{"at": 0, "length": 5}]},
+    {"steps": [{"latency": 10, "at": 0, "latency_spec": {"a1": 10}}]},
+    # overlapping splits
+    {"steps": [{"split": "ab", "at": 0, "length": 5}, {"split": "bc", "at": 4, "length": 5}]},
+    # teardown of the first split would stop the second one
+    {"steps": [{"split": "ab", "at": 0, "length": 5}, {"split": "bc", "at": 5, "length": 5}]},
+    {"steps": [{"latency_profile": [{"offset": 5, "latency": 10}], "at": 0}]},
+    {"steps": [{"latency_profile": [{"offset": 0, "latency": 10}], "latency": 10, "at": 0}]},
+    # latency change without length lasts till the end
+    {"steps": [{"latency": 10, "at": 0}, {"latency": 20, "at": 5}]},
+])
+def test_scenario_invalid(scenario_d):
+    scen = scenario.Scenario()
+    with pytest.raises(ValueError):
+        scen.load_dict(scenario_d)
+
+
+def test_cancel_cmd():
+    assert scenario.cancel_cmd() == [
+        "systemctl", "stop", "network-split-*.timer", "network-split@*.service"]
+    cmd = scenario.cancel_cmd(["network-split-ab-setup@1617979200.timer", "network-split-teardown-1617979500.timer"])
+    assert cmd[:2] == ["sh", "-c"]
+    assert shlex.split(cmd[2].split(";")[0]) == [
+        "systemctl", "stop", "network-split-ab-setup@1617979200.timer", "network-split-teardown-1617979500.timer"]
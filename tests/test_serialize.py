@@ -0,0 +1,57 @@
+# -*- coding: utf8 -*-
+
+import json
+
+import pytest
+import yaml
+
+from ocpnetsplit import main
+from ocpnetsplit import serialize
+
+
+ZONE_ENV = 'ZONE_A="198.51.100.1"\nZONE_B="198.51.100.2"\nZONE_C="198.51.100.3"\n'
+
+
+def test_fast_yaml_classes():
+    # libyaml bindings are used when available
+    if yaml.__with_libyaml__:
+        assert serialize.SafeLoader is yaml.CSafeLoader
+        assert serialize.SafeDumper is yaml.CSafeDumper
+    else:
+        assert serialize.SafeLoader is yaml.SafeLoader
+        assert serialize.SafeDumper is yaml.SafeDumper
+
+
+def test_load_yaml_all():
+    assert serialize.load_yaml_all("---\na: 1\n---\n---\nb: [1, 2]\n") == [{"a": 1}, {"b": [1, 2]}]
+    assert serialize.load_yaml("mode: 0444\n") == {"mode": 0o444}
+
+
+@pytest.mark.parametrize("output_format", serialize.OUTPUT_FORMATS)
+def test_dump_objects_roundtrip(output_format):
+    mc = main.get_networksplit_mc_spec(ZONE_ENV, split=True, latency=5)
+    content = serialize.dump_objects(mc, output_format)
+    assert serialize.load_objects(content) == mc
+
+
+def test_dump_objects_yaml():
+    """
+    Yaml output is the same as the one of pure python yaml dumper.
+    """
+    mc = main.get_networksplit_mc_spec(ZONE_ENV, split=True)
+    content = serialize.dump_objects(mc)
+    assert list(yaml.safe_load_all(content)) == mc
+    assert content == yaml.dump_all(mc, Dumper=yaml.SafeDumper)
+
+
+def test_dump_objects_json():
+    mc = main.get_networksplit_mc_spec(ZONE_ENV, split=True)
+    obj_list = json.loads(serialize.dump_objects(mc, "json"))
+    assert obj_list["apiVersion"] == "v1"
+    assert obj_list["kind"] == "List"
+    assert obj_list["items"] == mc
+
+
+def test_dump_objects_invalid():
+    with pytest.raises(ValueError):
+        serialize.dump_objects([], "toml")
@@ -0,0 +1,72 @@
+# -*- coding: utf8 -*-
+
+from ocpnetsplit import status
+
+
+LIST_TIMERS_TEXT = (
+    "NEXT                         LEFT          LAST                         PASSED    "
+    "UNIT                                    ACTIVATES\n"
+    "Fri 2021-04-09 14:30:00 UTC  3min 50s left n/a                          n/a       "
+    "network-split-ab-setup@1617978600.timer network-split@ab.service\n"
+    "n/a                          n/a           Fri 2021-04-09 14:00:00 UTC  26min ago "
+    "network-split-ab-setup@1617976800.timer network-split@ab.service\n"
+    "\n"
+    "2 timers listed.\n"
+    "Pass --all to see loaded but inactive timers, too.\n"
+)
+
+
+LIST_TIMERS_JSON = (
+    '[{"next":1617978600000000,"left":1617978370000000,"last":null,"passed":null,'
+    '"unit":"network-split-ab-setup@1617978600.timer","activates":"network-split@ab.service"},'
+    '{"next":null,"left":null,"last":1617976800000000,"passed":1617976800000000,'
+    '"unit":"network-split-ab-setup@1617976800.timer","activates":"network-split@ab.service"}]'
+)
+
+
+def test_timer_instance_ts():
+    assert status.timer_instance_ts("network-split-ab-setup@1617978600.timer") == 1617978600
+    assert status.timer_instance_ts("network-split-teardown@1617978900.timer") == 1617978900
+    assert status.timer_instance_ts("logrotate.timer") is None
+    assert status.timer_instance_ts("foo@bar.timer") is None
+    assert status.timer_instance_ts("network-latency-setup-1617978600.timer") == 1617978600
+    assert status.timer_instance_ts("systemd-tmpfiles-clean.timer") is None
+
+
+def test_parse_list_timers_text():
+    timers = status.parse_list_timers(LIST_TIMERS_TEXT)
+    assert len(timers) == 2
+    assert timers[0].unit == "network-split-ab-setup@1617978600.timer"
+    assert timers[0].activates == "network-split@ab.service"
+    assert timers[0].next_elapse == 1617978600
+    assert timers[0].armed
+    assert timers[1].unit == "network-split-ab-setup@1617976800.timer"
+    assert not timers[1].armed
+
+
+def test_parse_list_timers_json():
+    """
+    Both json and table output of the same timers are parsed the same way.
+    """
+    timers_json = status.parse_list_timers(LIST_TIMERS_JSON)
+    timers_text = status.parse_list_timers(LIST_TIMERS_TEXT)
+    assert [t.to_dict() for t in timers_json] == [t.to_dict() for t in timers_text]
+
+
+def test_parse_list_timers_empty():
+    output = "NEXT LEFT LAST PASSED UNIT ACTIVATES\n\n0 timers listed.\n"
+    assert status.parse_list_timers(output) == []
+    assert status.parse_list_timers("[]") == []
+
+
+def test_node_status():
+    node_status = status.NodeStatus("compute-0", "b")
+    assert node_status.ok
+    assert node_status.next_elapse is None
+    node_status.timers = status.parse_list_timers(LIST_TIMERS_TEXT)
+    assert node_status.next_elapse == 1617978600
+    node_dict = node_status.to_dict()
+    assert node_dict["node"] == "compute-0"
+    assert node_dict["zone"] == "b"
+    assert node_dict["armed_timers"] == ["network-split-ab-setup@1617978600.timer"]
+    assert len(node_dict["timers"]) == 2
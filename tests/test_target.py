@@ -0,0 +1,67 @@
+# -*- coding: utf8 -*-
+
+import threading
+
+import pytest
+
+from ocpnetsplit import status
+from ocpnetsplit import target
+
+
+def test_target_get_kwargs():
+    tgt = target.Target("c1", ["n1"], kubeconfig="c1.kubeconfig")
+    assert tgt.get_kwargs() == {
+        "use_ssh": False,
+        "kubeconfig": "c1.kubeconfig",
+        "zone_config": None,
+        "node_limiter": None,
+    }
+
+
+def test_map_targets_cluster():
+    targets = [
+        target.Target("c1", ["n1", "n2"]),
+        target.Target("c2", ["n3"]),
+    ]
+    results = target.map_targets(
+        lambda tgt: [status.NodeStatus(node) for node in tgt.nodes], targets)
+    assert [(r.node, r.cluster) for r in results] == [
+        ("n1", "c1"), ("n2", "c1"), ("n3", "c2")]
+    assert results[0].to_dict()["cluster"] == "c1"
+
+
+def test_map_targets_concurrent():
+    """
+    Targets are processed concurrently, so that a target could wait for
+    another one.
+    """
+    barrier = threading.Barrier(2, timeout=5)
+
+    def func(tgt):
+        barrier.wait()
+        return []
+
+    targets = [target.Target("c1", []), target.Target("c2", [])]
+    assert target.map_targets(func, targets) == []
+
+
+def test_map_targets_error():
+    """
+    Error is raised only after all targets are done.
+    """
+    done = []
+
+    def func(tgt):
+        if tgt.name == "c1":
+            raise ValueError("c1 failed")
+        done.append(tgt.name)
+        return []
+
+    targets = [target.Target("c1", []), target.Target("c2", [])]
+    with pytest.raises(ValueError, match="c1 failed"):
+        target.map_targets(func, targets)
+    assert done == ["c2"]
+
+
+def test_map_targets_empty():
+    assert target.map_targets(lambda tgt: [], []) == []
@@ -19,12 +19,55 @@ def test_valid_zone_splits():
             assert split[1] in zone.ZONES
 
 
+def test_normalize_split():
+    for split_config in zone.NETWORK_SPLITS:
+        assert zone.normalize_split(split_config) == split_config
+    assert zone.normalize_split("ba") == "ab"
+    assert zone.normalize_split("xb-ca-ab") == "ab-ac-bx"
+    # external zone is always the second one, even after zones y and z
+    assert zone.normalize_split("xy") == "yx"
+    assert zone.normalize_split("zx-xy") == "yx-zx"
+    assert zone.normalize_split("ab-ba") == "ab"
+
+
+def test_parse_split_options():
+    zone_tuples, options = zone.parse_split("ba-ac:loss30:flap10:tcp443.80.443:icmp")
+    assert zone_tuples == ["ab", "ac"]
+    assert options == {"loss": 30, "flap": 10, "protocols": {"tcp": [80, 443], "icmp": []}, "keep": None}
+    assert zone.parse_split("ab")[1] == {"loss": None, "flap": None, "protocols": {}, "keep": None}
+    assert zone.parse_split("ab:keep")[1]["keep"] == list(zone.KEEP_PORTS)
+    assert zone.parse_split("ab:keep8443.22")[1]["keep"] == [22, 8443]
+
+
+def test_normalize_split_options():
+    assert zone.normalize_split("ba:udp:tcp443.80:loss05") == "ab:loss5:tcp80.443:udp"
+    assert zone.normalize_split("ab:flap30") == "ab:flap30"
+    assert zone.normalize_split("ab:keep10250.6443.22:tcp2379") == "ab:tcp2379:keep"
+    assert zone.normalize_split("ab:keep22") == "ab:keep22"
+
+
+@pytest.mark.parametrize("split_config", [
+    "ab:", "ab:loss", "ab:loss0", "ab:loss100", "ab:lossx", "ab:loss5:loss6",
+    "ab:flap0", "ab:flap3601", "ab:icmp80", "ab:tcp0", "ab:tcp70000", "ab:tcp80:tcp443",
+    "ab:tcp80..443", "ab:gre", "ab:keep:keep22", "ab:keep0", "ab:tcp" + ".".join(str(p) for p in range(1, 17)),
+])
+def test_normalize_split_invalid_options(split_config):
+    with pytest.raises(ValueError):
+        zone.normalize_split(split_config)
+
+
+@pytest.mark.parametrize("split_config", ["", "a", "aa", "abc", "a1", "ab--bc", "AB", None])
+def test_normalize_split_invalid(split_config):
+    with pytest.raises(ValueError):
+        zone.normalize_split(split_config)
+
+
 def test_zoneconfig_invalid_zone():
     """
     Check that when invalid zone name is used, add_node raises ValueError.
     """
     zc = zone.ZoneConfig()
-    invalid_zone = "d"
+    invalid_zone = "dc1"
     assert invalid_zone not in zone.ZONES
     with pytest.raises(ValueError):
         zc.add_node(invalid_zone, "192.128.0.11")
@@ -44,6 +87,15 @@ def test_zoneconfig_add_nodes():
     assert zc.get_nodes("b") == set(zone_b)
 
 
+def test_zoneconfig_get_zone():
+    zc = zone.ZoneConfig()
+    zc.add_node("a", "198.51.100.11")
+    zc.add_nodes("b", ["198.51.100.175", "198.51.100.180"])
+    assert zc.get_zone("198.51.100.180") == "b"
+    assert zc.get_zone("198.51.100.11") == "a"
+    assert zc.get_zone("198.51.100.12") is None
+
+
 def test_zoneconfig_env_file():
     zc = zone.ZoneConfig()
     zc.add_node("a", "198.51.100.11")
@@ -57,6 +109,46 @@ def test_zoneconfig_env_file():
     """
     )
     assert zc.get_env_file() == expected_content
+    # cached env file is generated again when a node is added
+    zc.add_node("c", "198.51.100.100")
+    assert 'ZONE_C="198.51.100.100 198.51.100.115' in zc.get_env_file()
+
+
+def test_zoneconfig_load_env_file():
+    zc = zone.ZoneConfig()
+    zc.add_node("a", "198.51.100.11")
+    zc.add_nodes("b", ["198.51.100.175", "198.51.100.180"])
+    zc_loaded = zone.ZoneConfig()
+    zc_loaded.load_env_file("# zone config\n" + zc.get_env_file())
+    assert zc_loaded.get_env_file() == zc.get_env_file()
+    with pytest.raises(ValueError):
+        zc_loaded.load_env_file("FOO=bar\n")
+    with pytest.raises(ValueError):
+        zc_loaded.load_env_file('ZONE_DC1="198.51.100.1"\n')
+
+
+def test_zoneconfig_diff():
+    old_zc = zone.ZoneConfig()
+    old_zc.add_node("a", "198.51.100.11")
+    old_zc.add_nodes("b", ["198.51.100.175", "198.51.100.180"])
+    new_zc = zone.ZoneConfig()
+    new_zc.add_node("a", "198.51.100.11")
+    new_zc.add_nodes("b", ["198.51.100.175", "198.51.100.188"])
+    new_zc.add_nodes("c", ["198.51.100.180"])
+    zc_diff = new_zc.diff(old_zc)
+    assert not zc_diff.is_empty()
+    assert zc_diff.get_added("b") == {"198.51.100.188"}
+    assert zc_diff.get_removed("b") == {"198.51.100.180"}
+    assert zc_diff.get_added("a") == set()
+    assert zc_diff.get_moved_nodes() == {"198.51.100.180": ("b", "c")}
+    # additions go first
+    assert zc_diff.get_cli_args() == "b+=198.51.100.188 c+=198.51.100.180 b-=198.51.100.180"
+    assert zc_diff.to_dict() == {
+        "added": {"b": ["198.51.100.188"], "c": ["198.51.100.180"]},
+        "removed": {"b": ["198.51.100.180"]},
+    }
+    assert new_zc.diff(new_zc).is_empty()
+    assert new_zc.diff(new_zc).get_cli_args() == ""
 
 
 def test_zonelatspec_null():
@@ -66,7 +158,7 @@ def test_zonelatspec_null():
 
 def test_zonelatspec_invalid():
     with pytest.raises(ValueError):
-        zone.ZoneLatSpec(ab=7,ah=11)
+        zone.ZoneLatSpec(ab=7,a1=11)
     with pytest.raises(ValueError):
         zone.ZoneLatSpec(ac=7,abc=5)
 
@@ -106,3 +198,130 @@ def test_zonelatspec_from_argparse():
     zls = zone.ZoneLatSpec()
     zls.load_arguments(args.l)
     assert zls.get_cli_args() == "-l ab=11 -l ac=7"
+
+
+def test_zonelatspec_get_latency():
+    zls = zone.ZoneLatSpec(ba=11, ac="7")
+    assert zls.get_zones() == ["ab", "ac"]
+    assert zls.get_latency("ab", 5) == 11
+    assert zls.get_latency("ca", 5) == 7
+    assert zls.get_latency("bc", 5) == 5
+
+
+def test_latency_profile_steps():
+    profile = zone.LatencyProfile()
+    profile.load_list([
+        {"offset": 0, "latency": 10},
+        {"offset": 60, "latency": 20, "latency_spec": {"ab": 50}},
+        {"offset": 120, "latency": 20},
+    ])
+    assert profile.get_zones() == ["ab"]
+    assert profile.get_latency(30) == (10, {"ab": 10})
+    assert profile.get_latency(60) == (20, {"ab": 50})
+    assert profile.get_cli_args() == ["0:10:ab=10", "60:20:ab=50", "120:20:ab=20"]
+    # changes after the end of the profile are dropped
+    assert profile.get_cli_args(length=120) == ["0:10:ab=10", "60:20:ab=50"]
+
+
+def test_latency_profile_ramp():
+    """
+    Ramp is sampled, and only samples which change the latency are kept.
+    """
+    profile = zone.LatencyProfile()
+    profile.load_list([
+        {"offset": 0, "latency": 10},
+        {"offset": 10, "latency": 10, "latency_spec": {"ac": 30}, "ramp": True},
+        {"offset": 40, "latency": 13, "ramp": True},
+    ])
+    assert profile.get_latency(5) == (10, {"ac": 20})
+    changes = profile.compile(resolution=2)
+    assert changes[:3] == [(0, 10, {"ac": 10}), (2, 10, {"ac": 14}), (4, 10, {"ac": 18})]
+    assert changes[5] == (10, 10, {"ac": 30})
+    # latency between a and c drops back with the default latency
+    assert changes[-1] == (40, 13, {"ac": 13})
+    assert len(changes) == 6 + 15
+    # default latency changes by 1 ms every 10 seconds only
+    profile = zone.LatencyProfile()
+    profile.load_list([{"offset": 0, "latency": 10}, {"offset": 30, "latency": 13, "ramp": True}])
+    assert profile.get_cli_args() == ["0:10", "5:11", "15:12", "25:13"]
+
+
+@pytest.mark.parametrize("points", [
+    None,
+    [],
+    ["10"],
+    [{"offset": 5, "latency": 10}],
+    [{"offset": 0, "latency": 10, "ramp": True}],
+    [{"offset": 0, "latency": -1}],
+    [{"offset": 0, "latency": 10, "jitter": 5}],
+    [{"offset": 0, "latency": 10}, {"offset": 0, "latency": 20}],
+    [{"offset": 0, "latency": 10}, {"offset": 5, "latency": 20, "ramp": "yes"}],
+    [{"offset": 0, "latency": 10, "latency_spec": {"a1": 10}}],
+])
+def test_latency_profile_invalid(points):
+    profile = zone.LatencyProfile()
+    with pytest.raises(ValueError):
+        profile.load_list(points)
+
+
+def test_latency_profile_max_pairs():
+    """
+    Each zone pair of a profile needs it's own netem qdisc, even when the
+    latency values are the same.
+    """
+    pairs = ["a" + z for z in zone.CLUSTER_ZONES[1:13]]
+    profile = zone.LatencyProfile()
+    profile.load_list([
+        {"offset": 0, "latency": 10, "latency_spec": {p: 20 for p in pairs}},
+        {"offset": 60, "latency": 10, "latency_spec": {"bc": 20}},
+    ])
+    with pytest.raises(ValueError):
+        profile.load_list([
+            {"offset": 0, "latency": 10, "latency_spec": {p: 20 for p in pairs}},
+            {"offset": 60, "latency": 10, "latency_spec": {"a" + zone.CLUSTER_ZONES[13]: 20}},
+        ])
+
+
+def test_zones():
+    assert zone.ZONES[:3] == ("a", "b", "c")
+    assert zone.ZONES[-1] == zone.EXTERNAL_ZONE
+    assert len(zone.CLUSTER_ZONES) == 25
+    assert zone.EXTERNAL_ZONE not in zone.CLUSTER_ZONES
+
+
+def test_normalize_split_more_zones():
+    assert zone.normalize_split("ea-dc:flap5") == "ae-cd:flap5"
+
+
+def test_parse_zone_labels():
+    assert zone.parse_zone_labels([]) == {}
+    assert zone.parse_zone_labels(["d=data-3", "e=data=4"]) == {"d": "data-3", "e": "data=4"}
+
+
+@pytest.mark.parametrize("zone_specs", [
+    ["d"],
+    ["d="],
+    ["a=arbiter"],
+    ["x=external"],
+    ["dc=data-3"],
+    ["d=data-3", "d=data-4"],
+])
+def test_parse_zone_labels_invalid(zone_specs):
+    with pytest.raises(ValueError):
+        zone.parse_zone_labels(zone_specs)
+
+
+def test_zonelatspec_latency_classes():
+    zls = zone.ZoneLatSpec(ab=10, ac=10, ad=20, be=10, de=30)
+    assert zls.get_latency_classes("a") == {10: ["b", "c"], 20: ["d"]}
+    assert zls.get_latency_classes("e") == {10: ["b"], 30: ["d"]}
+    assert zls.get_latency_classes("f") == {}
+    zls.validate_classes(5)
+
+
+def test_zonelatspec_validate_classes():
+    # zone a has 14 distinct latency values, including the default one
+    zls = zone.ZoneLatSpec(**{"a" + z: 10 + i for i, z in enumerate(zone.CLUSTER_ZONES[1:14])})
+    zls.validate_classes(10)
+    with pytest.raises(ValueError):
+        zls.validate_classes(5)